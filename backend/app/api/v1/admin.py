@@ -1105,6 +1105,144 @@ async def migrate_cerebrocortex(
         raise HTTPException(status_code=500, detail=f"Migration failed: {e}")
 
 
+@router.get("/cerebro/partitioning")
+async def cerebro_partitioning_status(
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Hash-partitioning layout and online migration progress of the CerebroCortex tables."""
+    from app.config import get_settings
+    from app.services.cerebro.partitioning import partition_status
+
+    return {
+        "target_partitions": get_settings().cerebro_partitions,
+        "tables": await partition_status(db),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Vault Content Index
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@router.post("/vault/reindex-content")
+async def reindex_vault_content(
+    admin: User = Depends(require_admin),
+    user_id: Optional[UUID] = Query(None, description="Reindex specific user, or all if omitted"),
+):
+    """Backfill the vault content index (file_chunks) for unindexed or stale files.
+
+    Idempotent - only files whose checksum isn't indexed yet are processed.
+    Uses isolated DB session since the backfill commits per file.
+    """
+    from app.database import get_db_context
+    from app.services.vault.content_index import backfill_content_index
+
+    try:
+        async with get_db_context() as db:
+            report = await backfill_content_index(db, user_id)
+        logger.info(f"Vault content reindex triggered by {admin.email}: {report}")
+        return {"status": "ok", "report": report}
+    except Exception as e:
+        logger.error(f"Vault content reindex failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reindex failed: {e}")
+
+
+@router.post("/vault/reindex-semantic")
+async def reindex_vault_semantic(
+    admin: User = Depends(require_admin),
+    user_id: Optional[UUID] = Query(None, description="Reindex specific user, or all if omitted"),
+):
+    """Backfill the vault semantic index (file_embeddings) for unembedded or stale files.
+
+    Idempotent - only files whose checksum isn't embedded yet are processed.
+    Uses isolated DB session since the backfill commits per file.
+    """
+    from app.database import get_db_context
+    from app.services.vault.semantic_index import backfill_semantic_index
+
+    try:
+        async with get_db_context() as db:
+            report = await backfill_semantic_index(db, user_id)
+        logger.info(f"Vault semantic reindex triggered by {admin.email}: {report}")
+        return {"status": "ok", "report": report}
+    except Exception as e:
+        logger.error(f"Vault semantic reindex failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reindex failed: {e}")
+
+
+@router.post("/vault/dedup")
+async def dedup_vault(
+    admin: User = Depends(require_admin),
+    user_id: Optional[UUID] = Query(None, description="Migrate specific user, or all if omitted"),
+):
+    """Move legacy per-file vault storage into the content-addressed blob store.
+
+    Identical files collapse onto one blob. Idempotent - already migrated
+    files are skipped. Returns the migration report and resulting storage stats.
+    """
+    from app.database import get_db_context
+    from app.services.vault.blobs import migrate_to_blobs, storage_report
+
+    try:
+        async with get_db_context() as db:
+            report = await migrate_to_blobs(db, user_id)
+            storage = await storage_report(db)
+        logger.info(f"Vault dedup triggered by {admin.email}: {report}")
+        return {"status": "ok", "report": report, "storage": storage}
+    except Exception as e:
+        logger.error(f"Vault dedup failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Dedup failed: {e}")
+
+
+@router.get("/vault/blobs")
+async def vault_blob_report(
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Blob store stats: logical vs physical bytes and space saved by dedup."""
+    from app.services.vault.blobs import storage_report
+
+    return await storage_report(db)
+
+
+@router.post("/vault/gc")
+async def vault_blob_gc(
+    admin: User = Depends(require_admin),
+):
+    """Delete unreferenced blobs and orphaned blob files."""
+    from app.database import get_db_context
+    from app.services.vault.blobs import collect_garbage, sweep_orphans
+
+    try:
+        async with get_db_context() as db:
+            report = await collect_garbage(db)
+            report.update(await sweep_orphans(db))
+        logger.info(f"Vault blob GC triggered by {admin.email}: {report}")
+        return {"status": "ok", "report": report}
+    except Exception as e:
+        logger.error(f"Vault blob GC failed: {e}")
+        raise HTTPException(status_code=500, detail=f"GC failed: {e}")
+
+
+@router.post("/vault/reconcile-usage")
+async def reconcile_vault_usage(
+    admin: User = Depends(require_admin),
+    user_id: Optional[UUID] = Query(None, description="Reconcile specific user, or all if omitted"),
+):
+    """Recompute storage usage counters from the files table and fix any drift."""
+    from app.database import get_db_context
+    from app.services.vault.usage import reconcile_usage
+
+    try:
+        async with get_db_context() as db:
+            report = await reconcile_usage(db, user_id)
+        logger.info(f"Vault usage reconcile triggered by {admin.email}: {report}")
+        return {"status": "ok", "report": report}
+    except Exception as e:
+        logger.error(f"Vault usage reconcile failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reconcile failed: {e}")
+
+
 @router.patch("/agora/posts/{post_id}")
 async def moderate_agora_post(
     post_id: UUID,
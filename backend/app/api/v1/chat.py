@@ -49,6 +49,7 @@ from app.services.tool_executor import create_tool_executor
 from app.tools import registry as tool_registry, ToolContext, ToolCategory
 from app.services.billing import BillingService
 from app.services.neural_memory import store_chat_memory
+from app.services.cerebro.episodes import record_chat_turn
 from app.config import get_settings, TIER_LIMITS
 
 settings = get_settings()
@@ -411,7 +412,8 @@ async def build_attachment_content(
         if not file_path.exists():
             continue
 
-        ext = file_path.suffix.lstrip('.').lower()
+        # Blob paths carry no extension - the file name does
+        ext = Path(vault_file.name).suffix.lstrip('.').lower()
 
         if ext in IMAGE_EXTENSIONS:
             # Image: base64 encode for vision
@@ -419,7 +421,7 @@ async def build_attachment_content(
                 text_context_parts.append(f"[Image '{vault_file.name}' skipped: exceeds 5MB limit]")
                 continue
 
-            media_type = mimetypes.guess_type(str(file_path))[0] or f"image/{ext}"
+            media_type = mimetypes.guess_type(vault_file.name)[0] or f"image/{ext}"
             with open(file_path, 'rb') as f:
                 image_data = base64.standard_b64encode(f.read()).decode('utf-8')
 
@@ -1315,7 +1317,7 @@ Work together to create something beautiful!
                 # Store chat exchange as neural memories (for Neo-Cortex visualization)
                 if final_response and len(final_response) > 10:
                     try:
-                        await store_chat_memory(
+                        memory_ids = await store_chat_memory(
                             db=db,
                             user_id=user.id,
                             user_message=request.message,
@@ -1323,6 +1325,10 @@ Work together to create something beautiful!
                             agent_id=request.agent,
                             conversation_id=conversation.id if conversation else None,
                         )
+                        await record_chat_turn(
+                            db, user.id, conversation.id if conversation else None, request.agent,
+                            request.message, **memory_ids,
+                        )
                         await db.commit()
                         logger.debug(f"Stored neural memory for agent {request.agent}")
                     except Exception as e:
@@ -1465,7 +1471,7 @@ Work together to create something beautiful!
             # Store chat exchange as neural memories (for Neo-Cortex visualization)
             if assistant_content and len(assistant_content) > 10:
                 try:
-                    await store_chat_memory(
+                    memory_ids = await store_chat_memory(
                         db=db,
                         user_id=user.id,
                         user_message=request.message,
@@ -1473,6 +1479,10 @@ Work together to create something beautiful!
                         agent_id=request.agent,
                         conversation_id=conversation.id if conversation else None,
                     )
+                    await record_chat_turn(
+                        db, user.id, conversation.id if conversation else None, request.agent,
+                        request.message, **memory_ids,
+                    )
                     await db.commit()
                     logger.debug(f"Stored neural memory for agent {request.agent}")
                 except Exception as e:
@@ -11,7 +11,8 @@ from datetime import datetime
 from typing import Optional, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import text
 
@@ -19,6 +20,7 @@ from app.auth.deps import get_current_user
 from app.config import get_settings
 from app.database import get_db
 from app.models.user import User
+from app.services.cerebro import transfer  # registers the cortex_import job runner
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/cortex", tags=["CerebroCortex"])
@@ -50,6 +52,8 @@ class MemoryNode(BaseModel):
     link_count: int = 0
     created_at: Optional[str] = None
     last_accessed_at: Optional[str] = None
+    strength: Optional[float] = None  # cached FSRS retrievability (graph view)
+    hop: Optional[int] = None  # link distance from the graph view's seeds
 
 
 class GraphEdge(BaseModel):
@@ -77,6 +81,8 @@ class CortexStats(BaseModel):
     links: int = 0
     link_types: Optional[dict] = None
     episodes: int = 0
+    dedup: Optional[dict] = None
+    drift: Optional[dict] = None  # only with ?verify=true: counter mismatches found (and repaired)
 
 
 class SearchRequest(BaseModel):
@@ -95,6 +101,12 @@ class LayerUpdateRequest(BaseModel):
     layer: str  # sensory | working | long_term | cortex
 
 
+class RecallWeightsRequest(BaseModel):
+    """Per-agent reciprocal rank fusion weights for hybrid recall."""
+    vector_weight: Optional[float] = Field(None, ge=0.0, le=10.0)
+    lexical_weight: Optional[float] = Field(None, ge=0.0, le=10.0)
+
+
 # =============================================================================
 # Endpoints
 # =============================================================================
@@ -231,22 +243,33 @@ async def get_graph_data(
     layer: Optional[str] = Query(None),
     visibility: Optional[str] = Query(None),
     limit: int = Query(200, le=1000),
+    seed: Optional[List[str]] = Query(None, description="Center the view on these memories"),
+    hops: int = Query(1, ge=0, le=3, description="Link distance from the seeds to include"),
+    min_weight: float = Query(0.0, ge=0.0, le=1.0),
+    content_chars: int = Query(500, ge=0, le=2000),
     user: User = Depends(get_current_user),
     db=Depends(get_db),
 ) -> GraphData:
-    """Get graph data with real associative links for 3D visualization."""
+    """Get graph data with real associative links for 3D visualization.
+
+    Nodes and edges come from one projected query (no embeddings, content
+    truncated). Without `seed` the view is the most recent memories; with
+    `seed` it is their `hops`-link neighborhood, nearest first.
+    """
     try:
         from app.services.cerebro.pg_graph_store import PgGraphStore
 
         store = PgGraphStore(db)
-        nodes = await store.get_memories(
-            user.id, limit=limit, layer=layer, visibility=visibility,
+        nodes, links = await store.graph_snapshot(
+            user.id,
+            seed_ids=seed,
+            hops=hops,
+            limit=limit,
+            layer=layer,
+            visibility=visibility,
+            min_weight=min_weight,
+            content_chars=content_chars,
         )
-        response_nodes = [_node_to_response(n) for n in nodes]
-
-        # Get real associative links between these nodes
-        node_ids = [n.id for n in nodes]
-        links = await store.get_links_for_graph(user.id, node_ids)
 
         edges = [
             GraphEdge(
@@ -258,7 +281,7 @@ async def get_graph_data(
             for link in links
         ]
 
-        return GraphData(nodes=response_nodes, edges=edges)
+        return GraphData(nodes=[_graph_row_to_response(n) for n in nodes], edges=edges)
     except Exception as e:
         logger.error(f"Cortex graph error: {e}")
         return GraphData(nodes=[], edges=[])
@@ -266,6 +289,7 @@ async def get_graph_data(
 
 @router.get("/stats", response_model=CortexStats)
 async def get_stats(
+    verify: bool = Query(False, description="Check the counters against a full recount first"),
     user: User = Depends(get_current_user),
     db=Depends(get_db),
 ) -> CortexStats:
@@ -274,7 +298,7 @@ async def get_stats(
         from app.services.cerebro import get_cerebro_service
 
         service = get_cerebro_service()
-        stats = await service.stats(db, user.id)
+        stats = await service.stats(db, user.id, verify=verify)
 
         return CortexStats(
             total=stats.get("nodes", 0),
@@ -286,6 +310,8 @@ async def get_stats(
             links=stats.get("links", 0),
             link_types=stats.get("link_types", {}),
             episodes=stats.get("episodes", 0),
+            dedup=stats.get("dedup"),
+            drift=stats.get("drift"),
         )
     except Exception as e:
         logger.error(f"Cortex stats error: {e}")
@@ -395,10 +421,187 @@ async def delete_memory(
     return {"success": True, "deleted": memory_id}
 
 
+@router.post("/dream")
+async def run_dream(
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Run a dream consolidation cycle now (replay, abstraction, pruning, REM links).
+
+    Each cycle may make up to DREAM_MAX_LLM_CALLS summary calls on the platform
+    key, so a user gets one every `cerebro_dream_manual_cooldown_hours` (429 otherwise).
+    """
+    from app.services.cerebro.dream import DreamEngine, DreamTooSoon
+
+    try:
+        report = await DreamEngine().run(db, user.id, min_interval_hours=get_settings().cerebro_dream_manual_cooldown_hours)
+    except DreamTooSoon as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return {**report.model_dump(mode="json"), "node_delta": report.node_delta}
+
+
+@router.get("/dream/log")
+async def get_dream_log(
+    limit: int = Query(40, le=200),
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Recent dream phases, newest first."""
+    result = await db.execute(
+        text("""
+            SELECT run_id, phase, started_at, completed_at, duration_ms, nodes_before, nodes_after,
+                   memories_processed, links_created, links_strengthened, memories_pruned,
+                   schemas_extracted, notes, success
+            FROM cerebro_dream_log
+            WHERE user_id = :user_id
+            ORDER BY started_at DESC
+            LIMIT :limit
+        """),
+        {"user_id": user.id, "limit": limit},
+    )
+    return {"entries": [
+        {
+            **dict(row),
+            "run_id": str(row["run_id"]) if row["run_id"] else None,
+            "started_at": row["started_at"].isoformat() if row["started_at"] else None,
+            "completed_at": row["completed_at"].isoformat() if row["completed_at"] else None,
+        }
+        for row in result.mappings().all()
+    ]}
+
+
+@router.put("/agents/{agent_id}/recall-weights")
+async def set_recall_weights(
+    agent_id: str,
+    request: RecallWeightsRequest,
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Set how an agent's recall weighs vector vs full-text rank (null = default)."""
+    from app.services.cerebro.pg_graph_store import PgGraphStore
+
+    await PgGraphStore(db).set_recall_weights(
+        user.id, agent_id, request.vector_weight, request.lexical_weight,
+    )
+    return {"agent_id": agent_id, "vector_weight": request.vector_weight, "lexical_weight": request.lexical_weight}
+
+
+@router.get("/episodes")
+async def list_episodes(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    agent_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    limit: int = Query(20, le=100),
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Episodes overlapping a time window, newest first, with their steps."""
+    from app.services.cerebro.episodes import episodes_between
+
+    episodes = await episodes_between(
+        db, user.id, since=since, until=until, agent_id=agent_id, session_id=session_id, limit=limit,
+    )
+    return {"episodes": episodes}
+
+
+@router.get("/export")
+async def export_cortex(
+    agent_id: Optional[str] = None,
+    memory_type: Optional[str] = None,
+    include_embeddings: bool = Query(False, description="Add base64 float32 embeddings"),
+    user: User = Depends(get_current_user),
+):
+    """Stream the user's memories and links as NDJSON (MemoryCore format 3.0)."""
+    filename = f"memory_core_{agent_id or 'all'}_{datetime.utcnow():%Y%m%d_%H%M%S}.ndjson"
+    return StreamingResponse(
+        transfer.export_ndjson(user.id, agent_id, memory_type, include_embeddings),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", status_code=202)
+async def import_cortex(
+    request: Request,
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Bulk-import an NDJSON MemoryCore upload; embedding and merge run as a job."""
+    try:
+        return await transfer.stage_import(db, user.id, transfer.iter_ndjson(request.stream()))
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/import/{import_id}")
+async def get_import_status(
+    import_id: UUID,
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Progress of a bulk import."""
+    status = await transfer.get_import(db, user.id, import_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return status
+
+
+@router.delete("/import/{import_id}")
+async def cancel_import(
+    import_id: UUID,
+    user: User = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Cancel a bulk import that has not merged yet; staged rows are dropped."""
+    from app.services.session_jobs import cancel_job
+
+    current = await transfer.get_import(db, user.id, import_id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    job = await cancel_job(db, transfer.IMPORT_JOB_KIND, import_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Import is not running")
+    if current["status"] != "running":
+        # Never claimed again, so the runner's finish hook won't clean up
+        await transfer.clear_staging(db, import_id)
+    await db.commit()
+    return {"import_id": str(import_id), "status": job["status"]}
+
+
 # =============================================================================
 # Helpers
 # =============================================================================
 
+def _graph_row_to_response(row: dict) -> MemoryNode:
+    """Convert a PgGraphStore.graph_snapshot node row to API response."""
+    return MemoryNode(
+        id=row["id"],
+        content=row["content"] or "",
+        agent_id=row["agent_id"] or "AZOTH",
+        visibility=row["visibility"],
+        layer=row["layer"],
+        message_type=row["memory_type"],
+        memory_type=row["memory_type"],
+        salience=row["salience"],
+        arousal=row["arousal"],
+        valence=row["valence"] or "neutral",
+        attention_weight=row["salience"],
+        access_count=row["access_count"],
+        tags=row["tags"] or [],
+        concepts=row["concepts"] or [],
+        responding_to=row["responding_to"] or [],
+        related_agents=row["related_agents"] or [],
+        conversation_thread=row["conversation_thread"],
+        link_count=row["link_count"],
+        created_at=row["created_at"].isoformat() if row["created_at"] else None,
+        last_accessed_at=row["last_accessed_at"].isoformat() if row["last_accessed_at"] else None,
+        strength=row["last_retrievability"],
+        hop=row["depth"],
+    )
+
+
 def _node_to_response(node) -> MemoryNode:
     """Convert CerebroCortex MemoryNode to API response."""
     from app.cerebro.types import EmotionalValence
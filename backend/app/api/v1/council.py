@@ -19,7 +19,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_db_context
 from app.models.user import User
 from app.models.council import (
     DeliberationSession, SessionAgent, DeliberationRound, SessionMessage
@@ -38,6 +38,21 @@ from app.services.tool_executor import create_tool_executor
 from app.config import get_settings
 from app.api.v1.chat import load_native_prompt, get_agent_prompt_with_memory  # Reuse prompt loading + memory
 from app.services.neural_memory import NeuralMemoryService
+from app.services.council_context import build_round_context
+from app.services.council_prep import prepare_round
+from app.services.convergence import measure_round
+from app.services.session_jobs import (
+    JobContext,
+    cancel_job,
+    close_subscription,
+    enqueue,
+    get_session_job,
+    open_subscription,
+    pause_job,
+    register_runner,
+    resume_job,
+    wake,
+)
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -46,43 +61,6 @@ router = APIRouter(prefix="/council", tags=["Council"])
 # Use Haiku for fast deliberation
 COUNCIL_MODEL = "claude-haiku-4-5-20251001"
 
-# Consensus detection phrases
-CONSENSUS_PHRASES = [
-    "we all agree",
-    "consensus reached",
-    "unanimous",
-    "we're aligned",
-    "we've reached agreement",
-    "common ground",
-    "we concur",
-    "agreement reached",
-    "shared conclusion",
-]
-
-
-def check_convergence(messages: list) -> float:
-    """
-    Check if agents are converging toward consensus.
-
-    Returns a score from 0.0 to 1.0:
-    - 0.0: No consensus indicators
-    - 1.0: All agents show consensus indicators
-
-    Simple keyword detection for now. Could be enhanced with
-    semantic similarity or LLM-based analysis.
-    """
-    if not messages:
-        return 0.0
-
-    agreement_count = 0
-    for msg in messages:
-        content = msg.content if hasattr(msg, 'content') else str(msg)
-        content_lower = content.lower()
-        if any(phrase in content_lower for phrase in CONSENSUS_PHRASES):
-            agreement_count += 1
-
-    return agreement_count / len(messages)
-
 # Agent colors for UI
 AGENT_COLORS = {
     "AZOTH": "#00ffaa",
@@ -565,7 +543,6 @@ async def execute_round(
         select(DeliberationSession)
         .options(
             selectinload(DeliberationSession.agents),
-            selectinload(DeliberationSession.rounds).selectinload(DeliberationRound.messages),
         )
         .where(DeliberationSession.id == session_id)
         .where(DeliberationSession.user_id == user.id)
@@ -602,49 +579,16 @@ async def execute_round(
     await db.flush()  # Get round ID
 
     # Build context from previous rounds (includes human message if present)
-    context = build_round_context(session, round_number, human_message)
+    claude = get_claude_service()
+    round_context = await build_round_context(db, claude, session, round_number, human_message)
+    context = round_context.text
 
     # Get active agents
     active_agents = [a for a in session.agents if a.is_active]
 
-    # Pre-load agent prompts and village memories sequentially
-    claude = get_claude_service()
-    agent_prompts = {}
-    agent_village_memories = {}
-    for agent in active_agents:
-        if agent.persona_override:
-            agent_prompts[agent.agent_id] = agent.persona_override
-        else:
-            try:
-                prompt = await get_agent_prompt_with_memory(
-                    agent_id=agent.agent_id,
-                    user=user,
-                    use_pac=False,
-                    db=db,
-                )
-                agent_prompts[agent.agent_id] = prompt
-            except Exception as e:
-                logger.warning(f"Failed to load prompt for {agent.agent_id}: {e}")
-                agent_prompts[agent.agent_id] = load_native_prompt(agent.agent_id, use_pac=False)
-
-        try:
-            neural = NeuralMemoryService(db)
-            village_memories = await neural.get_village_memories(
-                user_id=user.id,
-                topic=session.topic,
-                limit=5,
-                collection="council",
-            )
-            if village_memories:
-                agent_village_memories[agent.agent_id] = neural.format_village_memories_for_prompt(
-                    village_memories, max_chars=1500,
-                )
-            else:
-                agent_village_memories[agent.agent_id] = ""
-        except Exception as e:
-            logger.warning(f"Failed to get village memories for {agent.agent_id}: {e}")
-            await db.rollback()  # Unpoison transaction after SQL failure
-            agent_village_memories[agent.agent_id] = ""
+    # Agent prompts (cached per session) and the topic's village memories,
+    # loaded concurrently on pooled sessions
+    prep = await prepare_round(session, active_agents, user)
 
     # Execute all agents in parallel (prompts pre-loaded, no DB contention)
     tasks = []
@@ -652,8 +596,8 @@ async def execute_round(
         tasks.append(
             execute_agent_turn(
                 claude, session, round_record, agent, context, db, user=user,
-                base_prompt=agent_prompts.get(agent.agent_id),
-                village_memory_block=agent_village_memories.get(agent.agent_id, ""),
+                base_prompt=prep.prompts.get(agent.agent_id),
+                village_memory_block=prep.village_memory_block,
             )
         )
 
@@ -699,6 +643,10 @@ async def execute_round(
         total_round_input += input_tokens
         total_round_output += output_tokens
 
+    # The shared digest call is billed with the round
+    total_round_input += round_context.input_tokens
+    total_round_output += round_context.output_tokens
+
     # Update session
     session.current_round = round_number
     session.total_input_tokens += total_round_input
@@ -711,9 +659,12 @@ async def execute_round(
     # Complete round
     round_record.completed_at = datetime.utcnow()
 
-    # Check for convergence (consensus detection)
-    convergence_score = check_convergence(messages)
+    # Check for convergence (embedding clusters + explicit consensus phrases;
+    # ending as consensus needs both, see services/convergence.py)
+    convergence = await measure_round(messages)
+    convergence_score = convergence.score
     round_record.convergence_score = convergence_score
+    round_record.key_agreements = convergence.clusters or None
     session.convergence_score = convergence_score
 
     # Check if max rounds reached
@@ -722,7 +673,7 @@ async def execute_round(
         session.state = "complete"
         session.termination_reason = "max_rounds"
         new_state = "complete"
-    elif convergence_score >= 0.8:
+    elif convergence.consensus:
         session.state = "complete"
         session.termination_reason = "consensus"
         new_state = "complete"
@@ -821,6 +772,7 @@ async def delete_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    await cancel_job(db, "council", session_id)
     await db.delete(session)
     await db.commit()
 
@@ -993,24 +945,24 @@ async def auto_deliberate(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Execute multiple rounds continuously with SSE streaming.
+    Queue rounds on the background session runner and stream its progress (SSE).
+
+    The rounds run as a session job (see services/session_jobs.py), not in
+    this request: disconnecting doesn't stop them, and calling this again (or
+    opening the council WebSocket) re-attaches to the running job.
 
     Events:
-    - start: Deliberation started
+    - start: Deliberation queued / attached
     - round_start: Round N beginning
+    - agent_token: Streamed token from an agent
     - agent_complete: Agent finished their turn
     - round_complete: Round N finished
-    - paused: User paused the session
-    - human_message_queued: Human butt-in message received
+    - paused / stopped: Session paused or stopped between rounds
+    - human_message_injected: Human butt-in message consumed by a round
     - end: Deliberation ended
     """
-    # Get session with agents
     result = await db.execute(
         select(DeliberationSession)
-        .options(
-            selectinload(DeliberationSession.agents),
-            selectinload(DeliberationSession.rounds).selectinload(DeliberationRound.messages),
-        )
         .where(DeliberationSession.id == session_id)
         .where(DeliberationSession.user_id == user.id)
     )
@@ -1022,273 +974,284 @@ async def auto_deliberate(
     if session.state == "complete":
         raise HTTPException(status_code=400, detail="Session already complete")
 
-    async def stream_deliberation():
-        nonlocal session
+    session.mode = "auto"
+    session.state = "running"
+    job = await enqueue(db, "council", session.id, user.id, num_rounds)
+    await db.commit()
 
-        # Start event
-        yield f"data: {json.dumps({'type': 'start', 'session_id': str(session.id), 'num_rounds': num_rounds, 'starting_round': session.current_round + 1})}\n\n"
+    # Subscribe before waking the runner so no early event is missed
+    queue = open_subscription("council", session.id)
+    wake()
+    start_event = {
+        "type": "start",
+        "session_id": str(session.id),
+        "job_id": str(job["id"]),
+        "num_rounds": job["rounds_requested"] - job["rounds_done"],
+        "starting_round": session.current_round + 1,
+    }
 
-        session.mode = "auto"
-        session.state = "running"
-        await db.commit()
+    async def stream_deliberation():
+        try:
+            yield f"data: {json.dumps(start_event)}\n\n"
+            while True:
+                event = await queue.get()
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+                if event.get("type") == "job_finished":
+                    break
+        finally:
+            close_subscription("council", session_id, queue)
 
-        claude = get_claude_service()
-        rounds_executed = 0
-        total_session_input = 0
-        total_session_output = 0
+    return StreamingResponse(
+        stream_deliberation(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
 
-        while rounds_executed < num_rounds and session.current_round < session.max_rounds:
-            # Reload with eager loading (refresh() only loads scalar columns,
-            # leaving relationships expired → MissingGreenlet on lazy load)
-            result = await db.execute(
-                select(DeliberationSession)
-                .where(DeliberationSession.id == session_id)
-                .options(
-                    selectinload(DeliberationSession.agents),
-                    selectinload(DeliberationSession.rounds).selectinload(DeliberationRound.messages),
-                )
-            )
-            session = result.scalar_one()
 
-            # Check if paused or stopped
-            if session.state == "paused":
-                yield f"data: {json.dumps({'type': 'paused', 'round_number': session.current_round})}\n\n"
-                break
+@router.get("/sessions/{session_id}/job")
+async def get_deliberation_job(
+    session_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Status of the session's latest auto-deliberation job."""
+    result = await db.execute(
+        select(DeliberationSession.id)
+        .where(DeliberationSession.id == session_id)
+        .where(DeliberationSession.user_id == user.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Session not found")
 
-            if session.state == "complete":
-                yield f"data: {json.dumps({'type': 'stopped', 'round_number': session.current_round})}\n\n"
-                break
+    job = await get_session_job(db, "council", session_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No auto-deliberation job for this session")
+    return job
 
-            # Create new round
-            round_number = session.current_round + 1
 
-            yield f"data: {json.dumps({'type': 'round_start', 'round_number': round_number})}\n\n"
+# ============================================================================
+# Background Runner (session jobs)
+# ============================================================================
 
-            # Check for pending human message (butt-in)
-            human_message = session.pending_human_message
-            if human_message:
-                yield f"data: {json.dumps({'type': 'human_message_injected', 'content': human_message})}\n\n"
-                session.pending_human_message = None  # Clear it
+async def run_council_job_round(job: JobContext) -> bool:
+    """
+    Run one auto-deliberation round for a session job.
 
-            round_record = DeliberationRound(
-                session_id=session.id,
-                round_number=round_number,
-                human_message=human_message,
-                started_at=datetime.utcnow(),
-            )
-            db.add(round_record)
-            await db.flush()
-
-            # Build context (includes human message if present)
-            context = build_round_context(session, round_number, human_message)
-
-            # Get active agents
-            active_agents = [a for a in session.agents if a.is_active]
-
-            # Pre-load agent prompts and village memories sequentially
-            # (DB session can't handle concurrent operations)
-            agent_prompts = {}
-            agent_village_memories = {}
-            for agent in active_agents:
-                if agent.persona_override:
-                    agent_prompts[agent.agent_id] = agent.persona_override
-                else:
-                    try:
-                        prompt = await get_agent_prompt_with_memory(
-                            agent_id=agent.agent_id,
-                            user=user,
-                            use_pac=False,
-                            db=db,
-                        )
-                        agent_prompts[agent.agent_id] = prompt
-                    except Exception as e:
-                        logger.warning(f"Failed to load prompt for {agent.agent_id}: {e}")
-                        agent_prompts[agent.agent_id] = load_native_prompt(agent.agent_id, use_pac=False)
-
-                try:
-                    neural = NeuralMemoryService(db)
-                    village_memories = await neural.get_village_memories(
-                        user_id=user.id,
-                        topic=session.topic,
-                        limit=5,
-                        collection="council",
-                    )
-                    if village_memories:
-                        agent_village_memories[agent.agent_id] = neural.format_village_memories_for_prompt(
-                            village_memories, max_chars=1500,
-                        )
-                    else:
-                        agent_village_memories[agent.agent_id] = ""
-                except Exception as e:
-                    logger.warning(f"Failed to get village memories for {agent.agent_id}: {e}")
-                    await db.rollback()  # Unpoison transaction after SQL failure
-                    agent_village_memories[agent.agent_id] = ""
-
-            # Execute all agents in parallel (prompts pre-loaded, no DB contention)
-            tasks = []
-            for agent in active_agents:
-                tasks.append(
-                    execute_agent_turn(
-                        claude, session, round_record, agent, context, db, user=user,
-                        base_prompt=agent_prompts.get(agent.agent_id),
-                        village_memory_block=agent_village_memories.get(agent.agent_id, ""),
-                    )
-                )
+    Uses its own DB session, streams tokens to job subscribers, commits the
+    round and checkpoints the job. Returns False once the session can't
+    continue (paused, stopped, consensus, max rounds, deleted).
+    """
+    claude = get_claude_service()
 
-            agent_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
-            total_round_input = 0
-            total_round_output = 0
-            round_messages = []  # Collect for neural storage
-
-            for i, result in enumerate(agent_results):
-                agent = active_agents[i]
-                if isinstance(result, Exception):
-                    logger.error(f"Agent {agent.agent_id} failed: {result}")
-                    content = f"[Error: {str(result)}]"
-                    input_tokens = 0
-                    output_tokens = 0
-                    tool_calls = None
-                else:
-                    content = result["content"]
-                    input_tokens = result["input_tokens"]
-                    output_tokens = result["output_tokens"]
-                    tool_calls = result.get("tool_calls")
-
-                # Create message record
-                msg = SessionMessage(
-                    session_id=session.id,
-                    round_id=round_record.id,
-                    role="agent",
-                    agent_id=agent.agent_id,
-                    content=content,
-                    tool_calls=tool_calls,  # Store tool calls in message
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                )
-                db.add(msg)
-                round_messages.append(msg)  # Collect for neural storage
-
-                # Update agent token counts
-                agent.input_tokens += input_tokens
-                agent.output_tokens += output_tokens
-                total_round_input += input_tokens
-                total_round_output += output_tokens
-
-                # Yield agent complete event
-                yield f"data: {json.dumps({'type': 'agent_complete', 'agent_id': agent.agent_id, 'content': content, 'input_tokens': input_tokens, 'output_tokens': output_tokens})}\n\n"
-
-                # Yield tool call events (for UI feedback)
-                if tool_calls:
-                    for tc in tool_calls:
-                        yield f"data: {json.dumps({'type': 'tool_call', 'agent_id': agent.agent_id, 'tool': tc['name'], 'input': tc.get('input'), 'result': tc.get('result')})}\n\n"
-
-            # Update session
-            session.current_round = round_number
-            session.total_input_tokens += total_round_input
-            session.total_output_tokens += total_round_output
-            total_session_input += total_round_input
-            total_session_output += total_round_output
-
-            # Cost for this round
-            round_cost = (total_round_input * 0.25 + total_round_output * 1.25) / 1_000_000
-            session.total_cost_usd += round_cost
-
-            # Complete round
-            round_record.completed_at = datetime.utcnow()
-
-            # Check for convergence (consensus detection)
-            convergence_score = check_convergence(round_messages)
-            round_record.convergence_score = convergence_score
-            session.convergence_score = convergence_score
+    async with get_db_context() as db:
+        user = (await db.execute(select(User).where(User.id == job.user_id))).scalar_one_or_none()
+        result = await db.execute(
+            select(DeliberationSession)
+            .where(DeliberationSession.id == job.session_id)
+            .where(DeliberationSession.user_id == job.user_id)
+            .options(selectinload(DeliberationSession.agents))
+        )
+        session = result.scalar_one_or_none()
+        if not session or not user:
+            return False
+
+        if session.state == "paused":
+            job.emit({"type": "paused", "round_number": session.current_round})
+            return False
+        if session.state == "complete":
+            job.emit({"type": "stopped", "round_number": session.current_round})
+            return False
+        if session.current_round >= session.max_rounds:
+            session.state = "complete"
+            session.termination_reason = "max_rounds"
+            await db.commit()
+            return False
 
-            try:
-                await db.commit()
-            except Exception as commit_err:
-                logger.error(f"Council round {round_number} commit failed: {commit_err}")
-                await db.rollback()
-                yield f"data: {json.dumps({'type': 'round_error', 'round_number': round_number, 'error': 'Failed to save round data'})}\n\n"
-                rounds_executed += 1
-                continue
-
-            # Yield round complete event
-            yield f"data: {json.dumps({'type': 'round_complete', 'round_number': round_number, 'convergence_score': convergence_score, 'cost_usd': round_cost, 'total_cost_usd': session.total_cost_usd})}\n\n"
-
-            # Check for consensus (auto-stop if high convergence)
-            if convergence_score >= 0.8:
-                session.state = "complete"
-                session.termination_reason = "consensus"
-                await db.commit()
-                yield f"data: {json.dumps({'type': 'consensus', 'score': convergence_score, 'round_number': round_number})}\n\n"
-                logger.info(f"Council {session.id} reached consensus at round {round_number} (score: {convergence_score})")
-                break
+        round_number = session.current_round + 1
+        job.emit({"type": "round_start", "round_number": round_number})
 
-            # Store council messages in Neural memory (The Village)
-            try:
-                stored = await store_council_memories(
-                    db=db,
-                    user_id=user.id,
-                    session_id=session.id,
-                    messages=round_messages,
-                    topic=session.topic,
-                )
-                if stored > 0:
-                    logger.debug(f"Stored {stored} council memories for round {round_number}")
-            except Exception as e:
-                logger.warning(f"Failed to store council memories: {e}")
+        # Check for pending human message (butt-in)
+        human_message = session.pending_human_message
+        if human_message:
+            job.emit({"type": "human_message_injected", "content": human_message})
+            session.pending_human_message = None
 
-            rounds_executed += 1
+        round_record = DeliberationRound(
+            session_id=session.id,
+            round_number=round_number,
+            human_message=human_message,
+            started_at=datetime.utcnow(),
+        )
+        db.add(round_record)
+        await db.flush()
+
+        # Build context (includes human message if present)
+        round_context = await build_round_context(db, claude, session, round_number, human_message)
+        active_agents = [a for a in session.agents if a.is_active]
+        prep = await prepare_round(session, active_agents, user)
+
+        async def on_token(agent_id: str, token: str):
+            job.emit({"type": "agent_token", "agent_id": agent_id, "token": token})
+
+        async def on_tool(agent_id: str, event: dict):
+            job.emit({
+                "type": f"agent_{event['type']}",
+                "agent_id": agent_id,
+                **{k: v for k, v in event.items() if k != "type"},
+            })
 
-            # Reload session with new rounds for next iteration
-            await db.refresh(session)
-            result = await db.execute(
-                select(DeliberationSession)
-                .options(
-                    selectinload(DeliberationSession.agents),
-                    selectinload(DeliberationSession.rounds).selectinload(DeliberationRound.messages),
-                )
-                .where(DeliberationSession.id == session_id)
+        agent_results = await asyncio.gather(*[
+            execute_agent_turn_streaming(
+                claude, session, round_record, agent, round_context.text, db,
+                on_token=on_token, on_tool=on_tool, user=user,
+                base_prompt=prep.prompts.get(agent.agent_id),
+                village_memory_block=prep.village_memory_block,
             )
-            session = result.scalar_one()
-
-        # Determine final state
-        if session.state != "paused":
-            if session.current_round >= session.max_rounds:
-                session.state = "complete"
-                session.termination_reason = "max_rounds"
-            elif rounds_executed >= num_rounds:
-                session.state = "running"  # Paused at requested rounds, but not complete
+            for agent in active_agents
+        ], return_exceptions=True)
+
+        total_round_input = 0
+        total_round_output = 0
+        round_messages = []
+
+        for agent, agent_result in zip(active_agents, agent_results):
+            if isinstance(agent_result, Exception):
+                logger.error(f"Agent {agent.agent_id} failed: {agent_result}")
+                content = f"[Error: {str(agent_result)}]"
+                input_tokens = 0
+                output_tokens = 0
+                tool_calls = None
+            else:
+                content = agent_result["content"]
+                input_tokens = agent_result["input_tokens"]
+                output_tokens = agent_result["output_tokens"]
+                tool_calls = agent_result.get("tool_calls")
 
-        await db.commit()
+            msg = SessionMessage(
+                session_id=session.id,
+                round_id=round_record.id,
+                role="agent",
+                agent_id=agent.agent_id,
+                content=content,
+                tool_calls=tool_calls,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+            )
+            db.add(msg)
+            round_messages.append(msg)
+
+            agent.input_tokens += input_tokens
+            agent.output_tokens += output_tokens
+            total_round_input += input_tokens
+            total_round_output += output_tokens
+
+            job.emit({
+                "type": "agent_complete",
+                "agent_id": agent.agent_id,
+                "content": content,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+            })
 
-        # Record billing for entire auto-deliberation
-        if settings.stripe_secret_key and (total_session_input > 0 or total_session_output > 0):
+        # The shared digest call is billed with the round
+        total_round_input += round_context.input_tokens
+        total_round_output += round_context.output_tokens
+
+        session.current_round = round_number
+        session.total_input_tokens += total_round_input
+        session.total_output_tokens += total_round_output
+        round_cost = (total_round_input * 0.25 + total_round_output * 1.25) / 1_000_000
+        session.total_cost_usd += round_cost
+        round_record.completed_at = datetime.utcnow()
+
+        # Check for convergence (embedding clusters + explicit consensus phrases;
+        # ending as consensus needs both, see services/convergence.py)
+        convergence = await measure_round(round_messages)
+        convergence_score = convergence.score
+        round_record.convergence_score = convergence_score
+        round_record.key_agreements = convergence.clusters or None
+        session.convergence_score = convergence_score
+
+        if convergence.consensus:
+            session.state = "complete"
+            session.termination_reason = "consensus"
+            logger.info(f"Council {session.id} reached consensus at round {round_number} (score: {convergence_score})")
+        elif session.current_round >= session.max_rounds:
+            session.state = "complete"
+            session.termination_reason = "max_rounds"
+
+        await job.checkpoint(db)  # commits the round
+
+        job.emit({
+            "type": "round_complete",
+            "round_number": round_number,
+            "convergence_score": convergence_score,
+            "cost_usd": round_cost,
+            "total_cost_usd": session.total_cost_usd,
+        })
+        if session.termination_reason == "consensus":
+            job.emit({"type": "consensus", "score": convergence_score, "round_number": round_number})
+
+        # Record billing per round (the job may outlive any request)
+        if settings.stripe_secret_key and (total_round_input > 0 or total_round_output > 0):
             try:
                 billing = BillingService(db)
                 await billing.record_message_usage(
                     user_id=user.id,
                     provider="anthropic",
                     model=session.model or COUNCIL_MODEL,
-                    input_tokens=total_session_input,
-                    output_tokens=total_session_output,
+                    input_tokens=total_round_input,
+                    output_tokens=total_round_output,
                 )
                 await db.commit()
             except Exception as e:
                 logger.error(f"Failed to record council billing: {e}")
 
-        # End event
-        yield f"data: {json.dumps({'type': 'end', 'state': session.state, 'total_rounds': session.current_round, 'rounds_executed': rounds_executed, 'total_cost_usd': session.total_cost_usd, 'termination_reason': session.termination_reason})}\n\n"
+        # Store council messages in Neural memory (The Village)
+        try:
+            stored = await store_council_memories(
+                db=db,
+                user_id=user.id,
+                session_id=session.id,
+                messages=round_messages,
+                topic=session.topic,
+            )
+            if stored > 0:
+                logger.debug(f"Stored {stored} council memories for round {round_number}")
+        except Exception as e:
+            logger.warning(f"Failed to store council memories: {e}")
+
+        return session.state != "complete"
 
-    return StreamingResponse(
-        stream_deliberation(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
-    )
+
+async def finish_council_job(job: JobContext, status: str) -> None:
+    """Emit the final `end` event for a council job."""
+    async with get_db_context() as db:
+        session = (await db.execute(
+            select(DeliberationSession).where(DeliberationSession.id == job.session_id)
+        )).scalar_one_or_none()
+        if not session:
+            job.emit({"type": "end", "state": "deleted", "job_status": status})
+            return
+        job.emit({
+            "type": "end",
+            "state": session.state,
+            "job_status": status,
+            "total_rounds": session.current_round,
+            "rounds_executed": job.rounds_done,
+            "total_cost_usd": session.total_cost_usd,
+            "termination_reason": session.termination_reason,
+            "model": session.model or COUNCIL_MODEL,
+            "input_tokens": session.total_input_tokens,
+            "output_tokens": session.total_output_tokens,
+        })
+
+
+register_runner("council", run_council_job_round, finish_council_job)
 
 
 @router.post("/sessions/{session_id}/butt-in")
@@ -1348,6 +1311,7 @@ async def pause_session(
         raise HTTPException(status_code=400, detail="Session is not running")
 
     session.state = "paused"
+    await pause_job(db, "council", session.id)
     await db.commit()
 
     return {"status": "paused", "current_round": session.current_round}
@@ -1374,7 +1338,11 @@ async def resume_session(
         raise HTTPException(status_code=400, detail="Session is not paused")
 
     session.state = "running"
+    # A paused auto-deliberation job picks up its remaining rounds
+    job = await resume_job(db, "council", session.id)
     await db.commit()
+    if job:
+        wake()
 
     return {"status": "running", "current_round": session.current_round}
 
@@ -1401,6 +1369,7 @@ async def stop_session(
 
     session.state = "complete"
     session.termination_reason = "user_stopped"
+    await cancel_job(db, "council", session.id)
     await db.commit()
 
     return {"status": "complete", "current_round": session.current_round}
@@ -1455,44 +1424,6 @@ async def store_council_memories(
     return stored
 
 
-def build_round_context(session: DeliberationSession, round_number: int, human_message: Optional[str] = None) -> str:
-    """Build context from previous rounds for agent prompts.
-
-    Args:
-        session: The deliberation session
-        round_number: Current round number
-        human_message: Optional human "butt-in" message to include
-    """
-    context_parts = []
-
-    # Add previous rounds context
-    if round_number > 1:
-        for round_rec in sorted(session.rounds, key=lambda r: r.round_number):
-            if round_rec.round_number >= round_number:
-                continue
-
-            round_messages = []
-
-            # Include human butt-in from the round if it exists
-            if round_rec.human_message:
-                round_messages.append(f"[HUMAN]: {round_rec.human_message}")
-
-            for msg in sorted(round_rec.messages, key=lambda m: m.created_at):
-                if msg.role == "agent":
-                    round_messages.append(f"[{msg.agent_id}]: {msg.content}")
-                elif msg.role == "human":
-                    round_messages.append(f"[HUMAN]: {msg.content}")
-
-            if round_messages:
-                context_parts.append(f"=== Round {round_rec.round_number} ===\n" + "\n\n".join(round_messages))
-
-    # Add current human butt-in message at the end
-    if human_message:
-        context_parts.append(f"=== Human Intervention ===\n[HUMAN]: {human_message}")
-
-    return "\n\n".join(context_parts)
-
-
 async def execute_agent_turn(
     claude: ClaudeService,
     session: DeliberationSession,
@@ -9,22 +9,23 @@ and secure file upload/download.
 
 import asyncio
 import hashlib
+import json
 import logging
 import os
 import shutil
 import subprocess
 import tempfile
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File as FastAPIFile, status
-from fastapi.responses import FileResponse as FastAPIFileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File as FastAPIFile, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
 from app.database import get_db
 from app.models.user import User
@@ -35,6 +36,17 @@ from app.models.file import (
 )
 from app.auth.deps import get_current_user
 from app.config import get_settings
+from app.services.vault.bulk import delete_entries, get_job, move_entries, schedule_reclaim
+from app.services.vault.content_index import refresh_file_index, search_content
+from app.services.vault.blobs import (
+    adopt_legacy, adopt_staged, add_ref, is_blob_path, release, remove_legacy,
+    replace_content, schedule_gc, staging_path,
+)
+from app.services.vault.ingest import IngestLimitExceeded, discard_staged, stream_upload
+from app.services.vault.project_context import ROOT_KEY as CONTEXT_ROOT_KEY, ContextSnapshot, get_snapshot as get_context_snapshot
+from app.services.vault.serving import is_fresh_access, record_access, serve_file, strong_etag
+from app.services.vault.semantic_index import find_relevant_files as find_relevant_files_semantic
+from app.services.vault.usage import adjust_usage, get_usage, quota_for, release_usage
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -87,6 +99,11 @@ class FileUpdate(BaseModel):
     is_archived: Optional[bool] = None
 
 
+class FileCopyRequest(BaseModel):
+    folder_id: Optional[UUID] = None  # Target folder (None = same folder as source)
+    name: Optional[str] = None  # Defaults to "<name> (copy)"
+
+
 class FileResponse(BaseModel):
     id: UUID
     name: str
@@ -152,19 +169,8 @@ def get_vault_path(user_id: UUID) -> Path:
 
 
 async def get_storage_used(user_id: UUID, db: AsyncSession) -> int:
-    """Calculate total storage used by a user."""
-    result = await db.execute(
-        select(func.coalesce(func.sum(File.size_bytes), 0))
-        .where(File.user_id == user_id)
-    )
-    return result.scalar() or 0
-
-
-async def check_quota(user_id: UUID, additional_bytes: int, db: AsyncSession) -> bool:
-    """Check if user has enough quota for additional bytes."""
-    settings = get_settings()
-    used = await get_storage_used(user_id, db)
-    return (used + additional_bytes) <= settings.default_quota_bytes
+    """Total storage used by a user (maintained counter, no SUM)."""
+    return (await get_usage(db, user_id))["used_bytes"]
 
 
 def calculate_checksum(file_path: Path) -> str:
@@ -183,42 +189,34 @@ def get_extension(filename: str) -> str:
     return ''
 
 
-async def get_folder_path(folder_id: UUID, user_id: UUID, db: AsyncSession) -> list[BreadcrumbItem]:
-    """Build breadcrumb path from root to folder."""
-    path = []
-    current_id = folder_id
-
-    while current_id:
-        result = await db.execute(
-            select(Folder)
-            .where(Folder.id == current_id)
-            .where(Folder.user_id == user_id)
-        )
-        folder = result.scalar_one_or_none()
-        if not folder:
-            break
-        path.insert(0, BreadcrumbItem(id=folder.id, name=folder.name))
-        current_id = folder.parent_id
-
-    return path
+MAX_FOLDER_DEPTH = 64  # Guards the breadcrumb CTE against parent_id cycles
 
 
-async def folder_to_response(folder: Folder, db: AsyncSession) -> FolderResponse:
-    """Convert Folder model to response with counts."""
-    # Count child folders
-    folder_result = await db.execute(
-        select(func.count(Folder.id))
-        .where(Folder.parent_id == folder.id)
+def folder_counts_select(user_id: UUID):
+    """Select folders with child folder/file counts as correlated subqueries."""
+    child = aliased(Folder)
+    folder_count = (
+        select(func.count(child.id))
+        .where(child.user_id == user_id)
+        .where(child.parent_id == Folder.id)
+        .correlate(Folder)
+        .scalar_subquery()
     )
-    folder_count = folder_result.scalar() or 0
-
-    # Count files in this folder
-    file_result = await db.execute(
+    file_count = (
         select(func.count(File.id))
-        .where(File.folder_id == folder.id)
+        .where(File.user_id == user_id)
+        .where(File.folder_id == Folder.id)
+        .correlate(Folder)
+        .scalar_subquery()
     )
-    file_count = file_result.scalar() or 0
+    return select(
+        Folder,
+        folder_count.label("folder_count"),
+        file_count.label("file_count"),
+    ).where(Folder.user_id == user_id)
+
 
+def build_folder_response(folder: Folder, folder_count: int, file_count: int) -> FolderResponse:
     return FolderResponse(
         id=folder.id,
         name=folder.name,
@@ -227,13 +225,29 @@ async def folder_to_response(folder: Folder, db: AsyncSession) -> FolderResponse
         color=folder.color,
         icon=folder.icon,
         is_archived=folder.is_archived,
-        file_count=file_count,
-        folder_count=folder_count,
+        file_count=file_count or 0,
+        folder_count=folder_count or 0,
         created_at=folder.created_at.isoformat(),
         updated_at=folder.updated_at.isoformat(),
     )
 
 
+async def folder_to_response(folder: Folder, db: AsyncSession) -> FolderResponse:
+    """Convert Folder model to response with counts."""
+    row = (await db.execute(
+        folder_counts_select(folder.user_id).where(Folder.id == folder.id)
+    )).one()
+    return build_folder_response(folder, row.folder_count, row.file_count)
+
+
+def file_etag(file: File) -> str:
+    """Strong ETag for a vault file: its content checksum (falls back to id + mtime)."""
+    if file.checksum:
+        return strong_etag(file.checksum)
+    stamp = file.updated_at or file.created_at
+    return strong_etag(f"{file.id}-{stamp.timestamp() if stamp else 0}")
+
+
 def file_to_response(file: File) -> FileResponse:
     """Convert File model to response."""
     return FileResponse(
@@ -275,20 +289,67 @@ async def list_folder_contents(
     db: AsyncSession = Depends(get_db)
 ):
     """List contents of a specific folder."""
-    # Verify folder exists and belongs to user
-    result = await db.execute(
-        select(Folder)
-        .where(Folder.id == folder_id)
-        .where(Folder.user_id == user.id)
+    return await list_directory_contents(folder_id, user, db)
+
+
+# Whole listing in one round trip: current folder + children with counts,
+# breadcrumbs (recursive CTE), files and the maintained storage counter, each
+# aggregated to JSON. {folder_filter}/{file_filter} pick root vs folder so
+# both stay index-friendly. Timestamps leave as UTC wall time (see _utc_iso).
+_LISTING_SQL = """
+    WITH RECURSIVE ancestors AS (
+        SELECT id, name, parent_id, 0 AS depth
+        FROM folders
+        WHERE id = :folder_id AND user_id = :user_id
+        UNION ALL
+        SELECT p.id, p.name, p.parent_id, a.depth + 1
+        FROM folders p
+        JOIN ancestors a ON p.id = a.parent_id
+        WHERE p.user_id = :user_id AND a.depth < :max_depth
+    ),
+    listed AS (
+        SELECT d.id, d.name, d.parent_id, d.description, d.color, d.icon, d.is_archived,
+               d.created_at, d.updated_at,
+               (SELECT COUNT(*) FROM folders c WHERE c.user_id = :user_id AND c.parent_id = d.id) AS folder_count,
+               (SELECT COUNT(*) FROM files f WHERE f.user_id = :user_id AND f.folder_id = d.id) AS file_count
+        FROM folders d
+        WHERE d.user_id = :user_id AND ({folder_filter})
     )
-    folder = result.scalar_one_or_none()
-    if not folder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Folder not found"
-        )
+    SELECT
+        (SELECT json_agg(json_build_object(
+                    'id', id, 'name', name, 'parent_id', parent_id, 'description', description,
+                    'color', color, 'icon', icon, 'is_archived', is_archived,
+                    'folder_count', folder_count, 'file_count', file_count,
+                    'created_at', created_at AT TIME ZONE 'UTC', 'updated_at', updated_at AT TIME ZONE 'UTC'
+                ) ORDER BY name)
+         FROM listed) AS folders,
+        (SELECT json_agg(json_build_object('id', id, 'name', name) ORDER BY depth DESC)
+         FROM ancestors) AS path,
+        (SELECT json_agg(json_build_object(
+                    'id', id, 'name', name, 'original_filename', original_filename,
+                    'mime_type', mime_type, 'file_type', file_type, 'size_bytes', size_bytes,
+                    'folder_id', folder_id, 'description', description, 'tags', tags,
+                    'favorite', favorite, 'is_archived', is_archived, 'access_count', access_count,
+                    'status', status,
+                    'created_at', created_at AT TIME ZONE 'UTC', 'updated_at', updated_at AT TIME ZONE 'UTC'
+                ) ORDER BY name)
+         FROM files
+         WHERE user_id = :user_id AND {file_filter} AND is_archived = FALSE) AS files,
+        (SELECT used_bytes FROM user_storage_usage WHERE user_id = :user_id) AS used_bytes
+"""
 
-    return await list_directory_contents(folder_id, user, db)
+
+def _utc_iso(value: Optional[str]) -> Optional[str]:
+    """UTC wall time from JSON -> the isoformat() an aware datetime column gives."""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).isoformat()
+
+
+def _json_rows(value) -> list[dict]:
+    if value is None:
+        return []
+    return json.loads(value) if isinstance(value, str) else value
 
 
 async def list_directory_contents(
@@ -296,55 +357,58 @@ async def list_directory_contents(
     user: User,
     db: AsyncSession
 ) -> DirectoryListing:
-    """Internal helper to list directory contents."""
-    settings = get_settings()
+    """
+    Internal helper to list directory contents.
 
-    # Get current folder info (if not root)
-    current_folder = None
-    path = []
+    One query regardless of width or depth (see _LISTING_SQL). Only a user
+    without a storage counter row yet costs a second one to seed it.
+    """
     if folder_id:
-        result = await db.execute(
-            select(Folder)
-            .where(Folder.id == folder_id)
-            .where(Folder.user_id == user.id)
-        )
-        folder = result.scalar_one_or_none()
-        if folder:
-            current_folder = await folder_to_response(folder, db)
-            path = await get_folder_path(folder_id, user.id, db)
+        folder_filter = "d.id = :folder_id OR (d.parent_id = :folder_id AND d.is_archived = FALSE)"
+        file_filter = "folder_id = :folder_id"
+    else:
+        folder_filter = "d.parent_id IS NULL AND d.is_archived = FALSE"
+        file_filter = "folder_id IS NULL"
+    row = (await db.execute(
+        text(_LISTING_SQL.format(folder_filter=folder_filter, file_filter=file_filter)),
+        {"user_id": user.id, "folder_id": folder_id, "max_depth": MAX_FOLDER_DEPTH},
+    )).one()
 
-    # Get child folders
-    folders_result = await db.execute(
-        select(Folder)
-        .where(Folder.user_id == user.id)
-        .where(Folder.parent_id == folder_id)
-        .where(Folder.is_archived == False)
-        .order_by(Folder.name)
-    )
-    folders = folders_result.scalars().all()
-    folder_responses = [await folder_to_response(f, db) for f in folders]
+    current_folder = None
+    folder_responses = []
+    for item in _json_rows(row.folders):
+        item["created_at"] = _utc_iso(item["created_at"])
+        item["updated_at"] = _utc_iso(item["updated_at"])
+        response = FolderResponse(**item)
+        if folder_id and response.id == folder_id:
+            current_folder = response
+        else:
+            folder_responses.append(response)
 
-    # Get files in this folder
-    files_result = await db.execute(
-        select(File)
-        .where(File.user_id == user.id)
-        .where(File.folder_id == folder_id)
-        .where(File.is_archived == False)
-        .order_by(File.name)
-    )
-    files = files_result.scalars().all()
-    file_responses = [file_to_response(f) for f in files]
+    if folder_id and current_folder is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Folder not found"
+        )
 
-    # Get storage stats
-    storage_used = await get_storage_used(user.id, db)
+    file_responses = []
+    for item in _json_rows(row.files):
+        item["created_at"] = _utc_iso(item["created_at"])
+        item["updated_at"] = _utc_iso(item["updated_at"])
+        item["tags"] = item["tags"] or []
+        file_responses.append(FileResponse(**item))
+
+    storage_used = row.used_bytes
+    if storage_used is None:
+        storage_used = await get_storage_used(user.id, db)
 
     return DirectoryListing(
         current_folder=current_folder,
-        path=path,
+        path=[BreadcrumbItem(**item) for item in _json_rows(row.path)],
         folders=folder_responses,
         files=file_responses,
-        storage_used=storage_used,
-        storage_quota=settings.default_quota_bytes,
+        storage_used=int(storage_used),
+        storage_quota=quota_for(user),
     )
 
 
@@ -482,47 +546,16 @@ async def delete_folder(
             detail="Folder not found"
         )
 
-    # Get all files in this folder tree for disk cleanup
-    # We need to recursively collect all files
-    async def collect_files_recursive(folder_id: UUID) -> list[File]:
-        files = []
-
-        # Get files in this folder
-        files_result = await db.execute(
-            select(File).where(File.folder_id == folder_id)
-        )
-        files.extend(files_result.scalars().all())
-
-        # Get subfolders
-        subfolders_result = await db.execute(
-            select(Folder).where(Folder.parent_id == folder_id)
-        )
-        for subfolder in subfolders_result.scalars().all():
-            files.extend(await collect_files_recursive(subfolder.id))
-
-        return files
-
-    files_to_delete = await collect_files_recursive(folder_id)
-
-    # Delete from disk
-    for file in files_to_delete:
-        try:
-            file_path = Path(file.storage_path)
-            if file_path.exists():
-                file_path.unlink()
-                # Clean up parent directory if empty
-                parent_dir = file_path.parent
-                if parent_dir.exists() and not any(parent_dir.iterdir()):
-                    parent_dir.rmdir()
-        except Exception as e:
-            logger.warning(f"Failed to delete file from disk: {file.storage_path} - {e}")
-
-    # Delete folder (cascades to files and subfolders in DB)
-    await db.delete(folder)
+    # One CTE-driven DELETE for the whole tree; disk space is reclaimed in the background
+    report = await delete_entries(db, user.id, [], [folder.id])
     await db.commit()
+    schedule_reclaim(report["job_id"])
 
-    logger.info(f"Deleted folder {folder_id} with {len(files_to_delete)} files")
-    return {"message": f"Folder deleted with {len(files_to_delete)} files"}
+    logger.info(f"Deleted folder {folder_id} with {report['deleted_files']} files")
+    return {
+        "message": f"Folder deleted with {report['deleted_files']} files",
+        "job_id": report["job_id"],
+    }
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -540,9 +573,9 @@ async def upload_file(
     Upload a file to The Vault.
 
     - Validates file type against allowed extensions
-    - Enforces user storage quota
-    - Calculates checksum for integrity
-    - Stores file on Railway volume
+    - Streams to disk in chunks, aborting as soon as size or quota is exceeded
+    - Calculates checksum incrementally for integrity
+    - Stores content once per checksum in the blob store on the Railway volume
     """
     settings = get_settings()
 
@@ -554,24 +587,6 @@ async def upload_file(
             detail=f"File type not allowed. Blocked extensions: {BLOCKED_EXTENSIONS}"
         )
 
-    # Read file content to check size and calculate checksum
-    content = await file.read()
-    file_size = len(content)
-
-    # Validate file size
-    if file_size > settings.max_file_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size: {settings.max_file_size_bytes / 1024 / 1024:.0f}MB"
-        )
-
-    # Check quota
-    if not await check_quota(user.id, file_size, db):
-        raise HTTPException(
-            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
-            detail="Storage quota exceeded. Delete some files to free up space."
-        )
-
     # Validate folder if specified
     if folder_id:
         result = await db.execute(
@@ -585,33 +600,51 @@ async def upload_file(
                 detail="Folder not found"
             )
 
-    # Generate unique file ID and storage path
+    # Size and quota are enforced while streaming - the body is never buffered whole
+    quota = quota_for(user)
+    quota_left = quota - await get_storage_used(user.id, db)
+    max_bytes = max(0, min(settings.max_file_size_bytes, quota_left))
+
     file_id = uuid4()
-    vault_path = get_vault_path(user.id)
-    file_dir = vault_path / str(file_id)
-    file_dir.mkdir(parents=True, exist_ok=True)
 
     # Sanitize filename
     safe_filename = (file.filename or f"file.{extension}").replace("/", "_").replace("\\", "_")
-    storage_path = file_dir / safe_filename
 
-    # Write file to disk
+    # Stream to a staging file, hashing as we go
+    staged = staging_path()
     try:
-        with open(storage_path, "wb") as f:
-            f.write(content)
-    except Exception as e:
+        file_size, checksum = await stream_upload(file, staged, max_bytes)
+    except IngestLimitExceeded:
+        if settings.max_file_size_bytes <= quota_left:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Maximum size: {settings.max_file_size_bytes / 1024 / 1024:.0f}MB"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Storage quota exceeded. Delete some files to free up space."
+        )
+    except OSError as e:
         logger.error(f"Failed to write file to disk: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to save file"
         )
 
-    # Calculate checksum
-    checksum = hashlib.sha256(content).hexdigest()
-
     # Determine file type category
     file_type = get_file_type(extension)
 
+    # Reserve the bytes atomically - concurrent uploads can't overshoot the quota
+    if not await adjust_usage(db, user.id, file_size, file_type, delta_files=1, quota=quota):
+        await discard_staged(staged)
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Storage quota exceeded. Delete some files to free up space."
+        )
+
+    # Content-addressed: identical bytes already in the vault are not stored twice
+    storage_path = await adopt_staged(db, staged, checksum, file_size)
+
     # Create database record
     file_record = File(
         id=file_id,
@@ -628,6 +661,7 @@ async def upload_file(
     )
     db.add(file_record)
     await db.commit()
+    await refresh_file_index(db, file_record)
 
     logger.info(f"Uploaded file {file_id} ({file_size} bytes) for user {user.id}")
     return file_to_response(file_record)
@@ -658,10 +692,16 @@ async def get_file_metadata(
 @router.get("/{file_id}/download")
 async def download_file(
     file_id: UUID,
+    request: Request,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Download a file."""
+    """
+    Download a file.
+
+    Supports conditional GET (ETag = sha256 checksum -> 304) and single
+    byte ranges (206) for resumable downloads and media seeking.
+    """
     result = await db.execute(
         select(File)
         .where(File.id == file_id)
@@ -674,28 +714,25 @@ async def download_file(
             detail="File not found"
         )
 
-    file_path = Path(file.storage_path)
-    if not file_path.exists():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on disk"
-        )
-
-    # Update access stats
-    file.access_count += 1
-    file.last_accessed_at = datetime.utcnow()
-    await db.commit()
-
-    return FastAPIFileResponse(
-        path=str(file_path),
-        filename=file.original_filename,
+    response = await serve_file(
+        request,
+        Path(file.storage_path),
+        etag=file_etag(file),
         media_type=file.mime_type or "application/octet-stream",
+        filename=file.original_filename,
     )
 
+    # Write-behind: repeated range requests don't each hit the database
+    if is_fresh_access(request):
+        record_access(file.id)
+
+    return response
+
 
 @router.get("/{file_id}/preview")
 async def preview_file(
     file_id: UUID,
+    request: Request,
     lines: int = 100,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -726,18 +763,21 @@ async def preview_file(
             detail="File not found on disk"
         )
 
-    # Update access stats
-    file.access_count += 1
-    file.last_accessed_at = datetime.utcnow()
-    await db.commit()
-
     # Image preview - return the file
     if file.file_type == "image":
-        return FastAPIFileResponse(
-            path=str(file_path),
-            filename=file.name,
+        response = await serve_file(
+            request,
+            file_path,
+            etag=file_etag(file),
             media_type=file.mime_type or "image/png",
+            filename=file.name,
+            disposition="inline",
         )
+        if is_fresh_access(request):
+            record_access(file.id)
+        return response
+
+    record_access(file.id)
 
     # Text/code preview - return first N lines
     if file.file_type in ("document", "code", "data"):
@@ -833,10 +873,7 @@ async def get_file_content(
             detail=f"Failed to read file: {str(e)}"
         )
 
-    # Update access stats
-    file.access_count += 1
-    file.last_accessed_at = datetime.utcnow()
-    await db.commit()
+    record_access(file.id)
 
     return {
         "id": file.id,
@@ -894,7 +931,6 @@ async def save_file_content(
     Overwrites the file with new content and updates metadata.
     Used by Cortex Diver IDE.
     """
-    settings = get_settings()
 
     result = await db.execute(
         select(File)
@@ -915,48 +951,36 @@ async def save_file_content(
             detail="Cannot edit binary files"
         )
 
-    file_path = Path(file.storage_path)
-
     # Calculate new size and check quota
     new_content = request.content.encode("utf-8")
     new_size = len(new_content)
     size_delta = new_size - file.size_bytes
 
-    # Check quota if size is increasing
-    if size_delta > 0:
-        user_settings = user.settings or {}
-        used = user_settings.get("storage_used_bytes", 0)
-        quota = user_settings.get("storage_quota_bytes", settings.default_quota_bytes)
-
-        if used + size_delta > quota:
+    # Apply the size change; growth is checked against quota atomically
+    if size_delta != 0:
+        quota = quota_for(user)
+        if not await adjust_usage(db, user.id, size_delta, file.file_type, quota=quota):
+            used = await get_storage_used(user.id, db)
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"Storage quota exceeded. Available: {quota - used} bytes"
+                detail=f"Storage quota exceeded. Available: {max(0, quota - used)} bytes"
             )
 
-    # Write content
+    # Write content (blobs are immutable - the file is repointed at a new blob)
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(request.content)
-    except Exception as e:
+        released = await replace_content(db, file, new_content)
+    except OSError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
 
     # Update file metadata
-    old_size = file.size_bytes
-    file.size_bytes = new_size
-    file.checksum = hashlib.sha256(new_content).hexdigest()
     file.updated_at = datetime.utcnow()
 
-    # Update user storage stats
-    if size_delta != 0:
-        user_settings = user.settings or {}
-        user_settings["storage_used_bytes"] = user_settings.get("storage_used_bytes", 0) + size_delta
-        user.settings = user_settings
-
     await db.commit()
+    schedule_gc(released)
+    await refresh_file_index(db, file)
     await db.refresh(file)
 
     return {
@@ -1104,6 +1128,93 @@ async def update_file(
     return file_to_response(file)
 
 
+@router.post("/{file_id}/copy", response_model=FileResponse, status_code=status.HTTP_201_CREATED)
+async def copy_file(
+    file_id: UUID,
+    request: FileCopyRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Copy a file. Metadata-only: the copy shares the source's blob.
+
+    Counts against quota like any other file.
+    """
+    result = await db.execute(
+        select(File)
+        .where(File.id == file_id)
+        .where(File.user_id == user.id)
+    )
+    source = result.scalar_one_or_none()
+    if not source:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    target_folder_id = request.folder_id if request.folder_id is not None else source.folder_id
+    if request.folder_id:
+        folder_result = await db.execute(
+            select(Folder)
+            .where(Folder.id == request.folder_id)
+            .where(Folder.user_id == user.id)
+        )
+        if not folder_result.scalar_one_or_none():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Target folder not found"
+            )
+
+    if not await adjust_usage(db, user.id, source.size_bytes, source.file_type, delta_files=1, quota=quota_for(user)):
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Storage quota exceeded. Delete some files to free up space."
+        )
+
+    # Files from before the blob store are moved into it on first copy
+    legacy_path = None
+    if not is_blob_path(source.storage_path):
+        legacy_path = source.storage_path
+        if await adopt_legacy(db, source) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found on disk"
+            )
+
+    if request.name:
+        name = request.name.replace("/", "_").replace("\\", "_")
+    elif target_folder_id == source.folder_id:
+        stem, dot, ext = source.name.rpartition(".")
+        name = f"{stem} (copy).{ext}" if dot and stem else f"{source.name} (copy)"
+    else:
+        name = source.name
+
+    await add_ref(db, source.storage_path, source.size_bytes)
+    copy = File(
+        id=uuid4(),
+        user_id=user.id,
+        folder_id=target_folder_id,
+        name=name,
+        original_filename=source.original_filename,
+        mime_type=source.mime_type,
+        file_type=source.file_type,
+        size_bytes=source.size_bytes,
+        storage_path=source.storage_path,
+        checksum=source.checksum,
+        description=source.description,
+        tags=list(source.tags or []),
+        status="ready",
+    )
+    db.add(copy)
+    await db.commit()
+    if legacy_path:
+        await remove_legacy(legacy_path)
+    await refresh_file_index(db, copy)
+
+    logger.info(f"Copied file {file_id} -> {copy.id} for user {user.id}")
+    return file_to_response(copy)
+
+
 @router.delete("/{file_id}")
 async def delete_file(
     file_id: UUID,
@@ -1123,21 +1234,14 @@ async def delete_file(
             detail="File not found"
         )
 
-    # Delete from disk
-    try:
-        file_path = Path(file.storage_path)
-        if file_path.exists():
-            file_path.unlink()
-            # Clean up parent directory if empty
-            parent_dir = file_path.parent
-            if parent_dir.exists() and not any(parent_dir.iterdir()):
-                parent_dir.rmdir()
-    except Exception as e:
-        logger.warning(f"Failed to delete file from disk: {file.storage_path} - {e}")
+    # Drop the blob reference (blob is collected once nothing else uses it)
+    released = await release(db, [file.storage_path])
+    await release_usage(db, user.id, [(file.size_bytes, file.file_type)])
 
     # Delete from database
     await db.delete(file)
     await db.commit()
+    schedule_gc(released)
 
     logger.info(f"Deleted file {file_id} for user {user.id}")
     return {"message": "File deleted"}
@@ -1167,38 +1271,10 @@ async def bulk_move(
                 detail="Target folder not found"
             )
 
-    moved_files = 0
-    moved_folders = 0
-
-    # Move files
-    for file_id in request.file_ids:
-        result = await db.execute(
-            select(File)
-            .where(File.id == file_id)
-            .where(File.user_id == user.id)
-        )
-        file = result.scalar_one_or_none()
-        if file:
-            file.folder_id = request.target_folder_id
-            file.updated_at = datetime.utcnow()
-            moved_files += 1
-
-    # Move folders (can't move folder into its own child)
-    for folder_id in request.folder_ids:
-        if folder_id == request.target_folder_id:
-            continue  # Skip moving folder to itself
-
-        result = await db.execute(
-            select(Folder)
-            .where(Folder.id == folder_id)
-            .where(Folder.user_id == user.id)
-        )
-        folder = result.scalar_one_or_none()
-        if folder:
-            folder.parent_id = request.target_folder_id
-            folder.updated_at = datetime.utcnow()
-            moved_folders += 1
-
+    # Set-based: one UPDATE for files, one for folders (cycle-creating moves skipped)
+    moved_files, moved_folders = await move_entries(
+        db, user.id, request.file_ids, request.folder_ids, request.target_folder_id
+    )
     await db.commit()
 
     return {
@@ -1214,83 +1290,40 @@ async def bulk_delete(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Delete multiple files and/or folders."""
-    deleted_files = 0
-    deleted_folders = 0
-
-    # Delete files
-    for file_id in request.file_ids:
-        result = await db.execute(
-            select(File)
-            .where(File.id == file_id)
-            .where(File.user_id == user.id)
-        )
-        file = result.scalar_one_or_none()
-        if file:
-            # Delete from disk
-            try:
-                file_path = Path(file.storage_path)
-                if file_path.exists():
-                    file_path.unlink()
-                    parent_dir = file_path.parent
-                    if parent_dir.exists() and not any(parent_dir.iterdir()):
-                        parent_dir.rmdir()
-            except Exception as e:
-                logger.warning(f"Failed to delete file from disk: {e}")
-
-            await db.delete(file)
-            deleted_files += 1
-
-    # Delete folders (cascades in DB, need disk cleanup)
-    for folder_id in request.folder_ids:
-        result = await db.execute(
-            select(Folder)
-            .where(Folder.id == folder_id)
-            .where(Folder.user_id == user.id)
-        )
-        folder = result.scalar_one_or_none()
-        if folder:
-            # Collect all files recursively for disk cleanup
-            async def collect_files(fid: UUID) -> list[str]:
-                paths = []
-                files_result = await db.execute(
-                    select(File.storage_path).where(File.folder_id == fid)
-                )
-                paths.extend([r[0] for r in files_result.fetchall()])
-
-                subfolders_result = await db.execute(
-                    select(Folder.id).where(Folder.parent_id == fid)
-                )
-                for (subfolder_id,) in subfolders_result.fetchall():
-                    paths.extend(await collect_files(subfolder_id))
-                return paths
-
-            file_paths = await collect_files(folder_id)
-
-            # Delete files from disk
-            for path in file_paths:
-                try:
-                    file_path = Path(path)
-                    if file_path.exists():
-                        file_path.unlink()
-                        parent_dir = file_path.parent
-                        if parent_dir.exists() and not any(parent_dir.iterdir()):
-                            parent_dir.rmdir()
-                except Exception as e:
-                    logger.warning(f"Failed to delete file from disk: {e}")
-
-            await db.delete(folder)
-            deleted_folders += 1
+    """
+    Delete multiple files and/or folders.
 
+    Database rows go in a few set-based statements; removing the bytes from
+    disk is handed to a background job - poll `GET /files/jobs/{job_id}`.
+    """
+    report = await delete_entries(db, user.id, request.file_ids, request.folder_ids)
     await db.commit()
+    schedule_reclaim(report["job_id"])
 
     return {
-        "message": f"Deleted {deleted_files} files and {deleted_folders} folders",
-        "deleted_files": deleted_files,
-        "deleted_folders": deleted_folders,
+        "message": f"Deleted {report['deleted_files']} files and {report['deleted_folders']} folders",
+        "deleted_files": report["deleted_files"],
+        "deleted_folders": report["deleted_folders"],
+        "job_id": report["job_id"],
     }
 
 
+@router.get("/jobs/{job_id}")
+async def get_reclaim_job(
+    job_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Status of a background disk reclamation job started by a delete."""
+    job = await get_job(db, user.id, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # SEARCH & SPECIAL LISTINGS
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1356,94 +1389,49 @@ async def search_file_contents(
     """
     Search inside file contents (The All-Seeing Eye).
 
-    Searches text-based files for the query string.
-    Returns matching lines with surrounding context.
+    Searches text-based files for the query string through the content
+    index (file_chunks). Returns matching lines with surrounding context.
 
     Used by Cortex Diver for semantic code search.
     """
-    import re
-
-    # Build query for searchable files
-    query = (
-        select(File)
-        .where(File.user_id == user.id)
-        .where(File.file_type.in_(["document", "code", "data"]))
-        .where(File.is_archived == False)
+    found = await search_content(
+        db,
+        user.id,
+        q,
+        file_type=file_type,
+        folder_id=folder_id,
+        max_files=limit,
+        max_matches_per_file=10,
+        context_lines=context_lines,
     )
 
-    if file_type:
-        query = query.where(File.file_type == file_type)
-
-    if folder_id:
-        query = query.where(File.folder_id == folder_id)
-
-    query = query.order_by(File.updated_at.desc())
-
-    result = await db.execute(query)
-    files = result.scalars().all()
-
     results = []
     total_matches = 0
-    files_searched = 0
-
-    # Compile search pattern (case-insensitive)
-    try:
-        pattern = re.compile(re.escape(q), re.IGNORECASE)
-    except re.error:
-        pattern = re.compile(re.escape(q), re.IGNORECASE)
-
-    for file in files:
-        file_path = Path(file.storage_path)
-        if not file_path.exists():
-            continue
-
-        files_searched += 1
-
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                lines = f.readlines()
-        except Exception:
-            continue
-
-        matches = []
-        for i, line in enumerate(lines):
-            if pattern.search(line):
-                # Get context
-                start = max(0, i - context_lines)
-                end = min(len(lines), i + context_lines + 1)
-
-                context_before = "".join(lines[start:i]).rstrip('\n')
-                context_after = "".join(lines[i+1:end]).rstrip('\n')
-
-                matches.append({
-                    "line": i + 1,  # 1-indexed
-                    "content": line.rstrip('\n'),
-                    "context_before": context_before,
-                    "context_after": context_after,
-                })
-
-                if len(matches) >= 10:  # Max matches per file
-                    break
-
-        if matches:
-            results.append(ContentSearchResult(
-                file_id=file.id,
-                file_name=file.name,
-                file_type=file.file_type,
-                folder_id=file.folder_id,
-                matches=matches,
-                match_count=len(matches),
-            ))
-            total_matches += len(matches)
-
-            if len(results) >= limit:
-                break
+    for item in found["results"]:
+        matches = [
+            {
+                "line": m["line"],  # 1-indexed
+                "content": m["content"],
+                "context_before": "\n".join(m["context_before"]),
+                "context_after": "\n".join(m["context_after"]),
+            }
+            for m in item["matches"]
+        ]
+        results.append(ContentSearchResult(
+            file_id=item["file_id"],
+            file_name=item["name"],
+            file_type=item["file_type"],
+            folder_id=item["folder_id"],
+            matches=matches,
+            match_count=len(matches),
+        ))
+        total_matches += len(matches)
 
     return ContentSearchResponse(
         query=q,
         results=results,
         total_matches=total_matches,
-        files_searched=files_searched,
+        files_searched=found["files_searched"],
     )
 
 
@@ -1467,153 +1455,153 @@ class ProjectContext(BaseModel):
     storage_used: int
 
 
-@router.get("/context", response_model=ProjectContext)
-async def get_project_context(
-    folder_id: Optional[UUID] = None,
-    include_previews: bool = True,
-    preview_lines: int = 50,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """
-    Get project structure and context for AI assistance.
+# Key files (README, main files, configs) get content previews
+KEY_FILE_PATTERNS = [
+    "readme", "readme.md", "readme.txt",
+    "main.py", "app.py", "index.js", "index.ts", "main.js", "main.ts",
+    "package.json", "requirements.txt", "pyproject.toml", "cargo.toml",
+    "dockerfile", "docker-compose.yml", "docker-compose.yaml",
+    ".env.example", "config.py", "settings.py", "config.js", "config.ts",
+    "makefile", "justfile",
+]
+ENTRY_POINT_NAMES = ["index.vue", "app.vue", "main.vue", "__init__.py", "mod.rs", "lib.rs"]
 
-    Returns a summary of the user's files including:
-    - File tree structure
-    - Key files with content previews (README, main files, configs)
-    - Language breakdown
 
-    Used by Cortex Diver's AI agent for codebase awareness.
-    """
-    # Get all folders
-    folders_result = await db.execute(
-        select(Folder)
-        .where(Folder.user_id == user.id)
-        .where(Folder.is_archived == False)
-        .order_by(Folder.name)
-    )
-    folders = folders_result.scalars().all()
+def is_key_file(name: str, file_type: str) -> bool:
+    lower_name = name.lower()
+    if any(lower_name == pattern or lower_name.endswith(f"/{pattern}") for pattern in KEY_FILE_PATTERNS):
+        return True
+    # Also include entry-point-like files
+    return file_type == "code" and lower_name in ENTRY_POINT_NAMES
 
-    # Get all files
-    files_query = select(File).where(File.user_id == user.id).where(File.is_archived == False)
-    if folder_id:
-        # Only files in this subtree
-        files_query = files_query.where(File.folder_id == folder_id)
-    files_result = await db.execute(files_query.order_by(File.name))
-    files = files_result.scalars().all()
+
+async def build_project_context(
+    snapshot: ContextSnapshot,
+    folder_id: Optional[UUID],
+    include_previews: bool,
+    preview_lines: int,
+) -> ProjectContext:
+    """Assemble ProjectContext from a snapshot (memoized until the vault changes)."""
+    memo_key = ("context", folder_id, include_previews, preview_lines)
+    if memo_key in snapshot.memo:
+        return snapshot.memo[memo_key]
+    version = snapshot.version
+
+    # Files: whole vault, or only this folder's direct children
+    files = snapshot.files(folder_id)
 
     # Build file tree
-    def build_tree(parent_id=None, path=""):
+    def build_tree(parent_key: UUID, path=""):
         items = []
 
         # Add folders
-        for folder in folders:
-            if folder.parent_id == parent_id:
-                folder_path = f"{path}/{folder.name}" if path else folder.name
-                children = build_tree(folder.id, folder_path)
-                items.append({
-                    "type": "folder",
-                    "id": str(folder.id),
-                    "name": folder.name,
-                    "path": folder_path,
-                    "children": children,
-                })
+        for folder in snapshot.folders_by_parent.get(parent_key, []):
+            folder_path = f"{path}/{folder['name']}" if path else folder["name"]
+            items.append({
+                "type": "folder",
+                "id": str(folder["id"]),
+                "name": folder["name"],
+                "path": folder_path,
+                "children": build_tree(folder["id"], folder_path),
+            })
 
         # Add files
-        for file in files:
-            if file.folder_id == parent_id:
-                file_path = f"{path}/{file.name}" if path else file.name
+        if folder_id is None or parent_key == folder_id:
+            for file in snapshot.files_by_folder.get(parent_key, []):
+                file_path = f"{path}/{file['name']}" if path else file["name"]
                 items.append({
                     "type": "file",
-                    "id": str(file.id),
-                    "name": file.name,
+                    "id": str(file["id"]),
+                    "name": file["name"],
                     "path": file_path,
-                    "file_type": file.file_type,
-                    "size": file.size_bytes,
+                    "file_type": file["file_type"],
+                    "size": file["size_bytes"],
                 })
 
         return items
 
-    file_tree = build_tree(folder_id if folder_id else None)
-
-    # Identify key files (README, main files, configs)
-    KEY_FILE_PATTERNS = [
-        "readme", "readme.md", "readme.txt",
-        "main.py", "app.py", "index.js", "index.ts", "main.js", "main.ts",
-        "package.json", "requirements.txt", "pyproject.toml", "cargo.toml",
-        "dockerfile", "docker-compose.yml", "docker-compose.yaml",
-        ".env.example", "config.py", "settings.py", "config.js", "config.ts",
-        "makefile", "justfile",
-    ]
+    file_tree = build_tree(folder_id or CONTEXT_ROOT_KEY)
 
     key_files = []
-    for file in files:
-        lower_name = file.name.lower()
-        is_key = any(lower_name == pattern or lower_name.endswith(f"/{pattern}") for pattern in KEY_FILE_PATTERNS)
-
-        # Also include entry-point-like files
-        if not is_key and file.file_type == "code":
-            if lower_name in ["index.vue", "app.vue", "main.vue", "__init__.py", "mod.rs", "lib.rs"]:
-                is_key = True
-
-        if is_key:
-            file_path = file.name
-            # Find path by traversing folders
-            folder_id_curr = file.folder_id
-            while folder_id_curr:
-                folder = next((f for f in folders if f.id == folder_id_curr), None)
-                if folder:
-                    file_path = f"{folder.name}/{file_path}"
-                    folder_id_curr = folder.parent_id
-                else:
-                    break
-
-            preview = None
-            if include_previews and file.file_type in ("document", "code", "data"):
-                file_disk_path = Path(file.storage_path)
-                if file_disk_path.exists():
-                    try:
-                        with open(file_disk_path, "r", encoding="utf-8", errors="replace") as f:
-                            preview_content = []
-                            for i, line in enumerate(f):
-                                if i >= preview_lines:
-                                    break
-                                preview_content.append(line)
-                            preview = "".join(preview_content)
-                    except Exception:
-                        pass
-
-            key_files.append(ProjectContextFile(
-                id=file.id,
-                name=file.name,
-                path=file_path,
-                file_type=file.file_type,
-                size_bytes=file.size_bytes,
-                preview=preview,
-            ))
+    for file in sorted(files, key=lambda f: f["name"]):
+        if not is_key_file(file["name"], file["file_type"]):
+            continue
+
+        preview = None
+        if include_previews and file["file_type"] in ("document", "code", "data"):
+            preview = await snapshot.preview(file, preview_lines)
+
+        key_files.append(ProjectContextFile(
+            id=file["id"],
+            name=file["name"],
+            path=snapshot.path_of(file["folder_id"], file["name"]),
+            file_type=file["file_type"],
+            size_bytes=file["size_bytes"],
+            preview=preview,
+        ))
 
     # Count languages
     language_counts = {}
     for file in files:
-        if file.file_type == "code":
-            lang = get_monaco_language(file.name)
+        if file["file_type"] == "code":
+            lang = get_monaco_language(file["name"])
             language_counts[lang] = language_counts.get(lang, 0) + 1
 
-    # Storage used
-    storage_used = sum(f.size_bytes for f in files)
-
-    return ProjectContext(
+    context = ProjectContext(
         total_files=len(files),
-        total_folders=len(folders),
+        total_folders=len(snapshot.folders),
         file_tree=file_tree,
         key_files=key_files,
         languages=language_counts,
-        storage_used=storage_used,
+        storage_used=sum(f["size_bytes"] or 0 for f in files),
     )
+    if snapshot.version == version:  # Not refreshed by a concurrent request meanwhile
+        snapshot.memo[memo_key] = context
+    return context
+
+
+def context_etag(snapshot: ContextSnapshot, *params) -> str:
+    """Validator for anything derived from a snapshot with the given parameters."""
+    digest = hashlib.sha256(repr(params).encode()).hexdigest()[:16]
+    return strong_etag(f"ctx-{snapshot.version}-{digest}")
+
+
+@router.get("/context", response_model=ProjectContext)
+async def get_project_context(
+    request: Request,
+    response: Response,
+    folder_id: Optional[UUID] = None,
+    include_previews: bool = True,
+    preview_lines: int = 50,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get project structure and context for AI assistance.
+
+    Returns a summary of the user's files including:
+    - File tree structure
+    - Key files with content previews (README, main files, configs)
+    - Language breakdown
+
+    Used by Cortex Diver's AI agent for codebase awareness. Served from a
+    cached snapshot that only re-walks folders changed since the last call;
+    honours If-None-Match with 304.
+    """
+    snapshot = await get_context_snapshot(db, user.id)
+    etag = context_etag(snapshot, "context", folder_id, include_previews, preview_lines)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return await build_project_context(snapshot, folder_id, include_previews, preview_lines)
 
 
 @router.get("/context/prompt")
 async def get_project_context_prompt(
+    request: Request,
+    response: Response,
     folder_id: Optional[UUID] = None,
     max_files: int = 10,
     preview_lines: int = 30,
@@ -1630,14 +1618,20 @@ async def get_project_context_prompt(
 
     This can be directly injected into agent prompts for codebase awareness.
     """
+    snapshot = await get_context_snapshot(db, user.id)
+    etag = context_etag(snapshot, "prompt", folder_id, max_files, preview_lines)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+    memo_key = ("prompt", folder_id, max_files, preview_lines)
+    if memo_key in snapshot.memo:
+        return snapshot.memo[memo_key]
+    version = snapshot.version
+
     # Get project context
-    context = await get_project_context(
-        folder_id=folder_id,
-        include_previews=True,
-        preview_lines=preview_lines,
-        user=user,
-        db=db
-    )
+    context = await build_project_context(snapshot, folder_id, True, preview_lines)
 
     # Format as prompt context
     lines = [
@@ -1691,11 +1685,14 @@ async def get_project_context_prompt(
                 lines.append("```")
             lines.append("")
 
-    return {
+    result = {
         "prompt": "\n".join(lines),
         "file_count": context.total_files,
         "key_file_count": len(context.key_files),
     }
+    if snapshot.version == version:
+        snapshot.memo[memo_key] = result
+    return result
 
 
 class RelevantFilesRequest(BaseModel):
@@ -1723,137 +1720,32 @@ async def find_relevant_files(
     """
     Find files relevant to a query for RAG context injection.
 
-    Uses keyword matching and file patterns to find related files.
-    Returns file contents that can be injected into agent prompts.
-
-    This is a simple relevance algorithm - can be enhanced with embeddings later.
+    Ranks files by semantic similarity of their embedded chunks (one pgvector
+    ANN query) plus a keyword boost on file name and folder path.
+    Returns excerpts of the best-matching chunks that can be injected into
+    agent prompts - no file is read from disk.
     """
-    import re
-
-    # Get all text-based files
-    result = await db.execute(
-        select(File)
-        .where(File.user_id == user.id)
-        .where(File.file_type.in_(["document", "code", "data"]))
-        .where(File.is_archived == False)
-    )
-    files = result.scalars().all()
-
-    # Get folders for path building
-    folders_result = await db.execute(
-        select(Folder)
-        .where(Folder.user_id == user.id)
+    found = await find_relevant_files_semantic(
+        db, user.id, request.query,
+        max_files=request.max_files,
+        exclude_file_id=request.current_file_id,
     )
-    folders = {f.id: f for f in folders_result.scalars().all()}
-
-    def get_file_path(file):
-        path = file.name
-        folder_id = file.folder_id
-        while folder_id:
-            folder = folders.get(folder_id)
-            if folder:
-                path = f"{folder.name}/{path}"
-                folder_id = folder.parent_id
-            else:
-                break
-        return path
-
-    # Extract keywords from query
-    query_lower = request.query.lower()
-    keywords = set(re.findall(r'\b\w+\b', query_lower))
-    keywords.discard('the')
-    keywords.discard('and')
-    keywords.discard('for')
-    keywords.discard('this')
-    keywords.discard('that')
-    keywords.discard('with')
-    keywords.discard('how')
-    keywords.discard('what')
-    keywords.discard('why')
-
-    relevant_files = []
-
-    for file in files:
-        if request.current_file_id and file.id == request.current_file_id:
-            continue
-
-        score = 0
-        relevance_reasons = []
-
-        file_path = get_file_path(file)
-        file_path_lower = file_path.lower()
-        file_name_lower = file.name.lower()
-
-        # Check filename matches
-        for kw in keywords:
-            if kw in file_name_lower:
-                score += 3
-                relevance_reasons.append(f"filename contains '{kw}'")
-
-            if kw in file_path_lower:
-                score += 1
-                if f"filename contains '{kw}'" not in relevance_reasons:
-                    relevance_reasons.append(f"path contains '{kw}'")
-
-        # Check file content (if accessible)
-        file_disk_path = Path(file.storage_path)
-        if file_disk_path.exists():
-            try:
-                with open(file_disk_path, "r", encoding="utf-8", errors="replace") as f:
-                    content = f.read(10000)  # Read first 10KB
-                    content_lower = content.lower()
-
-                    for kw in keywords:
-                        if len(kw) >= 3 and kw in content_lower:
-                            matches = content_lower.count(kw)
-                            score += min(matches, 5)
-                            if matches > 0:
-                                relevance_reasons.append(f"contains '{kw}' ({matches}x)")
-
-            except Exception:
-                content = None
-        else:
-            content = None
-
-        if score > 0:
-            relevant_files.append({
-                "file": file,
-                "path": file_path,
-                "score": score,
-                "reasons": relevance_reasons[:3],  # Top 3 reasons
-            })
-
-    # Sort by relevance score
-    relevant_files.sort(key=lambda x: x["score"], reverse=True)
 
-    # Return top N with content
-    results = []
-    for item in relevant_files[:request.max_files]:
-        file = item["file"]
-        content = None
-
-        file_disk_path = Path(file.storage_path)
-        if file_disk_path.exists():
-            try:
-                with open(file_disk_path, "r", encoding="utf-8", errors="replace") as f:
-                    content = f.read(8000)  # Limit content size
-                    if len(content) >= 8000:
-                        content += "\n... (truncated)"
-            except Exception:
-                pass
-
-        results.append(RelevantFileResult(
-            id=file.id,
-            name=file.name,
+    results = [
+        RelevantFileResult(
+            id=item["file_id"],
+            name=item["name"],
             path=item["path"],
             relevance=", ".join(item["reasons"]),
-            content=content,
-        ))
+            content=item["content"],
+        )
+        for item in found["results"]
+    ]
 
     return {
         "query": request.query,
         "results": results,
-        "total_matched": len(relevant_files),
+        "total_matched": found["total_matched"],
     }
 
 
@@ -1899,16 +1791,9 @@ async def get_storage_stats(
     db: AsyncSession = Depends(get_db)
 ):
     """Get user storage statistics."""
-    settings = get_settings()
 
-    # Total used
-    used = await get_storage_used(user.id, db)
-
-    # File count
-    file_count_result = await db.execute(
-        select(func.count(File.id)).where(File.user_id == user.id)
-    )
-    file_count = file_count_result.scalar() or 0
+    # Totals and per-type breakdown come from the maintained counter
+    usage = await get_usage(db, user.id)
 
     # Folder count
     folder_count_result = await db.execute(
@@ -1916,20 +1801,12 @@ async def get_storage_stats(
     )
     folder_count = folder_count_result.scalar() or 0
 
-    # By type
-    by_type_result = await db.execute(
-        select(File.file_type, func.sum(File.size_bytes))
-        .where(File.user_id == user.id)
-        .group_by(File.file_type)
-    )
-    by_type = {row[0]: row[1] or 0 for row in by_type_result.fetchall()}
-
     return StorageStats(
-        used_bytes=used,
-        quota_bytes=settings.default_quota_bytes,
-        file_count=file_count,
+        used_bytes=usage["used_bytes"],
+        quota_bytes=quota_for(user),
+        file_count=usage["file_count"],
         folder_count=folder_count,
-        by_type=by_type,
+        by_type=usage["by_type"],
     )
 
 
@@ -26,7 +26,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_db_context
 from app.models.user import User
 from app.models.jam import (
     JamSession, JamParticipant, JamTrack, JamMessage,
@@ -39,6 +39,18 @@ from app.services.tool_executor import create_tool_executor
 from app.services.neural_memory import NeuralMemoryService
 from app.api.v1.chat import load_native_prompt, get_agent_prompt_with_memory
 from app.config import get_settings
+from app.services.session_jobs import (
+    JobContext,
+    cancel_job,
+    close_subscription,
+    enqueue,
+    get_session_job,
+    open_subscription,
+    pause_job,
+    register_runner,
+    resume_job,
+    wake,
+)
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -1070,9 +1082,11 @@ async def auto_jam(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Execute multiple rounds of collaborative composition with SSE streaming.
+    Queue rounds of collaborative composition and stream progress (SSE).
 
-    Agents discuss and contribute notes in parallel, streamed in real-time.
+    The rounds run as a background session job (see
+    services/session_jobs.py): disconnecting doesn't stop them, and calling
+    this again re-attaches to the running job.
 
     SSE Events:
     - {type: "start", session_id, num_rounds}
@@ -1082,17 +1096,10 @@ async def auto_jam(
     - {type: "finalizing"}
     - {type: "end", state, total_rounds}
     """
-    num_rounds = request.num_rounds
-
     result = await db.execute(
         select(JamSession)
         .where(JamSession.id == session_id)
         .where(JamSession.user_id == user.id)
-        .options(
-            selectinload(JamSession.participants),
-            selectinload(JamSession.tracks),
-            selectinload(JamSession.messages),
-        )
     )
     session = result.scalar_one_or_none()
 
@@ -1102,216 +1109,339 @@ async def auto_jam(
     if session.state == JamState.COMPLETE.value:
         raise HTTPException(status_code=400, detail="Session already complete")
 
+    session.state = JamState.JAMMING.value
+    if not session.started_at:
+        session.started_at = datetime.utcnow()
+    if session.current_round == 0:
+        session.current_round = 1
+    job = await enqueue(db, "jam", session.id, user.id, request.num_rounds)
+    await db.commit()
+
+    # Subscribe before waking the runner so no early event is missed
+    queue = open_subscription("jam", session.id)
+    wake()
+    start_event = {
+        "type": "start",
+        "session_id": str(session.id),
+        "job_id": str(job["id"]),
+        "num_rounds": job["rounds_requested"] - job["rounds_done"],
+        "title": session.title,
+    }
+
     async def stream_jam():
-        nonlocal session
+        try:
+            yield f"data: {json.dumps(start_event)}\n\n"
+            while True:
+                event = await queue.get()
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+                if event.get("type") == "job_finished":
+                    break
+        finally:
+            close_subscription("jam", session_id, queue)
+
+    return StreamingResponse(
+        stream_jam(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
 
-        # Start
-        yield f"data: {json.dumps({'type': 'start', 'session_id': str(session.id), 'num_rounds': num_rounds, 'title': session.title})}\n\n"
 
-        session.state = JamState.JAMMING.value
-        if not session.started_at:
-            session.started_at = datetime.utcnow()
-        if session.current_round == 0:
-            session.current_round = 1
-        await db.commit()
+async def _owned_session(db: AsyncSession, session_id: UUID, user: User) -> JamSession:
+    result = await db.execute(
+        select(JamSession)
+        .where(JamSession.id == session_id)
+        .where(JamSession.user_id == user.id)
+    )
+    session = result.scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
 
-        claude = get_claude_service()
-        rounds_executed = 0
 
-        while rounds_executed < num_rounds and session.current_round <= session.max_rounds:
-            round_number = session.current_round
+@router.get("/sessions/{session_id}/job")
+async def get_jam_job(
+    session_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Status of the session's latest auto-jam job."""
+    await _owned_session(db, session_id, user)
+    job = await get_session_job(db, "jam", session_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No auto-jam job for this session")
+    return job
 
-            yield f"data: {json.dumps({'type': 'round_start', 'round_number': round_number})}\n\n"
 
-            # Build context from existing tracks
-            context = build_jam_context(session)
+@router.post("/sessions/{session_id}/pause")
+async def pause_jam(
+    session_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Pause auto-jam after the current round."""
+    await _owned_session(db, session_id, user)
+    job = await pause_job(db, "jam", session_id)
+    if not job:
+        raise HTTPException(status_code=400, detail="No auto-jam running")
+    await db.commit()
+    return job
 
-            # Pre-load agent prompts sequentially (DB session can't handle concurrent ops)
-            active_agents = [a for a in session.participants if a.is_active]
-            agent_prompts = {}
-            for agent in active_agents:
-                try:
-                    prompt = await get_agent_prompt_with_memory(
-                        agent_id=agent.agent_id,
-                        user=user,
-                        use_pac=False,
-                        db=db,
-                    )
-                    agent_prompts[agent.agent_id] = prompt
-                except Exception as e:
-                    logger.warning(f"Failed to load prompt for {agent.agent_id}: {e}")
-                    agent_prompts[agent.agent_id] = load_native_prompt(agent.agent_id, use_pac=False)
-
-            # Execute all agents in parallel (prompts pre-loaded, no DB contention)
-            tasks = []
-            for agent in active_agents:
-                tasks.append(
-                    execute_jam_agent_turn(
-                        claude, session, agent, context, db, user=user,
-                        base_prompt=agent_prompts.get(agent.agent_id),
-                    )
-                )
 
-            agent_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
-            for i, result in enumerate(agent_results):
-                agent = active_agents[i]
-                if isinstance(result, Exception):
-                    logger.error(f"Jam agent {agent.agent_id} failed: {result}")
-                    content = f"[Error: {str(result)}]"
-                    tool_calls = None
-                else:
-                    content = result["content"]
-                    tool_calls = result.get("tool_calls")
-
-                # Save message
-                msg = JamMessage(
-                    id=uuid4(),
-                    session_id=session.id,
-                    agent_id=agent.agent_id,
-                    content=content,
-                    round_number=round_number,
-                )
-                db.add(msg)
-
-                # Stream agent complete event
-                event = {
-                    'type': 'agent_complete',
-                    'agent_id': agent.agent_id,
-                    'role': agent.role,
-                    'content': content[:500],
-                    'tool_calls': [
-                        {'name': tc['name'], 'input': tc.get('input')}
-                        for tc in (tool_calls or [])
-                    ],
-                }
-                yield f"data: {json.dumps(event)}\n\n"
-
-            # Advance round
-            session.current_round = round_number + 1
-            await db.commit()
+@router.post("/sessions/{session_id}/resume")
+async def resume_jam(
+    session_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Resume a paused auto-jam with its remaining rounds."""
+    await _owned_session(db, session_id, user)
+    job = await resume_job(db, "jam", session_id)
+    if not job:
+        raise HTTPException(status_code=400, detail="No paused auto-jam")
+    await db.commit()
+    wake()
+    return job
+
+
+@router.post("/sessions/{session_id}/stop")
+async def stop_jam(
+    session_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stop auto-jam after the current round (tracks are kept; finalize manually)."""
+    await _owned_session(db, session_id, user)
+    job = await cancel_job(db, "jam", session_id)
+    if not job:
+        raise HTTPException(status_code=400, detail="No auto-jam to stop")
+    await db.commit()
+    return job
+
+
+# ============================================================================
+# Background Runner (session jobs)
+# ============================================================================
+
+async def _load_jam(db: AsyncSession, session_id: UUID) -> Optional[JamSession]:
+    result = await db.execute(
+        select(JamSession)
+        .where(JamSession.id == session_id)
+        .options(
+            selectinload(JamSession.participants),
+            selectinload(JamSession.tracks),
+            selectinload(JamSession.messages),
+        )
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
 
-            # Reload session to get new tracks from tool calls
-            await db.refresh(session)
-            result = await db.execute(
-                select(JamSession)
-                .where(JamSession.id == session_id)
-                .options(
-                    selectinload(JamSession.participants),
-                    selectinload(JamSession.tracks),
-                    selectinload(JamSession.messages),
+async def run_jam_job_round(job: JobContext) -> bool:
+    """
+    Run one auto-jam round for a session job on its own DB session.
+
+    Commits the round and checkpoints the job. Returns False once the
+    session can't continue (complete, past max rounds, deleted).
+    """
+    claude = get_claude_service()
+
+    async with get_db_context() as db:
+        user = (await db.execute(select(User).where(User.id == job.user_id))).scalar_one_or_none()
+        session = await _load_jam(db, job.session_id)
+        if not session or not user:
+            return False
+        if session.state != JamState.JAMMING.value or session.current_round > session.max_rounds:
+            return False
+
+        round_number = session.current_round
+        job.emit({"type": "round_start", "round_number": round_number})
+
+        # Build context from existing tracks
+        context = build_jam_context(session)
+
+        # Pre-load agent prompts sequentially (DB session can't handle concurrent ops)
+        active_agents = [a for a in session.participants if a.is_active]
+        agent_prompts = {}
+        for agent in active_agents:
+            try:
+                prompt = await get_agent_prompt_with_memory(
+                    agent_id=agent.agent_id,
+                    user=user,
+                    use_pac=False,
+                    db=db,
                 )
+                agent_prompts[agent.agent_id] = prompt
+            except Exception as e:
+                logger.warning(f"Failed to load prompt for {agent.agent_id}: {e}")
+                agent_prompts[agent.agent_id] = load_native_prompt(agent.agent_id, use_pac=False)
+
+        # Execute all agents in parallel (prompts pre-loaded, no DB contention)
+        agent_results = await asyncio.gather(*[
+            execute_jam_agent_turn(
+                claude, session, agent, context, db, user=user,
+                base_prompt=agent_prompts.get(agent.agent_id),
             )
-            session = result.scalar_one()
+            for agent in active_agents
+        ], return_exceptions=True)
+
+        for agent, result in zip(active_agents, agent_results):
+            if isinstance(result, Exception):
+                logger.error(f"Jam agent {agent.agent_id} failed: {result}")
+                content = f"[Error: {str(result)}]"
+                tool_calls = None
+            else:
+                content = result["content"]
+                tool_calls = result.get("tool_calls")
+
+            db.add(JamMessage(
+                id=uuid4(),
+                session_id=session.id,
+                agent_id=agent.agent_id,
+                content=content,
+                round_number=round_number,
+            ))
+
+            job.emit({
+                'type': 'agent_complete',
+                'agent_id': agent.agent_id,
+                'role': agent.role,
+                'content': content[:500],
+                'tool_calls': [
+                    {'name': tc['name'], 'input': tc.get('input')}
+                    for tc in (tool_calls or [])
+                ],
+            })
 
-            # Count total notes
-            total_notes = sum(len(t.notes or []) for t in session.tracks)
+        # Advance round
+        session.current_round = round_number + 1
+        await job.checkpoint(db)  # commits the round
 
-            yield f"data: {json.dumps({'type': 'round_complete', 'round_number': round_number, 'total_notes': total_notes, 'total_tracks': len(session.tracks)})}\n\n"
+        # Reload session to count tracks added by tool calls
+        session = await _load_jam(db, job.session_id)
+        total_notes = sum(len(t.notes or []) for t in session.tracks)
+        job.emit({'type': 'round_complete', 'round_number': round_number, 'total_notes': total_notes, 'total_tracks': len(session.tracks)})
 
-            rounds_executed += 1
+        return session.current_round <= session.max_rounds
 
-        # Auto-finalize if there are tracks
-        if session.tracks:
-            yield f"data: {json.dumps({'type': 'finalizing', 'total_notes': sum(len(t.notes or []) for t in session.tracks)})}\n\n"
 
-            try:
-                # Group tracks by agent for multi-track MIDI layering
-                tracks_by_agent = {}
-                for track in sorted(session.tracks, key=lambda t: (t.round_number, t.created_at)):
-                    if not track.notes:
-                        continue
-                    aid = track.agent_id or "UNKNOWN"
-                    if aid not in tracks_by_agent:
-                        tracks_by_agent[aid] = []
-                    tracks_by_agent[aid].append({
-                        "round_number": track.round_number,
-                        "notes": track.notes,
-                    })
-
-                if tracks_by_agent:
-                    midi_service = MidiService()
-                    midi_result = await midi_service.create_layered_midi(
-                        tracks_by_agent=tracks_by_agent,
-                        tempo=session.tempo,
-                        title=session.title,
-                        user_id=str(user.id),
-                    )
-
-                    if midi_result.get("success"):
-                        session.final_midi_path = midi_result["midi_file"]
-
-                        yield f"data: {json.dumps({'type': 'midi_created', 'note_count': midi_result.get('note_count', 0), 'track_count': midi_result.get('track_count', 1), 'midi_file': midi_result['midi_file']})}\n\n"
-
-                        # Try full Suno pipeline
-                        deps = midi_service.check_dependencies()
-                        if deps["ready"]:
-                            audio_result = await midi_service.midi_to_audio(midi_result["midi_file"])
-                            if audio_result.get("success"):
-                                upload_result = await midi_service.upload_to_suno(audio_result["audio_path"])
-                                if upload_result.get("success"):
-                                    style = session.style or "collaborative jam"
-                                    cover_result = await midi_service.call_upload_cover(
-                                        upload_url=upload_result["upload_url"],
-                                        style=style,
-                                        title=session.title,
-                                        audio_weight=session.audio_influence,
-                                        instrumental=True,
-                                    )
-                                    if cover_result.get("success"):
-                                        from app.models.music import MusicTask
-                                        music_task = MusicTask(
-                                            id=uuid4(),
-                                            user_id=user.id,
-                                            prompt=f"[VILLAGE BAND] {session.title}",
-                                            style=style,
-                                            title=session.title,
-                                            model="V5",
-                                            instrumental=True,
-                                            status="generating",
-                                            progress="Village Band masterpiece generating...",
-                                            suno_task_id=cover_result["suno_task_id"],
-                                            agent_id="VILLAGE_BAND",
-                                        )
-                                        db.add(music_task)
-                                        session.final_music_task_id = music_task.id
-                                        await db.commit()
-
-                                        # Fire auto-completion background worker
-                                        from app.services.suno import auto_complete_music_task
-                                        asyncio.create_task(
-                                            auto_complete_music_task(str(music_task.id), str(user.id))
-                                        )
-
-                                        yield f"data: {json.dumps({'type': 'suno_started', 'music_task_id': str(music_task.id)})}\n\n"
+async def _auto_finalize(db: AsyncSession, session: JamSession, user_id: UUID, emit) -> None:
+    """Merge tracks into a layered MIDI and hand it to Suno when the pipeline is available."""
+    emit({'type': 'finalizing', 'total_notes': sum(len(t.notes or []) for t in session.tracks)})
 
-            except Exception as e:
-                logger.warning(f"Auto-finalize error (non-fatal): {e}")
-                yield f"data: {json.dumps({'type': 'finalize_error', 'error': str(e)[:200]})}\n\n"
+    # Group tracks by agent for multi-track MIDI layering
+    tracks_by_agent = {}
+    for track in sorted(session.tracks, key=lambda t: (t.round_number, t.created_at)):
+        if not track.notes:
+            continue
+        aid = track.agent_id or "UNKNOWN"
+        if aid not in tracks_by_agent:
+            tracks_by_agent[aid] = []
+        tracks_by_agent[aid].append({
+            "round_number": track.round_number,
+            "notes": track.notes,
+        })
+
+    if not tracks_by_agent:
+        return
 
-        # Complete session
-        session.state = JamState.COMPLETE.value
-        session.completed_at = datetime.utcnow()
-        await db.commit()
+    midi_service = MidiService()
+    midi_result = await midi_service.create_layered_midi(
+        tracks_by_agent=tracks_by_agent,
+        tempo=session.tempo,
+        title=session.title,
+        user_id=str(user_id),
+    )
+    if not midi_result.get("success"):
+        return
 
-        # Inject Village memory
-        await inject_jam_village_memory(db, session, user.id)
+    session.final_midi_path = midi_result["midi_file"]
+    emit({'type': 'midi_created', 'note_count': midi_result.get('note_count', 0), 'track_count': midi_result.get('track_count', 1), 'midi_file': midi_result['midi_file']})
 
-        # End event
-        total_notes = sum(len(t.notes or []) for t in session.tracks)
-        yield f"data: {json.dumps({'type': 'end', 'state': session.state, 'total_rounds': session.current_round - 1, 'total_notes': total_notes, 'total_tracks': len(session.tracks), 'music_task_id': str(session.final_music_task_id) if session.final_music_task_id else None})}\n\n"
+    # Try full Suno pipeline
+    deps = midi_service.check_dependencies()
+    if not deps["ready"]:
+        return
+    audio_result = await midi_service.midi_to_audio(midi_result["midi_file"])
+    if not audio_result.get("success"):
+        return
+    upload_result = await midi_service.upload_to_suno(audio_result["audio_path"])
+    if not upload_result.get("success"):
+        return
+    style = session.style or "collaborative jam"
+    cover_result = await midi_service.call_upload_cover(
+        upload_url=upload_result["upload_url"],
+        style=style,
+        title=session.title,
+        audio_weight=session.audio_influence,
+        instrumental=True,
+    )
+    if not cover_result.get("success"):
+        return
 
-    return StreamingResponse(
-        stream_jam(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+    from app.models.music import MusicTask
+    music_task = MusicTask(
+        id=uuid4(),
+        user_id=user_id,
+        prompt=f"[VILLAGE BAND] {session.title}",
+        style=style,
+        title=session.title,
+        model="V5",
+        instrumental=True,
+        status="generating",
+        progress="Village Band masterpiece generating...",
+        suno_task_id=cover_result["suno_task_id"],
+        agent_id="VILLAGE_BAND",
+    )
+    db.add(music_task)
+    session.final_music_task_id = music_task.id
+    await db.commit()
+
+    # Fire auto-completion background worker
+    from app.services.suno import auto_complete_music_task
+    asyncio.create_task(
+        auto_complete_music_task(str(music_task.id), str(user_id))
     )
 
+    emit({'type': 'suno_started', 'music_task_id': str(music_task.id)})
+
+
+async def finish_jam_job(job: JobContext, status: str) -> None:
+    """Finalize and complete the session when the job ran to the end."""
+    async with get_db_context() as db:
+        session = await _load_jam(db, job.session_id)
+        if not session:
+            job.emit({"type": "end", "state": "deleted", "job_status": status})
+            return
+
+        # Paused/stopped jobs leave the session jamming (resume, or finalize manually)
+        if status == "done" and session.state == JamState.JAMMING.value:
+            if session.tracks:
+                try:
+                    await _auto_finalize(db, session, job.user_id, job.emit)
+                except Exception as e:
+                    logger.warning(f"Auto-finalize error (non-fatal): {e}")
+                    await db.rollback()
+                    session = await _load_jam(db, job.session_id)
+                    job.emit({'type': 'finalize_error', 'error': str(e)[:200]})
+
+            # Complete session
+            session.state = JamState.COMPLETE.value
+            session.completed_at = datetime.utcnow()
+            await db.commit()
+
+            # Inject Village memory
+            await inject_jam_village_memory(db, session, job.user_id)
+
+        total_notes = sum(len(t.notes or []) for t in session.tracks)
+        job.emit({'type': 'end', 'state': session.state, 'job_status': status, 'total_rounds': session.current_round - 1, 'total_notes': total_notes, 'total_tracks': len(session.tracks), 'music_task_id': str(session.final_music_task_id) if session.final_music_task_id else None})
+
+
+register_runner("jam", run_jam_job_round, finish_jam_job)
+
 
 @router.delete("/sessions/{session_id}")
 async def delete_session(
@@ -1330,6 +1460,7 @@ async def delete_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    await cancel_job(db, "jam", session_id)
     await db.delete(session)
     await db.commit()
 
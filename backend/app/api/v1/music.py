@@ -18,8 +18,8 @@ from typing import Optional
 from uuid import UUID
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse, RedirectResponse
 from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -30,6 +30,7 @@ from app.models.user import User
 from app.models.music import MusicTask
 from app.auth.deps import get_current_user, get_current_user_optional
 from app.services.suno import SunoService
+from app.services.vault.serving import CACHE_IMMUTABLE, serve_file, strong_etag
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -391,6 +392,7 @@ async def get_task(
 @router.get("/tasks/{task_id}/file")
 async def get_audio_file(
     task_id: UUID,
+    request: Request,
     token: Optional[str] = Query(None, description="JWT token for audio playback (alt to header)"),
     user: User = Depends(get_current_user_optional),
     db: AsyncSession = Depends(get_db)
@@ -398,7 +400,9 @@ async def get_audio_file(
     """
     Get the audio file for a completed task.
 
-    Returns the MP3 file directly for playback.
+    Returns the MP3 file directly for playback. A finished render never
+    changes, so it is served as immutable with a strong ETag; `Range`
+    requests (seeking) get 206 partial content.
 
     Accepts auth via:
     - Authorization header (standard)
@@ -456,14 +460,14 @@ async def get_audio_file(
             detail="Audio file not found on disk"
         )
 
-    return FileResponse(
+    return await serve_file(
+        request,
         file_path,
+        etag=strong_etag(f"{task.id}-{task.clip_id or ''}"),
         media_type="audio/mpeg",
         filename=file_path.name,
-        headers={
-            "Accept-Ranges": "bytes",
-            "Content-Disposition": f'inline; filename="{file_path.name}"',
-        }
+        disposition="inline",
+        cache_control=CACHE_IMMUTABLE,
     )
 
 
@@ -19,6 +19,9 @@ from app.models.user import User
 from app.models.village import VillageKnowledge
 from app.auth.deps import get_current_user_optional
 from app.services.claude import ClaudeService
+from app.services.convergence import cached_result, cluster_agents, embed_statements, store_result
+from app.services.embedding import get_embedding_service
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -217,7 +220,12 @@ async def detect_convergence(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Detect convergence across agents using AI analysis.
+    Detect convergence across agents.
+
+    Agreement is measured on embeddings of the recent entries (see
+    services/convergence.py); Claude is only asked to name the topic once a
+    cluster of agreeing agents is found. Results are cached for an
+    unchanged set of entries.
 
     Convergence types:
     - HARMONY: 2 agents agree on a topic
@@ -225,6 +233,7 @@ async def detect_convergence(
     """
     # Gather recent knowledge entries
     knowledge_items = []
+    db_items = []
 
     if user:
         result = await db.execute(
@@ -236,17 +245,21 @@ async def detect_convergence(
         db_items = result.scalars().all()
         for k in db_items:
             knowledge_items.append({
+                "id": k.id,
                 "agent": k.agent_id or "Unknown",
                 "content": k.content,
                 "category": k.category,
+                "embedding": k.embedding,
             })
     else:
         # Use in-memory store
         for k in _village_memory[-20:]:
             knowledge_items.append({
+                "id": k["id"],
                 "agent": k["agent_id"] or "Unknown",
                 "content": k["content"],
                 "category": k["category"],
+                "embedding": k.get("embedding"),
             })
 
     if len(knowledge_items) < 2:
@@ -258,30 +271,80 @@ async def detect_convergence(
             evidence=[],
         )
 
-    # Use Claude to analyze for convergence
+    cache_key = (user.id if user else None, topic, tuple(k["id"] for k in knowledge_items))
+    cached = cached_result(cache_key)
+    if cached is not None:
+        return ConvergenceResponse(**cached)
+
+    # Embed entries that don't have a vector yet (stored back, so each entry is embedded once)
+    dims = get_embedding_service().dimensions
+    missing = [k for k in knowledge_items if not k["embedding"] or len(k["embedding"]) != dims]
+    if missing:
+        vectors = await embed_statements([k["content"] for k in missing])
+        for k, vec in zip(missing, vectors):
+            k["embedding"] = vec
+        if user:
+            by_id = {k["id"]: k for k in missing}
+            for item in db_items:
+                if item.id in by_id and by_id[item.id]["embedding"]:
+                    item.embedding = by_id[item.id]["embedding"]
+            try:
+                await db.commit()
+            except Exception as e:
+                logger.warning(f"Failed to store village embeddings: {e}")
+                await db.rollback()
+        else:
+            by_id = {k["id"]: k["embedding"] for k in missing}
+            for entry in _village_memory:
+                if entry["id"] in by_id and by_id[entry["id"]]:
+                    entry["embedding"] = by_id[entry["id"]]
+
+    embedded = [k for k in knowledge_items if k["embedding"]]
+    clusters = cluster_agents(
+        [k["agent"] for k in embedded],
+        [k["embedding"] for k in embedded],
+        get_settings().convergence_similarity_threshold,
+    )
+
+    if not clusters.top:
+        response = ConvergenceResponse(
+            convergence_type="NONE",
+            agents=[],
+            similarity=0.0,
+            topic=topic or "",
+            evidence=[],
+        )
+        store_result(cache_key, response.model_dump())
+        return response
+
+    agents = clusters.top["agents"]
+    similarity = clusters.top["similarity"]
+    cluster_items = [k for k in embedded if k["agent"] in agents]
+    detected_topic = topic or ""
+    evidence = [{"agent": k["agent"], "text": k["content"][:200]} for k in cluster_items[:5]]
+
+    # A cluster exists - ask Claude only to name what they agree on
     try:
         claude = get_claude_service()
 
         knowledge_text = "\n".join([
             f"- {k['agent']}: {k['content'][:200]}"
-            for k in knowledge_items
+            for k in cluster_items
         ])
 
-        analysis_prompt = f"""Analyze these knowledge entries from different AI agents for convergence (agreement/alignment):
+        analysis_prompt = f"""These knowledge entries from different AI agents ({", ".join(agents)}) are semantically aligned:
 
 {knowledge_text}
 
 Respond in this exact format:
-CONVERGENCE: [NONE, HARMONY, or CONSENSUS]
-AGENTS: [comma-separated list of agreeing agents, or "none"]
-SIMILARITY: [0.0 to 1.0 score]
-TOPIC: [the topic they converge on, or "none"]
-EVIDENCE: [brief explanation]"""
+TOPIC: [the topic they converge on, in a few words]
+EVIDENCE: [one sentence on what they agree about]"""
 
         response = await claude.chat(
             messages=[{"role": "user", "content": analysis_prompt}],
             model="claude-3-haiku-20240307",
             system="You are an analyst detecting convergence patterns. Be precise and follow the format exactly.",
+            max_tokens=300,
         )
 
         content = ""
@@ -289,51 +352,27 @@ EVIDENCE: [brief explanation]"""
             if block.get("text"):
                 content += block["text"]
 
-        # Parse response
-        convergence_type = "NONE"
-        agents = []
-        similarity = 0.0
-        detected_topic = topic or ""
-        evidence = []
-
         for line in content.split("\n"):
-            if line.startswith("CONVERGENCE:"):
-                val = line.split(":", 1)[1].strip().upper()
-                if val in ["HARMONY", "CONSENSUS"]:
-                    convergence_type = val
-            elif line.startswith("AGENTS:"):
-                val = line.split(":", 1)[1].strip()
-                if val.lower() != "none":
-                    agents = [a.strip() for a in val.split(",")]
-            elif line.startswith("SIMILARITY:"):
-                try:
-                    similarity = float(line.split(":", 1)[1].strip())
-                except:
-                    pass
-            elif line.startswith("TOPIC:"):
+            if line.startswith("TOPIC:"):
                 val = line.split(":", 1)[1].strip()
-                if val.lower() != "none":
+                if val and val.lower() != "none" and not topic:
                     detected_topic = val
             elif line.startswith("EVIDENCE:"):
-                evidence.append({"text": line.split(":", 1)[1].strip()})
-
-        return ConvergenceResponse(
-            convergence_type=convergence_type,
-            agents=agents,
-            similarity=similarity,
-            topic=detected_topic,
-            evidence=evidence,
-        )
+                evidence.insert(0, {"text": line.split(":", 1)[1].strip()})
 
     except Exception as e:
-        logger.error(f"Convergence detection failed: {e}")
-        return ConvergenceResponse(
-            convergence_type="NONE",
-            agents=[],
-            similarity=0.0,
-            topic=topic or "",
-            evidence=[{"text": f"Analysis error: {str(e)}"}],
-        )
+        # The clustering result stands on its own; the summary is a nicety
+        logger.warning(f"Convergence summary failed: {e}")
+
+    response = ConvergenceResponse(
+        convergence_type=clusters.convergence_type,
+        agents=agents,
+        similarity=similarity,
+        topic=detected_topic,
+        evidence=evidence,
+    )
+    store_result(cache_key, response.model_dump())
+    return response
 
 
 @router.get("/threads")
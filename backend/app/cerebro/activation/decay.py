@@ -8,7 +8,9 @@ import time
 from datetime import datetime
 from typing import Optional
 
-from app.cerebro.config import LAYER_CONFIG
+import numpy as np
+
+from app.cerebro.config import ACTR_B_CONSTANT, ACTR_DECAY_RATE, ACTR_MIN_TIME_SECONDS, LAYER_CONFIG
 from app.cerebro.models.memory import MemoryNode, StrengthState
 from app.cerebro.activation.strength import base_level_activation, retrievability
 from app.cerebro.types import MemoryLayer
@@ -92,3 +94,48 @@ def apply_decay_tick(strength: StrengthState, current_time: Optional[float] = No
         last_activation=a,
         last_computed_at=now,
     )
+
+
+# =============================================================================
+# Batched (vectorized) versions for background sweeps
+# =============================================================================
+
+
+def batch_activation(
+    timestamps: np.ndarray,
+    compressed_count: np.ndarray,
+    compressed_avg_interval: np.ndarray,
+    now: float,
+    decay: float = ACTR_DECAY_RATE,
+) -> np.ndarray:
+    """ACT-R base-level activation for many memories at once.
+
+    Same result as compute_current_activation per row. `timestamps` is an
+    (n, k) array padded with NaN; rows with no accesses get -inf.
+    """
+    has_ts = ~np.isnan(timestamps)
+    ages = np.maximum(now - np.where(has_ts, timestamps, now), ACTR_MIN_TIME_SECONDS)
+    total = np.where(has_ts, ages ** (-decay), 0.0).sum(axis=1)
+
+    # Compressed accesses: spaced avg_interval apart before the oldest individual one
+    max_compressed = int(compressed_count.max()) if compressed_count.size else 0
+    if max_compressed > 0:
+        oldest = np.where(has_ts.any(axis=1), np.nanmin(np.where(has_ts, timestamps, np.inf), axis=1), now)
+        steps = np.arange(1, max_compressed + 1, dtype=np.float64)
+        ages = np.maximum(
+            (now - oldest)[:, None] + steps[None, :] * compressed_avg_interval[:, None],
+            ACTR_MIN_TIME_SECONDS,
+        )
+        mask = (steps[None, :] <= compressed_count[:, None]) & (compressed_avg_interval[:, None] > 0)
+        total += np.where(mask, ages ** (-decay), 0.0).sum(axis=1)
+
+    with np.errstate(divide="ignore"):
+        return np.where(total > 0, np.log(np.where(total > 0, total, 1.0)) + ACTR_B_CONSTANT, -np.inf)
+
+
+def batch_retrievability(last_access: np.ndarray, stability: np.ndarray, now: float) -> np.ndarray:
+    """FSRS retrievability for many memories (NaN last_access -> 0)."""
+    elapsed_days = np.maximum(now - np.nan_to_num(last_access, nan=now), 0) / 86400.0
+    safe_stability = np.where(stability > 0, stability, 1.0)
+    r = (1.0 + elapsed_days / (9.0 * safe_stability)) ** -1.0
+    return np.where(np.isnan(last_access) | (stability <= 0), 0.0, r)
@@ -31,6 +31,14 @@ SCORE_WEIGHT_ACTIVATION = 0.30  # ACT-R activation (base-level + associative)
 SCORE_WEIGHT_RETRIEVABILITY = 0.20  # FSRS retrievability (forgetting curve)
 SCORE_WEIGHT_SALIENCE = 0.15    # emotional salience metadata
 
+# =============================================================================
+# Hybrid Recall (lexical + vector, reciprocal rank fusion)
+# =============================================================================
+RECALL_RRF_K = 60                  # rank damping: fused = sum(w / (k + rank))
+RECALL_WEIGHT_VECTOR = 1.0         # default per-list weights; agents may override
+RECALL_WEIGHT_LEXICAL = 1.0
+RECALL_CANDIDATE_MULTIPLIER = 2    # each list contributes top_k * this candidates
+
 # =============================================================================
 # Spreading Activation
 # =============================================================================
@@ -82,6 +90,23 @@ LAYER_CONFIG = {
     },
 }
 
+# =============================================================================
+# Ingest deduplication (SimHash candidates, embedding confirmation)
+# =============================================================================
+DEDUP_SIMHASH_BANDS = 4           # 16-bit bands; SQL band indexes assume 4
+DEDUP_SIMHASH_MAX_DISTANCE = 12   # max differing bits for a candidate
+DEDUP_COSINE_THRESHOLD = 0.92     # embedding similarity for a near match; merged only if it adds no words
+                                  # (cosine alone merges updates - scripts/calibrate_dedup_threshold.py)
+DEDUP_MAX_CANDIDATES = 20
+DEDUP_ANN_CANDIDATES = 5          # nearest embeddings checked when no band candidate confirms
+
+# =============================================================================
+# Episodic capture
+# =============================================================================
+EPISODE_MAX_STEPS = 200                 # longer conversations roll over into a new episode
+TEMPORAL_LINK_HALF_LIFE_SECONDS = 600   # temporal link weight halves per this gap between steps
+TEMPORAL_LINK_MIN_WEIGHT = 0.1
+
 # =============================================================================
 # Dream Engine
 # =============================================================================
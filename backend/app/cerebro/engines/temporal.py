@@ -1,15 +1,20 @@
-"""SemanticEngine - Semantic knowledge management.
+"""SemanticEngine / TemporalEngine - Semantic knowledge and sequence.
 
 The temporal lobe: manages factual/conceptual memories, extracts concepts,
-creates semantic links between related knowledge.
+creates semantic links between related knowledge, and links memories that
+happened one after another.
 
-Adapted: concept extraction is pure logic (no storage calls).
-Link creation is handled by the async service layer.
+Adapted: concept extraction and link planning are pure logic (no storage
+calls). Link creation is handled by the async service layer.
 """
 
 import re
+from datetime import datetime
+from typing import Optional
 
+from app.cerebro.config import LINK_TYPE_WEIGHTS, TEMPORAL_LINK_HALF_LIFE_SECONDS, TEMPORAL_LINK_MIN_WEIGHT
 from app.cerebro.models.memory import MemoryNode
+from app.cerebro.types import LinkType
 
 
 # Common words to exclude from concept extraction
@@ -74,3 +79,33 @@ class SemanticEngine:
             promoted_at=node.promoted_at,
             link_count=node.link_count,
         )
+
+
+class TemporalEngine:
+    """Plans temporal links between consecutive memories of an episode.
+
+    Stateless version - the episode recorder writes the links.
+    """
+
+    @staticmethod
+    def link_weight(gap_seconds: float) -> float:
+        """Temporal link weight: the base weight, halved per half-life of gap."""
+        decay = 0.5 ** (max(gap_seconds, 0.0) / TEMPORAL_LINK_HALF_LIFE_SECONDS)
+        return max(round(LINK_TYPE_WEIGHTS[LinkType.TEMPORAL] * decay, 4), TEMPORAL_LINK_MIN_WEIGHT)
+
+    @staticmethod
+    def neighbor_links(
+        memories: list[tuple[str, datetime]],
+        previous: Optional[tuple[str, datetime]] = None,
+    ) -> list[tuple[str, str, float]]:
+        """(earlier, later, weight) for each consecutive pair of (memory_id, time).
+
+        `previous` is the last memory of the episode before this batch, so
+        sequences continue across flushes.
+        """
+        links = []
+        chain = ([previous] if previous else []) + memories
+        for (before, before_at), (after, after_at) in zip(chain, chain[1:]):
+            if before != after:
+                links.append((before, after, TemporalEngine.link_weight((after_at - before_at).total_seconds())))
+        return links
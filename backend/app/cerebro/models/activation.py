@@ -1,6 +1,6 @@
 """Activation and recall result models."""
 
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -55,6 +55,8 @@ class RecallResult(BaseModel):
     retrievability: float = 0.0
     salience: float = 0.0
     final_score: float = 0.0
+    relevance: float = 0.0  # reciprocal-rank fusion of vector and lexical rank, 0-1
+    lexical_rank: Optional[int] = None  # None when the full-text query didn't match
 
     # Metadata
     tags: list[str] = Field(default_factory=list)
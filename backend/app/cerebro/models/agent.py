@@ -16,6 +16,8 @@ class AgentProfile(BaseModel):
     origin_story: Optional[str] = None
     color: str = "#888888"
     symbol: str = "A"
+    recall_vector_weight: Optional[float] = Field(default=None, ge=0.0, description="RRF weight of vector rank (None = default)")
+    recall_lexical_weight: Optional[float] = Field(default=None, ge=0.0, description="RRF weight of full-text rank (None = default)")
     registered_at: datetime = Field(default_factory=datetime.now)
 
     model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
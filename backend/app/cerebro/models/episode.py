@@ -11,13 +11,14 @@ from app.cerebro.types import EmotionalValence
 
 class EpisodeStep(BaseModel):
     """A single step in an episodic sequence."""
-    memory_id: str
+    memory_id: Optional[str] = None  # None for steps with no memory (tool runs)
     position: int = Field(ge=0, description="Order in sequence (0-based)")
     timestamp: datetime = Field(default_factory=datetime.now)
     role: str = Field(
         default="event",
-        description="Role in the episode: event, context, outcome, reflection"
+        description="Role in the episode: event, context, action, outcome, reflection"
     )
+    summary: Optional[str] = None  # what happened, for steps without a memory
 
 
 class Episode(BaseModel):
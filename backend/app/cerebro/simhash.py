@@ -0,0 +1,76 @@
+"""SimHash fingerprints for near-duplicate memory detection.
+
+A 64-bit SimHash of word unigrams and bigrams: rephrasings of the same fact
+land a few bits apart, unrelated text ~32 bits apart. The fingerprint is
+split into DEDUP_SIMHASH_BANDS bands; two fingerprints within
+(bands - 1) bits of each other share at least one whole band, so a lookup
+on band equality (indexed) finds every very close candidate. Ordinary
+rephrasings often land 10-20 bits apart and share no band; ingest covers
+those with an indexed vector lookup (PgGraphStore.nearest_by_embedding).
+
+Neither signal tells a restatement from an update: "my favorite color is
+blue" and "... is green" are a few bits and ~0.95 cosine apart. `novel_terms`
+is the lexical check ingest applies before merging.
+"""
+
+import hashlib
+import re
+from collections import Counter
+
+import numpy as np
+
+from app.cerebro.config import DEDUP_SIMHASH_BANDS
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Function words a restatement may add or drop without changing the fact
+_FUNCTION_WORDS = frozenset("""
+    a an the this that these those it its i me my we us our you your he she they them their
+    is are was were be been being am do does did has have had
+    of to in on at by for from with about as into over so and or but then than also just
+    very really now currently still what which who s m re ve ll d
+""".split())
+_BITS = np.arange(64, dtype=np.uint64)
+BAND_BITS = 64 // DEDUP_SIMHASH_BANDS
+
+
+def _features(text: str) -> Counter:
+    tokens = _TOKEN_RE.findall(text.lower())
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+def simhash64(text: str) -> int:
+    """Signed 64-bit SimHash of `text` (fits a BIGINT column)."""
+    features = _features(text)
+    if not features:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big") for f in features],
+        dtype=np.uint64,
+    )
+    weights = np.array(list(features.values()), dtype=np.int64)
+    bits = ((hashes[:, None] >> _BITS[None, :]) & np.uint64(1)).astype(np.int64)
+    votes = (weights[:, None] * (2 * bits - 1)).sum(axis=0)
+    value = sum(1 << i for i in range(64) if votes[i] > 0)
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def bands(fingerprint: int) -> list[int]:
+    """Band values, lowest bits first (matches the SQL band expressions)."""
+    unsigned = fingerprint & ((1 << 64) - 1)
+    mask = (1 << BAND_BITS) - 1
+    return [(unsigned >> (BAND_BITS * i)) & mask for i in range(DEDUP_SIMHASH_BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+def novel_terms(new: str, old: str) -> set[str]:
+    """Words of `new` missing from `old`, function words ignored.
+
+    Empty when `new` only restates `old`; otherwise the words that may carry
+    an update ("green" for "my favorite color is green" against "... is blue").
+    """
+    return set(_TOKEN_RE.findall(new.lower())) - set(_TOKEN_RE.findall(old.lower())) - _FUNCTION_WORDS
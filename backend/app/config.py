@@ -99,10 +99,36 @@ class Settings(BaseSettings):
     # Tool execution
     tool_execution_timeout: int = 120  # seconds
 
+    # Code sandbox - pre-forked worker processes for code_run/code_eval
+    sandbox_pool_size: int = 2
+    sandbox_cpu_seconds: int = 10  # CPU budget per snippet (RLIMIT_CPU)
+    sandbox_memory_mb: int = 256  # Address-space cap per worker (RLIMIT_AS)
+
     # Mount path is /data on Railway volume - use directly to avoid permission issues
     vault_path: str = "/data"
     max_file_size_bytes: int = 104_857_600  # 100MB
     default_quota_bytes: int = 5_368_709_120  # 5GB per user
+    storage_reconcile_interval_hours: float = 6  # usage counter drift check (0 = off)
+    vault_access_flush_seconds: float = 10  # write-behind access_count flush interval
+
+    # Council - round context sent to every agent
+    council_verbatim_rounds: int = 2  # most recent rounds quoted in full; older ones are digested
+    council_context_token_budget: int = 6000  # approx. tokens of discussion history per agent prompt
+    convergence_similarity_threshold: float = 0.85  # cosine similarity at which two agents "agree" (topic-level; consensus also needs explicit agreement)
+
+    # Background session runner (auto-deliberate / auto-jam)
+    session_job_workers: int = 4  # concurrent session jobs per process
+    session_jobs_per_user: int = 2  # concurrent session jobs per user
+
+    # CerebroCortex - offline dream consolidation
+    cerebro_dream_interval_hours: float = 24  # per-user dream cycle cadence (0 = off)
+    cerebro_dream_manual_cooldown_hours: float = 1  # min gap before POST /cortex/dream may run another cycle
+    cerebro_layer_sweep_seconds: float = 60  # layer promotion/decay sweep tick (0 = off)
+    cerebro_layer_sweep_batch: int = 2000  # memory nodes evaluated per tick
+    cerebro_retention_floor: float = 0.05  # layer retention below which sensory/working nodes are archived
+    cerebro_episode_idle_minutes: float = 30  # chat episodes close after this long without a turn (0 = capture off)
+    cerebro_partitions: int = 0  # HASH(user_id) partitions for nodes/links; >0 migrates the plain tables online (0 = off)
+    cerebro_partition_copy_batch: int = 5000  # rows copied per tick while partitioning
 
     class Config:
         env_file = ".env"
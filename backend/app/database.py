@@ -1025,6 +1025,687 @@ END $$;
         """)
         migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_dream_user ON cerebro_dream_log(user_id);")
 
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v120: Content index (trigram substring search over file chunks)
+        # Replaces per-query disk scans in vault_search and /files/search/content
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            DO $$
+            BEGIN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'pg_trgm extension not available, content search falls back to sequential ILIKE';
+            END $$;
+        """)
+        migrations.append("ALTER TABLE files ADD COLUMN IF NOT EXISTS content_index_checksum VARCHAR(64);")
+        migrations.append("ALTER TABLE files ADD COLUMN IF NOT EXISTS content_index_failed_checksum VARCHAR(64);")
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS file_chunks (
+                id BIGSERIAL PRIMARY KEY,
+                file_id UUID NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                chunk_index INTEGER NOT NULL,
+                start_line INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                lead TEXT[] NOT NULL DEFAULT '{}',
+                tail TEXT[] NOT NULL DEFAULT '{}'
+            );
+        """)
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_file_chunks_file ON file_chunks(file_id, chunk_index);")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_file_chunks_user ON file_chunks(user_id);")
+        # Search is substring (ILIKE, trigram index); the earlier tsvector was never queried
+        migrations.append("DROP INDEX IF EXISTS idx_file_chunks_tsv;")
+        migrations.append("ALTER TABLE file_chunks DROP COLUMN IF EXISTS content_tsv;")
+        migrations.append("""
+            DO $$
+            BEGIN
+                CREATE INDEX IF NOT EXISTS idx_file_chunks_trgm ON file_chunks USING GIN (content gin_trgm_ops);
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'Trigram index skipped: %', SQLERRM;
+            END $$;
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v121: Semantic index (embedded file chunks for RAG)
+        # Replaces the keyword/disk-read loop in /files/context/relevant
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE files ADD COLUMN IF NOT EXISTS semantic_index_checksum VARCHAR(64);")
+        migrations.append("ALTER TABLE files ADD COLUMN IF NOT EXISTS semantic_index_failed_at TIMESTAMP WITH TIME ZONE;")
+        # Embeddings from a different model dimension are useless - drop and re-embed
+        migrations.append(f"""
+            DO $$
+            DECLARE
+                current_dim INTEGER;
+            BEGIN
+                SELECT atttypmod INTO current_dim
+                FROM pg_attribute
+                WHERE attrelid = to_regclass('file_embeddings')
+                  AND attname = 'embedding';
+
+                IF current_dim IS NOT NULL AND current_dim != {embed_dim} THEN
+                    RAISE NOTICE 'Rebuilding file_embeddings for % dimensions', {embed_dim};
+                    DROP TABLE file_embeddings;
+                    UPDATE files SET semantic_index_checksum = NULL;
+                END IF;
+            END $$;
+        """)
+        migrations.append(f"""
+            DO $$
+            BEGIN
+                CREATE TABLE IF NOT EXISTS file_embeddings (
+                    id BIGSERIAL PRIMARY KEY,
+                    file_id UUID NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                    chunk_index INTEGER NOT NULL,
+                    start_line INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    embedding vector({embed_dim}) NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_file_embeddings_file ON file_embeddings(file_id, chunk_index);
+                CREATE INDEX IF NOT EXISTS idx_file_embeddings_user ON file_embeddings(user_id);
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'file_embeddings table creation failed (pgvector may not be available)';
+            END $$;
+        """)
+        migrations.append("""
+            DO $$
+            BEGIN
+                CREATE INDEX IF NOT EXISTS idx_file_embeddings_hnsw
+                    ON file_embeddings USING hnsw (embedding vector_cosine_ops);
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'HNSW index skipped (pgvector < 0.5?): %', SQLERRM;
+            END $$;
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v122: Content-addressed blob store
+        # files.storage_path points at blobs/<sha[:2]>/<sha>; rows count references
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS vault_blobs (
+                checksum VARCHAR(64) PRIMARY KEY,
+                size_bytes BIGINT NOT NULL,
+                ref_count INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                released_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_vault_blobs_garbage ON vault_blobs(checksum) WHERE ref_count <= 0;")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v123: Maintained per-user storage usage
+        # Adjusted with every file write/delete; quota checked by conditional UPDATE
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS user_storage_usage (
+                user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                used_bytes BIGINT NOT NULL DEFAULT 0,
+                file_count INTEGER NOT NULL DEFAULT 0,
+                by_type JSONB NOT NULL DEFAULT '{}'::jsonb,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                reconciled_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+        # Seed from the real sums once; existing rows are left to the reconciler
+        migrations.append("""
+            INSERT INTO user_storage_usage (user_id, used_bytes, file_count, by_type, reconciled_at)
+            SELECT user_id,
+                   SUM(bytes),
+                   SUM(files),
+                   jsonb_object_agg(COALESCE(file_type, 'other'), jsonb_build_object('bytes', bytes, 'files', files)),
+                   NOW()
+            FROM (
+                SELECT user_id, file_type, SUM(size_bytes) AS bytes, COUNT(*) AS files
+                FROM files
+                GROUP BY user_id, file_type
+            ) t
+            GROUP BY user_id
+            ON CONFLICT (user_id) DO NOTHING;
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v124: Background disk reclamation jobs for bulk deletes
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS vault_reclaim_jobs (
+                id UUID PRIMARY KEY,
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                checksums TEXT[] NOT NULL DEFAULT '{}',
+                legacy_paths TEXT[] NOT NULL DEFAULT '{}',
+                files_deleted INTEGER NOT NULL DEFAULT 0,
+                folders_deleted INTEGER NOT NULL DEFAULT 0,
+                blobs_deleted INTEGER NOT NULL DEFAULT 0,
+                paths_removed INTEGER NOT NULL DEFAULT 0,
+                bytes_freed BIGINT NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                started_at TIMESTAMP WITH TIME ZONE,
+                finished_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_vault_reclaim_jobs_open ON vault_reclaim_jobs(created_at) WHERE status IN ('pending', 'running');")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_vault_reclaim_jobs_user ON vault_reclaim_jobs(user_id, created_at DESC);")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v125: Line-offset index per blob (ranged reads / splice edits)
+        # Keyed by content checksum; dropped with the blob
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS vault_line_index (
+                checksum VARCHAR(64) PRIMARY KEY REFERENCES vault_blobs(checksum) ON DELETE CASCADE,
+                size_bytes BIGINT NOT NULL,
+                line_count INTEGER NOT NULL,
+                terminated BOOLEAN NOT NULL,
+                offset_width SMALLINT NOT NULL,
+                offsets BYTEA NOT NULL,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            );
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # THE VAULT - v126: Vault version counter for cached project context
+        # Triggers bump user_storage_usage.vault_version on structural changes and
+        # stamp the affected folders (root = all-zero uuid) with the new version
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE user_storage_usage ADD COLUMN IF NOT EXISTS vault_version BIGINT NOT NULL DEFAULT 0;")
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS vault_folder_versions (
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                folder_key UUID NOT NULL,
+                version BIGINT NOT NULL,
+                PRIMARY KEY (user_id, folder_key)
+            );
+        """)
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_vault_folder_versions_version ON vault_folder_versions(user_id, version);")
+        migrations.append("""
+            CREATE OR REPLACE FUNCTION vault_bump_version() RETURNS trigger AS $$
+            DECLARE
+                uid UUID;
+                v BIGINT;
+                keys UUID[] := '{}';
+                root CONSTANT UUID := '00000000-0000-0000-0000-000000000000';
+            BEGIN
+                IF TG_OP = 'DELETE' THEN uid := OLD.user_id; ELSE uid := NEW.user_id; END IF;
+                -- Rows cascading away with their user: nothing to track
+                IF NOT EXISTS (SELECT 1 FROM users WHERE id = uid) THEN
+                    RETURN NULL;
+                END IF;
+
+                IF TG_TABLE_NAME = 'files' THEN
+                    IF TG_OP <> 'INSERT' THEN keys := keys || COALESCE(OLD.folder_id, root); END IF;
+                    IF TG_OP <> 'DELETE' THEN keys := keys || COALESCE(NEW.folder_id, root); END IF;
+                ELSE
+                    IF TG_OP <> 'INSERT' THEN keys := keys || COALESCE(OLD.parent_id, root) || OLD.id; END IF;
+                    IF TG_OP <> 'DELETE' THEN keys := keys || COALESCE(NEW.parent_id, root) || NEW.id; END IF;
+                END IF;
+
+                INSERT INTO user_storage_usage (user_id, vault_version) VALUES (uid, 1)
+                ON CONFLICT (user_id) DO UPDATE SET vault_version = user_storage_usage.vault_version + 1
+                RETURNING vault_version INTO v;
+
+                INSERT INTO vault_folder_versions (user_id, folder_key, version)
+                SELECT DISTINCT uid, k, v FROM unnest(keys) AS k
+                ON CONFLICT (user_id, folder_key) DO UPDATE SET version = EXCLUDED.version;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        migrations.append("""
+            DO $$ BEGIN
+                DROP TRIGGER IF EXISTS trg_files_vault_version ON files;
+                CREATE TRIGGER trg_files_vault_version
+                    AFTER INSERT OR DELETE ON files
+                    FOR EACH ROW EXECUTE FUNCTION vault_bump_version();
+                DROP TRIGGER IF EXISTS trg_files_vault_version_upd ON files;
+                CREATE TRIGGER trg_files_vault_version_upd
+                    AFTER UPDATE ON files
+                    FOR EACH ROW
+                    WHEN (OLD.name IS DISTINCT FROM NEW.name
+                          OR OLD.folder_id IS DISTINCT FROM NEW.folder_id
+                          OR OLD.checksum IS DISTINCT FROM NEW.checksum
+                          OR OLD.size_bytes IS DISTINCT FROM NEW.size_bytes
+                          OR OLD.file_type IS DISTINCT FROM NEW.file_type
+                          OR OLD.storage_path IS DISTINCT FROM NEW.storage_path
+                          OR OLD.is_archived IS DISTINCT FROM NEW.is_archived)
+                    EXECUTE FUNCTION vault_bump_version();
+                DROP TRIGGER IF EXISTS trg_folders_vault_version ON folders;
+                CREATE TRIGGER trg_folders_vault_version
+                    AFTER INSERT OR DELETE ON folders
+                    FOR EACH ROW EXECUTE FUNCTION vault_bump_version();
+                DROP TRIGGER IF EXISTS trg_folders_vault_version_upd ON folders;
+                CREATE TRIGGER trg_folders_vault_version_upd
+                    AFTER UPDATE ON folders
+                    FOR EACH ROW
+                    WHEN (OLD.name IS DISTINCT FROM NEW.name
+                          OR OLD.parent_id IS DISTINCT FROM NEW.parent_id
+                          OR OLD.is_archived IS DISTINCT FROM NEW.is_archived)
+                    EXECUTE FUNCTION vault_bump_version();
+            END $$;
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # COUNCIL DELIBERATION - v127: Rolling context digest
+        # Older rounds are summarised once into the session instead of being
+        # re-sent verbatim to every agent on every round
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE deliberation_sessions ADD COLUMN IF NOT EXISTS context_digest TEXT;")
+        migrations.append("ALTER TABLE deliberation_sessions ADD COLUMN IF NOT EXISTS digest_through_round INTEGER NOT NULL DEFAULT 0;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_deliberation_rounds_session_round ON deliberation_rounds(session_id, round_number);")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_session_messages_round ON session_messages(round_id, created_at);")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # SESSION JOBS - v128: Durable runner for auto-deliberate / auto-jam
+        # One row per requested run; checkpointed after every round and
+        # re-claimed when its worker's heartbeat goes stale
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS session_jobs (
+                id UUID PRIMARY KEY,
+                kind VARCHAR(20) NOT NULL,
+                session_id UUID NOT NULL,
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                rounds_requested INTEGER NOT NULL DEFAULT 0,
+                rounds_done INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                started_at TIMESTAMP WITH TIME ZONE,
+                heartbeat_at TIMESTAMP WITH TIME ZONE,
+                finished_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+        migrations.append("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_session_jobs_active
+            ON session_jobs(kind, session_id) WHERE status IN ('queued', 'running', 'paused');
+        """)
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_session_jobs_status ON session_jobs(status, created_at);")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_session_jobs_session ON session_jobs(kind, session_id, created_at DESC);")
+        migrations.append("ALTER TABLE session_jobs ADD COLUMN IF NOT EXISTS claim_token UUID;")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v129: Dream cycle log (one row per phase per run)
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE cerebro_dream_log ADD COLUMN IF NOT EXISTS run_id UUID;")
+        migrations.append("ALTER TABLE cerebro_dream_log ADD COLUMN IF NOT EXISTS duration_ms INTEGER DEFAULT 0;")
+        migrations.append("ALTER TABLE cerebro_dream_log ADD COLUMN IF NOT EXISTS nodes_before INTEGER DEFAULT 0;")
+        migrations.append("ALTER TABLE cerebro_dream_log ADD COLUMN IF NOT EXISTS nodes_after INTEGER DEFAULT 0;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_dream_user_started ON cerebro_dream_log(user_id, started_at DESC);")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v130: Layer sweeper (archived nodes leave the hot set)
+        # Partial indexes cover only live nodes; the sweep cursor is one row
+        # locked per tick
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE cerebro_memory_nodes ADD COLUMN IF NOT EXISTS archived BOOLEAN NOT NULL DEFAULT FALSE;")
+        migrations.append("ALTER TABLE cerebro_memory_nodes ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE;")
+        migrations.append("ALTER TABLE cerebro_memory_nodes ADD COLUMN IF NOT EXISTS demoted_at TIMESTAMP WITH TIME ZONE;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_hot ON cerebro_memory_nodes(user_id, layer) WHERE NOT archived;")
+        migrations.append("""
+            DO $$
+            BEGIN
+                CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_hot_hnsw
+                    ON cerebro_memory_nodes USING hnsw (embedding vector_cosine_ops)
+                    WHERE NOT archived;
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'Cerebro HNSW index skipped (pgvector < 0.5?): %', SQLERRM;
+            END $$;
+        """)
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_sweep_state (
+                name VARCHAR(50) PRIMARY KEY,
+                cursor_id VARCHAR(50),
+                cursor_user UUID,
+                passes INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            );
+        """)
+        migrations.append("INSERT INTO cerebro_sweep_state (name) VALUES ('layers') ON CONFLICT (name) DO NOTHING;")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v131: Access history as float8[] + SQL ACT-R/FSRS
+        # access_timestamps_json is drained into the array column (and left
+        # empty); cerebro_base_level() = ln(Σ t_k^-d) incl. compressed history
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE cerebro_memory_nodes ADD COLUMN IF NOT EXISTS access_timestamps FLOAT8[] NOT NULL DEFAULT '{}';")
+        migrations.append("""
+            UPDATE cerebro_memory_nodes SET
+                access_timestamps = ARRAY(
+                    SELECT CAST(t AS float8)
+                    FROM jsonb_array_elements_text(access_timestamps_json) AS t
+                    ORDER BY 1
+                ),
+                access_timestamps_json = '[]'::jsonb
+            WHERE access_timestamps_json <> '[]'::jsonb;
+        """)
+        migrations.append("""
+            CREATE OR REPLACE FUNCTION cerebro_base_level(
+                ts FLOAT8[], compressed_count INTEGER, compressed_avg_interval FLOAT8,
+                now_ts FLOAT8, decay FLOAT8 DEFAULT 0.5, min_t FLOAT8 DEFAULT 1.0
+            ) RETURNS FLOAT8
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+                SELECT CASE WHEN s.total > 0 THEN ln(s.total) END
+                FROM (
+                    SELECT COALESCE((
+                        SELECT SUM(power(GREATEST(now_ts - t, min_t), -decay)) FROM unnest(ts) AS t
+                    ), 0) + CASE
+                        WHEN compressed_count > 0 AND compressed_avg_interval > 0 THEN (
+                            SELECT SUM(power(GREATEST(
+                                now_ts - COALESCE((SELECT MIN(t) FROM unnest(ts) AS t), now_ts)
+                                    + k * compressed_avg_interval,
+                                min_t), -decay))
+                            FROM generate_series(1, compressed_count) AS k
+                        )
+                        ELSE 0
+                    END AS total
+                ) s
+            $$;
+        """)
+        migrations.append("""
+            CREATE OR REPLACE FUNCTION cerebro_retrievability(
+                ts FLOAT8[], stability FLOAT8, now_ts FLOAT8
+            ) RETURNS FLOAT8
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+                SELECT CASE
+                    WHEN COALESCE(cardinality(ts), 0) = 0 OR stability <= 0 THEN 0.0
+                    ELSE power(
+                        1.0 + GREATEST(now_ts - (SELECT MAX(t) FROM unnest(ts) AS t), 0) / 86400.0 / (9.0 * stability),
+                        -1.0)
+                END
+            $$;
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v132: SimHash near-duplicate gate for remember()
+        # One expression index per 16-bit band: a lookup is a BitmapOr of four
+        # equality scans within the user
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE cerebro_memory_nodes ADD COLUMN IF NOT EXISTS simhash BIGINT;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_simhash_b0 ON cerebro_memory_nodes(user_id, (simhash & 65535));")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_simhash_b1 ON cerebro_memory_nodes(user_id, ((simhash >> 16) & 65535));")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_simhash_b2 ON cerebro_memory_nodes(user_id, ((simhash >> 32) & 65535));")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_simhash_b3 ON cerebro_memory_nodes(user_id, ((simhash >> 48) & 65535));")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_simhash_missing ON cerebro_memory_nodes(id) WHERE simhash IS NULL;")
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_dedup_stats (
+                user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                checks BIGINT NOT NULL DEFAULT 0,
+                exact_hits BIGINT NOT NULL DEFAULT 0,
+                near_hits BIGINT NOT NULL DEFAULT 0,
+                last_hit_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v133: Trigger-maintained stats counters
+        # One row per (user, dimension, key) - e.g. ('layers', 'working') - kept
+        # current by row triggers on nodes/links/episodes, plus a per-user
+        # cortex version bumped on every counted change (and on dedup stats)
+        # so cached dashboard stats can be revalidated with one lookup.
+        # Triggers take the version row lock before touching counters, giving
+        # writers and the reconciler a single lock order.
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_cortex_versions (
+                user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                version BIGINT NOT NULL DEFAULT 0
+            );
+        """)
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_stat_counts (
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                dim VARCHAR(20) NOT NULL,
+                key VARCHAR(50) NOT NULL DEFAULT '',
+                count BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, dim, key)
+            );
+        """)
+        migrations.append("""
+            CREATE OR REPLACE FUNCTION cerebro_bump_cortex_version(uid UUID) RETURNS BOOLEAN AS $$
+            BEGIN
+                -- Rows cascading away with their user: nothing to track
+                IF NOT EXISTS (SELECT 1 FROM users WHERE id = uid) THEN
+                    RETURN FALSE;
+                END IF;
+                INSERT INTO cerebro_cortex_versions (user_id, version) VALUES (uid, 1)
+                ON CONFLICT (user_id) DO UPDATE SET version = cerebro_cortex_versions.version + 1;
+                RETURN TRUE;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        migrations.append("""
+            CREATE OR REPLACE FUNCTION cerebro_count(uid UUID, d TEXT, k TEXT, delta BIGINT) RETURNS VOID AS $$
+            BEGIN
+                INSERT INTO cerebro_stat_counts (user_id, dim, key, count)
+                VALUES (uid, d, COALESCE(k, ''), delta)
+                ON CONFLICT (user_id, dim, key) DO UPDATE SET count = cerebro_stat_counts.count + EXCLUDED.count;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        migrations.append("""
+            CREATE OR REPLACE FUNCTION cerebro_count_stats() RETURNS trigger AS $$
+            DECLARE
+                uid UUID;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN uid := OLD.user_id; ELSE uid := NEW.user_id; END IF;
+                IF NOT cerebro_bump_cortex_version(uid) THEN
+                    RETURN NULL;
+                END IF;
+                -- Dispatch on the trigger argument, not TG_TABLE_NAME: row
+                -- triggers on a partitioned table fire with the partition's name
+                IF TG_ARGV[0] = 'dedup' THEN
+                    RETURN NULL;
+                END IF;
+
+                IF TG_ARGV[0] = 'nodes' THEN
+                    IF TG_OP <> 'INSERT' THEN
+                        PERFORM cerebro_count(uid, 'memory_types', OLD.memory_type, -1);
+                        PERFORM cerebro_count(uid, 'layers', OLD.layer, -1);
+                        PERFORM cerebro_count(uid, 'visibility', OLD.visibility, -1);
+                        PERFORM cerebro_count(uid, 'agents', OLD.agent_id, -1);
+                    END IF;
+                    IF TG_OP <> 'DELETE' THEN
+                        PERFORM cerebro_count(uid, 'memory_types', NEW.memory_type, 1);
+                        PERFORM cerebro_count(uid, 'layers', NEW.layer, 1);
+                        PERFORM cerebro_count(uid, 'visibility', NEW.visibility, 1);
+                        PERFORM cerebro_count(uid, 'agents', NEW.agent_id, 1);
+                    END IF;
+                    IF TG_OP = 'INSERT' THEN PERFORM cerebro_count(uid, 'nodes', '', 1); END IF;
+                    IF TG_OP = 'DELETE' THEN PERFORM cerebro_count(uid, 'nodes', '', -1); END IF;
+                ELSIF TG_ARGV[0] = 'links' THEN
+                    IF TG_OP <> 'INSERT' THEN PERFORM cerebro_count(uid, 'link_types', OLD.link_type, -1); END IF;
+                    IF TG_OP <> 'DELETE' THEN PERFORM cerebro_count(uid, 'link_types', NEW.link_type, 1); END IF;
+                    IF TG_OP = 'INSERT' THEN PERFORM cerebro_count(uid, 'links', '', 1); END IF;
+                    IF TG_OP = 'DELETE' THEN PERFORM cerebro_count(uid, 'links', '', -1); END IF;
+                ELSE
+                    PERFORM cerebro_count(uid, 'episodes', '', CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        migrations.append("""
+            DO $$ BEGIN
+                DROP TRIGGER IF EXISTS trg_cerebro_nodes_stats ON cerebro_memory_nodes;
+                CREATE TRIGGER trg_cerebro_nodes_stats
+                    AFTER INSERT OR DELETE ON cerebro_memory_nodes
+                    FOR EACH ROW EXECUTE FUNCTION cerebro_count_stats('nodes');
+                DROP TRIGGER IF EXISTS trg_cerebro_nodes_stats_upd ON cerebro_memory_nodes;
+                CREATE TRIGGER trg_cerebro_nodes_stats_upd
+                    AFTER UPDATE OF memory_type, layer, visibility, agent_id ON cerebro_memory_nodes
+                    FOR EACH ROW
+                    WHEN (OLD.memory_type IS DISTINCT FROM NEW.memory_type
+                          OR OLD.layer IS DISTINCT FROM NEW.layer
+                          OR OLD.visibility IS DISTINCT FROM NEW.visibility
+                          OR OLD.agent_id IS DISTINCT FROM NEW.agent_id)
+                    EXECUTE FUNCTION cerebro_count_stats('nodes');
+                DROP TRIGGER IF EXISTS trg_cerebro_links_stats ON cerebro_associative_links;
+                CREATE TRIGGER trg_cerebro_links_stats
+                    AFTER INSERT OR DELETE ON cerebro_associative_links
+                    FOR EACH ROW EXECUTE FUNCTION cerebro_count_stats('links');
+                DROP TRIGGER IF EXISTS trg_cerebro_links_stats_upd ON cerebro_associative_links;
+                CREATE TRIGGER trg_cerebro_links_stats_upd
+                    AFTER UPDATE OF link_type ON cerebro_associative_links
+                    FOR EACH ROW
+                    WHEN (OLD.link_type IS DISTINCT FROM NEW.link_type)
+                    EXECUTE FUNCTION cerebro_count_stats('links');
+                DROP TRIGGER IF EXISTS trg_cerebro_episodes_stats ON cerebro_episodes;
+                CREATE TRIGGER trg_cerebro_episodes_stats
+                    AFTER INSERT OR DELETE ON cerebro_episodes
+                    FOR EACH ROW EXECUTE FUNCTION cerebro_count_stats('episodes');
+                DROP TRIGGER IF EXISTS trg_cerebro_dedup_stats_version ON cerebro_dedup_stats;
+                CREATE TRIGGER trg_cerebro_dedup_stats_version
+                    AFTER INSERT OR UPDATE ON cerebro_dedup_stats
+                    FOR EACH ROW EXECUTE FUNCTION cerebro_count_stats('dedup');
+            END $$;
+        """)
+        # First deploy only: seed counters for existing graphs. Drift from
+        # writes racing this seed is repaired by the nightly reconcile.
+        migrations.append("""
+            INSERT INTO cerebro_stat_counts (user_id, dim, key, count)
+            SELECT user_id, dim, key, count FROM (
+                SELECT user_id,
+                       CASE WHEN GROUPING(memory_type) = 0 THEN 'memory_types'
+                            WHEN GROUPING(layer) = 0 THEN 'layers'
+                            WHEN GROUPING(visibility) = 0 THEN 'visibility'
+                            WHEN GROUPING(agent_id) = 0 THEN 'agents'
+                            ELSE 'nodes' END AS dim,
+                       COALESCE(memory_type, layer, visibility, agent_id, '') AS key,
+                       COUNT(*) AS count
+                FROM cerebro_memory_nodes
+                GROUP BY GROUPING SETS ((user_id, memory_type), (user_id, layer), (user_id, visibility), (user_id, agent_id), (user_id))
+                UNION ALL
+                SELECT user_id,
+                       CASE WHEN GROUPING(link_type) = 0 THEN 'link_types' ELSE 'links' END,
+                       COALESCE(link_type, ''),
+                       COUNT(*)
+                FROM cerebro_associative_links
+                GROUP BY GROUPING SETS ((user_id, link_type), (user_id))
+                UNION ALL
+                SELECT user_id, 'episodes', '', COUNT(*) FROM cerebro_episodes GROUP BY user_id
+            ) AS recount
+            WHERE NOT EXISTS (SELECT 1 FROM cerebro_stat_counts)
+            ON CONFLICT (user_id, dim, key) DO NOTHING;
+        """)
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v134: Full-text leg of hybrid recall
+        # 'simple' config (no stemming or stopwords) so identifiers, names and
+        # code symbols match verbatim; per-agent RRF weights for the fusion
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            ALTER TABLE cerebro_memory_nodes ADD COLUMN IF NOT EXISTS content_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('simple', COALESCE(content, ''))) STORED;
+        """)
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_nodes_content_tsv ON cerebro_memory_nodes USING GIN (content_tsv) WHERE NOT archived;")
+        migrations.append("ALTER TABLE cerebro_agents ADD COLUMN IF NOT EXISTS recall_vector_weight FLOAT;")
+        migrations.append("ALTER TABLE cerebro_agents ADD COLUMN IF NOT EXISTS recall_lexical_weight FLOAT;")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v135: Bulk MemoryCore import
+        # NDJSON uploads are COPYed into per-import staging tables, embedded in
+        # batches by a session job, then merged into the graph in one step
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_imports (
+                id UUID PRIMARY KEY,
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                source_model VARCHAR(200),
+                staged_nodes INTEGER NOT NULL DEFAULT 0,
+                staged_links INTEGER NOT NULL DEFAULT 0,
+                reused_embeddings INTEGER NOT NULL DEFAULT 0,
+                embedded INTEGER NOT NULL DEFAULT 0,
+                nodes_imported INTEGER NOT NULL DEFAULT 0,
+                nodes_skipped INTEGER NOT NULL DEFAULT 0,
+                links_imported INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                merged_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+        migrations.append("ALTER TABLE cerebro_imports ADD COLUMN IF NOT EXISTS links_dropped INTEGER NOT NULL DEFAULT 0;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_imports_user ON cerebro_imports(user_id, created_at DESC);")
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_import_nodes (
+                import_id UUID NOT NULL REFERENCES cerebro_imports(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                id VARCHAR(50) NOT NULL,
+                content TEXT NOT NULL,
+                memory_type VARCHAR(20),
+                layer VARCHAR(20),
+                visibility VARCHAR(20),
+                agent_id VARCHAR(50),
+                tags JSONB,
+                concepts JSONB,
+                valence VARCHAR(20),
+                arousal FLOAT,
+                salience FLOAT,
+                access_count INTEGER,
+                stability FLOAT,
+                difficulty FLOAT,
+                access_timestamps FLOAT8[],
+                created_at TIMESTAMP WITH TIME ZONE,
+                embedding FLOAT4[],
+                embed_attempted BOOLEAN NOT NULL DEFAULT FALSE,
+                PRIMARY KEY (import_id, seq)
+            );
+        """)
+        migrations.append("""
+            CREATE INDEX IF NOT EXISTS idx_cerebro_import_nodes_pending
+            ON cerebro_import_nodes(import_id, seq) WHERE embedding IS NULL AND NOT embed_attempted;
+        """)
+        # Links name memories by their exported id; the merge maps it to the id stored
+        migrations.append("ALTER TABLE cerebro_import_nodes ADD COLUMN IF NOT EXISTS original_id TEXT;")
+        migrations.append("ALTER TABLE cerebro_import_nodes ADD COLUMN IF NOT EXISTS final_id VARCHAR(50);")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_import_nodes_original ON cerebro_import_nodes(import_id, original_id);")
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_import_links (
+                import_id UUID NOT NULL REFERENCES cerebro_imports(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                source_id TEXT NOT NULL,
+                target_id TEXT NOT NULL,
+                link_type VARCHAR(20) NOT NULL,
+                weight FLOAT,
+                evidence TEXT,
+                PRIMARY KEY (import_id, seq)
+            );
+        """)
+        migrations.append("ALTER TABLE cerebro_import_links ALTER COLUMN source_id TYPE TEXT, ALTER COLUMN target_id TYPE TEXT;")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v136: Episode capture
+        # Chat turns and tool runs are recorded as episode steps (tool steps
+        # carry a summary instead of a memory). Open episodes are extended
+        # per turn and closed on inactivity; replay only takes closed ones.
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("ALTER TABLE cerebro_episode_steps ALTER COLUMN memory_id DROP NOT NULL;")
+        migrations.append("ALTER TABLE cerebro_episode_steps ADD COLUMN IF NOT EXISTS summary TEXT;")
+        # Existing episodes were written whole, so they count as closed
+        migrations.append("ALTER TABLE cerebro_episodes ADD COLUMN IF NOT EXISTS closed BOOLEAN NOT NULL DEFAULT TRUE;")
+        migrations.append("ALTER TABLE cerebro_episodes ADD COLUMN IF NOT EXISTS step_count INTEGER NOT NULL DEFAULT 0;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_episodes_time ON cerebro_episodes(user_id, started_at DESC);")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_episodes_open ON cerebro_episodes(ended_at) WHERE NOT closed;")
+        migrations.append("CREATE INDEX IF NOT EXISTS idx_cerebro_steps_episode_pos ON cerebro_episode_steps(user_id, episode_id, position);")
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # CEREBROCORTEX - v137: Hash partitioning by user_id
+        # Nodes and links are moved to HASH (user_id) partitioned tables online
+        # by app.services.cerebro.partitioning (opt-in: CEREBRO_PARTITIONS);
+        # one row per table tracks the copy cursor and phase
+        # ═══════════════════════════════════════════════════════════════════════
+        migrations.append("""
+            CREATE TABLE IF NOT EXISTS cerebro_partition_state (
+                table_name VARCHAR(63) PRIMARY KEY,
+                partitions INTEGER NOT NULL,
+                phase VARCHAR(20) NOT NULL DEFAULT 'copying',
+                cursor_id VARCHAR(50) NOT NULL DEFAULT '',
+                cursor_user UUID NOT NULL DEFAULT '00000000-0000-0000-0000-000000000000',
+                copied BIGINT NOT NULL DEFAULT 0,
+                started_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                swapped_at TIMESTAMP WITH TIME ZONE,
+                legacy_dropped_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+
         for migration in migrations:
             await conn.execute(text(migration))
         print(f"Database migrations complete (embedding_dim={embed_dim})")
@@ -1065,3 +1746,50 @@ async def get_db_context():
             raise
         finally:
             await session.close()
+
+
+# pgvector >= 0.8 can keep walking an HNSW index until enough rows pass the
+# WHERE clause; None until the installed version has been checked
+_hnsw_iterative_scan = None
+
+
+@asynccontextmanager
+async def filtered_ann_scan(db: AsyncSession, k: int):
+    """
+    Scope for a per-user `ORDER BY embedding <=> ... LIMIT k` query.
+
+    The HNSW indexes span every user. A plain index scan collects
+    hnsw.ef_search nearest rows table-wide and filters by user afterwards,
+    so a user with few rows near the query got few or no results. On
+    pgvector >= 0.8 the scan continues (strict order) until k rows pass the
+    filter; older versions get an exact scan for the statement instead.
+
+    Usage:
+        async with filtered_ann_scan(db, top_k):
+            await db.execute(...)
+    """
+    from sqlalchemy import text
+
+    global _hnsw_iterative_scan
+    if _hnsw_iterative_scan is None:
+        version = (await db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))).scalar()
+        parts = tuple(int(p) for p in (version or "0").split(".")[:2] if p.isdigit())
+        _hnsw_iterative_scan = parts >= (0, 8)
+
+    if _hnsw_iterative_scan:
+        # hnsw.ef_search tops out at 1000
+        await db.execute(text(
+            "SELECT set_config('hnsw.ef_search', :ef, true),"
+            "       set_config('hnsw.iterative_scan', 'strict_order', true),"
+            "       set_config('hnsw.max_scan_tuples', :max_tuples, true)"
+        ), {"ef": str(min(max(k, 100), 1000)), "max_tuples": str(max(20000, k * 200))})
+        yield
+        return
+
+    # No HNSW bitmap scans exist, so with index scans off the planner reads
+    # the user's rows through the btree indexes and sorts them
+    previous = (await db.execute(text(
+        "SELECT current_setting('enable_indexscan'), set_config('enable_indexscan', 'off', true)"
+    ))).scalar()
+    yield
+    await db.execute(text("SELECT set_config('enable_indexscan', :previous, true)"), {"previous": previous})
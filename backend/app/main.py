@@ -69,9 +69,47 @@ async def lifespan(app: FastAPI):
     from app.tools import registry
     print(f"Tool registry: {registry.tool_count} tools registered")
 
+    # Pre-warm code sandbox workers (code_run / code_eval)
+    try:
+        from app.sandbox import get_sandbox_pool
+        await get_sandbox_pool().start()
+        print(f"Sandbox pool: {settings.sandbox_pool_size} workers ready")
+    except Exception as e:
+        print(f"Sandbox pool pre-warm skipped (starts on first use): {e}")
+
     # Initialize Vault storage
     init_vault()
 
+    # Periodic drift correction for the per-user storage usage counters
+    from app.services.vault.usage import start_reconciler, stop_reconciler
+    start_reconciler()
+    from app.services.vault.serving import start_access_flusher, stop_access_flusher
+    start_access_flusher()
+
+    # Finish disk reclamation for deletes interrupted by the last shutdown
+    try:
+        from app.services.vault.bulk import resume_reclaim_jobs
+        resumed = await resume_reclaim_jobs()
+        if resumed:
+            print(f"Vault reclaim: resumed {resumed} pending jobs")
+    except Exception as e:
+        print(f"Vault reclaim resume skipped: {e}")
+
+    # Background runner for auto-deliberate / auto-jam (picks up interrupted jobs)
+    from app.services.session_jobs import start_session_workers, stop_session_workers
+    start_session_workers()
+
+    # CerebroCortex upkeep: nightly consolidation, layer promotion/decay, idle episode close,
+    # online hash partitioning (when cerebro_partitions > 0)
+    from app.services.cerebro.dream import start_dream_sweeper, stop_dream_sweeper
+    start_dream_sweeper()
+    from app.services.cerebro.layers import start_layer_sweeper, stop_layer_sweeper
+    start_layer_sweeper()
+    from app.services.cerebro.episodes import start_episode_sweeper, stop_episode_sweeper
+    start_episode_sweeper()
+    from app.services.cerebro.partitioning import start_partition_migrator, stop_partition_migrator
+    start_partition_migrator()
+
     # Auto-purge old error logs (GDPR compliance)
     try:
         from app.database import get_db_context
@@ -130,6 +168,15 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("Shutting down...")
+    await stop_reconciler()
+    await stop_access_flusher()
+    await stop_session_workers()
+    await stop_dream_sweeper()
+    await stop_layer_sweeper()
+    await stop_episode_sweeper()
+    await stop_partition_migrator()
+    from app.sandbox import shutdown_sandbox_pool
+    await shutdown_sandbox_pool()
     await close_db()
     print("Database closed")
 
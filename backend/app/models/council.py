@@ -43,6 +43,10 @@ class DeliberationSession(Base):
     # Human butt-in queue (consumed by next round)
     pending_human_message: Mapped[Optional[str]] = mapped_column(Text)
 
+    # Rolling summary of rounds 1..digest_through_round (see services/council_context.py)
+    context_digest: Mapped[Optional[str]] = mapped_column(Text)
+    digest_through_round: Mapped[int] = mapped_column(Integer, default=0)
+
     # Cost tracking
     total_input_tokens: Mapped[int] = mapped_column(Integer, default=0)
     total_output_tokens: Mapped[int] = mapped_column(Integer, default=0)
@@ -149,6 +149,10 @@ class File(Base):
     # Storage
     storage_path: Mapped[str] = mapped_column(String(500))
     checksum: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # SHA256
+    content_index_checksum: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # checksum last chunked into file_chunks
+    content_index_failed_checksum: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # checksum whose chunking failed (not retried until it changes)
+    semantic_index_checksum: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # checksum last embedded into file_embeddings
+    semantic_index_failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # last failed embedding attempt (retried after a backoff)
 
     # Metadata
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -0,0 +1,392 @@
+"""
+Code Sandbox - Pre-forked worker processes for untrusted Python.
+
+Extracted from the code execution tools so worker processes only import
+the standard library (no FastAPI, SQLAlchemy or LLM clients).
+
+Each worker:
+- Imports the whitelisted modules once at startup
+- Runs one snippet at a time with restricted builtins
+- Enforces a CPU-time budget per snippet (RLIMIT_CPU) and an address-space cap (RLIMIT_AS)
+- Gives every run its own builtins dict and restores the whitelisted modules
+  afterwards so state never leaks between users
+
+The parent hands code to an idle worker over a pipe and waits on the pipe's
+file descriptor from the event loop (no executor threads). A worker that
+times out, exceeds its CPU budget or crashes is killed and replaced.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import multiprocessing
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Safe modules that can be imported
+SAFE_MODULES = {
+    "math", "random", "datetime", "json", "re",
+    "itertools", "functools", "collections", "string",
+    "decimal", "fractions", "statistics",
+}
+
+
+def __safe_import(name: str, *args):
+    """Safe import that only allows whitelisted modules."""
+    if name in SAFE_MODULES:
+        return __import__(name)
+    raise ImportError(f"Import of '{name}' is not allowed")
+
+
+# Safe builtins for Python execution
+SAFE_BUILTINS = {
+    "abs": abs,
+    "all": all,
+    "any": any,
+    "bin": bin,
+    "bool": bool,
+    "chr": chr,
+    "dict": dict,
+    "divmod": divmod,
+    "enumerate": enumerate,
+    "filter": filter,
+    "float": float,
+    "format": format,
+    "frozenset": frozenset,
+    "hex": hex,
+    "int": int,
+    "isinstance": isinstance,
+    "issubclass": issubclass,
+    "iter": iter,
+    "len": len,
+    "list": list,
+    "map": map,
+    "max": max,
+    "min": min,
+    "next": next,
+    "oct": oct,
+    "ord": ord,
+    "pow": pow,
+    "print": print,
+    "range": range,
+    "repr": repr,
+    "reversed": reversed,
+    "round": round,
+    "set": set,
+    "slice": slice,
+    "sorted": sorted,
+    "str": str,
+    "sum": sum,
+    "tuple": tuple,
+    "type": type,
+    "zip": zip,
+    # Math functions
+    "__import__": lambda name, *args: __safe_import(name),
+}
+
+# Bound before any user code runs - snippets can reassign json.dumps
+_json_dumps = json.dumps
+
+
+class SandboxError(Exception):
+    """Base error for sandbox pool failures."""
+
+
+class SandboxTimeout(SandboxError):
+    """Snippet exceeded its wall-clock timeout (worker was killed)."""
+
+
+class SandboxCrashed(SandboxError):
+    """Worker died mid-run (CPU budget, memory cap or interpreter crash)."""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Worker process
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _portable(value):
+    """Return value if it survives JSON encoding, otherwise its repr."""
+    try:
+        _json_dumps(value)
+        return value
+    except (TypeError, ValueError, OverflowError, RecursionError):
+        return repr(value)
+
+
+def _cap(text: str, limit: int) -> str:
+    if len(text) > limit:
+        return text[:limit] + f"\n\n[Output truncated at {limit // 1024}KB]"
+    return text
+
+
+def _run_snippet(request: dict, modules: dict) -> dict:
+    """Execute one snippet with restricted globals and capture its output."""
+    stdout_buffer = io.StringIO()
+    stderr_buffer = io.StringIO()
+    # A fresh copy per run: snippets can rebind builtins, and the worker is reused
+    restricted_globals = {
+        "__builtins__": dict(SAFE_BUILTINS),
+        "__name__": "__main__",
+        **modules,
+    }
+    code = request["code"]
+    max_output = request.get("max_output", 100 * 1024)
+
+    reply = {
+        "output": "",
+        "result": None,
+        "result_repr": None,
+        "result_type": None,
+        "error_type": None,
+        "error": None,
+        "traceback": None,
+    }
+    result_value = None
+
+    try:
+        with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+            if request.get("mode") == "eval":
+                result_value = eval(code, restricted_globals)
+            else:
+                # Try to evaluate as expression first
+                try:
+                    result_value = eval(code, restricted_globals)
+                except SyntaxError:
+                    # Not an expression, execute as statements
+                    exec(code, restricted_globals)
+                    result_value = restricted_globals.get("result")
+        reply["result"] = _portable(result_value)
+        reply["result_repr"] = repr(result_value) if result_value is not None else None
+        reply["result_type"] = type(result_value).__name__
+    except MemoryError:
+        reply["error_type"] = "MemoryError"
+        reply["error"] = "Sandbox memory limit exceeded"
+    except Exception as e:
+        reply["error_type"] = type(e).__name__
+        reply["error"] = str(e)
+        reply["traceback"] = traceback.format_exc()[:5000]
+
+    reply["output"] = _cap(stdout_buffer.getvalue() + stderr_buffer.getvalue(), max_output)
+    return reply
+
+
+def _worker_main(conn, cpu_seconds: int, memory_bytes: int):
+    """Worker loop: receive snippets, run them, send replies until EOF."""
+    import resource
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    modules = {}
+    for module_name in SAFE_MODULES:
+        try:
+            modules[module_name] = __import__(module_name)
+        except ImportError:
+            pass
+    snapshots = {name: dict(module.__dict__) for name, module in modules.items()}
+
+    if memory_bytes:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        except (ValueError, OSError):
+            pass
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        # RLIMIT_CPU is cumulative for the process - grant a fresh budget per
+        # snippet. Exceeding it raises SIGXCPU, which terminates the worker.
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        spent = int(usage.ru_utime + usage.ru_stime) + 1
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = spent + cpu_seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+        reply = _run_snippet(request, modules)
+
+        for name, module in modules.items():
+            module.__dict__.clear()
+            module.__dict__.update(snapshots[name])
+
+        conn.send(reply)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Pool
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _Worker:
+    """Handle for one sandbox process and the parent end of its pipe."""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+    def kill(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+class SandboxPool:
+    """
+    Fixed-size pool of pre-forked sandbox workers.
+
+    Workers are started lazily on first use. Callers get exclusive use of one
+    worker per snippet; when all are busy they queue on the idle list.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        cpu_seconds: int = 10,
+        memory_mb: int = 256,
+        max_jobs_per_worker: int = 200,
+    ):
+        self.size = max(1, size)
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024 if memory_mb else 0
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._ctx = multiprocessing.get_context("forkserver")
+        self._ctx.set_forkserver_preload([__name__])
+        self._workers: set[_Worker] = set()
+        self._idle: Optional[asyncio.Queue] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.cpu_seconds, self.memory_bytes),
+            daemon=True,
+            name="apex-sandbox",
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    async def _fill(self):
+        """Spawn workers until the pool is back at full size."""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while not self._closed and len(self._workers) < self.size:
+                worker = await asyncio.to_thread(self._spawn)
+                self._workers.add(worker)
+                self._idle.put_nowait(worker)
+
+    async def start(self):
+        """Pre-warm the pool (optional - run() starts it lazily)."""
+        self._closed = False
+        await self._fill()
+        logger.info(f"Sandbox pool ready: {len(self._workers)} workers")
+
+    def _discard(self, worker: _Worker):
+        self._workers.discard(worker)
+        worker.kill()
+
+    async def _wait_reply(self, worker: _Worker) -> dict:
+        """Wait for the worker's pipe to become readable, then read the reply."""
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = worker.conn.fileno()
+
+        def on_readable():
+            if not ready.done():
+                ready.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+        return worker.conn.recv()
+
+    async def run(self, code: str, mode: str = "exec", timeout: float = 10, max_output: int = 100 * 1024) -> dict:
+        """
+        Run a snippet in an idle worker.
+
+        Raises:
+            SandboxTimeout: wall-clock timeout hit (worker killed and replaced)
+            SandboxCrashed: worker died (CPU budget/memory cap) and was replaced
+        """
+        if self._closed:
+            raise SandboxError("Sandbox pool is shut down")
+        await self._fill()
+
+        worker = await self._idle.get()
+        healthy = False
+        try:
+            worker.conn.send({"mode": mode, "code": code, "max_output": max_output})
+            try:
+                reply = await asyncio.wait_for(self._wait_reply(worker), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise SandboxTimeout(f"Execution timed out after {timeout}s")
+            except (EOFError, OSError) as e:
+                raise SandboxCrashed(
+                    f"Sandbox worker terminated (CPU limit {self.cpu_seconds}s or memory limit exceeded)"
+                ) from e
+            healthy = True
+            worker.jobs += 1
+            return reply
+        finally:
+            if healthy and worker.jobs < self.max_jobs_per_worker:
+                self._idle.put_nowait(worker)
+            else:
+                self._discard(worker)
+                await self._fill()
+
+    async def shutdown(self):
+        """Stop all workers."""
+        self._closed = True
+        workers = list(self._workers)
+        self._workers.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+        await asyncio.to_thread(lambda: [w.kill() for w in workers])
+
+
+_pool: Optional[SandboxPool] = None
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Get or create the global sandbox pool (lazy initialization)."""
+    global _pool
+    if _pool is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _pool = SandboxPool(
+            size=settings.sandbox_pool_size,
+            cpu_seconds=settings.sandbox_cpu_seconds,
+            memory_mb=settings.sandbox_memory_mb,
+        )
+    return _pool
+
+
+async def shutdown_sandbox_pool():
+    """Stop the global sandbox pool if it was started."""
+    global _pool
+    if _pool is not None:
+        await _pool.shutdown()
+        _pool = None
@@ -0,0 +1,608 @@
+"""Dream Engine - offline consolidation of a user's CerebroCortex graph.
+
+One cycle runs four phases, each logged as a row in `cerebro_dream_log`
+(timings plus node counts before/after, grouped by `run_id`):
+
+1. SWS replay - unconsolidated episodes are replayed in step order; each
+   consecutive pair of steps gets (or strengthens) a temporal link and the
+   episode is marked consolidated.
+2. Pattern extraction - working/sensory memories are clustered by embedding
+   (one numpy similarity matrix per agent/visibility group). Every cluster of
+   at least DREAM_CLUSTER_MIN_SIZE near-duplicates is abstracted into one
+   long-term semantic node, linked DERIVED_FROM its members, whose salience
+   is lowered so pruning can retire them. At most DREAM_MAX_LLM_CALLS
+   clusters are summarised per run; the rest wait for the next cycle.
+3. Pruning - old, unaccessed, low-salience sensory/working memories are
+   deleted together with their links.
+4. REM recombination - a random sample of memories is checked pairwise for
+   non-obvious connections across sessions; similar pairs get a semantic link.
+
+Summaries come from a `Summarizer` (async list[str] -> str). `llm_summarizer`
+uses the platform key; `stub_summarizer` is deterministic and used when no
+key is configured (and in tests). Because of that cost, on-demand cycles
+(`POST /cortex/dream`) pass `min_interval_hours` and are refused with
+`DreamTooSoon` while the user's last cycle is more recent.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+import weakref
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+import numpy as np
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cerebro.config import (
+    DREAM_CLUSTER_MIN_SIZE,
+    DREAM_CLUSTER_SIMILARITY_THRESHOLD,
+    DREAM_MAX_LLM_CALLS,
+    DREAM_PRUNING_MAX_SALIENCE,
+    DREAM_PRUNING_MIN_AGE_HOURS,
+    DREAM_REM_MIN_CONNECTION_STRENGTH,
+    DREAM_REM_PAIR_CHECKS,
+    DREAM_REM_SAMPLE_SIZE,
+    LINK_TYPE_WEIGHTS,
+)
+from app.cerebro.engines.temporal import SemanticEngine
+from app.cerebro.models.memory import MemoryMetadata, MemoryNode
+from app.cerebro.types import DreamPhase, LinkType, MemoryLayer, MemoryType, Visibility
+from app.services.cerebro.pg_graph_store import PgGraphStore
+
+logger = logging.getLogger(__name__)
+
+REPLAY_EPISODE_LIMIT = 100     # episodes replayed per cycle
+CLUSTER_SCAN_LIMIT = 2000      # newest candidate memories clustered per cycle
+CLUSTER_MAX_MEMBERS = 20       # members quoted to the summariser
+MEMBER_SALIENCE_FACTOR = 0.5   # abstracted members fade toward the pruning threshold
+PRUNE_BATCH = 5000             # nodes deleted per cycle
+LINK_REINFORCE_BOOST = 0.05    # weight added when a replay/REM link already exists
+
+SUMMARY_MODEL = "claude-haiku-4-5-20251001"
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_SYSTEM_PROMPT = """You consolidate an AI agent's memories.
+Given several near-duplicate memories, write one memory that preserves every distinct fact,
+preference or decision they contain. Write it as a standalone statement, in under 120 words.
+Reply with the memory text only."""
+
+Summarizer = Callable[[list[str]], Awaitable[str]]
+
+# Per-user run locks; an entry disappears once no cycle holds or awaits it
+_locks: "weakref.WeakValueDictionary[UUID, asyncio.Lock]" = weakref.WeakValueDictionary()
+_dream_task: Optional[asyncio.Task] = None
+
+
+class DreamTooSoon(Exception):
+    """The user's last dream cycle is more recent than the requested interval."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Last dream cycle was too recent; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PhaseReport(BaseModel):
+    """Outcome of one dream phase."""
+    phase: str
+    started_at: Optional[datetime] = None
+    duration_ms: int = 0
+    nodes_before: int = 0
+    nodes_after: int = 0
+    memories_processed: int = 0
+    links_created: int = 0
+    links_strengthened: int = 0
+    memories_pruned: int = 0
+    schemas_extracted: int = 0
+    notes: Optional[str] = None
+    success: bool = True
+
+
+class DreamReport(BaseModel):
+    """Outcome of a full dream cycle."""
+    run_id: str
+    user_id: str
+    duration_ms: int = 0
+    llm_calls: int = 0
+    phases: list[PhaseReport] = Field(default_factory=list)
+
+    @property
+    def node_delta(self) -> int:
+        if not self.phases:
+            return 0
+        return self.phases[-1].nodes_after - self.phases[0].nodes_before
+
+
+# =============================================================================
+# Summarizers
+# =============================================================================
+
+async def stub_summarizer(contents: list[str]) -> str:
+    """Deterministic abstraction: shared concepts plus the most complete member."""
+    concepts = SemanticEngine.extract_concepts(" ".join(contents), max_concepts=6)
+    representative = max(contents, key=lambda c: (len(c), c))
+    if len(representative) > 500:
+        representative = representative[:500].rstrip() + " [...]"
+    header = f"Consolidated from {len(contents)} related memories"
+    if concepts:
+        header += f" ({', '.join(concepts)})"
+    return f"{header}: {representative}"
+
+
+def llm_summarizer(claude) -> Summarizer:
+    """Summarizer backed by a ClaudeService; falls back to the stub on errors."""
+
+    async def summarize(contents: list[str]) -> str:
+        listing = "\n".join(f"- {c[:1000]}" for c in contents)
+        try:
+            response = await claude.chat(
+                messages=[{"role": "user", "content": f"Memories:\n{listing}"}],
+                model=SUMMARY_MODEL,
+                system=SUMMARY_SYSTEM_PROMPT,
+                max_tokens=SUMMARY_MAX_TOKENS,
+            )
+            summary = "".join(
+                b.get("text", "") for b in response.get("content", []) if b.get("type") == "text"
+            ).strip()
+        except Exception as e:
+            logger.warning(f"Dream summarisation failed, using stub: {e}")
+            summary = ""
+        return summary or await stub_summarizer(contents)
+
+    return summarize
+
+
+def default_summarizer() -> Summarizer:
+    """LLM summarizer on the platform key, or the stub when none is configured."""
+    try:
+        from app.services.claude import ClaudeService
+        return llm_summarizer(ClaudeService())
+    except Exception:
+        return stub_summarizer
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+def _parse_vector(value) -> Optional[np.ndarray]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    vec = np.asarray(value, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else None
+
+
+def _components(similarity: np.ndarray, threshold: float) -> list[list[int]]:
+    """Connected components of the thresholded similarity graph (size >= 2)."""
+    parent = list(range(similarity.shape[0]))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows, cols = np.nonzero(np.triu(similarity >= threshold, k=1))
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        parent[find(i)] = find(j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(parent)):
+        groups.setdefault(find(i), []).append(i)
+    return [members for members in groups.values() if len(members) >= 2]
+
+
+async def _count_nodes(db: AsyncSession, user_id: UUID) -> int:
+    return (await db.execute(
+        text("SELECT COUNT(*) FROM cerebro_memory_nodes WHERE user_id = :uid"),
+        {"uid": str(user_id)},
+    )).scalar() or 0
+
+
+async def _seconds_until_due(db: AsyncSession, user_id: UUID, interval_hours: float) -> int:
+    """Seconds until `interval_hours` have passed since the user's last cycle (0 if due)."""
+    remaining = (await db.execute(
+        text("""
+            SELECT EXTRACT(EPOCH FROM MAX(started_at) + :hours * INTERVAL '1 hour' - NOW())
+            FROM cerebro_dream_log WHERE user_id = :uid
+        """),
+        {"uid": str(user_id), "hours": interval_hours},
+    )).scalar()
+    return int(remaining) + 1 if remaining and remaining > 0 else 0
+
+
+async def _upsert_links(
+    db: AsyncSession,
+    user_id: UUID,
+    links: list[tuple[str, str, LinkType, float, str]],
+    reason: str,
+) -> tuple[int, int]:
+    """Insert or reinforce (source, target, type, weight, evidence) links. Returns (created, strengthened)."""
+    return await PgGraphStore(db).upsert_links(user_id, links, reason, boost=LINK_REINFORCE_BOOST)
+
+
+# =============================================================================
+# Engine
+# =============================================================================
+
+class DreamEngine:
+    """Runs dream cycles for one user at a time.
+
+    Phases commit independently; a failing phase is logged and rolled back
+    without stopping the rest of the cycle.
+    """
+
+    def __init__(self, summarizer: Optional[Summarizer] = None, seed: Optional[int] = None):
+        self.summarize = summarizer or default_summarizer()
+        self.rng = random.Random(seed)
+
+    async def run(self, db: AsyncSession, user_id: UUID, min_interval_hours: float = 0) -> DreamReport:
+        """Run one full cycle. Concurrent cycles for the same user are serialised.
+
+        With `min_interval_hours`, raises DreamTooSoon when the user's last
+        cycle started less than that long ago (checked under the lock).
+        """
+        lock = _locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            if min_interval_hours > 0:
+                retry_after = await _seconds_until_due(db, user_id, min_interval_hours)
+                if retry_after:
+                    raise DreamTooSoon(retry_after)
+            report = DreamReport(run_id=str(uuid.uuid4()), user_id=str(user_id))
+            started = time.monotonic()
+            self._llm_calls = 0
+
+            for phase, handler in (
+                (DreamPhase.SWS_REPLAY, self._replay),
+                (DreamPhase.PATTERN_EXTRACTION, self._extract_patterns),
+                (DreamPhase.PRUNING, self._prune),
+                (DreamPhase.REM_RECOMBINATION, self._recombine),
+            ):
+                result = PhaseReport(phase=phase.value, started_at=datetime.now(timezone.utc))
+                phase_started = time.monotonic()
+                try:
+                    result.nodes_before = await _count_nodes(db, user_id)
+                    await handler(db, user_id, result)
+                    await db.commit()
+                    result.nodes_after = await _count_nodes(db, user_id)
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Dream {phase.value} failed for {user_id}: {e}")
+                    result.success = False
+                    result.notes = str(e)[:500]
+                    result.nodes_after = result.nodes_before
+                result.duration_ms = int((time.monotonic() - phase_started) * 1000)
+                await self._log(db, user_id, report.run_id, result)
+                report.phases.append(result)
+
+            report.llm_calls = self._llm_calls
+            report.duration_ms = int((time.monotonic() - started) * 1000)
+            logger.info(
+                f"Dream cycle for {user_id}: {report.duration_ms}ms, "
+                f"{report.node_delta:+d} nodes, {report.llm_calls} summaries"
+            )
+            return report
+
+    async def _log(self, db: AsyncSession, user_id: UUID, run_id: str, result: PhaseReport) -> None:
+        try:
+            await db.execute(
+                text("""
+                    INSERT INTO cerebro_dream_log (
+                        user_id, run_id, phase, started_at, completed_at, duration_ms,
+                        nodes_before, nodes_after, memories_processed, links_created,
+                        links_strengthened, memories_pruned, schemas_extracted, notes, success
+                    ) VALUES (
+                        :user_id, :run_id, :phase, :started_at, NOW(), :duration_ms,
+                        :nodes_before, :nodes_after, :memories_processed, :links_created,
+                        :links_strengthened, :memories_pruned, :schemas_extracted, :notes, :success
+                    )
+                """),
+                {"user_id": str(user_id), "run_id": run_id, **result.model_dump()},
+            )
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Failed to write dream log: {e}")
+
+    # -------------------------------------------------------------------------
+    # Phase 1: SWS replay
+    # -------------------------------------------------------------------------
+
+    async def _replay(self, db: AsyncSession, user_id: UUID, result: PhaseReport) -> None:
+        episode_ids = (await db.execute(
+            text("""
+                SELECT id FROM cerebro_episodes
+                WHERE user_id = :uid AND NOT consolidated AND closed
+                ORDER BY created_at
+                LIMIT :limit
+            """),
+            {"uid": str(user_id), "limit": REPLAY_EPISODE_LIMIT},
+        )).scalars().all()
+        if not episode_ids:
+            return
+
+        # Steps whose memory still exists, in sequence order
+        steps = (await db.execute(
+            text("""
+                SELECT s.episode_id, s.memory_id
+                FROM cerebro_episode_steps s
+                JOIN cerebro_memory_nodes n ON n.user_id = s.user_id AND n.id = s.memory_id
+                WHERE s.user_id = :uid AND s.episode_id = ANY(CAST(:ids AS text[]))
+                ORDER BY s.episode_id, s.position
+            """),
+            {"uid": str(user_id), "ids": list(episode_ids)},
+        )).fetchall()
+
+        weight = LINK_TYPE_WEIGHTS[LinkType.TEMPORAL]
+        links = []
+        previous: dict[str, str] = {}
+        for row in steps:
+            before = previous.get(row.episode_id)
+            if before and before != row.memory_id:
+                links.append((before, row.memory_id, LinkType.TEMPORAL, weight, f"Replayed sequence in {row.episode_id}"))
+            previous[row.episode_id] = row.memory_id
+
+        result.links_created, result.links_strengthened = await _upsert_links(db, user_id, links, "dream_sws")
+        await db.execute(
+            text("UPDATE cerebro_episodes SET consolidated = TRUE WHERE user_id = :uid AND id = ANY(CAST(:ids AS text[]))"),
+            {"uid": str(user_id), "ids": list(episode_ids)},
+        )
+        result.memories_processed = len(steps)
+        result.notes = f"{len(episode_ids)} episodes replayed"
+
+    # -------------------------------------------------------------------------
+    # Phase 2: pattern extraction (near-duplicate clusters -> abstractions)
+    # -------------------------------------------------------------------------
+
+    async def _extract_patterns(self, db: AsyncSession, user_id: UUID, result: PhaseReport) -> None:
+        # Candidates: not yet abstracted (no outgoing derived_from link)
+        rows = (await db.execute(
+            text("""
+                SELECT n.id, n.content, n.salience, n.agent_id, n.visibility,
+                       CAST(n.embedding AS text) AS embedding
+                FROM cerebro_memory_nodes n
+                WHERE n.user_id = :uid
+                  AND n.embedding IS NOT NULL
+                  AND NOT n.archived
+                  AND n.layer IN ('sensory', 'working')
+                  AND COALESCE(n.source, '') NOT IN ('dream', 'consolidation')
+                  AND NOT EXISTS (
+                      SELECT 1 FROM cerebro_associative_links l
+                      WHERE l.user_id = n.user_id AND l.source_id = n.id AND l.link_type = 'derived_from'
+                  )
+                ORDER BY n.created_at DESC
+                LIMIT :limit
+            """),
+            {"uid": str(user_id), "limit": CLUSTER_SCAN_LIMIT},
+        )).mappings().all()
+        result.memories_processed = len(rows)
+
+        # Only cluster within one agent/visibility scope so abstractions can't leak private memories
+        groups: dict[tuple, list[tuple[dict, np.ndarray]]] = {}
+        for row in rows:
+            vec = _parse_vector(row["embedding"])
+            if vec is not None:
+                groups.setdefault((row["agent_id"], row["visibility"]), []).append((row, vec))
+
+        clusters = []
+        for (agent_id, visibility), members in groups.items():
+            if len(members) < DREAM_CLUSTER_MIN_SIZE:
+                continue
+            matrix = np.stack([vec for _, vec in members])
+            for component in _components(matrix @ matrix.T, DREAM_CLUSTER_SIMILARITY_THRESHOLD):
+                if len(component) >= DREAM_CLUSTER_MIN_SIZE:
+                    clusters.append((agent_id, visibility, [members[i] for i in component]))
+        clusters.sort(key=lambda c: len(c[2]), reverse=True)
+
+        store = PgGraphStore(db)
+        skipped = 0
+        for agent_id, visibility, members in clusters:
+            if self._llm_calls >= DREAM_MAX_LLM_CALLS:
+                skipped += 1
+                continue
+            self._llm_calls += 1
+
+            ranked = sorted(members, key=lambda m: m[0]["salience"], reverse=True)
+            summary = await self.summarize([m[0]["content"] for m in ranked[:CLUSTER_MAX_MEMBERS]])
+
+            centroid = np.mean([vec for _, vec in members], axis=0)
+            centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+            member_ids = [m[0]["id"] for m in members]
+
+            node = MemoryNode(
+                content=summary,
+                metadata=MemoryMetadata(
+                    agent_id=agent_id or "AZOTH",
+                    visibility=Visibility(visibility),
+                    layer=MemoryLayer.LONG_TERM,
+                    memory_type=MemoryType.SEMANTIC,
+                    tags=["dream"],
+                    concepts=SemanticEngine.extract_concepts(summary),
+                    salience=max(float(m[0]["salience"]) for m in members),
+                    source="dream",
+                    derived_from=member_ids,
+                ),
+            )
+            abstraction_id = await store.add_node(user_id, node, embedding=centroid.tolist())
+
+            created, _ = await _upsert_links(
+                db, user_id,
+                [
+                    (row["id"], abstraction_id, LinkType.DERIVED_FROM, round(float(vec @ centroid), 4), "Dream abstraction")
+                    for row, vec in members
+                ],
+                "dream_pattern",
+            )
+            result.links_created += created
+            await db.execute(
+                text("""
+                    UPDATE cerebro_memory_nodes SET salience = salience * :factor
+                    WHERE user_id = :uid AND id = ANY(CAST(:ids AS text[]))
+                """),
+                {"uid": str(user_id), "factor": MEMBER_SALIENCE_FACTOR, "ids": member_ids},
+            )
+            await db.commit()
+            result.schemas_extracted += 1
+
+        if clusters:
+            result.notes = f"{len(clusters)} clusters, {skipped} deferred (summary budget)"
+
+    # -------------------------------------------------------------------------
+    # Phase 3: pruning
+    # -------------------------------------------------------------------------
+
+    async def _prune(self, db: AsyncSession, user_id: UUID, result: PhaseReport) -> None:
+        row = (await db.execute(
+            text("""
+                WITH doomed AS (
+                    SELECT id FROM cerebro_memory_nodes
+                    WHERE user_id = :uid
+                      AND layer IN ('sensory', 'working')
+                      AND memory_type <> 'prospective'
+                      AND salience <= :max_salience
+                      AND COALESCE(last_accessed_at, created_at) < NOW() - :min_age * INTERVAL '1 hour'
+                    LIMIT :limit
+                ), dropped_links AS (
+                    DELETE FROM cerebro_associative_links
+                    WHERE user_id = :uid
+                      AND (source_id IN (SELECT id FROM doomed) OR target_id IN (SELECT id FROM doomed))
+                    RETURNING 1
+                ), dropped_nodes AS (
+                    DELETE FROM cerebro_memory_nodes
+                    WHERE user_id = :uid AND id IN (SELECT id FROM doomed)
+                    RETURNING 1
+                )
+                SELECT (SELECT COUNT(*) FROM dropped_nodes) AS nodes,
+                       (SELECT COUNT(*) FROM dropped_links) AS links
+            """),
+            {
+                "uid": str(user_id),
+                "max_salience": DREAM_PRUNING_MAX_SALIENCE,
+                "min_age": DREAM_PRUNING_MIN_AGE_HOURS,
+                "limit": PRUNE_BATCH,
+            },
+        )).first()
+        result.memories_pruned = row.nodes
+        result.memories_processed = row.nodes
+        if row.links:
+            result.notes = f"{row.links} links removed with pruned memories"
+
+    # -------------------------------------------------------------------------
+    # Phase 4: REM recombination
+    # -------------------------------------------------------------------------
+
+    async def _recombine(self, db: AsyncSession, user_id: UUID, result: PhaseReport) -> None:
+        rows = (await db.execute(
+            text("""
+                SELECT id, agent_id, visibility, session_id, CAST(embedding AS text) AS embedding
+                FROM cerebro_memory_nodes
+                WHERE user_id = :uid AND embedding IS NOT NULL AND NOT archived
+                ORDER BY random()
+                LIMIT :limit
+            """),
+            {"uid": str(user_id), "limit": DREAM_REM_SAMPLE_SIZE},
+        )).mappings().all()
+        sample = [(row, vec) for row in rows if (vec := _parse_vector(row["embedding"])) is not None]
+        result.memories_processed = len(sample)
+        if len(sample) < 2:
+            return
+
+        ids = [row["id"] for row, _ in sample]
+        existing = {
+            frozenset((r["source_id"], r["target_id"]))
+            for r in await PgGraphStore(db).get_links_for_graph(user_id, ids)
+        }
+
+        # Cross-context pairs only: same session is already linked at encoding time
+        candidates = [
+            (a, b) for i, a in enumerate(sample) for b in sample[i + 1:]
+            if frozenset((a[0]["id"], b[0]["id"])) not in existing
+            and (a[0]["session_id"] is None or a[0]["session_id"] != b[0]["session_id"])
+            and (a[0]["agent_id"] == b[0]["agent_id"] or (a[0]["visibility"] == "shared" and b[0]["visibility"] == "shared"))
+        ]
+        pairs = self.rng.sample(candidates, min(DREAM_REM_PAIR_CHECKS, len(candidates)))
+
+        links = []
+        for (a, va), (b, vb) in pairs:
+            similarity = float(va @ vb)
+            if similarity >= DREAM_REM_MIN_CONNECTION_STRENGTH:
+                links.append((a["id"], b["id"], LinkType.SEMANTIC, round(similarity, 4), f"Dream recombination ({similarity:.2f})"))
+        result.links_created, result.links_strengthened = await _upsert_links(db, user_id, links, "dream_rem")
+        result.notes = f"{len(pairs)} pairs checked"
+
+
+# =============================================================================
+# Background sweep
+# =============================================================================
+
+async def run_due_dreams(db: AsyncSession, interval_hours: float, engine: Optional[DreamEngine] = None) -> int:
+    """Dream for every user with memories and no cycle in the last interval."""
+    user_ids = (await db.execute(
+        text("""
+            SELECT u.id FROM users u
+            WHERE EXISTS (SELECT 1 FROM cerebro_memory_nodes n WHERE n.user_id = u.id)
+              AND NOT EXISTS (
+                  SELECT 1 FROM cerebro_dream_log d
+                  WHERE d.user_id = u.id AND d.started_at > NOW() - :hours * INTERVAL '1 hour'
+              )
+        """),
+        {"hours": interval_hours},
+    )).scalars().all()
+
+    from app.services.cerebro.stats import reconcile_user_stats
+
+    engine = engine or DreamEngine()
+    for user_id in user_ids:
+        await engine.run(db, user_id)
+        # Nightly consistency check of the trigger-maintained stats counters
+        try:
+            await reconcile_user_stats(db, user_id)
+        except Exception as e:
+            logger.warning(f"Stats reconcile failed for {user_id}: {e}")
+    return len(user_ids)
+
+
+async def _dream_loop(interval_hours: float) -> None:
+    from app.database import get_db_context
+
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            async with get_db_context() as db:
+                count = await run_due_dreams(db, interval_hours)
+            if count:
+                logger.info(f"Dream sweep: consolidated {count} users")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Dream sweep failed: {e}")
+
+
+def start_dream_sweeper() -> None:
+    """Start the periodic dream sweep (idempotent)."""
+    global _dream_task
+    from app.config import get_settings
+
+    interval_hours = get_settings().cerebro_dream_interval_hours
+    if interval_hours <= 0 or (_dream_task and not _dream_task.done()):
+        return
+    _dream_task = asyncio.create_task(_dream_loop(interval_hours))
+
+
+async def stop_dream_sweeper() -> None:
+    global _dream_task
+    if _dream_task:
+        _dream_task.cancel()
+        try:
+            await _dream_task
+        except asyncio.CancelledError:
+            pass
+        _dream_task = None
@@ -0,0 +1,342 @@
+"""Episode capture - chat turns and tool runs recorded as CerebroCortex episodes.
+
+Each (user, conversation) has at most one open episode, held in memory:
+
+- `note_step` / `note_tool_call` buffer steps as they happen (no I/O);
+  ToolExecutor notes every tool run made inside a conversation
+- `flush` writes the buffered steps with one multi-row INSERT (the episode
+  row is created or extended by the same statement) and links consecutive
+  memories through `TemporalEngine`. The chat endpoints flush once per turn
+  via `record_chat_turn`
+- an episode closes after `cerebro_episode_idle_minutes` without a step, or
+  rolls over after EPISODE_MAX_STEPS. The sweeper flushes and closes idle
+  episodes, and closes ones left open by a restart or another instance
+
+Only closed episodes are consolidated by the dream replay. "What happened
+when" is answered from the episode indexes by `episodes_between`.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cerebro.config import EPISODE_MAX_STEPS
+from app.cerebro.engines.temporal import TemporalEngine
+from app.cerebro.models.episode import Episode, EpisodeStep
+from app.cerebro.types import LinkType
+from app.config import get_settings
+from app.services.cerebro.pg_graph_store import PgGraphStore
+
+logger = logging.getLogger(__name__)
+
+EPISODE_SWEEP_SECONDS = 60      # idle check cadence
+OPEN_EPISODE_CACHE_SIZE = 4096  # open conversations tracked per process
+TITLE_CHARS = 120
+SUMMARY_CHARS = 200
+
+
+@dataclass
+class _PendingStep:
+    memory_id: Optional[str]
+    role: str
+    summary: Optional[str]
+    timestamp: datetime
+
+
+@dataclass
+class _OpenEpisode:
+    user_id: UUID
+    episode: Episode
+    last_at: datetime
+    next_position: int = 0
+    last_memory: Optional[tuple[str, datetime]] = None  # continues temporal links across flushes
+    pending: list[_PendingStep] = field(default_factory=list)
+
+
+# (user_id, session_id) -> open episode, least recently active first
+_open: "OrderedDict[tuple[UUID, str], _OpenEpisode]" = OrderedDict()
+# Rolled over or evicted: flushed and closed by the next flush/sweep
+_retired: list[_OpenEpisode] = []
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+def _idle_limit() -> Optional[timedelta]:
+    minutes = get_settings().cerebro_episode_idle_minutes
+    return timedelta(minutes=minutes) if minutes > 0 else None
+
+
+def _retire(key: tuple[UUID, str]) -> None:
+    entry = _open.pop(key, None)
+    if entry is not None:
+        _retired.append(entry)
+
+
+def _claim_retired(entries: list[_OpenEpisode]) -> None:
+    """Take entries off `_retired` before the first await, so a concurrent
+    flush/sweep can't write or remove them too. Put back on failure."""
+    claimed = {id(entry) for entry in entries}
+    _retired[:] = [entry for entry in _retired if id(entry) not in claimed]
+
+
+def _current(user_id: UUID, session_id: str, agent_id: str, now: datetime) -> Optional[_OpenEpisode]:
+    """The conversation's open episode, opening a new one when idle or full."""
+    idle = _idle_limit()
+    if idle is None:
+        return None
+    key = (user_id, session_id)
+    entry = _open.get(key)
+    if entry is not None and (
+        now - entry.last_at > idle or entry.next_position + len(entry.pending) >= EPISODE_MAX_STEPS
+    ):
+        _retire(key)
+        entry = None
+    if entry is None:
+        entry = _OpenEpisode(
+            user_id=user_id,
+            episode=Episode(id=f"ep_{uuid.uuid4().hex[:12]}", session_id=session_id, agent_id=agent_id, started_at=now),
+            last_at=now,
+        )
+        _open[key] = entry
+        while len(_open) > OPEN_EPISODE_CACHE_SIZE:
+            _retire(next(iter(_open)))
+    _open.move_to_end(key)
+    return entry
+
+
+def note_step(
+    user_id: UUID,
+    session_id: str,
+    agent_id: str,
+    memory_id: Optional[str] = None,
+    role: str = "event",
+    summary: Optional[str] = None,
+) -> None:
+    """Buffer a step for the conversation's open episode (written on the next flush)."""
+    now = datetime.now(timezone.utc)
+    entry = _current(user_id, str(session_id), agent_id, now)
+    if entry is None:
+        return
+    entry.pending.append(_PendingStep(memory_id, role, summary[:SUMMARY_CHARS] if summary else None, now))
+    entry.last_at = now
+
+
+def note_tool_call(
+    user_id: UUID,
+    session_id: str,
+    agent_id: Optional[str],
+    name: str,
+    params: dict,
+    is_error: bool = False,
+) -> None:
+    """Buffer a tool run as an `action` step."""
+    try:
+        args = json.dumps(params, default=str)
+    except (TypeError, ValueError):
+        args = "{...}"
+    if len(args) > 120:
+        args = args[:117] + "..."
+    note_step(
+        user_id, session_id, agent_id or "AZOTH",
+        role="action", summary=f"{name} {args} -> {'error' if is_error else 'ok'}",
+    )
+
+
+async def _write(store: PgGraphStore, entry: _OpenEpisode) -> int:
+    """Insert an episode's buffered steps and their temporal links. Does not commit."""
+    pending, entry.pending = entry.pending, []
+    if not pending:
+        return 0
+    steps = [
+        EpisodeStep(
+            memory_id=step.memory_id,
+            position=entry.next_position + i,
+            timestamp=step.timestamp,
+            role=step.role,
+            summary=step.summary,
+        )
+        for i, step in enumerate(pending)
+    ]
+    memories = [(step.memory_id, step.timestamp) for step in steps if step.memory_id]
+    previous = entry.last_memory
+    # Claimed before the first await so a concurrent flush can't reuse positions
+    entry.next_position += len(steps)
+    if memories:
+        entry.last_memory = memories[-1]
+    entry.episode.ended_at = steps[-1].timestamp
+    try:
+        await store.append_episode_steps(entry.user_id, entry.episode, steps)
+        await store.upsert_links(
+            entry.user_id,
+            [
+                (before, after, LinkType.TEMPORAL, weight, f"Sequence in {entry.episode.id}")
+                for before, after, weight in TemporalEngine.neighbor_links(memories, previous)
+            ],
+            "episode",
+        )
+    except Exception:
+        entry.pending = pending + entry.pending
+        entry.last_memory = previous
+        raise
+    return len(steps)
+
+
+async def _write_retired(store: PgGraphStore, retired: list[_OpenEpisode]) -> None:
+    """Flush and close retired episodes (grouped per user). Does not commit."""
+    by_user: dict[UUID, list[str]] = {}
+    for entry in retired:
+        await _write(store, entry)
+        by_user.setdefault(entry.user_id, []).append(entry.episode.id)
+    for user_id, episode_ids in by_user.items():
+        await store.close_episodes(user_id, episode_ids)
+
+
+async def flush(db: AsyncSession, user_id: UUID, session_id: str) -> Optional[str]:
+    """Write the conversation's buffered steps. Returns the open episode id. Does not commit."""
+    session_id = str(session_id)
+    store = PgGraphStore(db)
+    retired = [e for e in _retired if e.user_id == user_id and e.episode.session_id == session_id]
+    if retired:
+        _claim_retired(retired)
+        try:
+            await _write_retired(store, retired)
+        except Exception:
+            _retired.extend(retired)
+            raise
+    entry = _open.get((user_id, session_id))
+    if entry is None:
+        return None
+    await _write(store, entry)
+    return entry.episode.id
+
+
+async def record_chat_turn(
+    db: AsyncSession,
+    user_id: UUID,
+    conversation_id: Optional[UUID],
+    agent_id: str,
+    user_message: str,
+    user_memory_id: Optional[str] = None,
+    assistant_memory_id: Optional[str] = None,
+) -> Optional[str]:
+    """Record one chat turn: the user message, the tool runs noted during it, the reply.
+
+    Tool steps were buffered while the turn ran; the user message is put
+    ahead of them. One flush, so one INSERT per turn. Does not commit.
+    """
+    if conversation_id is None:
+        return None
+    session_id = str(conversation_id)
+    now = datetime.now(timezone.utc)
+    entry = _current(user_id, session_id, agent_id, now)
+    if entry is None:
+        return None
+
+    turn_start = min((step.timestamp for step in entry.pending), default=now)
+    entry.pending.insert(0, _PendingStep(user_memory_id, "event", None if user_memory_id else user_message[:SUMMARY_CHARS], turn_start))
+    if assistant_memory_id:
+        entry.pending.append(_PendingStep(assistant_memory_id, "outcome", None, now))
+    if not entry.episode.title:
+        entry.episode.title = " ".join(user_message.split())[:TITLE_CHARS] or None
+    entry.last_at = now
+    return await flush(db, user_id, session_id)
+
+
+async def episodes_between(
+    db: AsyncSession,
+    user_id: UUID,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    agent_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    limit: int = 20,
+) -> list[dict]:
+    """Episodes overlapping a time window, newest first, with their steps."""
+    return await PgGraphStore(db).episodes_between(
+        user_id, since=since, until=until, agent_id=agent_id, session_id=session_id, limit=limit,
+    )
+
+
+# =============================================================================
+# Idle sweep
+# =============================================================================
+
+async def sweep_idle(db: AsyncSession) -> int:
+    """Flush and close episodes idle past the limit. Returns episodes closed. Commits."""
+    idle = _idle_limit()
+    if idle is None:
+        return 0
+    cutoff = datetime.now(timezone.utc) - idle
+    for key in [key for key, entry in _open.items() if entry.last_at < cutoff]:
+        _retire(key)
+    retired = list(_retired)
+    _claim_retired(retired)
+    store = PgGraphStore(db)
+    try:
+        await _write_retired(store, retired)
+        closed = await store.close_stale_episodes(idle.total_seconds() / 60)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        _retired.extend(retired)
+        raise
+    return len(retired) + closed
+
+
+async def _sweep_loop() -> None:
+    from app.database import get_db_context
+
+    while True:
+        await asyncio.sleep(EPISODE_SWEEP_SECONDS)
+        try:
+            async with get_db_context() as db:
+                closed = await sweep_idle(db)
+            if closed:
+                logger.info(f"Closed {closed} idle episodes")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Episode sweep failed: {e}")
+
+
+def start_episode_sweeper() -> None:
+    """Start the idle-episode sweep (idempotent)."""
+    global _sweeper_task
+    if _idle_limit() is None or (_sweeper_task and not _sweeper_task.done()):
+        return
+    _sweeper_task = asyncio.create_task(_sweep_loop())
+
+
+async def stop_episode_sweeper() -> None:
+    """Stop the sweep, writing out whatever is still buffered."""
+    global _sweeper_task
+    if _sweeper_task:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
+    if not _open and not _retired:
+        return
+    # Open episodes stay open in the database; the next sweep closes them once idle
+    from app.database import get_db_context
+    try:
+        async with get_db_context() as db:
+            store = PgGraphStore(db)
+            await _write_retired(store, list(_retired))
+            for entry in list(_open.values()):
+                await _write(store, entry)
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Episode flush on shutdown failed: {e}")
+    _open.clear()
+    _retired.clear()
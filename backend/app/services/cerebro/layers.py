@@ -0,0 +1,264 @@
+"""Layer sweeper - background promotion, demotion and archiving of memory nodes.
+
+Walks `cerebro_memory_nodes` in primary-key order, a bounded batch per tick,
+resuming from the cursor stored in `cerebro_sweep_state` (one row, locked
+for the duration of a tick so several app instances never sweep the same
+batch). For each batch, activation and retrievability are computed with the
+vectorized functions in `app.cerebro.activation.decay`; the cached values
+are written back in one UPDATE, and layer/archive changes in a second one
+covering only the rows that actually change.
+
+Per node, using LAYER_CONFIG:
+
+- promote sensory -> working -> long_term once `promotion_access_count` and
+  `promotion_min_age_hours` are met and the node is still in use: retention
+  in its current layer at least PROMOTE_RETENTION, and no demotion in the
+  last DEMOTION_COOLDOWN_HOURS (long_term -> cortex stays dream-only). The
+  access count is lifetime, so without these a demoted node would be
+  promoted straight back
+- demote long_term -> working when its retention (half-life decay since the
+  last access) drops below DEMOTE_RETENTION and salience is under the
+  layer's `min_salience`
+- archive sensory/working nodes whose retention falls below
+  `cerebro_retention_floor`; archived nodes stay in the table (and in the
+  graph) but drop out of vector search and the hot partial indexes. Any
+  access un-archives them.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cerebro.activation.decay import batch_activation, batch_retrievability
+from app.cerebro.config import LAYER_CONFIG
+from app.config import get_settings
+from app.services.cerebro.pg_graph_store import PgGraphStore
+
+logger = logging.getLogger(__name__)
+
+SWEEP_NAME = "layers"
+DEMOTE_RETENTION = 0.25         # long_term idle for 2 half-lives is demoted (if not salient)
+PROMOTE_RETENTION = 0.5         # promotion needs an access within one half-life of the current layer
+DEMOTION_COOLDOWN_HOURS = 72    # demoted nodes aren't promoted again for this long
+ARCHIVE_MAX_SALIENCE = 0.7      # memories at least this salient are never archived
+ACTIVATION_FLOOR = -10.0        # stored instead of -inf for never-accessed memories
+
+_PROMOTE_TO = {"sensory": "working", "working": "long_term"}
+_ARCHIVABLE = ("sensory", "working")
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+def _plan(rows: list, now: float, retention_floor: float) -> dict:
+    """Vectorized strength and layer decisions for one batch of rows."""
+    n = len(rows)
+    histories = [row["access_timestamps"] or [] for row in rows]
+    width = max((len(h) for h in histories), default=0) or 1
+    timestamps = np.full((n, width), np.nan)
+    for i, history in enumerate(histories):
+        if history:
+            timestamps[i, :len(history)] = history
+
+    compressed_count = np.array([row["compressed_count"] or 0 for row in rows], dtype=np.int64)
+    compressed_interval = np.array([row["compressed_avg_interval"] or 0.0 for row in rows], dtype=np.float64)
+    stability = np.array([row["stability"] for row in rows], dtype=np.float64)
+    salience = np.array([row["salience"] for row in rows], dtype=np.float64)
+    access_count = np.array([row["access_count"] for row in rows], dtype=np.int64)
+    created = np.array([row["created_ts"] or now for row in rows], dtype=np.float64)
+    demoted_ts = np.array([row["demoted_ts"] or -np.inf for row in rows], dtype=np.float64)
+    layers = np.array([row["layer"] for row in rows], dtype=object)
+    archived = np.array([bool(row["archived"]) for row in rows])
+    prospective = np.array([row["memory_type"] == "prospective" for row in rows])
+
+    has_access = ~np.isnan(timestamps).all(axis=1)
+    last_access = np.where(has_access, np.nanmax(np.where(np.isnan(timestamps), -np.inf, timestamps), axis=1), np.nan)
+    activation = np.maximum(batch_activation(timestamps, compressed_count, compressed_interval, now), ACTIVATION_FLOOR)
+    retrievability = batch_retrievability(last_access, stability, now)
+
+    idle_hours = (now - np.where(has_access, np.maximum(last_access, created), created)) / 3600.0
+    age_hours = (now - created) / 3600.0
+    half_life = np.array([LAYER_CONFIG.get(l, {}).get("decay_half_life_hours") or np.inf for l in layers])
+    retention = 0.5 ** (np.maximum(idle_hours, 0) / half_life)
+
+    new_layers = layers.copy()
+    promoted = np.zeros(n, dtype=bool)
+    in_use = (retention >= PROMOTE_RETENTION) & ((now - demoted_ts) / 3600.0 >= DEMOTION_COOLDOWN_HOURS)
+    for layer, target in _PROMOTE_TO.items():
+        config = LAYER_CONFIG[layer]
+        eligible = (layers == layer) & ~archived & in_use & (access_count >= config["promotion_access_count"])
+        if config["promotion_min_age_hours"] is not None:
+            eligible &= age_hours >= config["promotion_min_age_hours"]
+        new_layers[eligible] = target
+        promoted |= eligible
+
+    demoted = (
+        (layers == "long_term")
+        & (retention < DEMOTE_RETENTION)
+        & (salience < LAYER_CONFIG["long_term"]["min_salience"])
+    )
+    new_layers[demoted] = "working"
+
+    archivable = np.isin(new_layers, _ARCHIVABLE) & ~prospective & (salience < ARCHIVE_MAX_SALIENCE)
+    new_archived = archivable & (retention < retention_floor) & ~promoted
+
+    return {
+        "activation": activation,
+        "retrievability": retrievability,
+        "layers": new_layers,
+        "promoted": promoted,
+        "demoted": demoted,
+        "archived": new_archived,
+        "was_archived": archived,
+        "changed": (new_layers != layers) | (new_archived != archived),
+    }
+
+
+async def sweep_batch(db: AsyncSession, batch_size: Optional[int] = None) -> Optional[dict]:
+    """Process the next batch after the stored cursor and advance it.
+
+    Returns counts for the batch, or None when another instance holds the
+    sweep. Commits.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.cerebro_layer_sweep_batch
+
+    state = (await db.execute(text("""
+        SELECT cursor_id, cursor_user FROM cerebro_sweep_state
+        WHERE name = :name
+        FOR UPDATE SKIP LOCKED
+    """), {"name": SWEEP_NAME})).first()
+    if state is None:
+        await db.rollback()
+        return None
+
+    columns = """
+        id, user_id, layer, memory_type, archived, access_count, access_timestamps,
+        compressed_count, compressed_avg_interval, stability, salience,
+        EXTRACT(EPOCH FROM created_at) AS created_ts, EXTRACT(EPOCH FROM demoted_at) AS demoted_ts
+    """
+    if state.cursor_id is None:
+        rows = (await db.execute(text(f"""
+            SELECT {columns} FROM cerebro_memory_nodes
+            ORDER BY id, user_id
+            LIMIT :limit
+        """), {"limit": batch_size})).mappings().all()
+    else:
+        rows = (await db.execute(text(f"""
+            SELECT {columns} FROM cerebro_memory_nodes
+            WHERE (id, user_id) > (:cursor_id, CAST(:cursor_user AS uuid))
+            ORDER BY id, user_id
+            LIMIT :limit
+        """), {"cursor_id": state.cursor_id, "cursor_user": str(state.cursor_user), "limit": batch_size})).mappings().all()
+
+    report = {"scanned": len(rows), "promoted": 0, "demoted": 0, "archived": 0, "restored": 0, "wrapped": False}
+    if rows:
+        now = time.time()
+        plan = _plan(rows, now, settings.cerebro_retention_floor)
+        await db.execute(text("""
+            UPDATE cerebro_memory_nodes n SET
+                last_activation = t.activation,
+                last_retrievability = t.retrievability,
+                last_computed_at = :now
+            FROM unnest(
+                CAST(:ids AS text[]), CAST(:users AS uuid[]),
+                CAST(:activation AS float8[]), CAST(:retrievability AS float8[])
+            ) AS t(id, user_id, activation, retrievability)
+            WHERE n.id = t.id AND n.user_id = t.user_id
+        """), {
+            "now": now,
+            "ids": [row["id"] for row in rows],
+            "users": [str(row["user_id"]) for row in rows],
+            "activation": plan["activation"].tolist(),
+            "retrievability": plan["retrievability"].tolist(),
+        })
+        # Layer/archive changes only for the rows that have one: writing an
+        # unchanged layer would still cost an UPDATE OF layer stats check
+        changed = np.flatnonzero(plan["changed"])
+        if len(changed):
+            await db.execute(text("""
+                UPDATE cerebro_memory_nodes n SET
+                    layer = t.layer,
+                    promoted_at = CASE WHEN t.promoted THEN NOW() ELSE n.promoted_at END,
+                    demoted_at = CASE WHEN t.demoted THEN NOW() ELSE n.demoted_at END,
+                    archived_at = CASE
+                        WHEN t.archived AND NOT n.archived THEN NOW()
+                        WHEN NOT t.archived THEN NULL
+                        ELSE n.archived_at END,
+                    archived = t.archived
+                FROM unnest(
+                    CAST(:ids AS text[]), CAST(:users AS uuid[]), CAST(:layers AS text[]),
+                    CAST(:promoted AS boolean[]), CAST(:demoted AS boolean[]), CAST(:archived AS boolean[])
+                ) AS t(id, user_id, layer, promoted, demoted, archived)
+                WHERE n.id = t.id AND n.user_id = t.user_id
+            """), {
+                "ids": [rows[i]["id"] for i in changed],
+                "users": [str(rows[i]["user_id"]) for i in changed],
+                "layers": plan["layers"][changed].tolist(),
+                "promoted": plan["promoted"][changed].tolist(),
+                "demoted": plan["demoted"][changed].tolist(),
+                "archived": plan["archived"][changed].tolist(),
+            })
+        report["promoted"] = int(plan["promoted"].sum())
+        report["demoted"] = int(plan["demoted"].sum())
+        report["archived"] = int((plan["archived"] & ~plan["was_archived"]).sum())
+        report["restored"] = int((~plan["archived"] & plan["was_archived"]).sum())
+
+    # A short batch means the table was exhausted: start over next tick
+    if len(rows) < batch_size:
+        report["wrapped"] = True
+        cursor_id, cursor_user = None, None
+    else:
+        cursor_id, cursor_user = rows[-1]["id"], str(rows[-1]["user_id"])
+    await db.execute(text("""
+        UPDATE cerebro_sweep_state SET
+            cursor_id = :cursor_id,
+            cursor_user = CAST(:cursor_user AS uuid),
+            passes = passes + CASE WHEN :wrapped THEN 1 ELSE 0 END,
+            updated_at = NOW()
+        WHERE name = :name
+    """), {"name": SWEEP_NAME, "cursor_id": cursor_id, "cursor_user": cursor_user, "wrapped": report["wrapped"]})
+    await db.commit()
+    return report
+
+
+async def _sweep_loop(interval_seconds: float) -> None:
+    from app.database import get_db_context
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with get_db_context() as db:
+                report = await sweep_batch(db)
+                # Fingerprint nodes stored before the SimHash dedup gate (no-op once done)
+                await PgGraphStore(db).backfill_simhash()
+            if report and (report["promoted"] or report["demoted"] or report["archived"] or report["restored"]):
+                logger.info(f"Cerebro layer sweep: {report}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cerebro layer sweep failed: {e}")
+
+
+def start_layer_sweeper() -> None:
+    """Start the periodic layer sweep (idempotent)."""
+    global _sweeper_task
+    interval = get_settings().cerebro_layer_sweep_seconds
+    if interval <= 0 or (_sweeper_task and not _sweeper_task.done()):
+        return
+    _sweeper_task = asyncio.create_task(_sweep_loop(interval))
+
+
+async def stop_layer_sweeper() -> None:
+    global _sweeper_task
+    if _sweeper_task:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
@@ -54,7 +54,7 @@ async def migrate_user_vectors(db: AsyncSession, user_id: Optional[UUID] = None)
             text(f"""
                 INSERT INTO cerebro_memory_nodes (
                     id, user_id, content, content_hash, memory_type, layer, agent_id, visibility,
-                    stability, difficulty, access_count, access_timestamps_json,
+                    stability, difficulty, access_count, access_timestamps,
                     compressed_count, compressed_avg_interval,
                     last_retrievability, last_activation,
                     valence, arousal, salience,
@@ -93,8 +93,8 @@ async def migrate_user_vectors(db: AsyncSession, user_id: Optional[UUID] = None)
                     5.0,  -- difficulty
                     COALESCE(uv.access_count, 0),
                     CASE WHEN uv.last_accessed_at IS NOT NULL
-                        THEN jsonb_build_array(extract(epoch FROM uv.last_accessed_at))
-                        ELSE '[]'::jsonb
+                        THEN ARRAY[extract(epoch FROM uv.last_accessed_at)::float8]
+                        ELSE '{{}}'::float8[]
                     END,
                     0,    -- compressed_count
                     0.0,  -- compressed_avg_interval
@@ -171,7 +171,7 @@ async def migrate_agent_memories(db: AsyncSession, user_id: Optional[UUID] = Non
             text(f"""
                 INSERT INTO cerebro_memory_nodes (
                     id, user_id, content, content_hash, memory_type, layer, agent_id, visibility,
-                    stability, difficulty, access_count, access_timestamps_json,
+                    stability, difficulty, access_count, access_timestamps,
                     compressed_count, compressed_avg_interval,
                     last_retrievability, last_activation,
                     valence, arousal, salience,
@@ -207,8 +207,8 @@ async def migrate_agent_memories(db: AsyncSession, user_id: Optional[UUID] = Non
                     5.0,
                     COALESCE(am.access_count, 0),
                     CASE WHEN am.last_accessed IS NOT NULL
-                        THEN jsonb_build_array(extract(epoch FROM am.last_accessed))
-                        ELSE '[]'::jsonb
+                        THEN ARRAY[extract(epoch FROM am.last_accessed)::float8]
+                        ELSE '{{}}'::float8[]
                     END,
                     0, 0.0, 1.0, 0.0,
                     CASE WHEN am.memory_type = 'relationship' THEN 'positive' ELSE 'neutral' END,
@@ -0,0 +1,391 @@
+"""Online HASH (user_id) partitioning of the CerebroCortex graph tables.
+
+`cerebro_memory_nodes` and `cerebro_associative_links` start as plain heap
+tables, and every query filters them by `user_id`. With `cerebro_partitions`
+> 0, each table is moved online to a table partitioned by HASH (user_id).
+Queries then prune to one partition, so vacuum, index builds and HNSW scans
+work on 1/N of the rows. One table at a time, tracked in
+`cerebro_partition_state` (migration v137):
+
+1. prepare - `<table>_part` is created LIKE the table (columns, defaults,
+   generated columns, checks), with `cerebro_partitions` partitions
+   `<table>_hNN`. The table's constraints and indexes are cloned onto it, so
+   every partition gets its own HNSW/GIN/btree indexes. A mirror trigger
+   on the live table replays each insert/update/delete into the copy.
+2. copy - one batch of `cerebro_partition_copy_batch` rows per tick, in
+   primary-key order from the stored cursor. The source rows are locked FOR
+   SHARE, so a concurrent update or delete waits for the batch and is then
+   mirrored over the copied row. If the live table's columns change meanwhile
+   (a startup migration), the copy is dropped and the table starts over at
+   prepare - the copy and the mirror trigger would lose the new column.
+3. swap - in one transaction under ACCESS EXCLUSIVE lock, the live table and
+   its indexes are renamed to `_legacy`. The copy and its indexes take the
+   canonical names, and the table's triggers are recreated on it. Migrations
+   keep working because they match indexes by name. The lock is taken with
+   SWAP_LOCK_TIMEOUT: behind a long transaction the swap gives up and is
+   retried later, instead of queueing every cerebro query behind it.
+4. The legacy table is dropped LEGACY_RETENTION_HOURS after the swap.
+
+Changing `cerebro_partitions` after a table has been swapped does not
+repartition it.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("cerebro_memory_nodes", "cerebro_associative_links")
+PART_SUFFIX = "_part"
+LEGACY_SUFFIX = "_legacy"
+INDEX_SUFFIX = "_p"              # cloned index/constraint names until the swap
+LEGACY_RETENTION_HOURS = 24
+SWAP_LOCK_TIMEOUT = "2s"         # max wait for the swap's ACCESS EXCLUSIVE lock
+TICK_SECONDS = 1.0               # between ticks while copying
+IDLE_SECONDS = 60.0              # between ticks with nothing to do
+
+_INDEXDEF = re.compile(r"^CREATE (UNIQUE )?INDEX (\S+) ON (?:ONLY )?(\S+) USING ")
+
+_migrator_task: Optional[asyncio.Task] = None
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+async def partition_count(db: AsyncSession, table: str) -> int:
+    """Number of partitions of `table`, 0 for a plain table."""
+    return (await db.execute(text("""
+        SELECT COUNT(i.inhrelid)
+        FROM pg_partitioned_table p
+        LEFT JOIN pg_inherits i ON i.inhparent = p.partrelid
+        WHERE p.partrelid = to_regclass(:table)
+    """), {"table": table})).scalar() or 0
+
+
+async def _columns(db: AsyncSession, table: str) -> list[str]:
+    """Stored columns in table order (generated columns are recomputed, not copied)."""
+    return list((await db.execute(text("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+    """), {"table": table})).scalars().all())
+
+
+async def _column_layout(db: AsyncSession, table: str) -> list[tuple[str, str, str]]:
+    """(name, type, generated) of every column, in table order."""
+    return [tuple(row) for row in (await db.execute(text("""
+        SELECT attname, format_type(atttypid, atttypmod), attgenerated FROM pg_attribute
+        WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {"table": table})).all()]
+
+
+async def _columns_match(db: AsyncSession, table: str) -> bool:
+    """Whether the partitioned copy still has exactly the live table's columns."""
+    return await _column_layout(db, table) == await _column_layout(db, table + PART_SUFFIX)
+
+
+def _lock_timed_out(error: DBAPIError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == "55P03"  # lock_not_available
+
+
+async def _index_names(db: AsyncSession, table: str) -> list[str]:
+    return list((await db.execute(text("""
+        SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(:table)
+    """), {"table": table})).scalars().all())
+
+
+# =============================================================================
+# Phases
+# =============================================================================
+
+async def _prepare(db: AsyncSession, table: str, partitions: int) -> None:
+    """Create the partitioned copy, its indexes and the mirror trigger. Does not commit."""
+    part = table + PART_SUFFIX
+    await db.execute(text(f"""
+        CREATE TABLE {part} (
+            LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS INCLUDING STORAGE
+        ) PARTITION BY HASH (user_id)
+    """))
+    for remainder in range(partitions):
+        await db.execute(text(f"""
+            CREATE TABLE {table}_h{remainder:02d} PARTITION OF {part}
+            FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+        """))
+
+    # Keys (suffixed: their index names are schema-wide) and foreign keys
+    constraints = (await db.execute(text("""
+        SELECT conname, contype, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(:table) AND contype IN ('p', 'u', 'f')
+    """), {"table": table})).all()
+    for row in constraints:
+        name = row.conname + INDEX_SUFFIX if row.contype in ("p", "u") else row.conname
+        await db.execute(text(f"ALTER TABLE {part} ADD CONSTRAINT {_ident(name)} {row.definition}"))
+
+    # Every other index, built per partition (HNSW included)
+    indexes = (await db.execute(text("""
+        SELECT i.relname AS name, pg_get_indexdef(x.indexrelid) AS definition
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(:table)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    """), {"table": table})).all()
+    for row in indexes:
+        match = _INDEXDEF.match(row.definition)
+        if match is None:
+            raise RuntimeError(f"Unrecognised index definition: {row.definition}")
+        clone = f"CREATE {match.group(1) or ''}INDEX {_ident(row.name + INDEX_SUFFIX)} ON {part} USING " + row.definition[match.end():]
+        await db.execute(text(clone))
+
+    columns = await _columns(db, table)
+    updatable = [c for c in columns if c not in ("id", "user_id")]
+    await db.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {table}_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND (OLD.id, OLD.user_id) IS DISTINCT FROM (NEW.id, NEW.user_id)) THEN
+                DELETE FROM {part} WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO {part} ({", ".join(columns)})
+                VALUES ({", ".join("NEW." + c for c in columns)})
+                ON CONFLICT (id, user_id) DO UPDATE SET
+                    ({", ".join(updatable)}) = ROW({", ".join("EXCLUDED." + c for c in updatable)});
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """))
+    await db.execute(text(f"""
+        CREATE TRIGGER trg_{table}_mirror
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_mirror();
+    """))
+    await db.execute(text("""
+        INSERT INTO cerebro_partition_state (table_name, partitions) VALUES (:table, :partitions)
+        ON CONFLICT (table_name) DO UPDATE SET
+            partitions = EXCLUDED.partitions, phase = 'copying', cursor_id = '',
+            cursor_user = '00000000-0000-0000-0000-000000000000', copied = 0, started_at = NOW(),
+            swapped_at = NULL, legacy_dropped_at = NULL
+    """), {"table": table, "partitions": partitions})
+
+
+async def _copy_batch(db: AsyncSession, table: str, cursor_id: str, cursor_user, limit: int) -> tuple[int, Optional[str], Optional[str]]:
+    """Copy the next rows after the cursor. Returns (rows, last_id, last_user). Does not commit."""
+    cols = ", ".join(await _columns(db, table))
+    row = (await db.execute(text(f"""
+        WITH batch AS (
+            SELECT {cols} FROM {table}
+            WHERE (id, user_id) > (:cursor_id, CAST(:cursor_user AS uuid))
+            ORDER BY id, user_id
+            LIMIT :limit
+            FOR SHARE
+        ), copied AS (
+            INSERT INTO {table}{PART_SUFFIX} ({cols})
+            SELECT {cols} FROM batch
+            ON CONFLICT DO NOTHING
+        )
+        SELECT COUNT(*) AS n,
+               (array_agg(id ORDER BY id DESC, user_id DESC))[1] AS last_id,
+               (array_agg(user_id ORDER BY id DESC, user_id DESC))[1] AS last_user
+        FROM batch
+    """), {"cursor_id": cursor_id, "cursor_user": str(cursor_user), "limit": limit})).first()
+    return row.n, row.last_id, str(row.last_user) if row.last_user else None
+
+
+async def _abandon(db: AsyncSession, table: str) -> None:
+    """Drop the partitioned copy and its mirror trigger; the next tick prepares afresh. Does not commit."""
+    await db.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+    await db.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_mirror ON {table}"))
+    await db.execute(text(f"DROP FUNCTION IF EXISTS {table}_mirror()"))
+    await db.execute(text(f"DROP TABLE IF EXISTS {table}{PART_SUFFIX}"))
+    await db.execute(text("DELETE FROM cerebro_partition_state WHERE table_name = :table"), {"table": table})
+
+
+async def _swap(db: AsyncSession, table: str, state) -> None:
+    """Put the partitioned copy in place of the live table. Does not commit.
+
+    Raises DBAPIError (lock_not_available) when the lock is not granted
+    within SWAP_LOCK_TIMEOUT, and RuntimeError when the columns drifted.
+    """
+    part, legacy = table + PART_SUFFIX, table + LEGACY_SUFFIX
+    await db.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+    await db.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+    if not await _columns_match(db, table):
+        raise RuntimeError(f"{table} columns changed during the copy")
+
+    # Safety net under the lock: anything past the cursor (normally nothing)
+    cursor_id, cursor_user = state.cursor_id, state.cursor_user
+    while True:
+        n, last_id, last_user = await _copy_batch(db, table, cursor_id, cursor_user, 10000)
+        if not n:
+            break
+        cursor_id, cursor_user = last_id, last_user
+
+    mirror = f"trg_{table}_mirror"
+    triggers = (await db.execute(text("""
+        SELECT tgname, pg_get_triggerdef(oid) AS definition FROM pg_trigger
+        WHERE tgrelid = to_regclass(:table) AND NOT tgisinternal AND tgname <> :mirror
+    """), {"table": table, "mirror": mirror})).all()
+    await db.execute(text(f"DROP TRIGGER {mirror} ON {table}"))
+    await db.execute(text(f"DROP FUNCTION {table}_mirror()"))
+
+    await db.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    for name in await _index_names(db, legacy):
+        await db.execute(text(f"ALTER INDEX {_ident(name)} RENAME TO {_ident(name[:63 - len(LEGACY_SUFFIX)] + LEGACY_SUFFIX)}"))
+    for row in triggers:
+        await db.execute(text(f"DROP TRIGGER {_ident(row.tgname)} ON {legacy}"))
+
+    await db.execute(text(f"ALTER TABLE {part} RENAME TO {table}"))
+    for name in await _index_names(db, table):
+        if name.endswith(INDEX_SUFFIX):
+            await db.execute(text(f"ALTER INDEX {_ident(name)} RENAME TO {_ident(name[:-len(INDEX_SUFFIX)])}"))
+    for row in triggers:
+        await db.execute(text(row.definition))  # ON <table> now resolves to the partitioned table
+
+    await db.execute(text("""
+        UPDATE cerebro_partition_state
+        SET phase = 'swapped', swapped_at = NOW(), cursor_id = :cursor_id, cursor_user = CAST(:cursor_user AS uuid)
+        WHERE table_name = :table
+    """), {"table": table, "cursor_id": cursor_id, "cursor_user": str(cursor_user)})
+
+
+# =============================================================================
+# Driver
+# =============================================================================
+
+async def migrate_tick(db: AsyncSession) -> Optional[dict]:
+    """Advance the partitioning by one step (prepare, one copy batch, swap or cleanup). Commits.
+
+    Returns what was done, or None when there is nothing to do (or another
+    instance holds the migration).
+    """
+    settings = get_settings()
+    if settings.cerebro_partitions <= 0:
+        return None
+    if not (await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('cerebro_partitioning'))"))).scalar():
+        return None
+
+    for table in TABLES:
+        state = (await db.execute(text(
+            "SELECT * FROM cerebro_partition_state WHERE table_name = :table"
+        ), {"table": table})).first()
+
+        if state is None:
+            if await partition_count(db, table):
+                continue  # partitioned outside this migration
+            await _prepare(db, table, settings.cerebro_partitions)
+            await db.commit()
+            logger.info(f"Partitioning {table}: prepared {settings.cerebro_partitions} hash partitions")
+            return {"table": table, "phase": "prepared"}
+
+        if state.phase == "copying":
+            if not await _columns_match(db, table):
+                await _abandon(db, table)
+                await db.commit()
+                logger.warning(f"Partitioning {table}: columns changed during the copy, starting over")
+                return {"table": table, "phase": "restarted"}
+            n, last_id, last_user = await _copy_batch(
+                db, table, state.cursor_id, state.cursor_user, settings.cerebro_partition_copy_batch,
+            )
+            if n:
+                await db.execute(text("""
+                    UPDATE cerebro_partition_state
+                    SET cursor_id = :cursor_id, cursor_user = CAST(:cursor_user AS uuid), copied = copied + :n
+                    WHERE table_name = :table
+                """), {"table": table, "cursor_id": last_id, "cursor_user": last_user, "n": n})
+                await db.commit()
+                return {"table": table, "phase": "copying", "copied": state.copied + n}
+            try:
+                await _swap(db, table, state)
+            except DBAPIError as e:
+                if not _lock_timed_out(e):
+                    raise
+                await db.rollback()
+                logger.info(f"Partitioning {table}: swap lock not granted within {SWAP_LOCK_TIMEOUT}, retrying later")
+                return {"table": table, "phase": "swap_deferred"}
+            await db.commit()
+            await db.execute(text(f"ANALYZE {table}"))
+            await db.commit()
+            logger.info(f"Partitioning {table}: swapped in after copying {state.copied} rows")
+            return {"table": table, "phase": "swapped"}
+
+        if state.phase == "swapped":
+            due = (await db.execute(text(
+                "SELECT swapped_at < NOW() - make_interval(hours => :hours) FROM cerebro_partition_state WHERE table_name = :table"
+            ), {"table": table, "hours": LEGACY_RETENTION_HOURS})).scalar()
+            if due:
+                await db.execute(text(f"DROP TABLE IF EXISTS {table}{LEGACY_SUFFIX}"))
+                await db.execute(text("""
+                    UPDATE cerebro_partition_state SET phase = 'done', legacy_dropped_at = NOW() WHERE table_name = :table
+                """), {"table": table})
+                await db.commit()
+                logger.info(f"Partitioning {table}: dropped {table}{LEGACY_SUFFIX}")
+                return {"table": table, "phase": "done"}
+
+    await db.rollback()
+    return None
+
+
+async def partition_status(db: AsyncSession) -> list[dict]:
+    """Per table: layout, partition count and migration progress."""
+    states = {
+        row["table_name"]: row
+        for row in (await db.execute(text("SELECT * FROM cerebro_partition_state"))).mappings().all()
+    }
+    report = []
+    for table in TABLES:
+        state = states.get(table)
+        report.append({
+            "table": table,
+            "partitions": await partition_count(db, table),
+            "phase": state["phase"] if state else None,
+            "copied": state["copied"] if state else 0,
+            "started_at": state["started_at"].isoformat() if state and state["started_at"] else None,
+            "swapped_at": state["swapped_at"].isoformat() if state and state["swapped_at"] else None,
+        })
+    return report
+
+
+async def _migrate_loop() -> None:
+    from app.database import get_db_context
+
+    while True:
+        try:
+            async with get_db_context() as db:
+                step = await migrate_tick(db)
+            busy = step and step["phase"] != "swap_deferred"
+            await asyncio.sleep(TICK_SECONDS if busy else IDLE_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cerebro partition migration failed: {e}")
+            await asyncio.sleep(IDLE_SECONDS)
+
+
+def start_partition_migrator() -> None:
+    """Start the online partitioning loop when `cerebro_partitions` > 0 (idempotent)."""
+    global _migrator_task
+    if get_settings().cerebro_partitions <= 0 or (_migrator_task and not _migrator_task.done()):
+        return
+    _migrator_task = asyncio.create_task(_migrate_loop())
+
+
+async def stop_partition_migrator() -> None:
+    global _migrator_task
+    if _migrator_task:
+        _migrator_task.cancel()
+        try:
+            await _migrator_task
+        except asyncio.CancelledError:
+            pass
+        _migrator_task = None
@@ -8,6 +8,8 @@ import hashlib
 import json
 import logging
 import time
+import uuid
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
@@ -15,14 +17,99 @@ from uuid import UUID
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cerebro.activation.strength import retrievability, update_difficulty_on_recall, update_stability_on_recall
+from app.cerebro.config import (
+    ACTR_B_CONSTANT,
+    ACTR_DECAY_RATE,
+    ACTR_MIN_TIME_SECONDS,
+    DEDUP_ANN_CANDIDATES,
+    DEDUP_MAX_CANDIDATES,
+    DEDUP_SIMHASH_MAX_DISTANCE,
+    MAX_STORED_TIMESTAMPS,
+    RECALL_CANDIDATE_MULTIPLIER,
+    RECALL_RRF_K,
+    RECALL_WEIGHT_LEXICAL,
+    RECALL_WEIGHT_VECTOR,
+)
 from app.cerebro.models.memory import MemoryMetadata, MemoryNode, StrengthState
 from app.cerebro.models.link import AssociativeLink
 from app.cerebro.models.episode import Episode, EpisodeStep
 from app.cerebro.models.agent import AgentProfile
+from app.cerebro.simhash import bands, hamming, simhash64
 from app.cerebro.types import LinkType, MemoryLayer, MemoryType, EmotionalValence
+from app.database import filtered_ann_scan
 
 logger = logging.getLogger(__name__)
 
+# Everything _row_to_memory_node reads - never the embedding itself
+NODE_COLUMNS = """
+    id, user_id, content, memory_type, layer, agent_id, visibility,
+    stability, difficulty, access_count, access_timestamps,
+    compressed_count, compressed_avg_interval,
+    last_retrievability, last_activation, last_computed_at,
+    valence, arousal, salience, episode_id, session_id, conversation_thread,
+    tags, concepts, responding_to, related_agents, source, derived_from,
+    created_at, last_accessed_at, promoted_at
+"""
+
+# ACT-R base level and FSRS retrievability computed in SQL (functions from migration v131)
+_STRENGTH_COLUMNS = """
+    cerebro_base_level(access_timestamps, compressed_count, compressed_avg_interval,
+                       :now, :actr_decay, :actr_min_t) AS base_level,
+    cerebro_retrievability(access_timestamps, stability, :now) AS retrievability
+"""
+
+# Graph view projection: what the cortex visualisation draws - never the
+# embedding or access history, content cut to :content_chars in SQL
+GRAPH_NODE_COLUMNS = """
+    n.id, LEFT(n.content, :content_chars) AS content, n.memory_type, n.layer, n.agent_id,
+    n.visibility, n.salience, n.arousal, n.valence, n.access_count,
+    n.last_retrievability, n.last_activation, n.tags, n.concepts, n.responding_to,
+    n.related_agents, n.conversation_thread, n.created_at, n.last_accessed_at
+"""
+
+# Every counter dimension from a single scan per table (same shape as the
+# cerebro_stat_counts rows the v133 triggers maintain)
+CORTEX_RECOUNT_SQL = """
+    SELECT CASE WHEN GROUPING(memory_type) = 0 THEN 'memory_types'
+                WHEN GROUPING(layer) = 0 THEN 'layers'
+                WHEN GROUPING(visibility) = 0 THEN 'visibility'
+                WHEN GROUPING(agent_id) = 0 THEN 'agents'
+                ELSE 'nodes' END AS dim,
+           COALESCE(memory_type, layer, visibility, agent_id, '') AS key,
+           COUNT(*) AS count
+    FROM cerebro_memory_nodes
+    WHERE user_id = :uid
+    GROUP BY GROUPING SETS ((memory_type), (layer), (visibility), (agent_id), ())
+    UNION ALL
+    SELECT CASE WHEN GROUPING(link_type) = 0 THEN 'link_types' ELSE 'links' END,
+           COALESCE(link_type, ''),
+           COUNT(*)
+    FROM cerebro_associative_links
+    WHERE user_id = :uid
+    GROUP BY GROUPING SETS ((link_type), ())
+    UNION ALL
+    SELECT 'episodes', '', COUNT(*) FROM cerebro_episodes WHERE user_id = :uid
+"""
+
+_TOTAL_DIMS = ("nodes", "links", "episodes")
+_BREAKDOWN_DIMS = ("memory_types", "layers", "visibility", "link_types", "agents")
+
+
+def _stats_from_counts(counts) -> dict:
+    """(dim, key, count) rows -> the stats dict (totals plus breakdowns)."""
+    result: dict = {dim: 0 for dim in _TOTAL_DIMS}
+    result.update({dim: {} for dim in _BREAKDOWN_DIMS})
+    for dim, key, count in counts:
+        if not count:
+            continue
+        if dim in _TOTAL_DIMS:
+            result[dim] = count
+        elif dim in result:
+            # Agent-less nodes are counted under '' (the key column is NOT NULL)
+            result[dim][None if dim == "agents" and key == "" else key] = count
+    return result
+
 
 class PgGraphStore:
     """Async PostgreSQL adapter implementing CerebroCortex storage.
@@ -64,6 +151,7 @@ class PgGraphStore:
             "user_id": str(user_id),
             "content": node.content,
             "content_hash": content_hash,
+            "simhash": simhash64(node.content),
             "memory_type": meta.memory_type.value,
             "layer": meta.layer.value,
             "agent_id": meta.agent_id,
@@ -71,7 +159,7 @@ class PgGraphStore:
             "stability": strength.stability,
             "difficulty": strength.difficulty,
             "access_count": strength.access_count,
-            "access_timestamps_json": json.dumps(strength.access_timestamps),
+            "access_timestamps": [float(t) for t in strength.access_timestamps],
             "compressed_count": strength.compressed_count,
             "compressed_avg_interval": strength.compressed_avg_interval,
             "last_retrievability": strength.last_retrievability,
@@ -98,8 +186,8 @@ class PgGraphStore:
             params["embedding"] = embedding_val
             sql = text("""
                 INSERT INTO cerebro_memory_nodes (
-                    id, user_id, content, content_hash, memory_type, layer, agent_id, visibility,
-                    stability, difficulty, access_count, access_timestamps_json,
+                    id, user_id, content, content_hash, simhash, memory_type, layer, agent_id, visibility,
+                    stability, difficulty, access_count, access_timestamps,
                     compressed_count, compressed_avg_interval,
                     last_retrievability, last_activation, last_computed_at,
                     valence, arousal, salience,
@@ -108,8 +196,8 @@ class PgGraphStore:
                     source, derived_from,
                     created_at, last_accessed_at, promoted_at, embedding
                 ) VALUES (
-                    :id, :user_id, :content, :content_hash, :memory_type, :layer, :agent_id, :visibility,
-                    :stability, :difficulty, :access_count, CAST(:access_timestamps_json AS jsonb),
+                    :id, :user_id, :content, :content_hash, :simhash, :memory_type, :layer, :agent_id, :visibility,
+                    :stability, :difficulty, :access_count, CAST(:access_timestamps AS float8[]),
                     :compressed_count, :compressed_avg_interval,
                     :last_retrievability, :last_activation, :last_computed_at,
                     :valence, :arousal, :salience,
@@ -122,8 +210,8 @@ class PgGraphStore:
         else:
             sql = text("""
                 INSERT INTO cerebro_memory_nodes (
-                    id, user_id, content, content_hash, memory_type, layer, agent_id, visibility,
-                    stability, difficulty, access_count, access_timestamps_json,
+                    id, user_id, content, content_hash, simhash, memory_type, layer, agent_id, visibility,
+                    stability, difficulty, access_count, access_timestamps,
                     compressed_count, compressed_avg_interval,
                     last_retrievability, last_activation, last_computed_at,
                     valence, arousal, salience,
@@ -132,8 +220,8 @@ class PgGraphStore:
                     source, derived_from,
                     created_at, last_accessed_at, promoted_at
                 ) VALUES (
-                    :id, :user_id, :content, :content_hash, :memory_type, :layer, :agent_id, :visibility,
-                    :stability, :difficulty, :access_count, CAST(:access_timestamps_json AS jsonb),
+                    :id, :user_id, :content, :content_hash, :simhash, :memory_type, :layer, :agent_id, :visibility,
+                    :stability, :difficulty, :access_count, CAST(:access_timestamps AS float8[]),
                     :compressed_count, :compressed_avg_interval,
                     :last_retrievability, :last_activation, :last_computed_at,
                     :valence, :arousal, :salience,
@@ -151,7 +239,7 @@ class PgGraphStore:
     async def get_node(self, user_id: UUID, node_id: str) -> Optional[MemoryNode]:
         """Get a memory node by ID."""
         result = await self.db.execute(
-            text("SELECT * FROM cerebro_memory_nodes WHERE id = :id AND user_id = :user_id"),
+            text(f"SELECT {NODE_COLUMNS} FROM cerebro_memory_nodes WHERE id = :id AND user_id = :user_id"),
             {"id": node_id, "user_id": str(user_id)},
         )
         row = result.mappings().first()
@@ -169,6 +257,134 @@ class PgGraphStore:
         row = result.mappings().first()
         return row["id"] if row else None
 
+    async def find_near_duplicates(
+        self,
+        user_id: UUID,
+        content: str,
+        agent_id: str,
+        visibility: str,
+    ) -> list[tuple[str, int]]:
+        """SimHash candidates for `content`: [(node_id, differing_bits)], closest first.
+
+        Looks up nodes sharing any 16-bit band (one index per band), then keeps
+        those within DEDUP_SIMHASH_MAX_DISTANCE bits. Band equality only
+        guarantees recall up to 3 bits; nearest_by_embedding covers the rest
+        of that radius. Scoped like recall: the
+        same agent's memories, or shared ones when the new memory is shared.
+        """
+        fingerprint = simhash64(content)
+        b0, b1, b2, b3 = bands(fingerprint)
+        result = await self.db.execute(
+            text("""
+                SELECT id, simhash FROM cerebro_memory_nodes
+                WHERE user_id = :user_id
+                  AND simhash IS NOT NULL
+                  AND ((simhash & 65535) = :b0
+                       OR ((simhash >> 16) & 65535) = :b1
+                       OR ((simhash >> 32) & 65535) = :b2
+                       OR ((simhash >> 48) & 65535) = :b3)
+                  AND (agent_id = :agent_id OR (visibility = 'shared' AND :visibility = 'shared'))
+                LIMIT :limit
+            """),
+            {
+                "user_id": str(user_id), "b0": b0, "b1": b1, "b2": b2, "b3": b3,
+                "agent_id": agent_id, "visibility": visibility, "limit": DEDUP_MAX_CANDIDATES * 5,
+            },
+        )
+        candidates = [(row.id, hamming(fingerprint, row.simhash)) for row in result]
+        candidates = [c for c in candidates if c[1] <= DEDUP_SIMHASH_MAX_DISTANCE]
+        candidates.sort(key=lambda c: c[1])
+        return candidates[:DEDUP_MAX_CANDIDATES]
+
+    async def nearest_by_embedding(
+        self,
+        user_id: UUID,
+        embedding: list[float],
+        agent_id: str,
+        visibility: str,
+        limit: int = DEDUP_ANN_CANDIDATES,
+    ) -> list[tuple[str, float]]:
+        """Nearest live nodes to `embedding`: [(node_id, cosine similarity)], closest first.
+
+        The near-duplicate lookup for rephrasings SimHash bands miss. Scoped
+        like find_near_duplicates; served by the hot HNSW index.
+        """
+        async with filtered_ann_scan(self.db, limit):
+            result = await self.db.execute(
+                text("""
+                    SELECT id, 1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+                    FROM cerebro_memory_nodes
+                    WHERE user_id = :user_id AND NOT archived AND embedding IS NOT NULL
+                      AND (agent_id = :agent_id OR (visibility = 'shared' AND :visibility = 'shared'))
+                    ORDER BY embedding <=> CAST(:embedding AS vector)
+                    LIMIT :limit
+                """),
+                {
+                    "user_id": str(user_id), "agent_id": agent_id, "visibility": visibility, "limit": limit,
+                    "embedding": f"[{','.join(str(x) for x in embedding)}]",
+                },
+            )
+        return [(row.id, float(row.similarity)) for row in result]
+
+    async def embedding_similarities(self, user_id: UUID, node_ids: list[str], embedding: list[float]) -> dict[str, float]:
+        """Cosine similarity of `embedding` to each of node_ids (nodes without embeddings omitted)."""
+        if not node_ids:
+            return {}
+        result = await self.db.execute(
+            text("""
+                SELECT id, 1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+                FROM cerebro_memory_nodes
+                WHERE user_id = :user_id AND id = ANY(CAST(:ids AS text[])) AND embedding IS NOT NULL
+            """),
+            {"user_id": str(user_id), "ids": node_ids, "embedding": f"[{','.join(str(x) for x in embedding)}]"},
+        )
+        return {row.id: float(row.similarity) for row in result}
+
+    async def record_dedup(self, user_id: UUID, outcome: str) -> None:
+        """Count an ingest dedup check: outcome is 'exact', 'near' or 'miss'."""
+        await self.db.execute(
+            text("""
+                INSERT INTO cerebro_dedup_stats (user_id, checks, exact_hits, near_hits, last_hit_at)
+                VALUES (:user_id, 1, :exact, :near, CASE WHEN :hit THEN NOW() END)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    checks = cerebro_dedup_stats.checks + 1,
+                    exact_hits = cerebro_dedup_stats.exact_hits + EXCLUDED.exact_hits,
+                    near_hits = cerebro_dedup_stats.near_hits + EXCLUDED.near_hits,
+                    last_hit_at = COALESCE(EXCLUDED.last_hit_at, cerebro_dedup_stats.last_hit_at)
+            """),
+            {
+                "user_id": str(user_id),
+                "exact": int(outcome == "exact"),
+                "near": int(outcome == "near"),
+                "hit": outcome != "miss",
+            },
+        )
+        await self.db.commit()
+
+    async def backfill_simhash(self, limit: int = 500) -> int:
+        """Fingerprint up to `limit` nodes stored before SimHash existed. Returns count."""
+        rows = (await self.db.execute(
+            text("SELECT id, user_id, content FROM cerebro_memory_nodes WHERE simhash IS NULL LIMIT :limit"),
+            {"limit": limit},
+        )).fetchall()
+        if not rows:
+            return 0
+        await self.db.execute(
+            text("""
+                UPDATE cerebro_memory_nodes n SET simhash = t.simhash
+                FROM unnest(CAST(:ids AS text[]), CAST(:users AS uuid[]), CAST(:hashes AS bigint[]))
+                    AS t(id, user_id, simhash)
+                WHERE n.id = t.id AND n.user_id = t.user_id
+            """),
+            {
+                "ids": [row.id for row in rows],
+                "users": [row.user_id for row in rows],
+                "hashes": [simhash64(row.content) for row in rows],
+            },
+        )
+        await self.db.commit()
+        return len(rows)
+
     async def update_node_strength(self, user_id: UUID, node_id: str, strength: StrengthState) -> bool:
         """Update only the strength parameters for a node."""
         result = await self.db.execute(
@@ -176,20 +392,22 @@ class PgGraphStore:
                 UPDATE cerebro_memory_nodes SET
                     stability = :stability, difficulty = :difficulty,
                     access_count = :access_count,
-                    access_timestamps_json = CAST(:timestamps AS jsonb),
+                    access_timestamps = CAST(:timestamps AS float8[]),
                     compressed_count = :compressed_count,
                     compressed_avg_interval = :compressed_avg_interval,
                     last_retrievability = :last_retrievability,
                     last_activation = :last_activation,
                     last_computed_at = :last_computed_at,
-                    last_accessed_at = NOW()
+                    last_accessed_at = NOW(),
+                    archived = FALSE,
+                    archived_at = NULL
                 WHERE id = :id AND user_id = :user_id
             """),
             {
                 "stability": strength.stability,
                 "difficulty": strength.difficulty,
                 "access_count": strength.access_count,
-                "timestamps": json.dumps(strength.access_timestamps),
+                "timestamps": [float(t) for t in strength.access_timestamps],
                 "compressed_count": strength.compressed_count,
                 "compressed_avg_interval": strength.compressed_avg_interval,
                 "last_retrievability": strength.last_retrievability,
@@ -202,6 +420,66 @@ class PgGraphStore:
         await self.db.commit()
         return result.rowcount > 0
 
+    async def record_access(self, user_id: UUID, node: MemoryNode, now: Optional[float] = None) -> bool:
+        """Record one access: FSRS update plus an append-and-trim of the access history.
+
+        The timestamp array is appended to (and its oldest entries compressed)
+        in SQL, and base-level activation is recomputed there, so the history
+        never round-trips through Python.
+        """
+        now = now or time.time()
+        strength = node.strength
+        previous = max(strength.access_timestamps) if strength.access_timestamps else now
+        current_r = retrievability(max(now - previous, 0) / 86400.0, strength.stability)
+
+        result = await self.db.execute(
+            text("""
+                UPDATE cerebro_memory_nodes n SET
+                    stability = :stability,
+                    difficulty = :difficulty,
+                    access_count = n.access_count + 1,
+                    access_timestamps = c.ts,
+                    compressed_count = c.cc,
+                    compressed_avg_interval = c.ci,
+                    last_retrievability = 1.0,
+                    last_activation = COALESCE(
+                        cerebro_base_level(c.ts, c.cc, c.ci, :now, :actr_decay, :actr_min_t) + :actr_b, 0.0),
+                    last_computed_at = :now,
+                    last_accessed_at = NOW(),
+                    archived = FALSE,
+                    archived_at = NULL
+                FROM (
+                    SELECT id, user_id,
+                           (access_timestamps || CAST(:now AS float8))
+                               [GREATEST(1, cardinality(access_timestamps) + 2 - :max_stored):] AS ts,
+                           compressed_count + GREATEST(0, cardinality(access_timestamps) + 1 - :max_stored) AS cc,
+                           CASE
+                               WHEN cardinality(access_timestamps) + 1 > :max_stored AND cardinality(access_timestamps) >= 2
+                               THEN (compressed_count * compressed_avg_interval
+                                     + (access_timestamps[2] - access_timestamps[1])) / (compressed_count + 1)
+                               ELSE compressed_avg_interval
+                           END AS ci
+                    FROM cerebro_memory_nodes
+                    WHERE id = :id AND user_id = :user_id
+                    FOR UPDATE
+                ) c
+                WHERE n.id = c.id AND n.user_id = c.user_id
+            """),
+            {
+                "stability": update_stability_on_recall(strength.stability, strength.difficulty, current_r),
+                "difficulty": update_difficulty_on_recall(strength.difficulty, current_r),
+                "now": now,
+                "max_stored": MAX_STORED_TIMESTAMPS,
+                "actr_decay": ACTR_DECAY_RATE,
+                "actr_min_t": ACTR_MIN_TIME_SECONDS,
+                "actr_b": ACTR_B_CONSTANT,
+                "id": node.id,
+                "user_id": str(user_id),
+            },
+        )
+        await self.db.commit()
+        return result.rowcount > 0
+
     async def update_node_metadata(self, user_id: UUID, node_id: str, **kwargs) -> bool:
         """Update specific metadata fields for a node."""
         allowed = {
@@ -241,12 +519,54 @@ class PgGraphStore:
     ) -> list[tuple[MemoryNode, float]]:
         """Search memories by vector similarity using pgvector.
 
-        Returns list of (MemoryNode, similarity_score) tuples.
+        Returns list of (MemoryNode, similarity_score) tuples. Each node's
+        strength.last_activation / last_retrievability are computed in SQL as
+        of now (last_activation is -inf for never-accessed memories).
         """
-        embedding_str = f"[{','.join(str(x) for x in query_embedding)}]"
+        now = time.time()
+        where, params = self._search_filters(user_id, memory_types, min_salience, visibility, agent_id)
+        params.update({
+            "embedding": f"[{','.join(str(x) for x in query_embedding)}]",
+            "top_k": top_k,
+            "now": now,
+            "actr_decay": ACTR_DECAY_RATE,
+            "actr_min_t": ACTR_MIN_TIME_SECONDS,
+        })
+
+        async with filtered_ann_scan(self.db, top_k):
+            result = await self.db.execute(
+                text(f"""
+                    SELECT {NODE_COLUMNS}, {_STRENGTH_COLUMNS},
+                           1 - (embedding <=> CAST(:embedding AS vector)) as similarity
+                    FROM cerebro_memory_nodes
+                    WHERE {where} AND embedding IS NOT NULL
+                    ORDER BY embedding <=> CAST(:embedding AS vector)
+                    LIMIT :top_k
+                """),
+                params,
+            )
+            rows = result.mappings().all()
 
-        where_clauses = ["user_id = :user_id", "embedding IS NOT NULL"]
-        params: dict = {"user_id": str(user_id), "embedding": embedding_str, "top_k": top_k}
+        results = []
+        for row in rows:
+            node = self._row_to_memory_node(row)
+            self._apply_sql_strength(node, row, now)
+            similarity = float(row.get("similarity", 0))
+            results.append((node, similarity))
+        return results
+
+    @staticmethod
+    def _search_filters(
+        user_id: UUID,
+        memory_types: Optional[list[str]] = None,
+        min_salience: float = 0.0,
+        visibility: Optional[str] = None,
+        agent_id: Optional[str] = None,
+    ) -> tuple[str, dict]:
+        """WHERE clause and params shared by the recall searches."""
+        # Archived nodes (see services/cerebro/layers.py) are outside the hot set
+        where_clauses = ["user_id = :user_id", "NOT archived"]
+        params: dict = {"user_id": str(user_id)}
 
         if memory_types:
             where_clauses.append("memory_type = ANY(:memory_types)")
@@ -264,27 +584,142 @@ class PgGraphStore:
             where_clauses.append("agent_id = :agent_id")
             params["agent_id"] = agent_id
 
-        where = " AND ".join(where_clauses)
+        return " AND ".join(where_clauses), params
 
-        result = await self.db.execute(
-            text(f"""
-                SELECT *, 1 - (embedding <=> CAST(:embedding AS vector)) as similarity
-                FROM cerebro_memory_nodes
-                WHERE {where}
-                ORDER BY embedding <=> CAST(:embedding AS vector)
-                LIMIT :top_k
-            """),
-            params,
-        )
-        rows = result.mappings().all()
+    async def hybrid_search(
+        self,
+        user_id: UUID,
+        query: str,
+        query_embedding: Optional[list[float]],
+        top_k: int = 20,
+        memory_types: Optional[list[str]] = None,
+        min_salience: float = 0.0,
+        visibility: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        weights_agent: Optional[str] = None,
+    ) -> list[tuple[MemoryNode, float, float, Optional[int]]]:
+        """Lexical + vector search fused with reciprocal rank fusion.
+
+        One statement: the pgvector ranking and the full-text ranking
+        (content_tsv, any non-stopword query term matching) each produce
+        top_k * RECALL_CANDIDATE_MULTIPLIER candidates, which are fused as
+        sum(w / (RECALL_RRF_K + rank)) and cut to `top_k`. Weights come from
+        `weights_agent`'s profile in cerebro_agents, else the config
+        defaults. Without an embedding only the lexical list runs.
+
+        Returns (MemoryNode, similarity, relevance, lexical_rank) tuples, best
+        first; relevance is the fused score scaled so rank 1 in every list
+        is 1.0, similarity is 0.0 where the node has no embedding.
+        """
+        now = time.time()
+        where, params = self._search_filters(user_id, memory_types, min_salience, visibility, agent_id)
+        params.update({
+            "query": query,
+            "top_k": top_k,
+            "pool": top_k * RECALL_CANDIDATE_MULTIPLIER,
+            "rrf_k": RECALL_RRF_K,
+            "w_vector": RECALL_WEIGHT_VECTOR,
+            "w_lexical": RECALL_WEIGHT_LEXICAL,
+            "weights_agent": weights_agent,
+            "now": now,
+            "actr_decay": ACTR_DECAY_RATE,
+            "actr_min_t": ACTR_MIN_TIME_SECONDS,
+        })
+
+        if query_embedding:
+            params["embedding"] = f"[{','.join(str(x) for x in query_embedding)}]"
+            vector_weight = "COALESCE(a.recall_vector_weight, :w_vector)"
+            vector_cte = f"""
+                SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT id, embedding <=> CAST(:embedding AS vector) AS distance
+                    FROM cerebro_memory_nodes
+                    WHERE {where} AND embedding IS NOT NULL
+                    ORDER BY embedding <=> CAST(:embedding AS vector)
+                    LIMIT :pool
+                ) AS v
+            """
+            similarity = "CASE WHEN embedding IS NULL THEN 0.0 ELSE 1 - (embedding <=> CAST(:embedding AS vector)) END"
+        else:
+            vector_weight = "0.0"
+            vector_cte = "SELECT NULL::varchar AS id, NULL::bigint AS rank WHERE FALSE"
+            similarity = "0.0"
+
+        # The vector list needs :pool rows of this user from the shared index
+        scope = filtered_ann_scan(self.db, params["pool"]) if query_embedding else nullcontext()
+        async with scope:
+            result = await self.db.execute(
+                text(f"""
+                    WITH weights AS (
+                        SELECT {vector_weight} AS w_vector,
+                               COALESCE(a.recall_lexical_weight, :w_lexical) AS w_lexical
+                        FROM (SELECT 1) AS one
+                        LEFT JOIN cerebro_agents a ON a.user_id = :user_id AND a.id = :weights_agent
+                    ),
+                    terms AS (
+                        -- OR of the query's terms: ranked by how many (and how close) match.
+                        -- English stopwords (empty under the 'english' config) are dropped,
+                        -- or "what is the ..." would match nearly every memory
+                        SELECT to_tsquery('simple', string_agg(quote_literal(word), ' | ')) AS q
+                        FROM unnest(tsvector_to_array(to_tsvector('simple', :query))) AS word
+                        WHERE to_tsvector('english', word) <> ''::tsvector
+                    ),
+                    vec AS ({vector_cte}),
+                    lex AS (
+                        SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+                        FROM (
+                            SELECT n.id, ts_rank_cd(n.content_tsv, terms.q) AS score
+                            FROM cerebro_memory_nodes n, terms
+                            WHERE {where} AND n.content_tsv @@ terms.q
+                            ORDER BY score DESC
+                            LIMIT :pool
+                        ) AS l
+                    ),
+                    fused AS (
+                        SELECT COALESCE(vec.id, lex.id) AS id,
+                               lex.rank AS lexical_rank,
+                               (COALESCE(w.w_vector / (:rrf_k + vec.rank), 0)
+                                + COALESCE(w.w_lexical / (:rrf_k + lex.rank), 0))
+                               / NULLIF((w.w_vector + w.w_lexical) / (:rrf_k + 1), 0) AS relevance
+                        FROM vec
+                        FULL JOIN lex ON lex.id = vec.id
+                        CROSS JOIN weights w
+                        ORDER BY relevance DESC NULLS LAST
+                        LIMIT :top_k
+                    )
+                    SELECT n.*, f.relevance, f.lexical_rank
+                    FROM (
+                        SELECT {NODE_COLUMNS}, {_STRENGTH_COLUMNS}, {similarity} AS similarity
+                        FROM cerebro_memory_nodes
+                        WHERE user_id = :user_id AND id IN (SELECT id FROM fused)
+                    ) AS n
+                    JOIN fused f ON f.id = n.id
+                    ORDER BY f.relevance DESC NULLS LAST
+                """),
+                params,
+            )
+            rows = result.mappings().all()
 
         results = []
         for row in rows:
             node = self._row_to_memory_node(row)
-            similarity = float(row.get("similarity", 0))
-            results.append((node, similarity))
+            self._apply_sql_strength(node, row, now)
+            results.append((
+                node,
+                float(row["similarity"] or 0.0),
+                float(row["relevance"] or 0.0),
+                row["lexical_rank"],
+            ))
         return results
 
+    @staticmethod
+    def _apply_sql_strength(node: MemoryNode, row, now: float) -> None:
+        """Copy _STRENGTH_COLUMNS values onto the node's cached strength."""
+        base_level = row["base_level"]
+        node.strength.last_activation = float("-inf") if base_level is None else base_level + ACTR_B_CONSTANT
+        node.strength.last_retrievability = float(row["retrievability"] or 0.0)
+        node.strength.last_computed_at = now
+
     # =========================================================================
     # Associative link CRUD
     # =========================================================================
@@ -364,6 +799,58 @@ class PgGraphStore:
         )
         await self.db.commit()
 
+    async def upsert_links(
+        self,
+        user_id: UUID,
+        links: list[tuple[str, str, LinkType, float, str]],
+        reason: str,
+        boost: float = 0.05,
+    ) -> tuple[int, int]:
+        """Insert (source, target, type, weight, evidence) links in one statement.
+
+        Existing links are reinforced by `boost` instead. Returns (created,
+        strengthened). Does not commit.
+        """
+        unique = {}
+        for source_id, target_id, link_type, weight, evidence in links:
+            unique.setdefault((source_id, target_id, link_type.value), (weight, evidence))
+        if not unique:
+            return 0, 0
+
+        keys = list(unique)
+        rows = (await self.db.execute(
+            text("""
+                INSERT INTO cerebro_associative_links (
+                    id, user_id, source_id, target_id, link_type, weight,
+                    activation_count, created_at, source_reason, evidence
+                )
+                SELECT t.id, :user_id, t.source_id, t.target_id, t.link_type, t.weight,
+                       0, NOW(), :reason, t.evidence
+                FROM unnest(
+                    CAST(:ids AS text[]), CAST(:sources AS text[]), CAST(:targets AS text[]),
+                    CAST(:types AS text[]), CAST(:weights AS float8[]), CAST(:evidence AS text[])
+                ) AS t(id, source_id, target_id, link_type, weight, evidence)
+                ON CONFLICT ON CONSTRAINT uq_cerebro_link DO UPDATE SET
+                    weight = LEAST(GREATEST(cerebro_associative_links.weight, EXCLUDED.weight) + :boost, 1.0),
+                    last_activated = NOW(),
+                    activation_count = cerebro_associative_links.activation_count + 1
+                RETURNING (xmax = 0) AS inserted
+            """),
+            {
+                "user_id": str(user_id),
+                "reason": reason,
+                "boost": boost,
+                "ids": [f"link_{uuid.uuid4().hex[:12]}" for _ in keys],
+                "sources": [k[0] for k in keys],
+                "targets": [k[1] for k in keys],
+                "types": [k[2] for k in keys],
+                "weights": [float(unique[k][0]) for k in keys],
+                "evidence": [unique[k][1] for k in keys],
+            },
+        )).fetchall()
+        created = sum(1 for row in rows if row.inserted)
+        return created, len(rows) - created
+
     async def get_neighbors(
         self,
         user_id: UUID,
@@ -464,8 +951,8 @@ class PgGraphStore:
         """Add a step to an episode."""
         await self.db.execute(
             text("""
-                INSERT INTO cerebro_episode_steps (episode_id, user_id, memory_id, position, role, timestamp)
-                VALUES (:episode_id, :user_id, :memory_id, :position, :role, :timestamp)
+                INSERT INTO cerebro_episode_steps (episode_id, user_id, memory_id, position, role, summary, timestamp)
+                VALUES (:episode_id, :user_id, :memory_id, :position, :role, :summary, :timestamp)
             """),
             {
                 "episode_id": episode_id,
@@ -473,11 +960,162 @@ class PgGraphStore:
                 "memory_id": step.memory_id,
                 "position": step.position,
                 "role": step.role,
+                "summary": step.summary,
                 "timestamp": step.timestamp,
             },
         )
         await self.db.commit()
 
+    async def append_episode_steps(
+        self,
+        user_id: UUID,
+        episode: Episode,
+        steps: list[EpisodeStep],
+    ) -> None:
+        """Open-or-extend an episode and insert its new steps in one statement.
+
+        The episode row is created on its first flush; later flushes move
+        `ended_at` and raise `peak_arousal` to the arousal of the new step
+        memories. Does not commit.
+        """
+        await self.db.execute(
+            text("""
+                WITH episode AS (
+                    INSERT INTO cerebro_episodes (
+                        id, user_id, title, agent_id, session_id, started_at, ended_at,
+                        peak_arousal, tags, closed, step_count
+                    ) VALUES (
+                        :id, :user_id, :title, :agent_id, :session_id, :started_at, :ended_at,
+                        COALESCE((
+                            SELECT MAX(arousal) FROM cerebro_memory_nodes
+                            WHERE user_id = :user_id AND id = ANY(CAST(:memory_ids AS text[]))
+                        ), 0.5),
+                        CAST(:tags AS jsonb), FALSE, :step_count
+                    )
+                    ON CONFLICT (id, user_id) DO UPDATE SET
+                        ended_at = EXCLUDED.ended_at,
+                        peak_arousal = GREATEST(cerebro_episodes.peak_arousal, EXCLUDED.peak_arousal),
+                        step_count = cerebro_episodes.step_count + EXCLUDED.step_count
+                    RETURNING id
+                )
+                INSERT INTO cerebro_episode_steps (episode_id, user_id, memory_id, position, role, summary, timestamp)
+                SELECT episode.id, :user_id, t.memory_id, t.position, t.role, t.summary, t.ts
+                FROM episode, unnest(
+                    CAST(:memory_ids AS text[]), CAST(:positions AS integer[]), CAST(:roles AS text[]),
+                    CAST(:summaries AS text[]), CAST(:timestamps AS timestamptz[])
+                ) AS t(memory_id, position, role, summary, ts)
+            """),
+            {
+                "id": episode.id,
+                "user_id": str(user_id),
+                "title": episode.title,
+                "agent_id": episode.agent_id,
+                "session_id": episode.session_id,
+                "started_at": episode.started_at,
+                "ended_at": episode.ended_at,
+                "tags": json.dumps(episode.tags),
+                "step_count": len(steps),
+                "memory_ids": [step.memory_id for step in steps],
+                "positions": [step.position for step in steps],
+                "roles": [step.role for step in steps],
+                "summaries": [step.summary for step in steps],
+                "timestamps": [step.timestamp for step in steps],
+            },
+        )
+
+    async def close_episodes(self, user_id: UUID, episode_ids: list[str]) -> int:
+        """Mark episodes finished (the dream replay only picks up closed ones). Does not commit."""
+        result = await self.db.execute(
+            text("""
+                UPDATE cerebro_episodes SET closed = TRUE
+                WHERE user_id = :user_id AND id = ANY(CAST(:ids AS text[])) AND NOT closed
+            """),
+            {"user_id": str(user_id), "ids": episode_ids},
+        )
+        return result.rowcount
+
+    async def close_stale_episodes(self, idle_minutes: float) -> int:
+        """Close open episodes idle for `idle_minutes`, across users (e.g. left open by a restart)."""
+        result = await self.db.execute(
+            text("""
+                UPDATE cerebro_episodes SET closed = TRUE
+                WHERE NOT closed AND ended_at < NOW() - make_interval(secs => :idle_seconds)
+            """),
+            {"idle_seconds": idle_minutes * 60},
+        )
+        return result.rowcount
+
+    async def episodes_between(
+        self,
+        user_id: UUID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        agent_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        limit: int = 20,
+        steps_per_episode: int = 50,
+        content_chars: int = 300,
+    ) -> list[dict]:
+        """Episodes overlapping [since, until], newest first, with their steps.
+
+        Answered from the (user_id, started_at) index; each episode's steps
+        come from one LATERAL index scan on (user_id, episode_id, position).
+        """
+        filters = ["e.user_id = :user_id"]
+        if since:
+            filters.append("COALESCE(e.ended_at, e.started_at) >= :since")
+        if until:
+            filters.append("e.started_at <= :until")
+        if agent_id:
+            filters.append("e.agent_id = :agent_id")
+        if session_id:
+            filters.append("e.session_id = :session_id")
+        rows = (await self.db.execute(
+            text(f"""
+                SELECT e.id, e.title, e.agent_id, e.session_id, e.started_at, e.ended_at,
+                       e.overall_valence, e.peak_arousal, e.tags, e.closed, e.consolidated, e.step_count,
+                       COALESCE(steps.items, '[]'::json) AS steps
+                FROM cerebro_episodes e
+                LEFT JOIN LATERAL (
+                    SELECT json_agg(json_build_object(
+                        'position', s.position, 'role', s.role, 'memory_id', s.memory_id,
+                        'summary', s.summary, 'timestamp', s.timestamp,
+                        'content', LEFT(n.content, :content_chars)
+                    ) ORDER BY s.position) AS items
+                    FROM (
+                        SELECT * FROM cerebro_episode_steps
+                        WHERE user_id = e.user_id AND episode_id = e.id
+                        ORDER BY position
+                        LIMIT :steps_per_episode
+                    ) s
+                    LEFT JOIN cerebro_memory_nodes n ON n.user_id = s.user_id AND n.id = s.memory_id
+                ) steps ON TRUE
+                WHERE {" AND ".join(filters)}
+                ORDER BY e.started_at DESC
+                LIMIT :limit
+            """),
+            {
+                "user_id": str(user_id),
+                "since": since,
+                "until": until,
+                "agent_id": agent_id,
+                "session_id": session_id,
+                "limit": limit,
+                "steps_per_episode": steps_per_episode,
+                "content_chars": content_chars,
+            },
+        )).mappings().all()
+        return [
+            {
+                **dict(row),
+                "started_at": row["started_at"].isoformat() if row["started_at"] else None,
+                "ended_at": row["ended_at"].isoformat() if row["ended_at"] else None,
+                "tags": json.loads(row["tags"]) if isinstance(row["tags"], str) else (row["tags"] or []),
+                "steps": json.loads(row["steps"]) if isinstance(row["steps"], str) else row["steps"],
+            }
+            for row in rows
+        ]
+
     # =========================================================================
     # Agent CRUD
     # =========================================================================
@@ -488,16 +1126,20 @@ class PgGraphStore:
             text("""
                 INSERT INTO cerebro_agents (
                     id, user_id, display_name, generation, lineage, specialization,
-                    origin_story, color, symbol, registered_at
+                    origin_story, color, symbol, registered_at,
+                    recall_vector_weight, recall_lexical_weight
                 ) VALUES (
                     :id, :user_id, :display_name, :generation, :lineage, :specialization,
-                    :origin_story, :color, :symbol, :registered_at
+                    :origin_story, :color, :symbol, :registered_at,
+                    :recall_vector_weight, :recall_lexical_weight
                 )
                 ON CONFLICT (id, user_id) DO UPDATE SET
                     display_name = EXCLUDED.display_name,
                     specialization = EXCLUDED.specialization,
                     color = EXCLUDED.color,
-                    symbol = EXCLUDED.symbol
+                    symbol = EXCLUDED.symbol,
+                    recall_vector_weight = EXCLUDED.recall_vector_weight,
+                    recall_lexical_weight = EXCLUDED.recall_lexical_weight
             """),
             {
                 "id": profile.id,
@@ -510,11 +1152,41 @@ class PgGraphStore:
                 "color": profile.color,
                 "symbol": profile.symbol,
                 "registered_at": profile.registered_at,
+                "recall_vector_weight": profile.recall_vector_weight,
+                "recall_lexical_weight": profile.recall_lexical_weight,
             },
         )
         await self.db.commit()
         return profile.id
 
+    async def set_recall_weights(
+        self,
+        user_id: UUID,
+        agent_id: str,
+        vector_weight: Optional[float],
+        lexical_weight: Optional[float],
+    ) -> None:
+        """Set an agent's hybrid recall weights (None restores the default).
+
+        Agents without a profile get a minimal one.
+        """
+        await self.db.execute(
+            text("""
+                INSERT INTO cerebro_agents (id, user_id, display_name, recall_vector_weight, recall_lexical_weight)
+                VALUES (:id, :user_id, :id, :vector_weight, :lexical_weight)
+                ON CONFLICT (id, user_id) DO UPDATE SET
+                    recall_vector_weight = EXCLUDED.recall_vector_weight,
+                    recall_lexical_weight = EXCLUDED.recall_lexical_weight
+            """),
+            {
+                "id": agent_id,
+                "user_id": str(user_id),
+                "vector_weight": vector_weight,
+                "lexical_weight": lexical_weight,
+            },
+        )
+        await self.db.commit()
+
     async def list_agents(self, user_id: UUID) -> list[AgentProfile]:
         """List all registered agents for a user."""
         result = await self.db.execute(
@@ -533,6 +1205,8 @@ class PgGraphStore:
                 color=r.get("color") or "#888888",
                 symbol=r.get("symbol") or "A",
                 registered_at=r["registered_at"],
+                recall_vector_weight=r.get("recall_vector_weight"),
+                recall_lexical_weight=r.get("recall_lexical_weight"),
             )
             for r in rows
         ]
@@ -542,66 +1216,89 @@ class PgGraphStore:
     # =========================================================================
 
     async def stats(self, user_id: UUID) -> dict:
-        """Get comprehensive stats for a user's memory graph."""
-        r = await self.db.execute(
-            text("SELECT COUNT(*) as c FROM cerebro_memory_nodes WHERE user_id = :uid"),
-            {"uid": str(user_id)},
-        )
-        node_count = r.scalar() or 0
-
-        r = await self.db.execute(
-            text("SELECT COUNT(*) as c FROM cerebro_associative_links WHERE user_id = :uid"),
-            {"uid": str(user_id)},
-        )
-        link_count = r.scalar() or 0
+        """Get comprehensive stats for a user's memory graph.
 
-        r = await self.db.execute(
-            text("SELECT memory_type, COUNT(*) as c FROM cerebro_memory_nodes WHERE user_id = :uid GROUP BY memory_type"),
-            {"uid": str(user_id)},
-        )
-        type_counts = {row.memory_type: row.c for row in r}
-
-        r = await self.db.execute(
-            text("SELECT layer, COUNT(*) as c FROM cerebro_memory_nodes WHERE user_id = :uid GROUP BY layer"),
-            {"uid": str(user_id)},
-        )
-        layer_counts = {row.layer: row.c for row in r}
+        One indexed lookup of the trigger-maintained counters (v133) - cost
+        depends on the number of distinct types/layers/agents, not on graph
+        size. The result carries the cortex `version` it was read at.
+        """
+        row = (await self.db.execute(text("""
+            SELECT
+                COALESCE((SELECT version FROM cerebro_cortex_versions WHERE user_id = :uid), 0) AS version,
+                (SELECT COALESCE(json_agg(json_build_array(dim, key, count)), '[]'::json)
+                 FROM cerebro_stat_counts WHERE user_id = :uid AND count <> 0) AS counts,
+                d.checks, d.exact_hits, d.near_hits, d.last_hit_at
+            FROM (SELECT 1) AS one
+            LEFT JOIN cerebro_dedup_stats d ON d.user_id = :uid
+        """), {"uid": str(user_id)})).first()
+
+        counts = row.counts if isinstance(row.counts, list) else json.loads(row.counts or "[]")
+        result = _stats_from_counts(counts)
+        result["version"] = row.version
+        result["dedup"] = {
+            "checks": row.checks or 0,
+            "exact_hits": row.exact_hits or 0,
+            "near_hits": row.near_hits or 0,
+            "hit_rate": round((row.exact_hits + row.near_hits) / row.checks, 4) if row.checks else 0.0,
+            "last_hit_at": row.last_hit_at.isoformat() if row.last_hit_at else None,
+        }
+        return result
 
-        r = await self.db.execute(
-            text("SELECT visibility, COUNT(*) as c FROM cerebro_memory_nodes WHERE user_id = :uid GROUP BY visibility"),
-            {"uid": str(user_id)},
-        )
-        visibility_counts = {row.visibility: row.c for row in r}
+    async def recount_stats(self, user_id: UUID) -> dict:
+        """Count the graph directly - the reference the counters are checked against."""
+        rows = (await self.db.execute(text(CORTEX_RECOUNT_SQL), {"uid": str(user_id)})).all()
+        return _stats_from_counts([(row.dim, row.key, row.count) for row in rows])
 
-        r = await self.db.execute(
-            text("SELECT link_type, COUNT(*) as c FROM cerebro_associative_links WHERE user_id = :uid GROUP BY link_type"),
-            {"uid": str(user_id)},
-        )
-        link_type_counts = {row.link_type: row.c for row in r}
+    async def reconcile_stats(self, user_id: UUID) -> dict:
+        """Compare the counters with a full recount and repair any drift.
 
-        r = await self.db.execute(
-            text("SELECT COUNT(*) as c FROM cerebro_episodes WHERE user_id = :uid"),
-            {"uid": str(user_id)},
-        )
-        episode_count = r.scalar() or 0
-
-        r = await self.db.execute(
-            text("SELECT agent_id, COUNT(*) as c FROM cerebro_memory_nodes WHERE user_id = :uid GROUP BY agent_id"),
-            {"uid": str(user_id)},
-        )
-        agent_counts = {row.agent_id: row.c for row in r}
-
-        return {
-            "nodes": node_count,
-            "links": link_count,
-            "episodes": episode_count,
-            "memory_types": type_counts,
-            "layers": layer_counts,
-            "visibility": visibility_counts,
-            "link_types": link_type_counts,
-            "agents": agent_counts,
+        Locks the user's version row first (the same order the triggers use)
+        so no counted write interleaves with the rewrite. Returns
+        {dimension: {key: (counter, actual)}} for every mismatch. Does not
+        commit.
+        """
+        await self.db.execute(text("""
+            INSERT INTO cerebro_cortex_versions (user_id, version) VALUES (:uid, 0)
+            ON CONFLICT (user_id) DO NOTHING
+        """), {"uid": str(user_id)})
+        await self.db.execute(text(
+            "SELECT version FROM cerebro_cortex_versions WHERE user_id = :uid FOR UPDATE"
+        ), {"uid": str(user_id)})
+
+        rows = (await self.db.execute(text(CORTEX_RECOUNT_SQL), {"uid": str(user_id)})).all()
+        actual = {(row.dim, row.key): row.count for row in rows}
+        stored = {
+            (row.dim, row.key): row.count
+            for row in await self.db.execute(text(
+                "SELECT dim, key, count FROM cerebro_stat_counts WHERE user_id = :uid AND count <> 0"
+            ), {"uid": str(user_id)})
         }
 
+        drift: dict = {}
+        for dim, key in stored.keys() | actual.keys():
+            have, want = stored.get((dim, key), 0), actual.get((dim, key), 0)
+            if have != want:
+                drift.setdefault(dim, {})[key] = (have, want)
+        if not drift:
+            return drift
+
+        logger.warning(f"Cerebro stats drift for user {user_id}: {drift}")
+        await self.db.execute(text("DELETE FROM cerebro_stat_counts WHERE user_id = :uid"), {"uid": str(user_id)})
+        await self.db.execute(text("""
+            INSERT INTO cerebro_stat_counts (user_id, dim, key, count)
+            SELECT CAST(:uid AS uuid), dim, key, count
+            FROM unnest(CAST(:dims AS text[]), CAST(:keys AS text[]), CAST(:counts AS bigint[])) AS t(dim, key, count)
+        """), {
+            "uid": str(user_id),
+            "dims": [dim for dim, _ in actual],
+            "keys": [key for _, key in actual],
+            "counts": list(actual.values()),
+        })
+        await self.db.execute(text(
+            "UPDATE cerebro_cortex_versions SET version = version + 1 WHERE user_id = :uid"
+        ), {"uid": str(user_id)})
+        return drift
+
     # =========================================================================
     # Query helpers
     # =========================================================================
@@ -636,7 +1333,7 @@ class PgGraphStore:
         where = " AND ".join(where_clauses)
         result = await self.db.execute(
             text(f"""
-                SELECT * FROM cerebro_memory_nodes
+                SELECT {NODE_COLUMNS} FROM cerebro_memory_nodes
                 WHERE {where}
                 ORDER BY created_at DESC
                 LIMIT :limit OFFSET :offset
@@ -667,6 +1364,151 @@ class PgGraphStore:
         rows = result.mappings().all()
         return [dict(row) for row in rows]
 
+    async def get_neighbor_nodes(
+        self,
+        user_id: UUID,
+        node_id: str,
+        limit: int = 10,
+        content_chars: int = 200,
+    ) -> list[dict]:
+        """Neighbors of a node with their content preview, in one query.
+
+        Returns: [{id, weight, link_type, content, memory_type}, ...] strongest
+        link first. Dangling links (neighbor deleted) keep an empty preview.
+        """
+        result = await self.db.execute(
+            text("""
+                SELECT nb.id, nb.weight, nb.link_type,
+                       COALESCE(LEFT(n.content, :content_chars), '') AS content,
+                       COALESCE(n.memory_type, 'unknown') AS memory_type
+                FROM (
+                    SELECT target_id AS id, weight, link_type FROM cerebro_associative_links
+                    WHERE user_id = :user_id AND source_id = :node_id
+                    UNION ALL
+                    SELECT source_id, weight, link_type FROM cerebro_associative_links
+                    WHERE user_id = :user_id AND target_id = :node_id
+                ) AS nb
+                LEFT JOIN cerebro_memory_nodes n ON n.user_id = :user_id AND n.id = nb.id
+                ORDER BY nb.weight DESC
+                LIMIT :limit
+            """),
+            {"user_id": str(user_id), "node_id": node_id, "limit": limit, "content_chars": content_chars},
+        )
+        return [
+            {**row, "weight": float(row["weight"])}
+            for row in result.mappings().all()
+        ]
+
+    async def graph_snapshot(
+        self,
+        user_id: UUID,
+        seed_ids: Optional[list[str]] = None,
+        hops: int = 1,
+        limit: int = 200,
+        layer: Optional[str] = None,
+        visibility: Optional[str] = None,
+        min_weight: float = 0.0,
+        content_chars: int = 500,
+    ) -> tuple[list[dict], list[dict]]:
+        """Nodes and the edges between them for the graph view, in one query.
+
+        Without `seed_ids` the sample is the `limit` most recent memories
+        (the dashboard's default view). With seeds, it is the seeds plus
+        every node within `hops` links of them, nearest hops first and the
+        most salient within a hop, capped at `limit` - the viewport around
+        a selection. Nodes use GRAPH_NODE_COLUMNS (content truncated to
+        `content_chars`, no embedding) and carry their hop distance and
+        total degree.
+
+        Returns: (nodes, edges) - edges as {source_id, target_id, link_type, weight}
+        """
+        where_clauses = ["n.user_id = :user_id"]
+        params: dict = {
+            "user_id": str(user_id),
+            "limit": limit,
+            "min_weight": min_weight,
+            "content_chars": content_chars,
+        }
+        if layer:
+            where_clauses.append("n.layer = :layer")
+            params["layer"] = layer
+        if visibility:
+            where_clauses.append("n.visibility = :visibility")
+            params["visibility"] = visibility
+        where = " AND ".join(where_clauses)
+
+        if seed_ids:
+            params["seeds"] = list(seed_ids)
+            params["hops"] = hops
+            picked = f"""
+                WITH RECURSIVE reach(id, depth) AS (
+                    SELECT id, 0 FROM unnest(CAST(:seeds AS text[])) AS id
+                    UNION
+                    SELECT nb.id, r.depth + 1
+                    FROM reach r
+                    CROSS JOIN LATERAL (
+                        SELECT target_id AS id FROM cerebro_associative_links
+                        WHERE user_id = :user_id AND source_id = r.id AND weight >= :min_weight
+                        UNION ALL
+                        SELECT source_id FROM cerebro_associative_links
+                        WHERE user_id = :user_id AND target_id = r.id AND weight >= :min_weight
+                    ) AS nb
+                    WHERE r.depth < :hops
+                ),
+                picked AS (
+                    SELECT n.id, MIN(r.depth) AS depth
+                    FROM reach r
+                    JOIN cerebro_memory_nodes n ON n.user_id = :user_id AND n.id = r.id
+                    WHERE {where}
+                    GROUP BY n.id, n.salience
+                    ORDER BY MIN(r.depth), n.salience DESC
+                    LIMIT :limit
+                )
+            """
+        else:
+            picked = f"""
+                WITH picked AS (
+                    SELECT n.id, 0 AS depth FROM cerebro_memory_nodes n
+                    WHERE {where}
+                    ORDER BY n.created_at DESC
+                    LIMIT :limit
+                )
+            """
+
+        result = await self.db.execute(
+            text(f"""
+                {picked}
+                SELECT {GRAPH_NODE_COLUMNS}, p.depth,
+                       (SELECT COUNT(*) FROM cerebro_associative_links l
+                        WHERE l.user_id = :user_id AND l.source_id = n.id)
+                     + (SELECT COUNT(*) FROM cerebro_associative_links l
+                        WHERE l.user_id = :user_id AND l.target_id = n.id) AS link_count,
+                       (SELECT json_agg(json_build_array(l.target_id, l.link_type, l.weight))
+                        FROM cerebro_associative_links l
+                        WHERE l.user_id = :user_id AND l.source_id = n.id
+                          AND l.weight >= :min_weight
+                          AND l.target_id IN (SELECT id FROM picked)) AS out_edges
+                FROM picked p
+                JOIN cerebro_memory_nodes n ON n.user_id = :user_id AND n.id = p.id
+                ORDER BY p.depth, n.created_at DESC
+            """),
+            params,
+        )
+
+        nodes, edges = [], []
+        for row in result.mappings().all():
+            node = dict(row)
+            out_edges = node.pop("out_edges")
+            if isinstance(out_edges, str):
+                out_edges = json.loads(out_edges)
+            for target_id, link_type, weight in out_edges or []:
+                edges.append({"source_id": node["id"], "target_id": target_id, "link_type": link_type, "weight": weight})
+            for field in ("tags", "concepts", "responding_to", "related_agents"):
+                if isinstance(node.get(field), str):
+                    node[field] = json.loads(node[field])
+            nodes.append(node)
+        return nodes, edges
+
     # =========================================================================
     # Row mapping
     # =========================================================================
@@ -689,9 +1531,7 @@ class PgGraphStore:
         derived_from = row.get("derived_from", [])
         if isinstance(derived_from, str):
             derived_from = json.loads(derived_from)
-        access_timestamps = row.get("access_timestamps_json", [])
-        if isinstance(access_timestamps, str):
-            access_timestamps = json.loads(access_timestamps)
+        access_timestamps = list(row.get("access_timestamps") or [])
 
         created_at = row.get("created_at")
         if isinstance(created_at, str):
@@ -11,8 +11,8 @@ from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.cerebro.activation.decay import compute_current_activation, compute_current_retrievability
-from app.cerebro.activation.strength import combined_recall_score, record_access
+from app.cerebro.activation.strength import combined_recall_score
+from app.cerebro.config import DEDUP_COSINE_THRESHOLD
 from app.cerebro.engines.amygdala import AffectEngine
 from app.cerebro.engines.temporal import SemanticEngine
 from app.cerebro.engines.thalamus import GatingEngine
@@ -20,6 +20,7 @@ from app.cerebro.models.activation import RecallResult
 from app.cerebro.models.agent import AgentProfile
 from app.cerebro.models.link import AssociativeLink
 from app.cerebro.models.memory import MemoryNode
+from app.cerebro.simhash import novel_terms
 from app.cerebro.types import LinkType, MemoryType, Visibility
 from app.services.cerebro.pg_graph_store import PgGraphStore
 from app.services.cerebro.spreading import spreading_activation
@@ -87,12 +88,14 @@ class CerebroCortexService:
 
         Pipeline:
         1. Thalamus gating (type classification, salience estimation)
-        2. Deduplication check (async DB)
+        2. Deduplication: exact content hash, then SimHash candidates or
+           nearest embeddings confirmed by embedding similarity; a near
+           match that adds new words is stored and linked instead
         3. Semantic enrichment (concept extraction)
         4. Amygdala emotion (valence/arousal)
         5. Generate embedding
         6. Store in PostgreSQL
-        7. Auto-link via context_ids
+        7. Link to the near match it may update; auto-link via context_ids
 
         Returns:
             Dict with memory info, or None if gated out.
@@ -130,18 +133,42 @@ class CerebroCortexService:
         if node is None:
             return None
 
-        # Step 2: Deduplication (async DB check)
+        # Step 2a: Deduplication - exact content
         existing_id = await store.find_duplicate_content(user_id, content)
         if existing_id:
-            existing = await store.get_node(user_id, existing_id)
-            if existing:
-                new_strength = GatingEngine.strengthen_existing(existing.strength)
-                await store.update_node_strength(user_id, existing_id, new_strength)
-                return {
-                    "id": existing_id,
-                    "action": "strengthened",
-                    "access_count": new_strength.access_count,
-                }
+            result = await self._reinforce(store, user_id, existing_id, "exact")
+            if result:
+                return result
+
+        # Step 2b: Deduplication - rephrased content. SimHash bands find the
+        # close rephrasings cheaply; the indexed vector lookup catches the
+        # ones too many bits apart to share a band. The embedding (needed
+        # for storage anyway) confirms either way. Embeddings barely move
+        # when one detail of a fact changes, so a match only merges when the
+        # new content adds no words; otherwise it is stored and linked to
+        # the memory it may update.
+        embed_content = content[:8000] if len(content) > 8000 else content
+        candidates = await store.find_near_duplicates(user_id, content, agent_id, vis.value)
+        embedding = await self._get_embedding(embed_content)
+        near_match = None
+        if embedding:
+            similarities = {}
+            if candidates:
+                similarities = await store.embedding_similarities(user_id, [c[0] for c in candidates], embedding)
+            best_id = max(similarities, key=similarities.get, default=None)
+            if not best_id or similarities[best_id] < DEDUP_COSINE_THRESHOLD:
+                similarities = dict(await store.nearest_by_embedding(user_id, embedding, agent_id, vis.value))
+                best_id = max(similarities, key=similarities.get, default=None)
+            if best_id and similarities[best_id] >= DEDUP_COSINE_THRESHOLD:
+                existing = await store.get_node(user_id, best_id)
+                if existing and not novel_terms(content, existing.content):
+                    result = await self._reinforce(store, user_id, best_id, "near", salience=node.metadata.salience)
+                    if result:
+                        result["similarity"] = round(similarities[best_id], 4)
+                        return result
+                elif existing:
+                    near_match = (best_id, similarities[best_id])
+        await store.record_dedup(user_id, "miss")
 
         # Step 3: Semantic enrichment (sync, fast)
         node = SemanticEngine.enrich_node(node)
@@ -149,14 +176,21 @@ class CerebroCortexService:
         # Step 4: Amygdala emotion (sync, fast)
         node = AffectEngine.apply_emotion(node)
 
-        # Step 5: Generate embedding
-        # Truncate content for embedding (max 8000 chars)
-        embed_content = content[:8000] if len(content) > 8000 else content
-        embedding = await self._get_embedding(embed_content)
-
-        # Step 6: Store
+        # Step 5: Store
         node_id = await store.add_node(user_id, node, embedding=embedding)
 
+        # Step 6: Link to the near-duplicate this may update
+        if near_match:
+            await store.ensure_link(
+                user_id,
+                source_id=node_id,
+                target_id=near_match[0],
+                link_type=LinkType.SEMANTIC,
+                weight=round(near_match[1], 4),
+                source="encoding",
+                evidence="Near-duplicate with new details; newer content kept",
+            )
+
         # Step 7: Auto-link via context_ids
         if context_ids:
             for ctx_id in context_ids[:10]:  # Limit to 10 context links
@@ -183,6 +217,29 @@ class CerebroCortexService:
             "concepts": node.metadata.concepts[:5],
         }
 
+    async def _reinforce(
+        self,
+        store: PgGraphStore,
+        user_id: UUID,
+        node_id: str,
+        match: str,
+        salience: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Strengthen an existing memory in place of storing a duplicate."""
+        existing = await store.get_node(user_id, node_id)
+        if not existing:
+            return None
+        await store.record_access(user_id, existing)
+        if salience is not None and salience > existing.metadata.salience:
+            await store.update_node_metadata(user_id, node_id, salience=salience)
+        await store.record_dedup(user_id, match)
+        return {
+            "id": node_id,
+            "action": "strengthened",
+            "match": match,
+            "access_count": existing.strength.access_count + 1,
+        }
+
     # =========================================================================
     # Recall
     # =========================================================================
@@ -199,13 +256,14 @@ class CerebroCortexService:
         agent_id: Optional[str] = None,
         context_ids: Optional[list[str]] = None,
     ) -> list[RecallResult]:
-        """Recall memories using vector search + spreading activation + ACT-R scoring.
+        """Recall memories using hybrid search + spreading activation + ACT-R scoring.
 
         Pipeline:
         1. Generate query embedding
-        2. pgvector search for top-K seeds (2x top_k to have headroom)
+        2. Full-text and pgvector rankings fused with reciprocal rank fusion
+           (one query; per-agent weights) into top-K seeds
         3. SQL spreading activation from seeds + context_ids
-        4. Combine: 35% vector + 30% activation + 20% retrievability + 15% salience
+        4. Combine: 35% fused relevance + 30% activation + 20% retrievability + 15% salience
         5. Hebbian strengthening of recalled memories
 
         Returns:
@@ -213,9 +271,23 @@ class CerebroCortexService:
         """
         store = self._store(db)
 
-        # Step 1: Generate query embedding
+        # Step 1: Generate query embedding (the lexical leg still runs without one)
         query_embedding = await self._get_embedding(query[:8000])
-        if not query_embedding:
+
+        # Step 2: Hybrid search for seeds
+        search_results = await store.hybrid_search(
+            user_id,
+            query[:8000],
+            query_embedding,
+            top_k=top_k,
+            memory_types=memory_types,
+            min_salience=min_salience,
+            visibility=visibility,
+            agent_id=agent_id,
+            weights_agent=agent_id,
+        )
+
+        if not search_results and not query_embedding:
             # Fallback: return recent memories
             nodes = await store.get_memories(user_id, limit=top_k, visibility=visibility, agent_id=agent_id)
             return [
@@ -235,23 +307,13 @@ class CerebroCortexService:
                 for n in nodes
             ]
 
-        # Step 2: pgvector search for seeds
-        search_results = await store.vector_search(
-            user_id,
-            query_embedding,
-            top_k=top_k * 2,
-            memory_types=memory_types,
-            min_salience=min_salience,
-            visibility=visibility,
-            agent_id=agent_id,
-        )
-
         if not search_results:
             return []
 
-        seed_ids = [node.id for node, _ in search_results]
-        similarity_map = {node.id: sim for node, sim in search_results}
-        node_map = {node.id: node for node, _ in search_results}
+        seed_ids = [node.id for node, _, _, _ in search_results]
+        similarity_map = {node.id: sim for node, sim, _, _ in search_results}
+        relevance_map = {node.id: (relevance, lexical_rank) for node, _, relevance, lexical_rank in search_results}
+        node_map = {node.id: node for node, _, _, _ in search_results}
 
         # Step 3: Spreading activation
         all_seeds = list(seed_ids)
@@ -266,13 +328,15 @@ class CerebroCortexService:
 
         for node_id, node in node_map.items():
             vector_sim = similarity_map.get(node_id, 0.0)
+            relevance, lexical_rank = relevance_map[node_id]
             assoc_activation = activation_map.get(node_id, 0.0)
 
-            base_level = compute_current_activation(node.strength, now)
-            retrievability_score = compute_current_retrievability(node.strength, now)
+            # Computed in SQL by vector_search - no access-history decoding here
+            base_level = node.strength.last_activation
+            retrievability_score = node.strength.last_retrievability
 
             final = combined_recall_score(
-                vector_similarity=vector_sim,
+                vector_similarity=relevance,
                 base_level=base_level,
                 associative=assoc_activation,
                 fsrs_retrievability=retrievability_score,
@@ -285,6 +349,8 @@ class CerebroCortexService:
                 memory_type=node.metadata.memory_type.value,
                 layer=node.metadata.layer.value,
                 vector_similarity=vector_sim,
+                relevance=relevance,
+                lexical_rank=lexical_rank,
                 activation_score=assoc_activation,
                 retrievability=retrievability_score,
                 salience=node.metadata.salience,
@@ -305,8 +371,7 @@ class CerebroCortexService:
             try:
                 node = node_map.get(result.memory_id)
                 if node:
-                    new_strength = record_access(node.strength, now)
-                    await store.update_node_strength(user_id, result.memory_id, new_strength)
+                    await store.record_access(user_id, node, now)
             except Exception as e:
                 logger.debug(f"Hebbian update failed for {result.memory_id}: {e}")
 
@@ -356,27 +421,24 @@ class CerebroCortexService:
         memory_id: str,
         max_results: int = 10,
     ) -> list[dict]:
-        """Get neighbors of a memory in the associative graph."""
+        """Get neighbors of a memory in the associative graph (one query)."""
         store = self._store(db)
-        neighbors = await store.get_neighbors(user_id, memory_id)
-
-        results = []
-        for neighbor_id, weight, link_type in neighbors[:max_results]:
-            node = await store.get_node(user_id, neighbor_id)
-            results.append({
-                "id": neighbor_id,
-                "content": node.content[:200] if node else "",
-                "memory_type": node.metadata.memory_type.value if node else "unknown",
-                "link_type": link_type,
-                "weight": weight,
-            })
-        return results
+        return await store.get_neighbor_nodes(user_id, memory_id, limit=max_results)
 
     # =========================================================================
     # Stats
     # =========================================================================
 
-    async def stats(self, db: AsyncSession, user_id: UUID) -> dict:
-        """Get comprehensive CerebroCortex stats for a user."""
-        store = self._store(db)
-        return await store.stats(user_id)
+    async def stats(self, db: AsyncSession, user_id: UUID, verify: bool = False) -> dict:
+        """Get comprehensive CerebroCortex stats for a user.
+
+        Served from the version-checked stats cache. With `verify`, the
+        counters are first checked against a full recount (and repaired).
+        """
+        from app.services.cerebro.stats import get_stats, reconcile_user_stats
+
+        drift = await reconcile_user_stats(db, user_id) if verify else None
+        stats = await get_stats(db, user_id)
+        if verify:
+            stats["drift"] = drift
+        return stats
@@ -0,0 +1,91 @@
+"""Cached CerebroCortex stats.
+
+`PgGraphStore.stats()` reads trigger-maintained counters (migration v133) in
+one query, so it no longer scales with graph size. On top of that the
+dashboard and `cortex_stats` tool share a per-process cache:
+
+- within STATS_TTL_SECONDS a cached result is served without touching the
+  database
+- after that, the user's cortex version (bumped by the same triggers on
+  every counted write) is checked with one primary-key lookup; an unchanged
+  version just re-arms the TTL
+
+`reconcile_user_stats` recounts the graph with a single GROUPING SETS query
+and repairs the counters if they drifted; the dream sweep runs it for every
+user it consolidates.
+"""
+
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.cerebro.pg_graph_store import PgGraphStore
+
+logger = logging.getLogger(__name__)
+
+STATS_TTL_SECONDS = 5.0  # served without a version check for this long
+STATS_CACHE_SIZE = 1024  # users kept per process
+
+# user_id -> (stats, checked_at monotonic)
+_stats_cache: "OrderedDict[UUID, tuple[dict, float]]" = OrderedDict()
+
+
+def _cached(user_id: UUID) -> Optional[tuple[dict, float]]:
+    entry = _stats_cache.get(user_id)
+    if entry is not None:
+        _stats_cache.move_to_end(user_id)
+    return entry
+
+
+def _store(user_id: UUID, stats: dict) -> None:
+    _stats_cache[user_id] = (stats, time.monotonic())
+    _stats_cache.move_to_end(user_id)
+    while len(_stats_cache) > STATS_CACHE_SIZE:
+        _stats_cache.popitem(last=False)
+
+
+def forget_user_stats(user_id: UUID) -> None:
+    """Drop a user's cached stats (the next read goes to the database)."""
+    _stats_cache.pop(user_id, None)
+
+
+async def get_stats(db: AsyncSession, user_id: UUID) -> dict:
+    """A user's cortex stats, from cache when the cortex version is unchanged."""
+    entry = _cached(user_id)
+    if entry is not None:
+        stats, checked_at = entry
+        if time.monotonic() - checked_at <= STATS_TTL_SECONDS:
+            return copy.deepcopy(stats)
+        version = (await db.execute(
+            text("SELECT version FROM cerebro_cortex_versions WHERE user_id = :uid"),
+            {"uid": str(user_id)},
+        )).scalar() or 0
+        if version == stats["version"]:
+            _store(user_id, stats)
+            return copy.deepcopy(stats)
+
+    stats = await PgGraphStore(db).stats(user_id)
+    _store(user_id, stats)
+    return copy.deepcopy(stats)
+
+
+async def reconcile_user_stats(db: AsyncSession, user_id: UUID) -> dict:
+    """Check a user's counters against a full recount, repairing drift. Commits.
+
+    Returns the mismatches found ({dimension: {key: (counter, actual)}}).
+    """
+    try:
+        drift = await PgGraphStore(db).reconcile_stats(user_id)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    if drift:
+        forget_user_stats(user_id)
+    return drift
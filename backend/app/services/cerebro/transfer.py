@@ -0,0 +1,635 @@
+"""MemoryCore transfer - streaming NDJSON export and bulk import.
+
+Export (format 3.0) is one JSON object per line:
+
+    {"type": "header", "format_version": "3.0", "embedding_model": ..., ...}
+    {"type": "memory", "id": ..., "content": ..., ..., "embedding": <base64 float32 LE>}
+    {"type": "link", "source_id": ..., "target_id": ..., "link_type": ..., "weight": ...}
+    {"type": "footer", "memories": n, "links": m}
+
+Nodes and links are read in keyset-paginated pages on their own session, so
+an export streams at constant memory whatever the graph size. Embeddings
+are optional.
+
+Import never goes through `remember()`:
+
+1. `stage_import` parses the records and COPYs them into the
+   `cerebro_import_nodes` / `cerebro_import_links` staging tables. An
+   exported embedding is kept when the header's `embedding_model` matches
+   the configured model.
+2. A `cortex_import` session job (see services/session_jobs.py) embeds the
+   remaining staged memories EMBED_BATCH_SIZE at a time, checkpointing after
+   each batch.
+3. Its last round merges everything in one transaction. Memories are
+   exact-deduplicated by content hash against the user's graph and within
+   the import. A memory keeps its exported id unless that id is invalid
+   (over 50 characters) or taken by a different memory; then it gets a
+   fresh one. Staging keeps the exported id (`original_id`) and the id the
+   memory ended up under (`final_id`, the surviving node for duplicates),
+   and links are remapped through it. Links whose ends still don't exist
+   are dropped and counted (`links_dropped`).
+
+The import id is the job's session id. `get_import` reports progress.
+"""
+
+import base64
+import json
+import logging
+import math
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, Optional
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cerebro.types import EmotionalValence, LinkType, MemoryLayer, MemoryType, Visibility
+from app.services.session_jobs import enqueue, get_session_job, register_runner, wake
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = "3.0"
+ENGINE = "cerebrocortex"
+IMPORT_JOB_KIND = "cortex_import"
+EXPORT_PAGE_SIZE = 500
+COPY_BATCH_SIZE = 1000
+MAX_STAGED_ID = 500              # exported ids (memories and link ends) are cut here, consistently
+EMBED_BATCH_SIZE = 64
+
+_MEMORY_TYPES = {t.value for t in MemoryType}
+_LAYERS = {l.value for l in MemoryLayer}
+_VISIBILITIES = {v.value for v in Visibility}
+_VALENCES = {v.value for v in EmotionalValence}
+_LINK_TYPES = {t.value for t in LinkType}
+
+_NODE_STAGING_COLUMNS = [
+    "import_id", "seq", "id", "original_id", "content", "memory_type", "layer", "visibility", "agent_id",
+    "tags", "concepts", "valence", "arousal", "salience", "access_count", "stability",
+    "difficulty", "access_timestamps", "created_at", "embedding",
+]
+_LINK_STAGING_COLUMNS = ["import_id", "seq", "source_id", "target_id", "link_type", "weight", "evidence"]
+
+
+def _embedding_service():
+    from app.services.embedding import get_embedding_service
+    return get_embedding_service()
+
+
+def encode_embedding(values) -> str:
+    """float32 little-endian, base64 - a quarter the size of a JSON float list."""
+    return base64.b64encode(np.asarray(values, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_embedding(data, dimensions: int) -> Optional[list[float]]:
+    """Exported embedding (base64 or a plain list) -> floats, None if unusable."""
+    try:
+        if isinstance(data, str):
+            values = np.frombuffer(base64.b64decode(data), dtype="<f4")
+        else:
+            values = np.asarray(data, dtype=np.float32)
+    except (ValueError, TypeError):
+        return None
+    if values.shape != (dimensions,) or not np.isfinite(values).all():
+        return None
+    return values.tolist()
+
+
+def _json_list(value) -> list:
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value if isinstance(value, list) else []
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+# =============================================================================
+# Export
+# =============================================================================
+
+def _export_filters(alias: str, agent_id: Optional[str], memory_type: Optional[str]) -> str:
+    clauses = [f"{alias}.user_id = :user_id"]
+    if agent_id:
+        clauses.append(f"{alias}.agent_id = :agent_id")
+    if memory_type:
+        clauses.append(f"{alias}.memory_type = :memory_type")
+    return " AND ".join(clauses)
+
+
+async def export_ndjson(
+    user_id: UUID,
+    agent_id: Optional[str] = None,
+    memory_type: Optional[str] = None,
+    include_embeddings: bool = False,
+) -> AsyncIterator[str]:
+    """Stream a user's memories and links as NDJSON lines (own DB session)."""
+    from app.database import get_db_context
+
+    params = {"user_id": str(user_id), "agent_id": agent_id, "memory_type": memory_type, "limit": EXPORT_PAGE_SIZE}
+    embedding_column = ", embedding::real[] AS embedding" if include_embeddings else ""
+    node_filter = _export_filters("n", agent_id, memory_type)
+
+    yield json.dumps({
+        "type": "header",
+        "format_version": FORMAT_VERSION,
+        "engine": ENGINE,
+        "agent_id": agent_id or "ALL",
+        "memory_type": memory_type,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_model": _embedding_service().model_id if include_embeddings else None,
+        "embedding_encoding": "base64-float32-le" if include_embeddings else None,
+    }) + "\n"
+
+    memories = links = 0
+    async with get_db_context() as db:
+        after = ""
+        while True:
+            rows = (await db.execute(text(f"""
+                SELECT id, content, memory_type, layer, visibility, agent_id, tags, concepts,
+                       valence, arousal, salience, access_count, stability, difficulty,
+                       access_timestamps, created_at{embedding_column}
+                FROM cerebro_memory_nodes n
+                WHERE {node_filter} AND n.id > :after
+                ORDER BY n.id
+                LIMIT :limit
+            """), {**params, "after": after})).mappings().all()
+            for row in rows:
+                record = {
+                    "type": "memory",
+                    "id": row["id"],
+                    "content": row["content"],
+                    "memory_type": row["memory_type"],
+                    "layer": row["layer"],
+                    "visibility": row["visibility"],
+                    "agent_id": row["agent_id"],
+                    "tags": _json_list(row["tags"]),
+                    "concepts": _json_list(row["concepts"]),
+                    "valence": row["valence"],
+                    "arousal": row["arousal"],
+                    "salience": row["salience"],
+                    "access_count": row["access_count"],
+                    "stability": row["stability"],
+                    "difficulty": row["difficulty"],
+                    "access_timestamps": list(row["access_timestamps"] or []),
+                    "created_at": _iso(row["created_at"]),
+                }
+                if include_embeddings and row["embedding"] is not None:
+                    record["embedding"] = encode_embedding(row["embedding"])
+                yield json.dumps(record) + "\n"
+            memories += len(rows)
+            if len(rows) < EXPORT_PAGE_SIZE:
+                break
+            after = rows[-1]["id"]
+
+        # Links between exported memories only
+        endpoint_filter = ""
+        if agent_id or memory_type:
+            endpoint_filter = f"""
+                AND EXISTS (SELECT 1 FROM cerebro_memory_nodes n WHERE {node_filter} AND n.id = l.source_id)
+                AND EXISTS (SELECT 1 FROM cerebro_memory_nodes n WHERE {node_filter} AND n.id = l.target_id)
+            """
+        after = ""
+        while True:
+            rows = (await db.execute(text(f"""
+                SELECT l.id, l.source_id, l.target_id, l.link_type, l.weight, l.evidence
+                FROM cerebro_associative_links l
+                WHERE l.user_id = :user_id AND l.id > :after {endpoint_filter}
+                ORDER BY l.id
+                LIMIT :limit
+            """), {**params, "after": after})).mappings().all()
+            for row in rows:
+                yield json.dumps({
+                    "type": "link",
+                    "source_id": row["source_id"],
+                    "target_id": row["target_id"],
+                    "link_type": row["link_type"],
+                    "weight": row["weight"],
+                    "evidence": row["evidence"],
+                }) + "\n"
+            links += len(rows)
+            if len(rows) < EXPORT_PAGE_SIZE:
+                break
+            after = rows[-1]["id"]
+
+    yield json.dumps({"type": "footer", "memories": memories, "links": links}) + "\n"
+
+
+# =============================================================================
+# Import - staging
+# =============================================================================
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Parse an NDJSON byte stream into records (blank lines skipped)."""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield _parse_line(line, line_no)
+    if buffer.strip():
+        yield _parse_line(buffer, line_no + 1)
+
+
+def _parse_line(line: bytes, line_no: int) -> dict:
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Line {line_no}: invalid JSON ({e.msg})")
+    if not isinstance(record, dict):
+        raise ValueError(f"Line {line_no}: expected a JSON object")
+    return record
+
+
+async def iter_memory_core(memory_core: dict) -> AsyncIterator[dict]:
+    """Records from a format 1.x/2.x MemoryCore object (the cortex_import tool)."""
+    memories: Iterable = memory_core.get("memories") or [
+        memory for collection in (memory_core.get("collections") or {}).values() for memory in collection
+    ]
+    for memory in memories:
+        if isinstance(memory, dict):
+            yield {"type": "memory", **memory}
+    for link in memory_core.get("links") or []:
+        if isinstance(link, dict):
+            yield {"type": "link", **link}
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _float(value, default: float) -> float:
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _node_record(import_id: UUID, seq: int, item: dict, dimensions: int, reuse: bool) -> Optional[tuple]:
+    content = item.get("content")
+    if not isinstance(content, str) or not content.strip():
+        return None
+    original_id = item.get("id") if isinstance(item.get("id"), str) and item.get("id") else None
+    memory_id = original_id if original_id and len(original_id) <= 50 else f"mem_{uuid4().hex[:12]}"
+    embedding = decode_embedding(item["embedding"], dimensions) if reuse and item.get("embedding") else None
+    timestamps = item.get("access_timestamps")
+    return (
+        import_id,
+        seq,
+        memory_id,
+        original_id[:MAX_STAGED_ID] if original_id else None,
+        content,
+        item.get("memory_type") if item.get("memory_type") in _MEMORY_TYPES else "semantic",
+        item.get("layer") if item.get("layer") in _LAYERS else "working",
+        item.get("visibility") if item.get("visibility") in _VISIBILITIES else "private",
+        str(item.get("agent_id") or "AZOTH")[:50],
+        json.dumps([str(t) for t in item.get("tags") or []]),
+        json.dumps([str(c) for c in item.get("concepts") or []]),
+        item.get("valence") if item.get("valence") in _VALENCES else "neutral",
+        _float(item.get("arousal"), 0.5),
+        _float(item.get("salience"), 0.5),
+        int(_float(item.get("access_count"), 0)),
+        _float(item.get("stability"), 1.0),
+        _float(item.get("difficulty"), 5.0),
+        [float(t) for t in timestamps] if isinstance(timestamps, list) else None,
+        _parse_time(item.get("created_at")),
+        embedding,
+    )
+
+
+def _link_record(import_id: UUID, seq: int, item: dict) -> Optional[tuple]:
+    source_id, target_id = item.get("source_id"), item.get("target_id")
+    if not isinstance(source_id, str) or not isinstance(target_id, str) or source_id == target_id:
+        return None
+    if item.get("link_type") not in _LINK_TYPES:
+        return None
+    weight = min(max(_float(item.get("weight"), 0.5), 0.0), 1.0)
+    evidence = item.get("evidence")
+    return (import_id, seq, source_id[:MAX_STAGED_ID], target_id[:MAX_STAGED_ID], item["link_type"], weight,
+            str(evidence) if evidence is not None else None)
+
+
+async def _copy(db: AsyncSession, table: str, columns: list[str], records: list[tuple]) -> None:
+    """COPY records into a table on the session's connection and transaction."""
+    if not records:
+        return
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+
+async def stage_import(db: AsyncSession, user_id: UUID, records: AsyncIterator[dict]) -> dict:
+    """
+    COPY parsed records into staging and queue the import job. Commits.
+
+    Returns the import handle (`import_id` plus staging counts and job status).
+    """
+    service = _embedding_service()
+    import_id = uuid4()
+    await db.execute(text("INSERT INTO cerebro_imports (id, user_id) VALUES (:id, :user_id)"),
+                     {"id": import_id, "user_id": str(user_id)})
+
+    source_model: Optional[str] = None
+    reuse = False
+    nodes: list[tuple] = []
+    links: list[tuple] = []
+    staged_nodes = staged_links = reused = 0
+
+    async for record in records:
+        kind = record.get("type", "memory")
+        if kind == "header":
+            source_model = record.get("embedding_model")
+            reuse = source_model == service.model_id
+        elif kind == "memory":
+            row = _node_record(import_id, staged_nodes, record, service.dimensions, reuse)
+            if row is not None:
+                nodes.append(row)
+                staged_nodes += 1
+                reused += row[-1] is not None
+        elif kind == "link":
+            row = _link_record(import_id, staged_links, record)
+            if row is not None:
+                links.append(row)
+                staged_links += 1
+
+        if len(nodes) >= COPY_BATCH_SIZE:
+            await _copy(db, "cerebro_import_nodes", _NODE_STAGING_COLUMNS, nodes)
+            nodes = []
+        if len(links) >= COPY_BATCH_SIZE:
+            await _copy(db, "cerebro_import_links", _LINK_STAGING_COLUMNS, links)
+            links = []
+
+    await _copy(db, "cerebro_import_nodes", _NODE_STAGING_COLUMNS, nodes)
+    await _copy(db, "cerebro_import_links", _LINK_STAGING_COLUMNS, links)
+
+    await db.execute(text("""
+        UPDATE cerebro_imports
+        SET source_model = :source_model, staged_nodes = :nodes, staged_links = :links, reused_embeddings = :reused
+        WHERE id = :id
+    """), {"id": import_id, "source_model": source_model, "nodes": staged_nodes, "links": staged_links, "reused": reused})
+
+    # One round per embedding batch, plus the merge
+    rounds = math.ceil((staged_nodes - reused) / EMBED_BATCH_SIZE) + 1
+    job = await enqueue(db, IMPORT_JOB_KIND, import_id, user_id, rounds)
+    await db.commit()
+    wake()
+
+    logger.info(f"Staged cortex import {import_id}: {staged_nodes} memories ({reused} embedded), {staged_links} links")
+    return {
+        "import_id": str(import_id),
+        "staged_nodes": staged_nodes,
+        "staged_links": staged_links,
+        "reused_embeddings": reused,
+        "status": job["status"],
+        "rounds_requested": job["rounds_requested"],
+    }
+
+
+# =============================================================================
+# Import - job rounds
+# =============================================================================
+
+async def _embed_batch(db: AsyncSession, import_id: UUID) -> Optional[tuple[int, int]]:
+    """Embed the next pending batch. Returns (attempted, embedded), None when none are left."""
+    pending = (await db.execute(text("""
+        SELECT seq, content FROM cerebro_import_nodes
+        WHERE import_id = :import_id AND embedding IS NULL AND NOT embed_attempted
+        ORDER BY seq
+        LIMIT :limit
+    """), {"import_id": import_id, "limit": EMBED_BATCH_SIZE})).all()
+    if not pending:
+        return None
+
+    try:
+        vectors = await _embedding_service().embed_batch([row.content[:8000] for row in pending])
+    except Exception as e:
+        # Stored without an embedding, like remember() when embedding is unavailable
+        logger.warning(f"Import {import_id}: embedding batch failed: {e}")
+        vectors = [None] * len(pending)
+
+    await db.execute(text("""
+        UPDATE cerebro_import_nodes s
+        SET embedding = CAST(t.embedding AS real[]), embed_attempted = TRUE
+        FROM unnest(CAST(:seqs AS integer[]), CAST(:embeddings AS text[])) AS t(seq, embedding)
+        WHERE s.import_id = :import_id AND s.seq = t.seq
+    """), {
+        "import_id": import_id,
+        "seqs": [row.seq for row in pending],
+        "embeddings": ["{" + ",".join(str(x) for x in v) + "}" if v else None for v in vectors],
+    })
+    embedded = sum(1 for v in vectors if v)
+    await db.execute(text("UPDATE cerebro_imports SET embedded = embedded + :n WHERE id = :id"),
+                     {"id": import_id, "n": embedded})
+    return len(pending), embedded
+
+
+async def _merge(db: AsyncSession, import_id: UUID, user_id: UUID) -> dict:
+    """Move staged memories and links into the graph and clear staging. Does not commit."""
+    params = {"import_id": import_id, "user_id": str(user_id)}
+    staged = (await db.execute(text(
+        "SELECT COUNT(*) FROM cerebro_import_nodes WHERE import_id = :import_id"
+    ), params)).scalar() or 0
+
+    # Each new content hash keeps its first staged row. Its id is kept
+    # unless another memory of the user (or an earlier staged row) already
+    # has it; then the memory gets a fresh id.
+    await db.execute(text("""
+        WITH staged AS (
+            SELECT n.seq, n.id, left(encode(sha256(convert_to(n.content, 'UTF8')), 'hex'), 16) AS content_hash
+            FROM cerebro_import_nodes n
+            WHERE n.import_id = :import_id
+        ), fresh AS (
+            SELECT DISTINCT ON (s.content_hash) s.*
+            FROM staged s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM cerebro_memory_nodes e
+                WHERE e.user_id = :user_id AND e.content_hash = s.content_hash
+            )
+            ORDER BY s.content_hash, s.seq
+        ), named AS (
+            SELECT f.seq,
+                   CASE WHEN ROW_NUMBER() OVER (PARTITION BY f.id ORDER BY f.seq) > 1
+                          OR EXISTS (SELECT 1 FROM cerebro_memory_nodes e WHERE e.user_id = :user_id AND e.id = f.id)
+                        THEN 'mem_' || substr(md5(random()::text || f.seq::text), 1, 12)
+                        ELSE f.id END AS final_id
+            FROM fresh f
+        )
+        UPDATE cerebro_import_nodes n SET final_id = named.final_id
+        FROM named
+        WHERE n.import_id = :import_id AND n.seq = named.seq
+    """), params)
+
+    inserted = (await db.execute(text("""
+        INSERT INTO cerebro_memory_nodes (
+            id, user_id, content, content_hash, memory_type, layer, agent_id, visibility,
+            stability, difficulty, access_count, access_timestamps,
+            valence, arousal, salience, tags, concepts, source, embedding, created_at
+        )
+        SELECT s.final_id, :user_id, s.content, left(encode(sha256(convert_to(s.content, 'UTF8')), 'hex'), 16),
+               s.memory_type, s.layer, s.agent_id, s.visibility,
+               s.stability, s.difficulty, s.access_count, COALESCE(s.access_timestamps, '{}'::float8[]),
+               s.valence, s.arousal, s.salience, s.tags, s.concepts, 'import',
+               CAST(s.embedding AS vector), COALESCE(s.created_at, NOW())
+        FROM cerebro_import_nodes s
+        WHERE s.import_id = :import_id AND s.final_id IS NOT NULL
+        ON CONFLICT (id, user_id) DO NOTHING
+        RETURNING id
+    """), params)).all()
+
+    # Duplicates resolve to the node that holds their content (preferring
+    # their own id)
+    await db.execute(text("""
+        UPDATE cerebro_import_nodes n
+        SET final_id = (
+            SELECT e.id FROM cerebro_memory_nodes e
+            WHERE e.user_id = :user_id
+              AND e.content_hash = left(encode(sha256(convert_to(n.content, 'UTF8')), 'hex'), 16)
+            ORDER BY (e.id = n.id) DESC, e.created_at, e.id
+            LIMIT 1
+        )
+        WHERE n.import_id = :import_id AND n.final_id IS NULL
+    """), params)
+
+    # Link endpoints that name a staged memory (by its exported id) point at
+    # that memory's final id; other ids are taken as they are. Links whose
+    # endpoints don't exist, or that collapse into a self link, are dropped
+    # and counted.
+    link_counts = (await db.execute(text("""
+        WITH resolved AS (
+            SELECT l.seq, l.link_type, l.weight, l.evidence,
+                   CASE WHEN ms.seq IS NULL THEN l.source_id ELSE ms.final_id END AS source_id,
+                   CASE WHEN mt.seq IS NULL THEN l.target_id ELSE mt.final_id END AS target_id
+            FROM cerebro_import_links l
+            LEFT JOIN LATERAL (
+                SELECT n.seq, n.final_id FROM cerebro_import_nodes n
+                WHERE n.import_id = l.import_id AND n.original_id = l.source_id
+                ORDER BY n.seq LIMIT 1
+            ) AS ms ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT n.seq, n.final_id FROM cerebro_import_nodes n
+                WHERE n.import_id = l.import_id AND n.original_id = l.target_id
+                ORDER BY n.seq LIMIT 1
+            ) AS mt ON TRUE
+            WHERE l.import_id = :import_id
+        ), checked AS (
+            SELECT r.*,
+                   r.source_id <> r.target_id
+                   AND EXISTS (SELECT 1 FROM cerebro_memory_nodes s WHERE s.user_id = :user_id AND s.id = r.source_id)
+                   AND EXISTS (SELECT 1 FROM cerebro_memory_nodes t WHERE t.user_id = :user_id AND t.id = r.target_id)
+                   AS linkable
+            FROM resolved r
+        ), inserted AS (
+            INSERT INTO cerebro_associative_links (
+                id, user_id, source_id, target_id, link_type, weight,
+                activation_count, created_at, source_reason, evidence
+            )
+            SELECT 'link_' || substr(md5(random()::text || c.seq::text), 1, 12), :user_id,
+                   c.source_id, c.target_id, c.link_type, c.weight, 0, NOW(), 'import', c.evidence
+            FROM checked c
+            WHERE c.linkable
+            ON CONFLICT ON CONSTRAINT uq_cerebro_link DO NOTHING
+            RETURNING id
+        )
+        SELECT (SELECT COUNT(*) FROM inserted) AS imported,
+               (SELECT COUNT(*) FROM checked WHERE NOT linkable) AS dropped
+    """), params)).first()
+
+    counts = {
+        "nodes_imported": len(inserted),
+        "nodes_skipped": staged - len(inserted),
+        "links_imported": link_counts.imported,
+        "links_dropped": link_counts.dropped,
+    }
+    if link_counts.dropped:
+        logger.warning(f"Cortex import {import_id}: dropped {link_counts.dropped} links with missing endpoints")
+    await db.execute(text("""
+        UPDATE cerebro_imports
+        SET nodes_imported = :nodes_imported, nodes_skipped = :nodes_skipped,
+            links_imported = :links_imported, links_dropped = :links_dropped, merged_at = NOW()
+        WHERE id = :import_id
+    """), {**params, **counts})
+    await clear_staging(db, import_id)
+    return counts
+
+
+async def clear_staging(db: AsyncSession, import_id: UUID) -> None:
+    """Drop an import's staged rows. Does not commit."""
+    await db.execute(text("DELETE FROM cerebro_import_nodes WHERE import_id = :id"), {"id": import_id})
+    await db.execute(text("DELETE FROM cerebro_import_links WHERE import_id = :id"), {"id": import_id})
+
+
+async def run_import_round(job) -> bool:
+    """Session job step: one embedding batch, or the final merge."""
+    from app.database import get_db_context
+
+    async with get_db_context() as db:
+        if job.rounds_left > 1:
+            batch = await _embed_batch(db, job.session_id)
+            if batch is not None:
+                await job.checkpoint(db)
+                job.emit({"type": "import_progress", "attempted": batch[0], "embedded": batch[1],
+                          "rounds_done": job.rounds_done, "rounds_left": job.rounds_left})
+                return True
+
+        counts = await _merge(db, job.session_id, job.user_id)
+        await job.checkpoint(db)  # commits the merge
+    job.emit({"type": "import_merged", **counts})
+    logger.info(f"Cortex import {job.session_id} merged: {counts}")
+    return False
+
+
+async def finish_import(job, status: str) -> None:
+    """Cancelled or failed imports drop their staged rows."""
+    from app.database import get_db_context
+
+    if status not in ("cancelled", "failed"):
+        return
+    async with get_db_context() as db:
+        await clear_staging(db, job.session_id)
+        await db.commit()
+
+
+register_runner(IMPORT_JOB_KIND, run_import_round, finish_import)
+
+
+async def get_import(db: AsyncSession, user_id: UUID, import_id: UUID) -> Optional[dict]:
+    """Progress of an import: counts so far plus its job, or None."""
+    row = (await db.execute(text("""
+        SELECT i.*,
+               (SELECT COUNT(*) FROM cerebro_import_nodes n
+                WHERE n.import_id = i.id AND n.embedding IS NULL AND NOT n.embed_attempted) AS pending_embeddings
+        FROM cerebro_imports i
+        WHERE i.id = :id AND i.user_id = :user_id
+    """), {"id": import_id, "user_id": str(user_id)})).mappings().first()
+    if row is None:
+        return None
+    job = await get_session_job(db, IMPORT_JOB_KIND, import_id)
+    return {
+        "import_id": str(row["id"]),
+        "source_model": row["source_model"],
+        "staged_nodes": row["staged_nodes"],
+        "staged_links": row["staged_links"],
+        "reused_embeddings": row["reused_embeddings"],
+        "embedded": row["embedded"],
+        "pending_embeddings": row["pending_embeddings"],
+        "nodes_imported": row["nodes_imported"],
+        "nodes_skipped": row["nodes_skipped"],
+        "links_imported": row["links_imported"],
+        "links_dropped": row["links_dropped"],
+        "created_at": _iso(row["created_at"]),
+        "merged_at": _iso(row["merged_at"]),
+        "status": job["status"] if job else None,
+        "rounds_done": job["rounds_done"] if job else 0,
+        "rounds_requested": job["rounds_requested"] if job else 0,
+        "error": job["error"] if job else None,
+    }
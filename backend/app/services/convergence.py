@@ -0,0 +1,208 @@
+"""
+Convergence - embedding-based agreement detection
+
+Decides whether agents are saying the same thing without asking an LLM.
+Each statement is embedded once (`embed_batch`), statements are averaged
+into one unit vector per agent, and the agent-by-agent cosine similarity
+matrix is a single numpy product. Agents whose similarity clears
+`convergence_similarity_threshold` are linked; the connected groups are the
+agreeing clusters:
+
+- largest cluster of 2 agents -> HARMONY
+- largest cluster of 3+ agents -> CONSENSUS
+
+Councils use the share of agents in the largest cluster as the round's
+convergence score. Explicit consensus phrases ("we all agree", ...) still
+count, and are the whole signal when no embeddings are available.
+
+A council only ends as consensus when the score clears CONSENSUS_SCORE
+*and* at least CONSENSUS_MIN_EXPLICIT of the round's statements say so
+explicitly. Sentence embeddings (bge-small) score answers on the same
+topic highly even when they disagree, so similarity alone would end
+councils after the first round.
+
+`/village/convergence` only calls the LLM to describe a cluster once one is
+found, and caches the answer per user/topic for the exact set of entries
+it was computed from - polling an unchanged Village costs one indexed query.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.embedding import get_embedding_service
+
+logger = logging.getLogger(__name__)
+
+# Explicit agreement markers (fallback signal, and a floor on the score)
+CONSENSUS_PHRASES = [
+    "we all agree",
+    "consensus reached",
+    "unanimous",
+    "we're aligned",
+    "we've reached agreement",
+    "common ground",
+    "we concur",
+    "agreement reached",
+    "shared conclusion",
+]
+
+CONSENSUS_SCORE = 0.8          # convergence score that can end a council
+CONSENSUS_MIN_EXPLICIT = 0.5   # share of statements that must state agreement
+
+RESULT_CACHE_SIZE = 256
+
+
+class ConvergenceResult:
+    """Clusters of agreeing agents, largest first."""
+
+    __slots__ = ("convergence_type", "clusters", "score", "explicit")
+
+    def __init__(self, convergence_type: str = "NONE", clusters: Optional[list[dict]] = None, score: float = 0.0):
+        self.convergence_type = convergence_type
+        self.clusters = clusters or []  # [{"agents": [...], "similarity": float}]
+        self.score = score
+        self.explicit = 0.0  # share of statements with a consensus phrase
+
+    @property
+    def top(self) -> Optional[dict]:
+        return self.clusters[0] if self.clusters else None
+
+    @property
+    def consensus(self) -> bool:
+        """Whether the round ends a council: converged, and agreement stated explicitly."""
+        return self.score >= CONSENSUS_SCORE and self.explicit >= CONSENSUS_MIN_EXPLICIT
+
+
+def phrase_score(contents: list[str]) -> float:
+    """Share of statements containing an explicit consensus phrase."""
+    if not contents:
+        return 0.0
+    hits = sum(1 for c in contents if any(p in c.lower() for p in CONSENSUS_PHRASES))
+    return hits / len(contents)
+
+
+def _agent_vectors(agents: list[str], vectors: list[list[float]]) -> tuple[list[str], np.ndarray]:
+    """One L2-normalised centroid per agent."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    names = sorted(set(agents))
+    index = {name: i for i, name in enumerate(names)}
+    centroids = np.zeros((len(names), matrix.shape[1]), dtype=np.float32)
+    np.add.at(centroids, [index[a] for a in agents], matrix)
+    centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return names, centroids
+
+
+def cluster_agents(agents: list[str], vectors: list[list[float]], threshold: float) -> ConvergenceResult:
+    """
+    Group agents whose (centroid) embeddings are at least `threshold` similar.
+
+    `agents[i]` authored the statement embedded as `vectors[i]`; an agent may
+    appear several times.
+    """
+    if not vectors:
+        return ConvergenceResult()
+    names, centroids = _agent_vectors(agents, vectors)
+    if len(names) < 2:
+        return ConvergenceResult()
+
+    similarity = centroids @ centroids.T
+    linked = similarity >= threshold
+
+    # Connected components over the thresholded similarity graph
+    parent = list(range(len(names)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows, cols = np.nonzero(np.triu(linked, k=1))
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        parent[find(i)] = find(j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(names)):
+        groups.setdefault(find(i), []).append(i)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        block = similarity[np.ix_(members, members)]
+        mean = (block.sum() - len(members)) / (len(members) * (len(members) - 1))
+        clusters.append({"agents": [names[i] for i in members], "similarity": round(float(mean), 4)})
+    clusters.sort(key=lambda c: (len(c["agents"]), c["similarity"]), reverse=True)
+
+    if not clusters:
+        return ConvergenceResult()
+    size = len(clusters[0]["agents"])
+    return ConvergenceResult(
+        "CONSENSUS" if size >= 3 else "HARMONY",
+        clusters,
+        score=size / len(names),
+    )
+
+
+async def embed_statements(texts: list[str]) -> list[Optional[list[float]]]:
+    """Embed statements in one batch (None entries where embedding failed)."""
+    if not texts:
+        return []
+    try:
+        return await get_embedding_service().embed_batch(texts)
+    except Exception as e:
+        logger.warning(f"Convergence embedding failed: {e}")
+        return [None] * len(texts)
+
+
+async def measure_round(messages: list) -> ConvergenceResult:
+    """
+    Convergence of one council round's agent messages.
+
+    Score is the share of agents in the largest agreeing cluster, floored
+    by the explicit-consensus-phrase share (also kept as `explicit`).
+    """
+    statements = [
+        (m.agent_id, m.content) for m in messages
+        if getattr(m, "role", "agent") == "agent" and m.content and not m.content.startswith("[Error:")
+    ]
+    phrases = phrase_score([m.content for m in messages if m.content])
+    result = ConvergenceResult()
+    if len(statements) >= 2:
+        vectors = await embed_statements([content for _, content in statements])
+        embedded = [(agent, vec) for (agent, _), vec in zip(statements, vectors) if vec]
+        if len(embedded) >= 2:
+            result = cluster_agents(
+                [agent for agent, _ in embedded],
+                [vec for _, vec in embedded],
+                get_settings().convergence_similarity_threshold,
+            )
+    result.score = max(result.score, phrases)
+    result.explicit = phrases
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Result cache (Village polling)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_results: "OrderedDict[tuple, dict]" = OrderedDict()
+
+
+def cached_result(key: tuple) -> Optional[dict]:
+    result = _results.get(key)
+    if result is not None:
+        _results.move_to_end(key)
+    return result
+
+
+def store_result(key: tuple, result: dict) -> None:
+    _results[key] = result
+    _results.move_to_end(key)
+    while len(_results) > RESULT_CACHE_SIZE:
+        _results.popitem(last=False)
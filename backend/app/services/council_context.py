@@ -0,0 +1,282 @@
+"""
+Council Context - incremental, token-budgeted round history
+
+Every agent in a round gets the same "previous discussion" block. Rebuilding
+it from the full transcript makes prompts (and cost) grow with the square of
+the round count, so the history is split in two:
+
+- the most recent `council_verbatim_rounds` rounds are quoted in full
+- everything older lives in a rolling digest on the session
+  (`context_digest`, covering rounds 1..`digest_through_round`)
+
+Each round folds the round that just left the verbatim window into the
+digest with one summarisation call shared by all agents. The digest is
+written on the session object and committed together with the round.
+
+Only the rows in the verbatim window (and the round being folded) are
+read - the session's full round/message tree is never loaded. The result is
+trimmed to `council_context_token_budget`, dropping the oldest verbatim
+material first.
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.council import DeliberationSession, DeliberationRound, SessionMessage
+from app.services.claude import ClaudeService
+
+logger = logging.getLogger(__name__)
+
+DIGEST_MODEL = "claude-haiku-4-5-20251001"  # Same fast model the council defaults to
+DIGEST_MAX_TOKENS = 700  # Output cap for the rolling digest
+DIGEST_INPUT_TOKENS = 12000  # Max transcript per summarisation call (catch-up folds in chunks)
+MIN_MESSAGE_CHARS = 200  # Never clip a verbatim message shorter than this
+FALLBACK_LINE_CHARS = 160  # Per-message excerpt when the summariser is unavailable
+
+DIGEST_SYSTEM_PROMPT = """You maintain the running summary of a multi-agent council deliberation.
+Merge the new rounds into the existing summary. Keep: each participant's current position,
+points of agreement and disagreement, proposals on the table, and any human instructions.
+Drop pleasantries and repetition. Refer to participants by their IDs in brackets, e.g. [AZOTH].
+Reply with the updated summary only, in under 400 words."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token)."""
+    return len(text) // 4
+
+
+class RoundContext:
+    """Discussion history for one round, plus what it cost to build."""
+
+    __slots__ = ("text", "input_tokens", "output_tokens")
+
+    def __init__(self, text: str, input_tokens: int = 0, output_tokens: int = 0):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Transcript loading
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def _load_rounds(db: AsyncSession, session_id, first: int, last: int) -> list[tuple[int, list[str]]]:
+    """[(round_number, lines)] for rounds first..last (inclusive), oldest first."""
+    if last < first:
+        return []
+    rows = (await db.execute(
+        select(
+            DeliberationRound.round_number,
+            DeliberationRound.human_message,
+            SessionMessage.role,
+            SessionMessage.agent_id,
+            SessionMessage.content,
+        )
+        .outerjoin(SessionMessage, SessionMessage.round_id == DeliberationRound.id)
+        .where(DeliberationRound.session_id == session_id)
+        .where(DeliberationRound.round_number.between(first, last))
+        .order_by(DeliberationRound.round_number, SessionMessage.created_at)
+    )).all()
+
+    rounds: dict[int, list[str]] = {}
+    for row in rows:
+        lines = rounds.get(row.round_number)
+        if lines is None:
+            lines = rounds[row.round_number] = []
+            # Human butt-in for the round comes first
+            if row.human_message:
+                lines.append(f"[HUMAN]: {row.human_message}")
+        if row.role == "agent":
+            lines.append(f"[{row.agent_id}]: {row.content}")
+        elif row.role == "human":
+            lines.append(f"[HUMAN]: {row.content}")
+    return [(number, lines) for number, lines in rounds.items() if lines]
+
+
+def _format_round(number: int, lines: list[str]) -> str:
+    return f"=== Round {number} ===\n" + "\n\n".join(lines)
+
+
+def _clip(line: str, max_chars: int) -> str:
+    if len(line) <= max_chars:
+        return line
+    return line[:max_chars].rstrip() + " [...]"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Rolling digest
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _chunk_rounds(rounds: list[tuple[int, list[str]]]) -> list[list[tuple[int, list[str]]]]:
+    """Group rounds so each summarisation call stays under DIGEST_INPUT_TOKENS."""
+    chunks: list[list[tuple[int, list[str]]]] = []
+    current: list[tuple[int, list[str]]] = []
+    used = 0
+    for number, lines in rounds:
+        cost = estimate_tokens(_format_round(number, lines))
+        if current and used + cost > DIGEST_INPUT_TOKENS:
+            chunks.append(current)
+            current, used = [], 0
+        current.append((number, lines))
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _extractive_digest(digest: Optional[str], rounds: list[tuple[int, list[str]]]) -> str:
+    """Fallback fold: short per-message excerpts appended to the digest."""
+    parts = [digest] if digest else []
+    for number, lines in rounds:
+        parts.append(f"Round {number}: " + " ".join(_clip(line, FALLBACK_LINE_CHARS) for line in lines))
+    text = "\n".join(parts)
+    # Keep the newest material when the fallback digest outgrows its budget
+    max_chars = DIGEST_MAX_TOKENS * 4
+    return text[-max_chars:] if len(text) > max_chars else text
+
+
+async def _fold(
+    claude: Optional[ClaudeService],
+    topic: str,
+    digest: Optional[str],
+    rounds: list[tuple[int, list[str]]],
+) -> tuple[str, int, int]:
+    """Merge `rounds` into `digest`. Returns (digest, input_tokens, output_tokens)."""
+    if claude is None:
+        return _extractive_digest(digest, rounds), 0, 0
+
+    transcript = "\n\n".join(_format_round(number, lines) for number, lines in rounds)
+    prompt = (
+        f'Topic: "{topic}"\n\n'
+        f"Existing summary:\n{digest or '(none yet)'}\n\n"
+        f"New rounds:\n{transcript}"
+    )
+    try:
+        response = await claude.chat(
+            messages=[{"role": "user", "content": prompt}],
+            model=DIGEST_MODEL,
+            system=DIGEST_SYSTEM_PROMPT,
+            max_tokens=DIGEST_MAX_TOKENS,
+        )
+    except Exception as e:
+        logger.warning(f"Council digest call failed, using excerpts: {e}")
+        return _extractive_digest(digest, rounds), 0, 0
+
+    text = "".join(b.get("text", "") for b in response.get("content", []) if b.get("type") == "text").strip()
+    usage = response.get("usage", {})
+    if not text:
+        return _extractive_digest(digest, rounds), usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    return text, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+async def advance_digest(
+    db: AsyncSession,
+    claude: Optional[ClaudeService],
+    session: DeliberationSession,
+    through_round: int,
+) -> tuple[int, int]:
+    """
+    Fold rounds up to `through_round` into the session's digest (if not already).
+
+    Normally that is exactly one round and one model call. Sets
+    session.context_digest / digest_through_round; the caller commits.
+    Returns (input_tokens, output_tokens) spent.
+    """
+    done = session.digest_through_round or 0
+    if through_round <= done:
+        return 0, 0
+
+    rounds = await _load_rounds(db, session.id, done + 1, through_round)
+    digest = session.context_digest
+    input_tokens = output_tokens = 0
+    for chunk in _chunk_rounds(rounds):
+        digest, used_in, used_out = await _fold(claude, session.topic, digest, chunk)
+        input_tokens += used_in
+        output_tokens += used_out
+
+    session.context_digest = digest
+    session.digest_through_round = through_round
+    return input_tokens, output_tokens
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Round context
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _fit_rounds(rounds: list[tuple[int, list[str]]], budget: int) -> list[str]:
+    """
+    Format verbatim rounds within `budget` tokens, newest kept whole first.
+
+    The first round that doesn't fit has its messages clipped to share what
+    is left; anything older is replaced by a one-line omission note.
+    """
+    kept: list[str] = []
+    remaining = budget
+    for i in range(len(rounds) - 1, -1, -1):
+        number, lines = rounds[i]
+        block = _format_round(number, lines)
+        cost = estimate_tokens(block)
+        if cost <= remaining:
+            kept.append(block)
+            remaining -= cost
+            continue
+
+        per_line = max(MIN_MESSAGE_CHARS, (remaining * 4) // max(1, len(lines)))
+        clipped = _format_round(number, [_clip(line, per_line) for line in lines])
+        newest_omitted = i
+        if estimate_tokens(clipped) <= remaining:
+            kept.append(clipped)
+            newest_omitted = i - 1
+        if newest_omitted > 0:
+            kept.append(f"[Rounds {rounds[0][0]}-{rounds[newest_omitted][0]} omitted for length]")
+        elif newest_omitted == 0:
+            kept.append(f"[Round {rounds[0][0]} omitted for length]")
+        break
+    kept.reverse()
+    return kept
+
+
+async def build_round_context(
+    db: AsyncSession,
+    claude: Optional[ClaudeService],
+    session: DeliberationSession,
+    round_number: int,
+    human_message: Optional[str] = None,
+) -> RoundContext:
+    """
+    Build the previous-discussion block shared by all agents in a round.
+
+    Advances the session's rolling digest as a side effect (caller commits
+    with the round). Pass claude=None to digest with plain excerpts instead
+    of a model call. Token usage of the digest call is returned on the
+    result so callers can bill it with the round.
+    """
+    settings = get_settings()
+    verbatim = max(0, settings.council_verbatim_rounds)
+    budget = max(500, settings.council_context_token_budget)
+
+    last_previous = round_number - 1
+    if last_previous < 1:
+        text = f"=== Human Intervention ===\n[HUMAN]: {human_message}" if human_message else ""
+        return RoundContext(text)
+
+    digest_through = max(0, last_previous - verbatim)
+    input_tokens, output_tokens = await advance_digest(db, claude, session, digest_through)
+
+    parts = []
+    if session.context_digest:
+        parts.append(f"=== Summary of Rounds 1-{session.digest_through_round} ===\n{session.context_digest}")
+    human_block = f"=== Human Intervention ===\n[HUMAN]: {human_message}" if human_message else ""
+
+    fixed_cost = sum(estimate_tokens(p) for p in parts) + estimate_tokens(human_block)
+    rounds = await _load_rounds(db, session.id, digest_through + 1, last_previous)
+    parts.extend(_fit_rounds(rounds, budget - fixed_cost))
+
+    if human_block:
+        parts.append(human_block)
+
+    return RoundContext("\n\n".join(parts), input_tokens, output_tokens)
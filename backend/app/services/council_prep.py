@@ -0,0 +1,115 @@
+"""
+Council Prep - per-round prompt and memory preparation
+
+Before a round every agent needs its system prompt (native prompt + agent
+memories + CerebroCortex recall) and the Village memories for the topic.
+Doing that agent by agent on the request's session serialises several
+recalls per agent. Instead `prepare_round`:
+
+- fetches the Village memories for the topic once - the query is the same
+  for every agent
+- loads the per-agent prompts concurrently, each on its own pooled session
+  (an AsyncSession can't run operations concurrently)
+
+Only the native prompt text is cached (process-wide, by `load_native_prompt`).
+Agent memories and cortex recall run again every round, so agents see what
+was remembered during earlier rounds of the same deliberation.
+
+Each lookup commits its own session (memory access bumps persist) and never
+touches the caller's transaction, so a failed recall can't poison the round
+being written.
+"""
+
+import asyncio
+import logging
+from uuid import UUID
+
+from app.models.user import User
+from app.services.neural_memory import NeuralMemoryService
+
+logger = logging.getLogger(__name__)
+
+VILLAGE_MEMORY_LIMIT = 5
+VILLAGE_MEMORY_MAX_CHARS = 1500
+
+
+class RoundPreparation:
+    """Everything agents need before a round starts."""
+
+    __slots__ = ("prompts", "village_memory_block")
+
+    def __init__(self, prompts: dict[str, str], village_memory_block: str):
+        self.prompts = prompts
+        self.village_memory_block = village_memory_block
+
+
+async def _load_agent_prompt(agent_id: str, user: User) -> str:
+    from app.api.v1.chat import load_native_prompt, get_agent_prompt_with_memory
+    from app.database import get_db_context
+
+    try:
+        async with get_db_context() as db:
+            prompt = await get_agent_prompt_with_memory(
+                agent_id=agent_id,
+                user=user,
+                use_pac=False,
+                db=db,
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Failed to load prompt for {agent_id}: {e}")
+        return load_native_prompt(agent_id, use_pac=False)
+    return prompt
+
+
+async def _load_village_block(user_id: UUID, topic: str) -> str:
+    from app.database import get_db_context
+
+    try:
+        async with get_db_context() as db:
+            neural = NeuralMemoryService(db)
+            memories = await neural.get_village_memories(
+                user_id=user_id,
+                topic=topic,
+                limit=VILLAGE_MEMORY_LIMIT,
+                collection="council",
+            )
+            await db.commit()
+            if not memories:
+                return ""
+            return neural.format_village_memories_for_prompt(memories, max_chars=VILLAGE_MEMORY_MAX_CHARS)
+    except Exception as e:
+        logger.warning(f"Failed to get village memories: {e}")
+        return ""
+
+
+async def prepare_round(session, agents: list, user: User) -> RoundPreparation:
+    """
+    Load prompts for `agents` and the topic's Village memories concurrently.
+
+    Agents with a persona_override use it verbatim; the others get their
+    prompt with fresh memories, each on a pooled session.
+    """
+    # Read the user's columns here, on the caller's session: the concurrent
+    # loaders only read attributes and must never trigger a refresh.
+    user_id = user.id
+    _ = (user.settings, user.display_name, user.email)
+
+    prompts: dict[str, str] = {}
+    to_load: list[str] = []
+    for agent in agents:
+        if agent.persona_override:
+            prompts[agent.agent_id] = agent.persona_override
+            continue
+        to_load.append(agent.agent_id)
+
+    results = await asyncio.gather(
+        _load_village_block(user_id, session.topic),
+        *(_load_agent_prompt(agent_id, user) for agent_id in to_load),
+    )
+    village_block, loaded = results[0], results[1:]
+
+    prompts.update(zip(to_load, loaded))
+
+    logger.debug(f"Council {session.id}: loaded {len(to_load)} agent prompts")
+    return RoundPreparation(prompts, village_block)
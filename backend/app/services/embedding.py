@@ -9,6 +9,7 @@ Supports:
 - Voyage AI - voyage-2
 """
 
+import asyncio
 import logging
 from typing import Optional
 import httpx
@@ -76,6 +77,12 @@ class EmbeddingService:
     def dimensions(self) -> int:
         return self.settings.embedding_dimensions
 
+    @property
+    def model_id(self) -> str:
+        """Identifies the vector space: embeddings are interchangeable only within one id."""
+        model = "voyage-2" if self.provider == "voyage" else self.settings.embedding_model
+        return f"{self.provider}:{model}:{self.dimensions}"
+
     @property
     def is_local(self) -> bool:
         """Check if using local embeddings."""
@@ -140,8 +147,9 @@ class EmbeddingService:
         """Generate embedding using local FastEmbed model."""
         try:
             model = _get_local_model()
-            # FastEmbed returns a generator, get first result
-            embeddings = list(model.embed([text]))
+            # FastEmbed returns a generator, get first result (inference is
+            # CPU-bound - keep it off the event loop)
+            embeddings = await asyncio.to_thread(lambda: list(model.embed([text])))
             if embeddings:
                 return embeddings[0].tolist()
             return None
@@ -153,7 +161,7 @@ class EmbeddingService:
         """Generate embeddings for batch using local FastEmbed model."""
         try:
             model = _get_local_model()
-            embeddings = list(model.embed(texts))
+            embeddings = await asyncio.to_thread(lambda: list(model.embed(texts)))
             return [e.tolist() for e in embeddings]
         except Exception as e:
             logger.exception(f"Local batch embedding failed: {e}")
@@ -0,0 +1,457 @@
+"""
+Session Jobs - durable, resumable runner for multi-round sessions
+
+Auto-deliberation (council) and auto-jam drive many LLM rounds. Instead of
+running them inside the HTTP request or socket that asked for them, they are
+enqueued as rows in `session_jobs` and executed by a bounded in-process
+worker pool:
+
+- at most `session_job_workers` jobs run per process, and at most
+  `session_jobs_per_user` per user (a per-user soft limit enforced by the
+  claim query)
+- each round runs on its own short-lived DB session and commits together
+  with its checkpoint (`rounds_done`); a side task refreshes `heartbeat_at`
+  while the round runs, however long it takes
+- every claim writes a fresh `claim_token`. Checkpoints and status checks
+  only succeed for the current token, so a worker whose job was claimed
+  again stops, and its in-flight round is rolled back instead of committed
+- pause / resume / stop change the job row; the worker looks at it before
+  every round, so a round in flight always finishes cleanly. A job resumed
+  before its worker noticed the pause is taken back by that same worker
+- jobs whose heartbeat went stale (worker died mid-round) are claimable
+  again, and shutdown hands running jobs back to the queue - the session
+  continues from its last committed round
+
+Progress events are published on an in-process bus keyed by
+(kind, session_id). Any client - the SSE response that started the job, a
+council WebSocket opened later - subscribes to it, and disconnecting never
+affects the job.
+
+Session types plug in with `register_runner(kind, step, finish)`:
+`step(job)` runs one round and returns False once the session can't
+continue; `finish(job, status)` runs when the job leaves the worker.
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_MINUTES = 10  # "running" jobs without a heartbeat this long are re-claimed
+HEARTBEAT_SECONDS = 60  # heartbeat refresh while a round runs (well under STALE_JOB_MINUTES)
+DISPATCH_POLL_SECONDS = 5.0
+SUBSCRIBER_QUEUE_SIZE = 2000  # events buffered per subscriber before dropping
+
+ACTIVE_STATUSES = ("queued", "running", "paused")
+FINAL_STATUSES = ("done", "cancelled", "failed")
+
+
+class JobSuperseded(Exception):
+    """The job was claimed again by another worker; this one must stop."""
+
+
+class JobContext:
+    """A claimed job as seen by a session runner."""
+
+    def __init__(self, row):
+        self.id: UUID = row.id
+        self.claim_token: UUID = row.claim_token
+        self.kind: str = row.kind
+        self.session_id: UUID = row.session_id
+        self.user_id: UUID = row.user_id
+        self.rounds_requested: int = row.rounds_requested
+        self.rounds_done: int = row.rounds_done
+
+    @property
+    def rounds_left(self) -> int:
+        return self.rounds_requested - self.rounds_done
+
+    def emit(self, event: dict) -> None:
+        publish(self.kind, self.session_id, event)
+
+    async def checkpoint(self, db: AsyncSession) -> None:
+        """Count the round and commit it with the caller's pending writes.
+
+        Raises JobSuperseded (after rolling the round back) when another
+        worker holds the job now.
+        """
+        claimed = (await db.execute(text("""
+            UPDATE session_jobs SET rounds_done = :done, heartbeat_at = NOW()
+            WHERE id = :id AND claim_token = :token
+            RETURNING id
+        """), {"id": self.id, "token": self.claim_token, "done": self.rounds_done + 1})).first()
+        if claimed is None:
+            await db.rollback()
+            raise JobSuperseded(str(self.id))
+        await db.commit()
+        self.rounds_done += 1
+
+
+StepFn = Callable[[JobContext], Awaitable[bool]]
+FinishFn = Callable[[JobContext, str], Awaitable[None]]
+
+_runners: dict[str, tuple[StepFn, Optional[FinishFn]]] = {}
+
+
+def register_runner(kind: str, step: StepFn, finish: Optional[FinishFn] = None) -> None:
+    """Register how jobs of `kind` run one round and wrap up."""
+    _runners[kind] = (step, finish)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Event bus
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_subscribers: dict[tuple[str, UUID], set[asyncio.Queue]] = {}
+
+
+def publish(kind: str, session_id: UUID, event: dict) -> None:
+    """Deliver an event to every subscriber of the session (never blocks)."""
+    for queue in list(_subscribers.get((kind, session_id), ())):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.debug(f"Dropping {event.get('type')} event for slow {kind} subscriber")
+
+
+def open_subscription(kind: str, session_id: UUID) -> asyncio.Queue:
+    """Start buffering a session's events; pair with close_subscription."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    _subscribers.setdefault((kind, session_id), set()).add(queue)
+    return queue
+
+
+def close_subscription(kind: str, session_id: UUID, queue: asyncio.Queue) -> None:
+    queues = _subscribers.get((kind, session_id))
+    if queues is not None:
+        queues.discard(queue)
+        if not queues:
+            _subscribers.pop((kind, session_id), None)
+
+
+@contextmanager
+def subscription(kind: str, session_id: UUID):
+    queue = open_subscription(kind, session_id)
+    try:
+        yield queue
+    finally:
+        close_subscription(kind, session_id, queue)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Job control
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _job_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "kind": row.kind,
+        "session_id": row.session_id,
+        "status": row.status,
+        "rounds_requested": row.rounds_requested,
+        "rounds_done": row.rounds_done,
+        "error": row.error,
+        "created_at": row.created_at,
+        "started_at": row.started_at,
+        "finished_at": row.finished_at,
+    }
+
+
+_JOB_COLUMNS = """
+    id, kind, session_id, user_id, status, rounds_requested, rounds_done, error,
+    created_at, started_at, finished_at
+"""
+
+
+async def get_session_job(db: AsyncSession, kind: str, session_id: UUID) -> Optional[dict]:
+    """The session's most recent job, or None."""
+    row = (await db.execute(text(f"""
+        SELECT {_JOB_COLUMNS} FROM session_jobs
+        WHERE kind = :kind AND session_id = :session_id
+        ORDER BY created_at DESC LIMIT 1
+    """), {"kind": kind, "session_id": session_id})).first()
+    return _job_dict(row) if row else None
+
+
+async def enqueue(db: AsyncSession, kind: str, session_id: UUID, user_id: UUID, num_rounds: int) -> dict:
+    """
+    Queue `num_rounds` rounds for a session. Does not commit.
+
+    An already queued/running job is returned unchanged; a paused one is
+    re-queued with the new round count. Call `wake()` after the commit.
+    """
+    row = (await db.execute(text(f"""
+        SELECT {_JOB_COLUMNS} FROM session_jobs
+        WHERE kind = :kind AND session_id = :session_id AND status = ANY(CAST(:active AS text[]))
+        FOR UPDATE
+    """), {"kind": kind, "session_id": session_id, "active": list(ACTIVE_STATUSES)})).first()
+
+    if row and row.status != "paused":
+        return _job_dict(row)
+
+    if row:
+        row = (await db.execute(text(f"""
+            UPDATE session_jobs
+            SET status = 'queued', rounds_requested = rounds_done + :rounds, heartbeat_at = NULL
+            WHERE id = :id
+            RETURNING {_JOB_COLUMNS}
+        """), {"id": row.id, "rounds": num_rounds})).first()
+    else:
+        row = (await db.execute(text(f"""
+            INSERT INTO session_jobs (id, kind, session_id, user_id, status, rounds_requested)
+            VALUES (:id, :kind, :session_id, :user_id, 'queued', :rounds)
+            RETURNING {_JOB_COLUMNS}
+        """), {
+            "id": uuid4(),
+            "kind": kind,
+            "session_id": session_id,
+            "user_id": user_id,
+            "rounds": num_rounds,
+        })).first()
+    return _job_dict(row)
+
+
+async def _set_status(db: AsyncSession, kind: str, session_id: UUID, status: str, from_statuses: tuple) -> Optional[dict]:
+    row = (await db.execute(text(f"""
+        UPDATE session_jobs
+        SET status = :status,
+            finished_at = CASE WHEN CAST(:status AS text) = ANY(CAST(:final AS text[])) THEN NOW() ELSE finished_at END
+        WHERE kind = :kind AND session_id = :session_id AND status = ANY(CAST(:from_statuses AS text[]))
+        RETURNING {_JOB_COLUMNS}
+    """), {
+        "kind": kind,
+        "session_id": session_id,
+        "status": status,
+        "final": list(FINAL_STATUSES),
+        "from_statuses": list(from_statuses),
+    })).first()
+    return _job_dict(row) if row else None
+
+
+async def pause_job(db: AsyncSession, kind: str, session_id: UUID) -> Optional[dict]:
+    """Stop after the current round; resumable. Does not commit."""
+    return await _set_status(db, kind, session_id, "paused", ("queued", "running"))
+
+
+async def resume_job(db: AsyncSession, kind: str, session_id: UUID) -> Optional[dict]:
+    """Re-queue a paused job. Does not commit; call `wake()` after."""
+    return await _set_status(db, kind, session_id, "queued", ("paused",))
+
+
+async def cancel_job(db: AsyncSession, kind: str, session_id: UUID) -> Optional[dict]:
+    """Stop after the current round for good. Does not commit."""
+    return await _set_status(db, kind, session_id, "cancelled", ACTIVE_STATUSES)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Worker pool
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_wake_event: Optional[asyncio.Event] = None
+_dispatcher_task: Optional[asyncio.Task] = None
+_running: dict[UUID, asyncio.Task] = {}
+
+
+def wake() -> None:
+    """Nudge the dispatcher (after committing an enqueue/resume)."""
+    if _wake_event is not None:
+        _wake_event.set()
+
+
+async def _claim(db: AsyncSession) -> Optional[JobContext]:
+    settings = get_settings()
+    row = (await db.execute(text(f"""
+        UPDATE session_jobs SET status = 'running', heartbeat_at = NOW(), claim_token = :token,
+                                started_at = COALESCE(started_at, NOW())
+        WHERE id = (
+            SELECT j.id FROM session_jobs j
+            WHERE j.kind = ANY(CAST(:kinds AS text[]))
+              AND j.id <> ALL(CAST(:running AS uuid[]))
+              AND (j.status = 'queued'
+                   OR (j.status = 'running' AND j.heartbeat_at < NOW() - INTERVAL '{STALE_JOB_MINUTES} minutes'))
+              AND (
+                  SELECT count(*) FROM session_jobs r
+                  WHERE r.user_id = j.user_id AND r.status = 'running' AND r.id <> j.id
+                    AND r.heartbeat_at >= NOW() - INTERVAL '{STALE_JOB_MINUTES} minutes'
+              ) < :per_user
+            ORDER BY j.created_at
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, claim_token, kind, session_id, user_id, rounds_requested, rounds_done
+    """), {
+        "token": uuid4(),
+        "kinds": list(_runners),
+        "running": list(_running),  # still winding down here, e.g. paused then resumed mid-round
+        "per_user": max(1, settings.session_jobs_per_user),
+    })).first()
+    await db.commit()
+    return JobContext(row) if row else None
+
+
+async def _job_status(job: JobContext) -> Optional[str]:
+    """The job's status for the worker holding it; None once it was claimed again
+    ('cancelled' if the row is gone).
+
+    A job paused and resumed while its worker was still in a round is
+    'queued' again - take it back here rather than leaving it to a new claim.
+    """
+    from app.database import get_db_context
+
+    async with get_db_context() as db:
+        row = (await db.execute(text("""
+            UPDATE session_jobs
+            SET status = CASE WHEN status = 'queued' THEN 'running' ELSE status END,
+                heartbeat_at = CASE WHEN status = 'queued' THEN NOW() ELSE heartbeat_at END
+            WHERE id = :id AND claim_token = :token
+            RETURNING status, rounds_requested
+        """), {"id": job.id, "token": job.claim_token})).first()
+        await db.commit()
+        if row is None:
+            exists = (await db.execute(text(
+                "SELECT 1 FROM session_jobs WHERE id = :id"
+            ), {"id": job.id})).scalar()
+            return None if exists else "cancelled"
+    job.rounds_requested = row.rounds_requested  # a resume may have asked for more rounds
+    return row.status
+
+
+async def _heartbeat(job: JobContext) -> None:
+    """Keep the claim fresh while a round runs, so it isn't taken for dead."""
+    from app.database import get_db_context
+
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        try:
+            async with get_db_context() as db:
+                await db.execute(text("""
+                    UPDATE session_jobs SET heartbeat_at = NOW()
+                    WHERE id = :id AND claim_token = :token AND status = 'running'
+                """), {"id": job.id, "token": job.claim_token})
+                await db.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"{job.kind} job {job.id} heartbeat failed: {e}")
+
+
+async def _finish(job: JobContext, status: str, error: Optional[str] = None) -> None:
+    from app.database import get_db_context
+
+    async with get_db_context() as db:
+        await db.execute(text("""
+            UPDATE session_jobs
+            SET status = :status, error = :error, finished_at = NOW()
+            WHERE id = :id AND claim_token = :token AND status = 'running'
+        """), {"id": job.id, "token": job.claim_token, "status": status, "error": error})
+        await db.commit()
+
+
+async def _run(job: JobContext) -> None:
+    step, finish = _runners[job.kind]
+    job.emit({"type": "job_started", "job_id": str(job.id), "rounds_left": job.rounds_left})
+
+    status = "done"
+    error = None
+    heartbeat = asyncio.create_task(_heartbeat(job))
+    try:
+        while job.rounds_left > 0:
+            current = await _job_status(job)
+            if current is None:
+                raise JobSuperseded(str(job.id))
+            if current != "running":
+                status = current  # paused/cancelled from outside
+                break
+            if not await step(job):
+                break
+    except asyncio.CancelledError:
+        raise
+    except JobSuperseded:
+        # Another worker holds the job now and reports its progress
+        logger.warning(f"{job.kind} job {job.id} was claimed by another worker; stopping")
+        return
+    except Exception as e:
+        logger.error(f"{job.kind} job {job.id} failed: {e}", exc_info=True)
+        status = "failed"
+        error = str(e)[:1000]
+        job.emit({"type": "error", "message": str(e)[:200]})
+    finally:
+        heartbeat.cancel()
+
+    if status in ("done", "failed"):
+        await _finish(job, status, error)
+    if finish is not None:
+        try:
+            await finish(job, status)
+        except Exception as e:
+            logger.warning(f"{job.kind} job {job.id} finish hook failed: {e}")
+    job.emit({"type": "job_finished", "job_id": str(job.id), "status": status, "rounds_done": job.rounds_done})
+
+
+async def _dispatch_loop() -> None:
+    from app.database import get_db_context
+
+    while True:
+        try:
+            await asyncio.wait_for(_wake_event.wait(), timeout=DISPATCH_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wake_event.clear()
+
+        try:
+            while _runners and len(_running) < max(1, get_settings().session_job_workers):
+                async with get_db_context() as db:
+                    job = await _claim(db)
+                if job is None:
+                    break
+                task = asyncio.create_task(_run(job))
+                _running[job.id] = task
+                task.add_done_callback(lambda _t, job_id=job.id: (_running.pop(job_id, None), wake()))
+        except Exception as e:
+            logger.warning(f"Session job dispatch failed: {e}")
+
+
+def start_session_workers() -> None:
+    """Start the dispatcher (idempotent). Stale and queued jobs are picked up."""
+    global _wake_event, _dispatcher_task
+    if _dispatcher_task and not _dispatcher_task.done():
+        return
+    _wake_event = asyncio.Event()
+    _wake_event.set()  # claim leftovers immediately
+    _dispatcher_task = asyncio.create_task(_dispatch_loop())
+
+
+async def stop_session_workers() -> None:
+    """Stop dispatching and hand running jobs back to the queue."""
+    global _dispatcher_task
+    if _dispatcher_task:
+        _dispatcher_task.cancel()
+        try:
+            await _dispatcher_task
+        except asyncio.CancelledError:
+            pass
+        _dispatcher_task = None
+
+    job_ids = list(_running)
+    for task in list(_running.values()):
+        task.cancel()
+    if job_ids:
+        await asyncio.gather(*_running.values(), return_exceptions=True)
+        from app.database import get_db_context
+        try:
+            async with get_db_context() as db:
+                await db.execute(text("""
+                    UPDATE session_jobs SET status = 'queued', heartbeat_at = NULL
+                    WHERE id = ANY(CAST(:ids AS uuid[])) AND status = 'running'
+                """), {"ids": job_ids})
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to requeue {len(job_ids)} session jobs: {e}")
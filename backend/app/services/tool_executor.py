@@ -79,6 +79,14 @@ class ToolExecutor:
 
         result = await self.execute(tool_name, tool_input)
 
+        # Buffer the run as an episode step of the conversation
+        if self.context.user_id and self.context.conversation_id:
+            from app.services.cerebro.episodes import note_tool_call
+            note_tool_call(
+                self.context.user_id, self.context.conversation_id, self.context.agent_id,
+                tool_name, tool_input, is_error=not result.success,
+            )
+
         # Format for Claude
         tool_result = result.to_claude_format()
         tool_result["tool_use_id"] = tool_id
@@ -0,0 +1,13 @@
+"""The Vault - storage services shared by the Files API and vault tools.
+
+Modules:
+- content_index: chunked trigram/full-text index over text file contents
+- semantic_index: embedded file chunks (pgvector) for relevance lookups
+- ingest: chunked streaming of uploads to disk with incremental hashing
+- blobs: content-addressed, reference-counted file storage
+- usage: maintained per-user storage counters and atomic quota checks
+- serving: ETag/Range-aware file responses and write-behind access stats
+- bulk: set-based moves/deletes with background disk reclamation jobs
+- lines: per-blob line-offset index for ranged reads and splice edits
+- project_context: cached per-user tree snapshots refreshed by vault version
+"""
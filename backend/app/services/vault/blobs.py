@@ -0,0 +1,468 @@
+"""Vault blob store - content-addressed, deduplicated file storage.
+
+File bytes live once per distinct sha256 under
+`<vault_path>/blobs/<sha256[:2]>/<sha256>`; `File.storage_path` points at the
+blob and `vault_blobs.ref_count` counts the File rows sharing it. Blobs are
+immutable - changing a file's content writes (or reuses) another blob and
+releases the old one, so copies are metadata-only.
+
+Concurrency protocol (no locks outside PostgreSQL):
+- Adding a reference upserts the vault_blobs row *before* the blob is placed
+  on disk, so the row lock is held while the bytes land
+- Garbage collection deletes a zero-ref row and unlinks the blob inside the
+  same transaction; a concurrent upsert waits on that row and re-creates both
+- Files written before the blob store keep their legacy per-file path until
+  `migrate_to_blobs` moves them; releasing a legacy path deletes it directly
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.file import File
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_BYTES = 1024 * 1024
+ORPHAN_GRACE_SECONDS = 3600  # Unreferenced blob files younger than this may still be mid-adopt
+GC_BATCH_SIZE = 200  # Blob rows deleted (and files unlinked) per GC transaction
+
+_ADD_REF = text("""
+    INSERT INTO vault_blobs (checksum, size_bytes, ref_count)
+    VALUES (:checksum, :size_bytes, 1)
+    ON CONFLICT (checksum) DO UPDATE
+    SET ref_count = vault_blobs.ref_count + 1, released_at = NULL
+""")
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Paths
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def blobs_root() -> Path:
+    return Path(get_settings().vault_path) / "blobs"
+
+
+def blob_path(checksum: str) -> Path:
+    return blobs_root() / checksum[:2] / checksum
+
+
+def staging_path() -> Path:
+    """A fresh path for bytes that are about to become a blob."""
+    return blobs_root() / "staging" / f"{uuid4().hex}.part"
+
+
+def is_blob_path(path: str | Path) -> bool:
+    path = Path(path)
+    return len(path.name) == 64 and path.parent.parent == blobs_root()
+
+
+def _place(source: Path, dest: Path, keep_source: bool) -> bool:
+    """Put source's bytes at dest unless a blob is already there. Returns True if placed."""
+    if dest.exists():
+        if not keep_source:
+            source.unlink(missing_ok=True)
+        return False
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if keep_source:
+        tmp = dest.with_name(f"{dest.name}.{uuid4().hex}.part")
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        source = tmp
+    os.chmod(source, 0o444)
+    os.replace(source, dest)
+    return True
+
+
+def _write_staged(data: bytes) -> Path:
+    path = staging_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _hash_file(path: Path) -> tuple[int, str]:
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+    return size, sha256.hexdigest()
+
+
+def _remove_legacy(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+        parent = path.parent
+        if parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+    except OSError as e:
+        logger.warning(f"Failed to delete file from disk: {path} - {e}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# References
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def adopt_staged(db: AsyncSession, staged: Path, checksum: str, size_bytes: int) -> Path:
+    """
+    Turn a fully written staging file into a reference on blob `checksum`.
+
+    The staging file is consumed either way (moved into place, or dropped
+    because the blob already exists). Does not commit.
+    """
+    await db.execute(_ADD_REF, {"checksum": checksum, "size_bytes": size_bytes})
+    dest = blob_path(checksum)
+    await asyncio.to_thread(_place, staged, dest, False)
+    return dest
+
+
+async def put_bytes(db: AsyncSession, data: bytes) -> tuple[Path, str, int]:
+    """
+    Store bytes as a blob and take a reference on it. Does not commit.
+
+    Returns (blob path, sha256, size). Identical content is written only once.
+    """
+    checksum = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+    await db.execute(_ADD_REF, {"checksum": checksum, "size_bytes": len(data)})
+    dest = blob_path(checksum)
+    if not await asyncio.to_thread(dest.exists):
+        staged = await asyncio.to_thread(_write_staged, data)
+        await asyncio.to_thread(_place, staged, dest, False)
+    return dest, checksum, len(data)
+
+
+async def add_ref(db: AsyncSession, storage_path: str | Path, size_bytes: int) -> None:
+    """Take another reference on an existing blob (metadata-only copies). Does not commit."""
+    path = Path(storage_path)
+    if not is_blob_path(path):
+        raise ValueError(f"Not a blob path: {path}")
+    await db.execute(_ADD_REF, {"checksum": path.name, "size_bytes": size_bytes})
+
+
+async def release(db: AsyncSession, storage_paths: Iterable[str | Path]) -> list[str]:
+    """
+    Drop one reference per path. Does not commit.
+
+    Legacy (pre-blob) paths are deleted from disk straight away. Returns the
+    checksums whose reference count reached zero - pass them to `schedule_gc`
+    once the transaction has committed.
+    """
+    zeroed, legacy = await release_refs(db, storage_paths)
+    for path in legacy:
+        await asyncio.to_thread(_remove_legacy, Path(path))
+    return zeroed
+
+
+async def release_refs(db: AsyncSession, storage_paths: Iterable[str | Path]) -> tuple[list[str], list[str]]:
+    """
+    Drop one reference per path without touching the disk. Does not commit.
+
+    Returns (checksums whose count reached zero, legacy paths to delete) -
+    for callers that hand disk reclamation to a background job.
+    """
+    counts: dict[str, int] = {}
+    legacy: list[str] = []
+    for storage_path in storage_paths:
+        if not storage_path:
+            continue
+        path = Path(storage_path)
+        if is_blob_path(path):
+            counts[path.name] = counts.get(path.name, 0) + 1
+        else:
+            legacy.append(str(path))
+
+    zeroed: list[str] = []
+    if counts:
+        rows = (await db.execute(text("""
+            UPDATE vault_blobs b
+            SET ref_count = GREATEST(b.ref_count - d.n, 0), released_at = NOW()
+            FROM unnest(CAST(:checksums AS varchar[]), CAST(:counts AS int[])) AS d(checksum, n)
+            WHERE b.checksum = d.checksum
+            RETURNING b.checksum, b.ref_count
+        """), {"checksums": list(counts), "counts": list(counts.values())})).fetchall()
+        zeroed = [row.checksum for row in rows if row.ref_count == 0]
+    return zeroed, legacy
+
+
+async def replace_content(db: AsyncSession, file: File, data: bytes) -> list[str]:
+    """
+    Point a file at a blob holding `data` and release its previous blob.
+
+    Updates storage_path, checksum and size_bytes. Does not commit.
+    Returns checksums to hand to `schedule_gc` after commit.
+    """
+    old_path = file.storage_path
+    path, checksum, size = await put_bytes(db, data)
+    file.storage_path = str(path)
+    file.checksum = checksum
+    file.size_bytes = size
+    # Unchanged content nets out: one reference taken, one released
+    return await release(db, [old_path])
+
+
+async def replace_staged(db: AsyncSession, file: File, staged: Path, checksum: str, size_bytes: int) -> list[str]:
+    """Like `replace_content`, for new content already written to a staging file."""
+    old_path = file.storage_path
+    file.storage_path = str(await adopt_staged(db, staged, checksum, size_bytes))
+    file.checksum = checksum
+    file.size_bytes = size_bytes
+    return await release(db, [old_path])
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Garbage collection
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _unlink_blobs(checksums: list[str]) -> None:
+    for checksum in checksums:
+        try:
+            blob_path(checksum).unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to delete blob {checksum}: {e}")
+
+
+def remove_legacy_batch(paths: list[str]) -> tuple[int, int]:
+    """Delete legacy files from disk (blocking). Returns (removed, bytes freed)."""
+    removed = 0
+    freed = 0
+    for raw in paths:
+        path = Path(raw)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            continue
+        _remove_legacy(path)
+        if not path.exists():
+            removed += 1
+            freed += size
+    return removed, freed
+
+
+async def collect_garbage(
+    db: AsyncSession,
+    checksums: Optional[list[str]] = None,
+    limit: int = 1000,
+    batch_size: int = GC_BATCH_SIZE,
+) -> dict:
+    """
+    Delete blobs nobody references any more.
+
+    Rows are deleted and their files unlinked batch by batch, each inside one
+    transaction, so a concurrent `put_bytes` of the same content either waits
+    for us and re-creates it, or has already bumped the count and is skipped.
+    """
+    stmt = "SELECT checksum FROM vault_blobs WHERE ref_count <= 0"
+    params: dict = {"limit": limit}
+    if checksums is not None:
+        stmt += " AND checksum = ANY(CAST(:checksums AS varchar[]))"
+        params["checksums"] = checksums
+    candidates = (await db.execute(text(stmt + " LIMIT :limit"), params)).scalars().all()
+    await db.commit()
+
+    deleted = 0
+    bytes_freed = 0
+    for i in range(0, len(candidates), batch_size):
+        rows = (await db.execute(text("""
+            DELETE FROM vault_blobs
+            WHERE checksum = ANY(CAST(:checksums AS varchar[])) AND ref_count <= 0
+            RETURNING checksum, size_bytes
+        """), {"checksums": list(candidates[i:i + batch_size])})).fetchall()
+        if rows:
+            await asyncio.to_thread(_unlink_blobs, [row.checksum for row in rows])
+            deleted += len(rows)
+            bytes_freed += sum(row.size_bytes or 0 for row in rows)
+        await db.commit()
+
+    return {"blobs_deleted": deleted, "bytes_freed": bytes_freed}
+
+
+def schedule_gc(checksums: list[str]) -> None:
+    """Collect released blobs in the background with their own DB session."""
+    if not checksums:
+        return
+    task = asyncio.create_task(_gc_in_background(list(checksums)))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _gc_in_background(checksums: list[str]) -> None:
+    from app.database import get_db_context
+
+    try:
+        async with get_db_context() as db:
+            report = await collect_garbage(db, checksums)
+            if report["blobs_deleted"]:
+                logger.debug(f"Blob GC: {report}")
+    except Exception as e:
+        logger.warning(f"Blob GC failed for {len(checksums)} blobs: {e}")
+
+
+def _sweep_orphans(known: set[str], grace_seconds: int) -> tuple[int, int]:
+    """Remove blob files without a vault_blobs row and stale staging files."""
+    root = blobs_root()
+    if not root.exists():
+        return 0, 0
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    freed = 0
+    for entry in root.glob("*/*"):
+        try:
+            stat = entry.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            stale_part = entry.name.endswith(".part")
+            if stale_part or (len(entry.name) == 64 and entry.name not in known):
+                entry.unlink()
+                removed += 1
+                freed += stat.st_size
+        except OSError:
+            continue
+    return removed, freed
+
+
+async def sweep_orphans(db: AsyncSession, grace_seconds: int = ORPHAN_GRACE_SECONDS) -> dict:
+    """Remove blob files left behind by rolled-back writes or crashes."""
+    known = set((await db.execute(text("SELECT checksum FROM vault_blobs"))).scalars().all())
+    removed, freed = await asyncio.to_thread(_sweep_orphans, known, grace_seconds)
+    return {"orphans_deleted": removed, "bytes_freed": freed}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Migration & reporting
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def adopt_legacy(db: AsyncSession, file: File) -> Optional[bool]:
+    """
+    Move a file stored at a legacy per-file path under a blob reference.
+
+    The bytes are hashed from disk and hard-linked (or copied) into the blob
+    store; the legacy file stays put so a rollback leaves the file readable -
+    delete it with `remove_legacy` after commit. Does not commit.
+
+    Returns True if a new blob was created, False if the content was already
+    stored (deduplicated), None if the legacy file is missing.
+    """
+    legacy = Path(file.storage_path)
+    if not await asyncio.to_thread(legacy.exists):
+        # A previous run may have linked the blob and died before committing
+        if file.checksum and await asyncio.to_thread(blob_path(file.checksum).exists):
+            await add_ref(db, blob_path(file.checksum), file.size_bytes)
+            file.storage_path = str(blob_path(file.checksum))
+            return False
+        return None
+
+    size, checksum = await asyncio.to_thread(_hash_file, legacy)
+    await db.execute(_ADD_REF, {"checksum": checksum, "size_bytes": size})
+    dest = blob_path(checksum)
+    placed = await asyncio.to_thread(_place, legacy, dest, True)
+    file.storage_path = str(dest)
+    file.checksum = checksum
+    file.size_bytes = size
+    return placed
+
+
+async def remove_legacy(path: str | Path) -> None:
+    """Delete a legacy per-file path (and its directory if empty)."""
+    if not is_blob_path(path):
+        await asyncio.to_thread(_remove_legacy, Path(path))
+
+
+async def migrate_to_blobs(
+    db: AsyncSession,
+    user_id: Optional[UUID] = None,
+    batch_size: int = 200,
+) -> dict:
+    """
+    Move every file still stored at a legacy per-file path into the blob store.
+
+    Commits per file and only then removes the legacy copy, so a crash at any
+    point leaves the file readable. Idempotent.
+    """
+    stmt = (
+        select(File)
+        .where(~File.storage_path.startswith(f"{blobs_root()}{os.sep}"))
+        .order_by(File.id)
+        .limit(batch_size)
+    )
+    if user_id:
+        stmt = stmt.where(File.user_id == user_id)
+
+    report = {
+        "files_migrated": 0,
+        "blobs_created": 0,
+        "duplicates": 0,
+        "bytes_reclaimed": 0,
+        "missing": 0,
+        "failed": 0,
+    }
+    last_id = None
+    while True:
+        page = stmt if last_id is None else stmt.where(File.id > last_id)
+        files = (await db.execute(page)).scalars().all()
+        if not files:
+            break
+        for file in files:
+            last_id = file.id
+            legacy = file.storage_path
+            try:
+                placed = await adopt_legacy(db, file)
+                if placed is None:
+                    report["missing"] += 1
+                    continue
+                await db.commit()
+                await remove_legacy(legacy)
+
+                report["files_migrated"] += 1
+                if placed:
+                    report["blobs_created"] += 1
+                else:
+                    report["duplicates"] += 1
+                    report["bytes_reclaimed"] += file.size_bytes or 0
+            except Exception as e:
+                logger.warning(f"Blob migration failed for file {file.id}: {e}")
+                await db.rollback()
+                report["failed"] += 1
+
+    return report
+
+
+async def storage_report(db: AsyncSession) -> dict:
+    """Logical vs physical bytes for the blob store, plus legacy leftovers."""
+    row = (await db.execute(text("""
+        SELECT
+            (SELECT COUNT(*) FROM vault_blobs WHERE ref_count > 0) AS blobs,
+            (SELECT COALESCE(SUM(size_bytes), 0) FROM vault_blobs WHERE ref_count > 0) AS physical_bytes,
+            (SELECT COUNT(*) FROM vault_blobs WHERE ref_count <= 0) AS garbage_blobs,
+            (SELECT COUNT(*) FROM files WHERE storage_path LIKE :prefix) AS blob_files,
+            (SELECT COALESCE(SUM(size_bytes), 0) FROM files WHERE storage_path LIKE :prefix) AS logical_bytes,
+            (SELECT COUNT(*) FROM files WHERE storage_path NOT LIKE :prefix) AS legacy_files
+    """), {"prefix": f"{blobs_root()}{os.sep}%"})).first()
+    logical = int(row.logical_bytes)
+    physical = int(row.physical_bytes)
+    return {
+        "blobs": row.blobs,
+        "blob_files": row.blob_files,
+        "legacy_files": row.legacy_files,
+        "garbage_blobs": row.garbage_blobs,
+        "logical_bytes": logical,
+        "physical_bytes": physical,
+        "bytes_saved": max(0, logical - physical),
+        "dedup_ratio": round(logical / physical, 2) if physical else 1.0,
+    }
@@ -0,0 +1,258 @@
+"""Vault bulk operations - set-based moves/deletes with background reclamation.
+
+Moves and deletes run as a handful of SQL statements regardless of how many
+items (or how deep a folder tree) are involved: a recursive CTE collects the
+affected subtree and a single UPDATE/DELETE ... RETURNING does the work.
+
+Deleting never touches the disk inside the request. Blob references and
+usage counters are released in the same transaction, and a row in
+`vault_reclaim_jobs` records what has to be removed from disk. After commit a
+background worker collects the released blobs and deletes legacy files in
+thread-offloaded batches, updating the job row as it goes; clients can poll
+it through `GET /files/jobs/{job_id}`. Jobs interrupted by a restart are
+picked up again by `resume_reclaim_jobs`.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.vault.blobs import collect_garbage, release_refs, remove_legacy_batch
+from app.services.vault.usage import release_usage
+
+logger = logging.getLogger(__name__)
+
+RECLAIM_BATCH_SIZE = 200
+STALE_JOB_MINUTES = 10  # "running" jobs older than this were interrupted by a restart
+
+_background_tasks: set[asyncio.Task] = set()
+
+# Folder ids in the subtrees rooted at :folder_ids (user-scoped, cycle-safe via UNION)
+_SUBTREE = """
+    WITH RECURSIVE tree AS (
+        SELECT id FROM folders
+        WHERE user_id = :user_id AND id = ANY(CAST(:folder_ids AS uuid[]))
+        UNION
+        SELECT f.id FROM folders f JOIN tree t ON f.parent_id = t.id
+        WHERE f.user_id = :user_id
+    )
+"""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Moves
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def move_entries(
+    db: AsyncSession,
+    user_id: UUID,
+    file_ids: list[UUID],
+    folder_ids: list[UUID],
+    target_folder_id: Optional[UUID],
+) -> tuple[int, int]:
+    """
+    Re-parent files and folders in two statements. Does not commit.
+
+    Folders that are the target or one of its ancestors are skipped - moving
+    them would create a cycle. Returns (moved_files, moved_folders).
+    """
+    moved_files = 0
+    moved_folders = 0
+
+    if file_ids:
+        moved_files = len((await db.execute(text("""
+            UPDATE files SET folder_id = :target, updated_at = NOW()
+            WHERE user_id = :user_id AND id = ANY(CAST(:file_ids AS uuid[]))
+            RETURNING id
+        """), {"user_id": user_id, "file_ids": file_ids, "target": target_folder_id})).fetchall())
+
+    if folder_ids:
+        moved_folders = len((await db.execute(text("""
+            WITH RECURSIVE ancestors AS (
+                SELECT id, parent_id FROM folders
+                WHERE id = CAST(:target AS uuid) AND user_id = :user_id
+                UNION
+                SELECT f.id, f.parent_id FROM folders f JOIN ancestors a ON f.id = a.parent_id
+            )
+            UPDATE folders SET parent_id = :target, updated_at = NOW()
+            WHERE user_id = :user_id
+              AND id = ANY(CAST(:folder_ids AS uuid[]))
+              AND id NOT IN (SELECT id FROM ancestors)
+            RETURNING id
+        """), {"user_id": user_id, "folder_ids": folder_ids, "target": target_folder_id})).fetchall())
+
+    return moved_files, moved_folders
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Deletes
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def delete_entries(
+    db: AsyncSession,
+    user_id: UUID,
+    file_ids: list[UUID],
+    folder_ids: list[UUID],
+) -> dict:
+    """
+    Delete files and whole folder trees set-wise. Does not commit.
+
+    Releases blob references and storage usage in the same transaction and
+    enqueues a reclaim job for the disk work. Returns {"deleted_files",
+    "deleted_folders", "job_id"}; pass job_id to `schedule_reclaim` after
+    the commit.
+    """
+    params = {"user_id": user_id, "file_ids": file_ids, "folder_ids": folder_ids}
+
+    gone_files = (await db.execute(text(_SUBTREE + """
+        DELETE FROM files
+        WHERE user_id = :user_id
+          AND (id = ANY(CAST(:file_ids AS uuid[])) OR folder_id IN (SELECT id FROM tree))
+        RETURNING storage_path, size_bytes, file_type
+    """), params)).fetchall()
+
+    deleted_folders = 0
+    if folder_ids:
+        deleted_folders = len((await db.execute(text(_SUBTREE + """
+            DELETE FROM folders WHERE id IN (SELECT id FROM tree)
+            RETURNING id
+        """), params)).fetchall())
+
+    checksums, legacy = await release_refs(db, [row.storage_path for row in gone_files])
+    await release_usage(db, user_id, [(row.size_bytes, row.file_type) for row in gone_files])
+
+    job_id = uuid4()
+    idle = not checksums and not legacy
+    await db.execute(text("""
+        INSERT INTO vault_reclaim_jobs
+            (id, user_id, status, checksums, legacy_paths, files_deleted, folders_deleted, finished_at)
+        VALUES
+            (:id, :user_id, :status, CAST(:checksums AS text[]), CAST(:legacy AS text[]),
+             :files_deleted, :folders_deleted, CASE WHEN CAST(:idle AS boolean) THEN NOW() END)
+    """), {
+        "id": job_id,
+        "user_id": user_id,
+        "status": "done" if idle else "pending",
+        "checksums": checksums,
+        "legacy": legacy,
+        "files_deleted": len(gone_files),
+        "folders_deleted": deleted_folders,
+        "idle": idle,
+    })
+
+    return {"deleted_files": len(gone_files), "deleted_folders": deleted_folders, "job_id": job_id}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Reclamation worker
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def schedule_reclaim(job_id: UUID) -> None:
+    """Run a reclaim job in the background with its own DB session."""
+    task = asyncio.create_task(_run_job(job_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _run_job(job_id: UUID) -> None:
+    from app.database import get_db_context
+
+    async with get_db_context() as db:
+        job = (await db.execute(text("""
+            UPDATE vault_reclaim_jobs SET status = 'running', started_at = NOW()
+            WHERE id = :id AND status = 'pending'
+            RETURNING checksums, legacy_paths
+        """), {"id": job_id})).first()
+        await db.commit()
+        if not job:
+            return  # Already done, or claimed by another worker
+
+        try:
+            checksums = list(job.checksums or [])
+            legacy = list(job.legacy_paths or [])
+            blobs_deleted = 0
+            paths_removed = 0
+            bytes_freed = 0
+
+            for i in range(0, len(checksums), RECLAIM_BATCH_SIZE):
+                report = await collect_garbage(db, checksums[i:i + RECLAIM_BATCH_SIZE])
+                blobs_deleted += report["blobs_deleted"]
+                bytes_freed += report["bytes_freed"]
+                await _progress(db, job_id, blobs_deleted, paths_removed, bytes_freed)
+
+            for i in range(0, len(legacy), RECLAIM_BATCH_SIZE):
+                removed, freed = await asyncio.to_thread(remove_legacy_batch, legacy[i:i + RECLAIM_BATCH_SIZE])
+                paths_removed += removed
+                bytes_freed += freed
+                await _progress(db, job_id, blobs_deleted, paths_removed, bytes_freed)
+
+            await db.execute(text("""
+                UPDATE vault_reclaim_jobs SET status = 'done', finished_at = NOW() WHERE id = :id
+            """), {"id": job_id})
+            await db.commit()
+            logger.debug(f"Reclaim job {job_id}: {blobs_deleted} blobs, {paths_removed} files, {bytes_freed} bytes")
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Reclaim job {job_id} failed: {e}")
+            await db.execute(text("""
+                UPDATE vault_reclaim_jobs SET status = 'failed', error = :error, finished_at = NOW() WHERE id = :id
+            """), {"id": job_id, "error": str(e)[:1000]})
+            await db.commit()
+
+
+async def _progress(db: AsyncSession, job_id: UUID, blobs: int, paths: int, freed: int) -> None:
+    await db.execute(text("""
+        UPDATE vault_reclaim_jobs
+        SET blobs_deleted = :blobs, paths_removed = :paths, bytes_freed = :freed
+        WHERE id = :id
+    """), {"id": job_id, "blobs": blobs, "paths": paths, "freed": freed})
+    await db.commit()
+
+
+async def resume_reclaim_jobs() -> int:
+    """Re-queue jobs left pending (or stuck running) by a previous process."""
+    from app.database import get_db_context
+
+    async with get_db_context() as db:
+        await db.execute(text(f"""
+            UPDATE vault_reclaim_jobs SET status = 'pending'
+            WHERE status = 'running' AND started_at < NOW() - INTERVAL '{STALE_JOB_MINUTES} minutes'
+        """))
+        job_ids = (await db.execute(text(
+            "SELECT id FROM vault_reclaim_jobs WHERE status = 'pending' ORDER BY created_at"
+        ))).scalars().all()
+        await db.commit()
+
+    for job_id in job_ids:
+        schedule_reclaim(job_id)
+    return len(job_ids)
+
+
+async def get_job(db: AsyncSession, user_id: UUID, job_id: UUID) -> Optional[dict]:
+    """Status of one of the user's reclaim jobs, or None."""
+    row = (await db.execute(text("""
+        SELECT id, status, files_deleted, folders_deleted, blobs_deleted, paths_removed,
+               bytes_freed, error, created_at, started_at, finished_at,
+               COALESCE(array_length(checksums, 1), 0) + COALESCE(array_length(legacy_paths, 1), 0) AS items_total
+        FROM vault_reclaim_jobs WHERE id = :id AND user_id = :user_id
+    """), {"id": job_id, "user_id": user_id})).first()
+    if not row:
+        return None
+    return {
+        "id": row.id,
+        "status": row.status,
+        "files_deleted": row.files_deleted,
+        "folders_deleted": row.folders_deleted,
+        "items_total": row.items_total,
+        "blobs_deleted": row.blobs_deleted,
+        "paths_removed": row.paths_removed,
+        "bytes_freed": row.bytes_freed,
+        "error": row.error,
+        "created_at": row.created_at,
+        "started_at": row.started_at,
+        "finished_at": row.finished_at,
+    }
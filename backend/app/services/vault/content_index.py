@@ -0,0 +1,438 @@
+"""Vault content index - chunked trigram substring search over text files.
+
+Text files (document/code/data) are split into fixed-size line chunks stored
+in `file_chunks`. Each chunk keeps a few lines of surrounding context so a
+search can return line numbers and context without touching the disk.
+
+- Queries are substring matches (`ILIKE`). From 3 characters on they are
+  served by a pg_trgm GIN index; shorter ones scan the user's chunks
+- `files.content_index_checksum` records which checksum was indexed ('' for
+  files without a checksum); files whose checksum moved on (or were never
+  indexed) are scanned from disk for that query and queued for background
+  re-indexing
+- `files.content_index_failed_checksum` records a checksum whose indexing
+  failed; such files are still disk-scanned but not re-queued until their
+  content changes
+
+Indexing happens after upload/save/vault_write/vault_edit/vault_insert
+(which also queues the semantic index, see semantic_index).
+`backfill_content_index` indexes files that predate the index.
+"""
+
+import asyncio
+import itertools
+import logging
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import select, func, or_, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.file import File
+from app.services.vault.semantic_index import schedule_embedding
+
+logger = logging.getLogger(__name__)
+
+TEXT_FILE_TYPES = ("document", "code", "data")
+
+CHUNK_LINES = 64  # Lines owned by each chunk
+CONTEXT_LINES = 5  # Lines of lead/tail context stored per chunk
+INSERT_BATCH = 500  # Chunks per multi-row insert
+INLINE_INDEX_BYTES = 1024 * 1024  # Larger files are indexed in the background
+STALE_SCAN_LIMIT = 25  # Max unindexed files scanned from disk per query
+
+_INSERT_CHUNKS = text("""
+    INSERT INTO file_chunks (file_id, user_id, chunk_index, start_line, content, lead, tail)
+    VALUES (:file_id, :user_id, :chunk_index, :start_line, :content, :lead, :tail)
+""")
+
+# File ids with a background index job in flight (avoids duplicate scheduling)
+_pending: set[UUID] = set()
+_background_tasks: set[asyncio.Task] = set()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Chunking
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _clean(line: str) -> str:
+    # PostgreSQL text can't hold NUL bytes
+    return line.rstrip("\r\n").replace("\x00", "")
+
+
+def iter_chunks(lines: Iterable[str]) -> Iterator[tuple[int, int, list[str], list[str], list[str]]]:
+    """
+    Split lines into chunks.
+
+    Yields (chunk_index, start_line, lines, lead, tail) where start_line is
+    1-indexed and lead/tail hold up to CONTEXT_LINES neighbouring lines.
+    Streams - only two chunks are held in memory at a time.
+    """
+    pending = None
+    prev_tail: list[str] = []
+    buf: list[str] = []
+    index = 0
+    start = 1
+
+    for raw in lines:
+        buf.append(_clean(raw))
+        if len(buf) == CHUNK_LINES:
+            if pending:
+                yield (*pending, buf[:CONTEXT_LINES])
+            pending = (index, start, buf, prev_tail)
+            prev_tail = buf[-CONTEXT_LINES:]
+            index += 1
+            start += CHUNK_LINES
+            buf = []
+
+    if buf:
+        if pending:
+            yield (*pending, buf[:CONTEXT_LINES])
+        pending = (index, start, buf, prev_tail)
+    if pending:
+        yield (*pending, [])
+
+
+def _take(iterator: Iterator, n: int) -> list:
+    return list(itertools.islice(iterator, n))
+
+
+def _match_lines(
+    lines: list[str],
+    start_line: int,
+    lead: list[str],
+    tail: list[str],
+    pattern: re.Pattern,
+    context_lines: int,
+    max_matches: int,
+) -> list[dict]:
+    """Find matching lines in a chunk, with context drawn from lead/tail."""
+    window = lead + lines + tail
+    offset = len(lead)
+    matches = []
+    for i, line in enumerate(lines):
+        if not pattern.search(line):
+            continue
+        pos = offset + i
+        matches.append({
+            "line": start_line + i,
+            "content": line,
+            "context_before": window[max(0, pos - context_lines):pos],
+            "context_after": window[pos + 1:pos + 1 + context_lines],
+        })
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+def _scan_file(path: Path, pattern: re.Pattern, context_lines: int, max_matches: int) -> Optional[list[dict]]:
+    """Disk scan for files the index hasn't caught up with yet (runs in a thread)."""
+    if not path.exists():
+        return None
+    matches: list[dict] = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for _, start, lines, lead, tail in iter_chunks(f):
+                matches.extend(_match_lines(
+                    lines, start, lead, tail, pattern, context_lines, max_matches - len(matches),
+                ))
+                if len(matches) >= max_matches:
+                    break
+    except Exception:
+        return None
+    return matches
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Indexing
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _not_indexed():
+    """Files whose chunks don't reflect their current checksum."""
+    return or_(
+        File.content_index_checksum.is_(None),
+        File.content_index_checksum != func.coalesce(File.checksum, ""),
+    )
+
+
+async def _mark_failed(db: AsyncSession, file_id: UUID) -> None:
+    """Record that the file's current checksum can't be indexed. Call after rollback; commits."""
+    try:
+        await db.execute(
+            update(File)
+            .where(File.id == file_id)
+            .values(content_index_failed_checksum=func.coalesce(File.checksum, ""))
+        )
+        await db.commit()
+    except Exception as e:
+        logger.warning(f"Could not mark file {file_id} as failed to index: {e}")
+        await db.rollback()
+
+
+async def index_file(db: AsyncSession, file: File) -> int:
+    """
+    (Re)build the chunks for one file and mark its checksum as indexed.
+
+    Does not commit - callers own the transaction.
+    Returns the number of chunks written.
+    """
+    await db.execute(text("DELETE FROM file_chunks WHERE file_id = :file_id"), {"file_id": file.id})
+
+    written = 0
+    path = Path(file.storage_path)
+    if file.file_type in TEXT_FILE_TYPES and path.exists():
+        handle = await asyncio.to_thread(open, path, "r", encoding="utf-8", errors="replace")
+        try:
+            chunks = iter_chunks(handle)
+            while True:
+                batch = await asyncio.to_thread(_take, chunks, INSERT_BATCH)
+                if not batch:
+                    break
+                await db.execute(_INSERT_CHUNKS, [
+                    {
+                        "file_id": file.id,
+                        "user_id": file.user_id,
+                        "chunk_index": index,
+                        "start_line": start,
+                        "content": "\n".join(lines),
+                        "lead": lead,
+                        "tail": tail,
+                    }
+                    for index, start, lines, lead, tail in batch
+                ])
+                written += len(batch)
+        finally:
+            handle.close()
+
+    file.content_index_checksum = file.checksum or ""
+    file.content_index_failed_checksum = None
+    return written
+
+
+async def refresh_file_index(db: AsyncSession, file: File) -> None:
+    """
+    Re-index a file after its content changed. Never raises.
+
+    Small files are indexed inline and committed; large ones are handed to a
+    background task so the request isn't held for the whole file. The semantic
+    index is always refreshed in the background.
+    """
+    if file.file_type not in TEXT_FILE_TYPES:
+        return
+    schedule_embedding([file.id])
+    if (file.size_bytes or 0) > INLINE_INDEX_BYTES:
+        schedule_index([file.id])
+        return
+    file_id = file.id
+    try:
+        await index_file(db, file)
+        await db.commit()
+    except Exception as e:
+        logger.warning(f"Content index update failed for file {file_id}: {e}")
+        await db.rollback()
+        await _mark_failed(db, file_id)
+
+
+def schedule_index(file_ids: list[UUID]) -> None:
+    """Queue files for background indexing with their own DB session."""
+    ids = [fid for fid in file_ids if fid not in _pending]
+    if not ids:
+        return
+    _pending.update(ids)
+    task = asyncio.create_task(_index_in_background(ids))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _index_in_background(file_ids: list[UUID]) -> None:
+    from app.database import get_db_context
+
+    try:
+        async with get_db_context() as db:
+            for file_id in file_ids:
+                file = await db.get(File, file_id)
+                if not file:
+                    continue
+                try:
+                    chunks = await index_file(db, file)
+                    await db.commit()
+                    logger.debug(f"Indexed file {file_id} ({chunks} chunks)")
+                except Exception as e:
+                    logger.warning(f"Background content index failed for file {file_id}: {e}")
+                    await db.rollback()
+                    await _mark_failed(db, file_id)
+    finally:
+        _pending.difference_update(file_ids)
+
+
+async def backfill_content_index(
+    db: AsyncSession,
+    user_id: Optional[UUID] = None,
+    batch_size: int = 200,
+) -> dict:
+    """
+    Index every text file whose content isn't indexed at its current checksum.
+
+    Commits after each file so a long backfill can be interrupted and re-run.
+    """
+    stmt = (
+        select(File)
+        .where(File.file_type.in_(TEXT_FILE_TYPES))
+        .where(_not_indexed())
+        .order_by(File.id)
+        .limit(batch_size)
+    )
+    if user_id:
+        stmt = stmt.where(File.user_id == user_id)
+
+    indexed = 0
+    chunks = 0
+    failed = 0
+    last_id = None
+    while True:
+        page = stmt if last_id is None else stmt.where(File.id > last_id)
+        files = (await db.execute(page)).scalars().all()
+        if not files:
+            break
+        for file in files:
+            last_id = file_id = file.id
+            try:
+                chunks += await index_file(db, file)
+                await db.commit()
+                indexed += 1
+            except Exception as e:
+                logger.warning(f"Backfill failed for file {file_id}: {e}")
+                await db.rollback()
+                await _mark_failed(db, file_id)
+                failed += 1
+
+    return {"indexed": indexed, "chunks": chunks, "failed": failed}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Search
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_content(
+    db: AsyncSession,
+    user_id: UUID,
+    query: str,
+    *,
+    file_type: Optional[str] = None,
+    folder_id: Optional[UUID] = None,
+    max_files: int = 20,
+    max_matches_per_file: int = 10,
+    context_lines: int = 2,
+) -> dict:
+    """
+    Search text file contents through the chunk index.
+
+    Returns:
+        {"results": [{file_id, name, file_type, folder_id, matches}], "files_searched": int}
+        Each match is {line, content, context_before: [..], context_after: [..]}.
+    """
+    context_lines = max(0, min(context_lines, CONTEXT_LINES))
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+    scope = [
+        File.user_id == user_id,
+        File.file_type.in_(TEXT_FILE_TYPES),
+        File.is_archived == False,  # noqa: E712
+    ]
+    filters = ""
+    params: dict = {
+        "user_id": user_id,
+        "max_files": max_files,
+        "max_chunks": max_matches_per_file,
+    }
+    if file_type:
+        scope.append(File.file_type == file_type)
+        filters += " AND f.file_type = :file_type"
+        params["file_type"] = file_type
+    if folder_id:
+        scope.append(File.folder_id == folder_id)
+        filters += " AND f.folder_id = :folder_id"
+        params["folder_id"] = folder_id
+
+    # Substring semantics at every length; under 3 characters pg_trgm can't
+    # serve the pattern and this scans the user's chunks instead
+    params["like_pattern"] = f"%{_escape_like(query)}%"
+
+    rows = (await db.execute(text(f"""
+        SELECT file_id, name, file_type, folder_id, updated_at, start_line, content, lead, tail
+        FROM (
+            SELECT c.file_id, f.name, f.file_type, f.folder_id, f.updated_at,
+                   c.chunk_index, c.start_line, c.content, c.lead, c.tail,
+                   dense_rank() OVER (ORDER BY f.updated_at DESC, f.id) AS file_rank,
+                   row_number() OVER (PARTITION BY c.file_id ORDER BY c.chunk_index) AS chunk_rank
+            FROM file_chunks c
+            JOIN files f ON f.id = c.file_id
+            WHERE c.user_id = :user_id
+              AND f.file_type IN ('document', 'code', 'data')
+              AND f.is_archived = FALSE
+              AND f.content_index_checksum = COALESCE(f.checksum, '')
+              AND c.content ILIKE :like_pattern
+              {filters}
+        ) ranked
+        WHERE file_rank <= :max_files AND chunk_rank <= :max_chunks
+        ORDER BY file_rank, chunk_index
+    """), params)).fetchall()
+
+    by_file: dict = {}
+    for row in rows:
+        entry = by_file.get(row.file_id)
+        if entry is None:
+            entry = by_file[row.file_id] = {
+                "file_id": row.file_id,
+                "name": row.name,
+                "file_type": row.file_type,
+                "folder_id": row.folder_id,
+                "updated_at": row.updated_at,
+                "matches": [],
+            }
+        remaining = max_matches_per_file - len(entry["matches"])
+        if remaining > 0:
+            entry["matches"].extend(_match_lines(
+                row.content.split("\n"), row.start_line, list(row.lead or []), list(row.tail or []),
+                pattern, context_lines, remaining,
+            ))
+
+    # Files the index hasn't caught up with: scan from disk and queue re-indexing
+    stale = (await db.execute(
+        select(File)
+        .where(*scope)
+        .where(_not_indexed())
+        .order_by(File.updated_at.desc())
+        .limit(STALE_SCAN_LIMIT)
+    )).scalars().all()
+    for file in stale:
+        matches = await asyncio.to_thread(
+            _scan_file, Path(file.storage_path), pattern, context_lines, max_matches_per_file,
+        )
+        if matches:
+            by_file[file.id] = {
+                "file_id": file.id,
+                "name": file.name,
+                "file_type": file.file_type,
+                "folder_id": file.folder_id,
+                "updated_at": file.updated_at,
+                "matches": matches,
+            }
+    # Files whose current content already failed to index aren't re-queued
+    retry = [f.id for f in stale if f.content_index_failed_checksum != (f.checksum or "")]
+    if retry:
+        schedule_index(retry)
+
+    files_searched = (await db.execute(
+        select(func.count(File.id)).where(*scope)
+    )).scalar() or 0
+
+    results = [r for r in by_file.values() if r["matches"]]
+    results.sort(key=lambda r: r["updated_at"], reverse=True)
+    return {"results": results[:max_files], "files_searched": files_searched}
@@ -0,0 +1,96 @@
+"""Vault ingest - stream uploads to disk without buffering whole files.
+
+The upload body is copied in INGEST_CHUNK_BYTES pieces: each piece updates
+a running sha256 and is written through a thread-offloaded file handle, so
+peak memory per upload is one chunk and the event loop never blocks on disk.
+
+Data lands in a `.part` file next to the destination and is renamed into
+place only once the whole body was accepted (uploads stream into a blob
+staging path, see blobs.adopt_staged). Exceeding the byte limit
+aborts the copy immediately and removes the partial file.
+"""
+
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi import UploadFile
+
+INGEST_CHUNK_BYTES = 1024 * 1024
+
+
+class IngestLimitExceeded(Exception):
+    """Upload body grew past the allowed number of bytes (partial file removed)."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Upload exceeds {limit} bytes")
+
+
+def _open_part(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, "wb")
+
+
+def _absorb(handle, digest, chunk: bytes) -> None:
+    # hashlib releases the GIL for large buffers - hash and write off-loop together
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+def _discard(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+async def stream_upload(
+    upload: UploadFile,
+    dest: Path,
+    max_bytes: int,
+    chunk_size: int = INGEST_CHUNK_BYTES,
+) -> tuple[int, str]:
+    """
+    Copy an UploadFile to `dest`, enforcing `max_bytes` as the data arrives.
+
+    Returns (size_bytes, sha256 hex digest).
+
+    Raises:
+        IngestLimitExceeded: body is larger than max_bytes
+        OSError: disk write failed
+    Nothing is left on disk when this raises (or is cancelled).
+    """
+    # Cheap early reject when the multipart parser already knows the size
+    if upload.size is not None and upload.size > max_bytes:
+        raise IngestLimitExceeded(max_bytes)
+
+    part = dest.with_name(dest.name + ".part")
+    sha256 = hashlib.sha256()
+    size = 0
+
+    handle = await asyncio.to_thread(_open_part, part)
+    try:
+        try:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise IngestLimitExceeded(max_bytes)
+                await asyncio.to_thread(_absorb, handle, sha256, chunk)
+        finally:
+            await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(os.replace, part, dest)
+    except BaseException:
+        await asyncio.shield(asyncio.to_thread(_discard, part))
+        raise
+
+    return size, sha256.hexdigest()
+
+
+async def discard_staged(path: Path) -> None:
+    """Remove a file written by stream_upload that won't be kept."""
+    await asyncio.to_thread(_discard, path)
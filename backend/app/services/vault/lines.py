@@ -0,0 +1,231 @@
+"""Vault line index - ranged reads and splice edits without parsing whole files.
+
+A file's line-offset index is the byte offset at which each line starts.
+Blobs are immutable and content-addressed, so the index is keyed by the
+blob checksum in `vault_line_index` (deleted with the blob by FK cascade):
+any content change produces a new checksum and the index is rebuilt lazily
+the first time a line-addressed operation touches it. Legacy (pre-blob)
+files get a transient index per call.
+
+With the index, reading lines 5000-5050 is one `pread` of just those bytes,
+and `splice_lines` stream-copies the unchanged prefix/suffix around the new
+bytes into a staging file (hashing as it goes) instead of decoding, splitting
+and re-joining the entire text. Untouched bytes are copied verbatim.
+
+Lines are "\\n"-terminated byte ranges ("\\r\\n" lines keep their "\\r").
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.file import File
+from app.services.vault.blobs import is_blob_path, staging_path
+
+logger = logging.getLogger(__name__)
+
+SCAN_CHUNK_BYTES = 1024 * 1024
+
+
+class LineIndex:
+    """Start offset of every line in a file of `size` bytes."""
+
+    __slots__ = ("offsets", "size", "terminated")
+
+    def __init__(self, offsets: array, size: int, terminated: bool):
+        self.offsets = offsets
+        self.size = size
+        self.terminated = terminated  # file ends with "\n"
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets)
+
+    def span(self, first: int, last: int) -> tuple[int, int]:
+        """Byte range [start, end) of lines first..last (1-indexed, inclusive, clamped)."""
+        last = min(last, self.line_count)
+        start = self.offsets[first - 1]
+        end = self.offsets[last] if last < self.line_count else self.size
+        return start, end
+
+    def boundary(self, after_line: int) -> int:
+        """Byte offset just after line `after_line` (0 = start of file)."""
+        if after_line <= 0:
+            return 0
+        return self.offsets[after_line] if after_line < self.line_count else self.size
+
+
+def _scan(path: Path) -> LineIndex:
+    offsets = array("Q", [0])
+    pos = 0
+    last = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(SCAN_CHUNK_BYTES), b""):
+            i = chunk.find(b"\n")
+            while i != -1:
+                offsets.append(pos + i + 1)
+                i = chunk.find(b"\n", i + 1)
+            pos += len(chunk)
+            last = chunk[-1:]
+    if pos == 0:
+        return LineIndex(array("Q"), 0, False)
+    terminated = last == b"\n"
+    if terminated:
+        offsets.pop()  # == size, not the start of a line
+    return LineIndex(offsets, pos, terminated)
+
+
+def _pack(index: LineIndex) -> tuple[int, bytes]:
+    # 4-byte offsets cover any file under 4 GiB - half the storage of 8
+    width = 4 if index.size < 2 ** 32 else 8
+    packed = array("I" if width == 4 else "Q", index.offsets)
+    if packed.itemsize != width:
+        packed = array("Q", index.offsets)
+        width = 8
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return width, packed.tobytes()
+
+
+def _unpack(width: int, data: bytes) -> array:
+    packed = array("I" if width == 4 else "Q")
+    if packed.itemsize != width:
+        raise ValueError(f"Unsupported line offset width {width}")
+    packed.frombytes(data)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed
+
+
+async def get_line_index(db: AsyncSession, file: File) -> LineIndex:
+    """
+    Line index for a file's current content, built and stored on first use.
+
+    May write to the session (persisting a new index); the caller commits.
+    """
+    path = Path(file.storage_path)
+    if not file.checksum or not is_blob_path(path):
+        return await asyncio.to_thread(_scan, path)
+
+    row = (await db.execute(text("""
+        SELECT size_bytes, terminated, offset_width, offsets
+        FROM vault_line_index WHERE checksum = :checksum
+    """), {"checksum": file.checksum})).first()
+    if row is not None:
+        return LineIndex(_unpack(row.offset_width, bytes(row.offsets)), int(row.size_bytes), row.terminated)
+
+    index = await asyncio.to_thread(_scan, path)
+    width, packed = await asyncio.to_thread(_pack, index)
+    try:
+        # Savepoint: losing a race with GC (blob row gone) must not abort the caller
+        async with db.begin_nested():
+            await db.execute(text("""
+                INSERT INTO vault_line_index (checksum, size_bytes, line_count, terminated, offset_width, offsets)
+                VALUES (:checksum, :size_bytes, :line_count, :terminated, :offset_width, :offsets)
+                ON CONFLICT (checksum) DO NOTHING
+            """), {
+                "checksum": file.checksum,
+                "size_bytes": index.size,
+                "line_count": index.line_count,
+                "terminated": index.terminated,
+                "offset_width": width,
+                "offsets": packed,
+            })
+    except IntegrityError:
+        logger.debug(f"Line index for {file.checksum} not stored (blob released)")
+    return index
+
+
+def _pread_all(path: Path, start: int, length: int) -> bytes:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        parts = []
+        while length > 0:
+            chunk = os.pread(fd, length, start)
+            if not chunk:
+                break
+            parts.append(chunk)
+            start += len(chunk)
+            length -= len(chunk)
+        return b"".join(parts)
+    finally:
+        os.close(fd)
+
+
+async def read_range(path: Path, start: int, end: int) -> bytes:
+    """Bytes [start, end) of a file via pread - nothing outside the range is read."""
+    if end <= start:
+        return b""
+    return await asyncio.to_thread(_pread_all, path, start, end - start)
+
+
+def _copy_range(src_fd: int, out, digest, start: int, end: int) -> None:
+    while start < end:
+        chunk = os.pread(src_fd, min(SCAN_CHUNK_BYTES, end - start), start)
+        if not chunk:
+            raise OSError("Source file shrank during splice")
+        digest.update(chunk)
+        out.write(chunk)
+        start += len(chunk)
+
+
+def _splice(path: Path, cut_start: int, cut_end: int, size: int, replacement: bytes) -> tuple[Path, int, str]:
+    staged = staging_path()
+    staged.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    src_fd = os.open(path, os.O_RDONLY)
+    try:
+        with open(staged, "wb") as out:
+            _copy_range(src_fd, out, digest, 0, cut_start)
+            digest.update(replacement)
+            out.write(replacement)
+            _copy_range(src_fd, out, digest, cut_end, size)
+    except BaseException:
+        staged.unlink(missing_ok=True)
+        raise
+    finally:
+        os.close(src_fd)
+    return staged, cut_start + len(replacement) + (size - cut_end), digest.hexdigest()
+
+
+async def splice_lines(
+    path: Path,
+    index: LineIndex,
+    cut_start: int,
+    cut_end: int,
+    replacement: bytes,
+) -> tuple[Path, int, str]:
+    """
+    Write a copy of `path` with bytes [cut_start, cut_end) replaced into staging.
+
+    Unchanged ranges are stream-copied in bounded chunks. Returns
+    (staged path, new size, sha256) - hand it to blobs.replace_staged, or
+    discard it with ingest.discard_staged.
+    """
+    return await asyncio.to_thread(_splice, path, cut_start, cut_end, index.size, replacement)
+
+
+def as_line_bytes(content: str, prefix_newline: bool = False) -> tuple[bytes, int]:
+    """
+    Encode replacement text as whole lines (trailing "\\n" ensured).
+
+    Returns (bytes, number of lines). `prefix_newline` terminates an
+    unterminated last line of the file before appending after it.
+    """
+    if not content:
+        return b"", 0
+    if not content.endswith("\n"):
+        content += "\n"
+    data = content.encode("utf-8")
+    lines = data.count(b"\n")
+    if prefix_newline:
+        data = b"\n" + data
+    return data, lines
@@ -0,0 +1,164 @@
+"""Vault project context - per-user tree snapshots, refreshed incrementally.
+
+Triggers on `files` and `folders` (see migration v126) bump a per-user
+`vault_version` on every structural mutation and stamp the affected folders
+(parent before/after, plus the folder itself for folder changes) in
+`vault_folder_versions` with that version. The counter lives on the user's
+`user_storage_usage` row, so writers are ordered by its row lock and a
+reader that has seen version V has seen every change <= V.
+
+A snapshot holds the user's non-archived folders and files grouped by
+parent. Checking it is one indexed query for folders stamped after the
+snapshot's version; only those folders' direct children are re-read.
+Previews of key files are cached by content checksum, so unchanged files
+are never re-read from disk. Snapshots live in a per-process LRU; callers
+can memoize anything derived from a snapshot in `snapshot.memo`, which is
+cleared whenever the snapshot changes.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+ROOT_KEY = UUID(int=0)  # folder_key used for the vault root
+SNAPSHOT_CACHE_SIZE = 128  # users kept in memory per process
+PREVIEW_CACHE_SIZE = 256  # previews kept per snapshot
+
+_snapshots: "OrderedDict[UUID, ContextSnapshot]" = OrderedDict()
+_locks: dict[UUID, asyncio.Lock] = {}
+
+
+class ContextSnapshot:
+    """A user's vault structure as of `version`."""
+
+    def __init__(self, user_id: UUID):
+        self.user_id = user_id
+        self.version = -1
+        self.folders: dict[UUID, dict] = {}
+        self.folders_by_parent: dict[UUID, list[dict]] = {}
+        self.files_by_folder: dict[UUID, list[dict]] = {}
+        self.memo: dict = {}
+        self._previews: "OrderedDict[tuple[str, int], Optional[str]]" = OrderedDict()
+
+    def files(self, folder_id: Optional[UUID] = None) -> list[dict]:
+        """All files, or the direct children of one folder."""
+        if folder_id is not None:
+            return self.files_by_folder.get(folder_id, [])
+        return [f for group in self.files_by_folder.values() for f in group]
+
+    def path_of(self, folder_id: Optional[UUID], name: str) -> str:
+        """Slash path of `name` inside folder_id (stops at unknown/archived folders)."""
+        parts = [name]
+        seen = set()
+        while folder_id and folder_id in self.folders and folder_id not in seen:
+            seen.add(folder_id)
+            folder = self.folders[folder_id]
+            parts.append(folder["name"])
+            folder_id = folder["parent_id"]
+        return "/".join(reversed(parts))
+
+    async def preview(self, file: dict, lines: int) -> Optional[str]:
+        """First `lines` lines of a text file, cached by content checksum."""
+        key = (file["checksum"] or str(file["id"]), lines)
+        if key in self._previews:
+            self._previews.move_to_end(key)
+            return self._previews[key]
+        preview = await asyncio.to_thread(_read_head, Path(file["storage_path"]), lines)
+        self._previews[key] = preview
+        if len(self._previews) > PREVIEW_CACHE_SIZE:
+            self._previews.popitem(last=False)
+        return preview
+
+    def _rebuild_folder_index(self) -> None:
+        self.folders = {f["id"]: f for group in self.folders_by_parent.values() for f in group}
+
+
+def _read_head(path: Path, lines: int) -> Optional[str]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            head = []
+            for i, line in enumerate(f):
+                if i >= lines:
+                    break
+                head.append(line)
+            return "".join(head)
+    except Exception:
+        return None
+
+
+async def _load(db: AsyncSession, snapshot: ContextSnapshot, keys: Optional[list[UUID]]) -> None:
+    """(Re)read the direct children of `keys` - or everything when keys is None."""
+    params: dict = {"user_id": snapshot.user_id}
+    scope_folders = scope_files = ""
+    if keys is not None:
+        params["keys"] = keys
+        params["root"] = ROOT_KEY
+        scope_folders = "AND COALESCE(parent_id, CAST(:root AS uuid)) = ANY(CAST(:keys AS uuid[]))"
+        scope_files = "AND COALESCE(folder_id, CAST(:root AS uuid)) = ANY(CAST(:keys AS uuid[]))"
+
+    folder_rows = (await db.execute(text(f"""
+        SELECT id, name, parent_id FROM folders
+        WHERE user_id = :user_id AND is_archived = FALSE {scope_folders}
+        ORDER BY name
+    """), params)).mappings().all()
+    file_rows = (await db.execute(text(f"""
+        SELECT id, name, folder_id, file_type, size_bytes, checksum, storage_path FROM files
+        WHERE user_id = :user_id AND is_archived = FALSE {scope_files}
+        ORDER BY name
+    """), params)).mappings().all()
+
+    if keys is None:
+        snapshot.folders_by_parent = {}
+        snapshot.files_by_folder = {}
+    else:
+        for key in keys:
+            snapshot.folders_by_parent.pop(key, None)
+            snapshot.files_by_folder.pop(key, None)
+
+    for row in folder_rows:
+        snapshot.folders_by_parent.setdefault(row["parent_id"] or ROOT_KEY, []).append(dict(row))
+    for row in file_rows:
+        snapshot.files_by_folder.setdefault(row["folder_id"] or ROOT_KEY, []).append(dict(row))
+    snapshot._rebuild_folder_index()
+    snapshot.memo.clear()
+
+
+async def get_snapshot(db: AsyncSession, user_id: UUID) -> ContextSnapshot:
+    """The user's up-to-date snapshot, re-walking only folders changed since last use."""
+    lock = _locks.setdefault(user_id, asyncio.Lock())
+    async with lock:
+        snapshot = _snapshots.get(user_id)
+        if snapshot is None:
+            snapshot = ContextSnapshot(user_id)
+            # Version first: changes racing the load show up as newer next time
+            snapshot.version = (await db.execute(text(
+                "SELECT vault_version FROM user_storage_usage WHERE user_id = :user_id"
+            ), {"user_id": user_id})).scalar() or 0
+            await _load(db, snapshot, None)
+        else:
+            changed = (await db.execute(text("""
+                SELECT folder_key, version FROM vault_folder_versions
+                WHERE user_id = :user_id AND version > :since
+            """), {"user_id": user_id, "since": snapshot.version})).fetchall()
+            if changed:
+                await _load(db, snapshot, [row.folder_key for row in changed])
+                snapshot.version = max(row.version for row in changed)
+                logger.debug(f"Project context for {user_id}: re-walked {len(changed)} folders")
+
+        _snapshots[user_id] = snapshot
+        _snapshots.move_to_end(user_id)
+        while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+            evicted, _ = _snapshots.popitem(last=False)
+            if not _locks[evicted].locked():
+                _locks.pop(evicted, None)
+        return snapshot
@@ -0,0 +1,458 @@
+"""Vault semantic index - embedded file chunks for relevance lookups (RAG).
+
+Text files (document/code/data) are split into line-aligned chunks of up to
+SEMANTIC_CHUNK_CHARS characters, embedded in batches with
+`EmbeddingService.embed_batch` and stored in `file_embeddings` behind an HNSW
+index (cosine distance).
+
+- `files.semantic_index_checksum` records which checksum was embedded;
+  files whose checksum moved on are re-embedded in the background
+- `files.semantic_index_failed_at` records a failed attempt; lookups don't
+  re-queue the file for SEMANTIC_RETRY_HOURS, so files that never embed
+  can't crowd out the rest
+- Embedding always runs in a background task - writes never wait on the model
+- `find_relevant_files` is one ANN query plus a keyword boost on file
+  name/path; excerpts come from the stored chunks, never from disk
+
+Scheduling piggybacks on `content_index.refresh_file_index`, so every write
+path that refreshes the content index refreshes this one too.
+"""
+
+import asyncio
+import logging
+import re
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import select, func, or_, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import filtered_ann_scan
+from app.models.file import File, Folder
+
+logger = logging.getLogger(__name__)
+
+TEXT_FILE_TYPES = ("document", "code", "data")
+
+SEMANTIC_CHUNK_CHARS = 1200  # ~300 tokens, inside every supported model's window
+MAX_CHUNKS_PER_FILE = 256  # Larger files are represented by their first ~300KB
+EMBED_BATCH = 32  # Chunks per embed_batch call / insert
+STALE_SCHEDULE_LIMIT = 50  # Max stale files queued per lookup
+SEMANTIC_RETRY_HOURS = 6  # A failed file isn't re-queued by lookups for this long
+MIN_SIMILARITY = 0.25  # Cosine similarity floor for a semantic hit
+EXCERPT_CHUNKS = 3  # Chunks used for each result's content excerpt
+MAX_EXCERPT_CHARS = 8000
+NAME_BOOST = 0.15  # Per query keyword found in the file name
+PATH_BOOST = 0.05  # Per query keyword found only in the folder path
+
+STOPWORDS = {"the", "and", "for", "this", "that", "with", "how", "what", "why"}
+
+_INSERT_EMBEDDINGS = text("""
+    INSERT INTO file_embeddings (file_id, user_id, chunk_index, start_line, content, embedding)
+    VALUES (:file_id, :user_id, :chunk_index, :start_line, :content, CAST(:embedding AS vector))
+""")
+
+# File ids with a background job in flight, and ids written again meanwhile
+_pending: set[UUID] = set()
+_requeue: set[UUID] = set()
+_background_tasks: set[asyncio.Task] = set()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Chunking
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def iter_semantic_chunks(lines: Iterable[str]) -> Iterator[tuple[int, int, str]]:
+    """
+    Split lines into embedding-sized chunks.
+
+    Yields (chunk_index, start_line, content). Chunks end on line boundaries;
+    a single line longer than SEMANTIC_CHUNK_CHARS is cut into pieces.
+    """
+    buf: list[str] = []
+    size = 0
+    index = 0
+    start = 1
+    line_no = 0
+
+    for raw in lines:
+        line_no += 1
+        line = raw.rstrip("\r\n").replace("\x00", "")
+        while len(line) > SEMANTIC_CHUNK_CHARS:
+            if buf:
+                yield index, start, "\n".join(buf)
+                index += 1
+                buf, size = [], 0
+            yield index, line_no, line[:SEMANTIC_CHUNK_CHARS]
+            index += 1
+            line = line[SEMANTIC_CHUNK_CHARS:]
+            start = line_no
+        if buf and size + len(line) + 1 > SEMANTIC_CHUNK_CHARS:
+            yield index, start, "\n".join(buf)
+            index += 1
+            buf, size = [], 0
+        if not buf:
+            start = line_no
+        buf.append(line)
+        size += len(line) + 1
+
+    if buf and any(part.strip() for part in buf):
+        yield index, start, "\n".join(buf)
+
+
+def _read_chunks(path: Path) -> list[tuple[int, int, str]]:
+    """Read up to MAX_CHUNKS_PER_FILE non-blank chunks (runs in a thread)."""
+    chunks = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for chunk in iter_semantic_chunks(f):
+            if not chunk[2].strip():
+                continue
+            chunks.append(chunk)
+            if len(chunks) >= MAX_CHUNKS_PER_FILE:
+                break
+    return chunks
+
+
+def _vector_literal(embedding: list[float]) -> str:
+    return f"[{','.join(str(x) for x in embedding)}]"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Indexing
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _not_embedded():
+    """Files whose embeddings don't reflect their current checksum."""
+    return or_(
+        File.semantic_index_checksum.is_(None),
+        File.semantic_index_checksum != func.coalesce(File.checksum, ""),
+    )
+
+
+async def _mark_failed(db: AsyncSession, file_id: UUID) -> None:
+    """Record a failed embedding attempt. Call after rollback; commits."""
+    try:
+        await db.execute(update(File).where(File.id == file_id).values(semantic_index_failed_at=func.now()))
+        await db.commit()
+    except Exception as e:
+        logger.warning(f"Could not mark file {file_id} as failed to embed: {e}")
+        await db.rollback()
+
+
+async def embed_file(db: AsyncSession, file: File) -> int:
+    """
+    (Re)build the embedded chunks for one file and mark its checksum as indexed.
+
+    Does not commit - callers own the transaction.
+    Returns the number of chunks embedded. Raises if the embedding provider
+    is unavailable, leaving the checksum untouched so the file is retried.
+    """
+    from app.services.embedding import get_embedding_service
+
+    chunks: list[tuple[int, int, str]] = []
+    path = Path(file.storage_path)
+    if file.file_type in TEXT_FILE_TYPES and path.exists():
+        chunks = await asyncio.to_thread(_read_chunks, path)
+
+    embed_service = get_embedding_service()
+    rows = []
+    for i in range(0, len(chunks), EMBED_BATCH):
+        batch = chunks[i:i + EMBED_BATCH]
+        # The file name is embedded with each chunk so name-only cues still land
+        embeddings = await embed_service.embed_batch([f"{file.name}\n\n{content}" for _, _, content in batch])
+        if len(embeddings) != len(batch) or any(e is None for e in embeddings):
+            raise RuntimeError(f"Embedding provider '{embed_service.provider}' returned no vectors")
+        rows.extend(
+            {
+                "file_id": file.id,
+                "user_id": file.user_id,
+                "chunk_index": index,
+                "start_line": start,
+                "content": content,
+                "embedding": _vector_literal(embedding),
+            }
+            for (index, start, content), embedding in zip(batch, embeddings)
+        )
+
+    await db.execute(text("DELETE FROM file_embeddings WHERE file_id = :file_id"), {"file_id": file.id})
+    for i in range(0, len(rows), EMBED_BATCH):
+        await db.execute(_INSERT_EMBEDDINGS, rows[i:i + EMBED_BATCH])
+
+    file.semantic_index_checksum = file.checksum or ""
+    file.semantic_index_failed_at = None
+    return len(rows)
+
+
+def schedule_embedding(file_ids: list[UUID]) -> None:
+    """Queue files for background embedding with their own DB session."""
+    ids = []
+    for file_id in file_ids:
+        if file_id in _pending:
+            # Written again while a job is running - run it once more afterwards
+            _requeue.add(file_id)
+        else:
+            ids.append(file_id)
+    if not ids:
+        return
+    _pending.update(ids)
+    task = asyncio.create_task(_embed_in_background(ids))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _embed_in_background(file_ids: list[UUID]) -> None:
+    from app.database import get_db_context
+
+    try:
+        async with get_db_context() as db:
+            for file_id in file_ids:
+                file = await db.get(File, file_id)
+                if not file or file.semantic_index_checksum == (file.checksum or ""):
+                    continue
+                try:
+                    chunks = await embed_file(db, file)
+                    await db.commit()
+                    logger.debug(f"Embedded file {file_id} ({chunks} chunks)")
+                except Exception as e:
+                    logger.warning(f"Background semantic index failed for file {file_id}: {e}")
+                    await db.rollback()
+                    await _mark_failed(db, file_id)
+    finally:
+        _pending.difference_update(file_ids)
+        again = [fid for fid in file_ids if fid in _requeue]
+        _requeue.difference_update(again)
+        if again:
+            schedule_embedding(again)
+
+
+async def backfill_semantic_index(
+    db: AsyncSession,
+    user_id: Optional[UUID] = None,
+    batch_size: int = 100,
+) -> dict:
+    """
+    Embed every text file whose content isn't embedded at its current checksum.
+
+    Commits after each file so a long backfill can be interrupted and re-run.
+    """
+    stmt = (
+        select(File)
+        .where(File.file_type.in_(TEXT_FILE_TYPES))
+        .where(_not_embedded())
+        .order_by(File.id)
+        .limit(batch_size)
+    )
+    if user_id:
+        stmt = stmt.where(File.user_id == user_id)
+
+    embedded = 0
+    chunks = 0
+    failed = 0
+    last_id = None
+    while True:
+        page = stmt if last_id is None else stmt.where(File.id > last_id)
+        files = (await db.execute(page)).scalars().all()
+        if not files:
+            break
+        for file in files:
+            last_id = file_id = file.id
+            try:
+                chunks += await embed_file(db, file)
+                await db.commit()
+                embedded += 1
+            except Exception as e:
+                logger.warning(f"Semantic backfill failed for file {file_id}: {e}")
+                await db.rollback()
+                await _mark_failed(db, file_id)
+                failed += 1
+
+    return {"embedded": embedded, "chunks": chunks, "failed": failed}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Lookup
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _keywords(query: str) -> list[str]:
+    words = set(re.findall(r"\b\w+\b", query.lower())) - STOPWORDS
+    return sorted(w for w in words if len(w) >= 2)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _folder_paths(db: AsyncSession, user_id: UUID) -> Callable[[UUID], str]:
+    """Load the user's folders once and return a memoized folder-id -> path lookup."""
+    rows = (await db.execute(
+        select(Folder.id, Folder.name, Folder.parent_id).where(Folder.user_id == user_id)
+    )).all()
+    folders = {row.id: row for row in rows}
+    paths: dict = {}
+
+    def path_of(folder_id) -> str:
+        if folder_id in paths:
+            return paths[folder_id]
+        parts = []
+        seen = set()
+        current = folder_id
+        while current and current in folders and current not in seen:
+            seen.add(current)
+            parts.append(folders[current].name)
+            current = folders[current].parent_id
+        paths[folder_id] = "/".join(reversed(parts))
+        return paths[folder_id]
+
+    return path_of
+
+
+async def find_relevant_files(
+    db: AsyncSession,
+    user_id: UUID,
+    query: str,
+    *,
+    max_files: int = 5,
+    exclude_file_id: Optional[UUID] = None,
+) -> dict:
+    """
+    Rank the user's text files by relevance to a query.
+
+    Candidates are the nearest embedded chunks (one ANN query) plus files whose
+    name contains a query keyword. Score = best chunk similarity + keyword boost.
+
+    Returns:
+        {"results": [{file_id, name, path, score, reasons, content}], "total_matched": int}
+    """
+    from app.services.embedding import get_embedding_service
+
+    keywords = _keywords(query)
+    query_embedding = await get_embedding_service().embed(query)
+    candidates = min(max(max_files * 20, 100), 1000)
+
+    params: dict = {
+        "user_id": user_id,
+        "exclude_id": exclude_file_id,
+        "min_similarity": MIN_SIMILARITY,
+        "name_patterns": [f"%{_escape_like(kw)}%" for kw in keywords],
+    }
+    if query_embedding is not None:
+        nearest = """
+            SELECT file_id, chunk_index, embedding <=> CAST(:embedding AS vector) AS distance
+            FROM file_embeddings
+            WHERE user_id = :user_id
+            ORDER BY embedding <=> CAST(:embedding AS vector)
+            LIMIT :candidates
+        """
+        params["embedding"] = _vector_literal(query_embedding)
+        params["candidates"] = candidates
+    else:
+        nearest = "SELECT NULL::uuid AS file_id, NULL::int AS chunk_index, NULL::float AS distance WHERE FALSE"
+
+    # The shared HNSW index must yield :candidates rows of this user
+    scope = filtered_ann_scan(db, candidates) if query_embedding is not None else nullcontext()
+    async with scope:
+        rows = (await db.execute(text(f"""
+            WITH nearest AS ({nearest}),
+            hits AS (
+                SELECT file_id,
+                       1 - MIN(distance) AS similarity,
+                       (array_agg(chunk_index ORDER BY distance))[1:{EXCERPT_CHUNKS}] AS best_chunks
+                FROM nearest
+                WHERE 1 - distance >= :min_similarity
+                GROUP BY file_id
+            )
+            SELECT f.id, f.name, f.folder_id, f.updated_at,
+                   COALESCE(h.similarity, 0) AS similarity, h.best_chunks
+            FROM files f
+            LEFT JOIN hits h ON h.file_id = f.id
+            WHERE f.user_id = :user_id
+              AND f.file_type IN ('document', 'code', 'data')
+              AND f.is_archived = FALSE
+              AND (CAST(:exclude_id AS uuid) IS NULL OR f.id != CAST(:exclude_id AS uuid))
+              AND (h.file_id IS NOT NULL OR f.name ILIKE ANY(CAST(:name_patterns AS text[])))
+        """), params)).fetchall()
+
+    path_of = await _folder_paths(db, user_id)
+    scored = []
+    for row in rows:
+        folder_path = path_of(row.folder_id) if row.folder_id else ""
+        name_lower = row.name.lower()
+        folder_lower = folder_path.lower()
+        score = float(row.similarity)
+        reasons = []
+        if row.best_chunks:
+            reasons.append(f"semantic match ({score:.2f})")
+        for kw in keywords:
+            if kw in name_lower:
+                score += NAME_BOOST
+                reasons.append(f"filename contains '{kw}'")
+            elif kw in folder_lower:
+                score += PATH_BOOST
+                reasons.append(f"path contains '{kw}'")
+        scored.append({
+            "file_id": row.id,
+            "name": row.name,
+            "path": f"{folder_path}/{row.name}" if folder_path else row.name,
+            "score": score,
+            "reasons": reasons[:3],
+            "updated_at": row.updated_at,
+            "chunks": sorted(row.best_chunks) if row.best_chunks else list(range(EXCERPT_CHUNKS)),
+        })
+
+    scored.sort(key=lambda item: (item["score"], item["updated_at"]), reverse=True)
+    top = scored[:max_files]
+
+    # Excerpts for the winners, straight from the stored chunks
+    excerpts: dict = {}
+    if top:
+        want_files = [item["file_id"] for item in top for _ in item["chunks"]]
+        want_chunks = [chunk for item in top for chunk in item["chunks"]]
+        chunk_rows = (await db.execute(text("""
+            SELECT e.file_id, e.chunk_index, e.content
+            FROM file_embeddings e
+            JOIN unnest(CAST(:file_ids AS uuid[]), CAST(:chunk_indexes AS int[])) AS want(file_id, chunk_index)
+              ON want.file_id = e.file_id AND want.chunk_index = e.chunk_index
+            ORDER BY e.file_id, e.chunk_index
+        """), {"file_ids": want_files, "chunk_indexes": want_chunks})).fetchall()
+        for row in chunk_rows:
+            excerpts.setdefault(row.file_id, []).append(row.content)
+
+    results = []
+    for item in top:
+        content = None
+        parts = excerpts.get(item["file_id"])
+        if parts:
+            content = "\n...\n".join(parts)
+            if len(content) >= MAX_EXCERPT_CHARS:
+                content = content[:MAX_EXCERPT_CHARS] + "\n... (truncated)"
+        results.append({
+            "file_id": item["file_id"],
+            "name": item["name"],
+            "path": item["path"],
+            "score": item["score"],
+            "reasons": item["reasons"],
+            "content": content,
+        })
+
+    # Catch up on files written before the index existed or changed since,
+    # most recently edited first; recent failures wait out their backoff
+    stale = (await db.execute(
+        select(File.id)
+        .where(File.user_id == user_id)
+        .where(File.file_type.in_(TEXT_FILE_TYPES))
+        .where(File.is_archived == False)  # noqa: E712
+        .where(_not_embedded())
+        .where(or_(
+            File.semantic_index_failed_at.is_(None),
+            File.semantic_index_failed_at < func.now() - timedelta(hours=SEMANTIC_RETRY_HOURS),
+        ))
+        .order_by(File.updated_at.desc())
+        .limit(STALE_SCHEDULE_LIMIT)
+    )).scalars().all()
+    if stale and query_embedding is not None:
+        schedule_embedding(list(stale))
+
+    return {"results": results, "total_matched": len(scored)}
@@ -0,0 +1,315 @@
+"""Vault serving - conditional and ranged GETs for stored files.
+
+`serve_file` answers a download with the cheapest correct response:
+
+- `If-None-Match` matching the strong ETag -> 304, no body
+- `Range: bytes=...` (single range) -> 206 with just that slice
+- otherwise -> 200 with the whole file
+
+Bodies go out zero-copy when the ASGI server offers it (`pathsend` for
+whole files, `zerocopysend` for slices); otherwise the file is streamed in
+chunks read off-loop with pread. Vault blobs are content-addressed, so the
+sha256 checksum is a strong ETag and If-Range can be honoured exactly.
+
+Access stats are write-behind: `record_access` bumps an in-memory counter
+and a background task flushes all pending bumps in one UPDATE every
+`vault_access_flush_seconds`. Range continuations (e.g. an <audio> element
+seeking) don't count as a new access.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import stat
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+from uuid import UUID
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+from sqlalchemy import text
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SERVE_CHUNK_BYTES = 256 * 1024
+
+# Content behind the URL never changes (e.g. finished music renders)
+CACHE_IMMUTABLE = "private, max-age=31536000, immutable"
+# Content may change (file edits) - cache, but always revalidate via ETag
+CACHE_REVALIDATE = "private, no-cache"
+
+_RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+
+
+def strong_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison is correct for If-None-Match (RFC 9110 13.1.2)
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (multi-range or malformed -
+    both may be answered with the full body). Raises 416 when unsatisfiable.
+    """
+    match = _RANGE_RE.match(header)
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise _unsatisfiable(size)
+        start, end = max(0, size - length), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start > end:
+            if last and int(last) < start:
+                return None
+            raise _unsatisfiable(size)
+    if start >= size:
+        raise _unsatisfiable(size)
+    return start, end
+
+
+def _unsatisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,  # Range Not Satisfiable (constant was renamed across Starlette versions)
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+class _FileSliceResponse(Response):
+    """Send bytes [start, start + length) of a file, zero-copy when possible."""
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        length: int,
+        status_code: int,
+        headers: dict,
+        media_type: str,
+        whole_file: bool,
+    ):
+        self.path = path
+        self.start = start
+        self.length = length
+        self.whole_file = whole_file
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope.get("method", "GET").upper() == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if self.whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        fd = await asyncio.to_thread(os.open, self.path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+
+            offset = self.start
+            remaining = self.length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(os.pread, fd, min(SERVE_CHUNK_BYTES, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us - terminate the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+async def serve_file(
+    request: Request,
+    path: Path,
+    *,
+    etag: str,
+    media_type: str,
+    filename: str,
+    disposition: str = "attachment",
+    cache_control: str = CACHE_REVALIDATE,
+) -> Response:
+    """
+    Build the response for a GET of a stored file.
+
+    `etag` is the quoted strong validator (see strong_etag). Raises 404 when
+    the file is missing and 416 for unsatisfiable ranges.
+    """
+    try:
+        st = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found on disk")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found on disk")
+
+    size = st.st_size
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Last-Modified": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    headers["Content-Disposition"] = _content_disposition(disposition, filename)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header:
+        if_range = request.headers.get("if-range")
+        # If-Range with a stale validator means "send me the whole thing"
+        if if_range is None or if_range.strip() == etag:
+            byte_range = _parse_range(range_header, size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return _FileSliceResponse(
+            path, 0, size, status.HTTP_200_OK, headers, media_type, whole_file=True,
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return _FileSliceResponse(
+        path, start, length, status.HTTP_206_PARTIAL_CONTENT, headers, media_type,
+        whole_file=(start == 0 and length == size),
+    )
+
+
+def is_fresh_access(request: Request) -> bool:
+    """False for conditional hits and mid-file range requests (seeks/resumes)."""
+    if request.headers.get("if-none-match"):
+        return False
+    match = _RANGE_RE.match(request.headers.get("range") or "")
+    return not match or match.group(1) in ("", "0")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Write-behind access counter
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# file_id -> (pending bumps, latest access time)
+_pending_access: dict[UUID, tuple[int, datetime]] = {}
+_flusher_task: Optional[asyncio.Task] = None
+
+
+def record_access(file_id: UUID) -> None:
+    """Count one access; persisted by the next flush."""
+    count, _ = _pending_access.get(file_id, (0, None))
+    _pending_access[file_id] = (count + 1, datetime.now(timezone.utc))
+
+
+async def flush_access_counts() -> int:
+    """Write all pending bumps in a single UPDATE. Returns files touched."""
+    global _pending_access
+    if not _pending_access:
+        return 0
+    pending, _pending_access = _pending_access, {}
+
+    from app.database import get_db_context
+
+    ids = list(pending)
+    try:
+        async with get_db_context() as db:
+            await db.execute(text("""
+                UPDATE files f
+                SET access_count = f.access_count + v.bumps,
+                    last_accessed_at = GREATEST(f.last_accessed_at, v.seen_at)
+                FROM unnest(CAST(:ids AS uuid[]), CAST(:bumps AS integer[]), CAST(:seen AS timestamptz[]))
+                     AS v(id, bumps, seen_at)
+                WHERE f.id = v.id
+            """), {
+                "ids": ids,
+                "bumps": [pending[i][0] for i in ids],
+                "seen": [pending[i][1] for i in ids],
+            })
+            await db.commit()
+    except Exception as e:
+        # Put the bumps back so the next flush retries them
+        for file_id, (count, seen_at) in pending.items():
+            current, latest = _pending_access.get(file_id, (0, seen_at))
+            _pending_access[file_id] = (current + count, max(latest, seen_at))
+        logger.warning(f"Access count flush failed ({len(ids)} files): {e}")
+        return 0
+    return len(ids)
+
+
+async def _flush_loop(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await flush_access_counts()
+
+
+def start_access_flusher() -> None:
+    """Start the periodic access count flush (idempotent)."""
+    global _flusher_task
+    if _flusher_task and not _flusher_task.done():
+        return
+    interval = max(1.0, get_settings().vault_access_flush_seconds)
+    _flusher_task = asyncio.create_task(_flush_loop(interval))
+
+
+async def stop_access_flusher() -> None:
+    """Stop the flusher and persist whatever is still pending."""
+    global _flusher_task
+    if _flusher_task:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+    await flush_access_counts()
@@ -0,0 +1,263 @@
+"""Vault storage usage - maintained per-user counters and atomic quota.
+
+`user_storage_usage` holds one row per user with total bytes, file count
+and a per-file-type breakdown ({"code": {"bytes": n, "files": k}, ...}).
+Every file create/update/delete adjusts the row inside the same transaction
+as the File change, so the counter commits or rolls back with it.
+
+Quota is enforced by a conditional UPDATE (`used_bytes + delta <= quota`):
+two concurrent uploads can't both slip under the limit, because the second
+UPDATE waits on the row lock and re-checks against the first one's total.
+
+`reconcile_usage` recomputes the real sums and corrects any drift; it runs
+periodically in the background (see `start_reconciler`).
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SEED_ROW = text("""
+    INSERT INTO user_storage_usage (user_id, used_bytes, file_count, by_type)
+    SELECT :user_id,
+           COALESCE(SUM(bytes), 0),
+           COALESCE(SUM(files), 0),
+           COALESCE(jsonb_object_agg(file_type, jsonb_build_object('bytes', bytes, 'files', files)), '{}'::jsonb)
+    FROM (
+        SELECT COALESCE(file_type, 'other') AS file_type, SUM(size_bytes) AS bytes, COUNT(*) AS files
+        FROM files WHERE user_id = :user_id
+        GROUP BY 1
+    ) t
+    ON CONFLICT (user_id) DO NOTHING
+""")
+
+# by_type[file_type] += (delta_bytes, delta_files), only when the quota check passes
+_ADJUST = text("""
+    UPDATE user_storage_usage
+    SET used_bytes = used_bytes + CAST(:delta_bytes AS bigint),
+        file_count = file_count + CAST(:delta_files AS integer),
+        by_type = jsonb_set(
+            by_type,
+            ARRAY[CAST(:file_type AS text)],
+            jsonb_build_object(
+                'bytes', COALESCE((by_type #>> ARRAY[CAST(:file_type AS text), 'bytes'])::bigint, 0) + CAST(:delta_bytes AS bigint),
+                'files', COALESCE((by_type #>> ARRAY[CAST(:file_type AS text), 'files'])::bigint, 0) + CAST(:delta_files AS integer)
+            )
+        ),
+        updated_at = NOW()
+    WHERE user_id = :user_id
+      AND (CAST(:quota AS bigint) IS NULL OR CAST(:delta_bytes AS bigint) <= 0 OR used_bytes + CAST(:delta_bytes AS bigint) <= CAST(:quota AS bigint))
+    RETURNING used_bytes
+""")
+
+
+def _as_dict(value) -> dict:
+    # jsonb comes back as text from raw SQL unless a codec is registered
+    if isinstance(value, dict):
+        return value
+    return json.loads(value or "{}")
+
+
+def quota_for(user) -> int:
+    """Effective quota in bytes: per-user override in settings, else the default."""
+    settings = get_settings()
+    return int((user.settings or {}).get("storage_quota_bytes", settings.default_quota_bytes))
+
+
+async def ensure_usage(db: AsyncSession, user_id: UUID) -> None:
+    """Seed a user's counter row from the real sums if it doesn't exist yet."""
+    await db.execute(_SEED_ROW, {"user_id": user_id})
+
+
+async def adjust_usage(
+    db: AsyncSession,
+    user_id: UUID,
+    delta_bytes: int,
+    file_type: str,
+    delta_files: int = 0,
+    quota: Optional[int] = None,
+) -> bool:
+    """
+    Apply a usage change in the caller's transaction. Does not commit.
+
+    With `quota`, growth is only applied if the new total stays within it;
+    returns False (nothing changed) when it wouldn't. Shrinking always applies.
+    """
+    params = {
+        "user_id": user_id,
+        "delta_bytes": delta_bytes,
+        "delta_files": delta_files,
+        "file_type": file_type or "other",
+        "quota": quota,
+    }
+    if (await db.execute(_ADJUST, params)).first() is not None:
+        return True
+
+    # No row yet (first write since the table appeared) - seed it and retry once
+    exists = (await db.execute(
+        text("SELECT 1 FROM user_storage_usage WHERE user_id = :user_id"), {"user_id": user_id}
+    )).first()
+    if exists:
+        return False
+    await ensure_usage(db, user_id)
+    return (await db.execute(_ADJUST, params)).first() is not None
+
+
+async def release_usage(db: AsyncSession, user_id: UUID, files: list[tuple[int, str]]) -> None:
+    """Subtract deleted files, given as (size_bytes, file_type) pairs. Does not commit."""
+    totals: dict[str, list[int]] = {}
+    for size_bytes, file_type in files:
+        entry = totals.setdefault(file_type or "other", [0, 0])
+        entry[0] += size_bytes or 0
+        entry[1] += 1
+    for file_type, (size_bytes, count) in totals.items():
+        await adjust_usage(db, user_id, -size_bytes, file_type, delta_files=-count)
+
+
+async def get_usage(db: AsyncSession, user_id: UUID) -> dict:
+    """Return {"used_bytes", "file_count", "by_type": {type: bytes}} in O(1)."""
+    row = (await db.execute(
+        text("SELECT used_bytes, file_count, by_type FROM user_storage_usage WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    )).first()
+    if row is None:
+        # Seeded in the caller's transaction; persists with its next commit
+        await ensure_usage(db, user_id)
+        return await get_usage(db, user_id)
+
+    by_type = _as_dict(row.by_type)
+    return {
+        "used_bytes": int(row.used_bytes),
+        "file_count": int(row.file_count),
+        "by_type": {
+            file_type: int(entry.get("bytes", 0))
+            for file_type, entry in by_type.items()
+            if entry.get("files", 0) or entry.get("bytes", 0)
+        },
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Reconciliation
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def reconcile_usage(db: AsyncSession, user_id: Optional[UUID] = None) -> dict:
+    """
+    Recompute counters from the files table and correct any drift.
+
+    Each user is fixed in its own short transaction that holds the counter
+    row lock, so concurrent writes simply wait rather than being lost.
+    """
+    if user_id:
+        user_ids = [user_id]
+    else:
+        user_ids = (await db.execute(text("""
+            SELECT user_id FROM user_storage_usage
+            UNION
+            SELECT DISTINCT user_id FROM files
+        """))).scalars().all()
+        await db.commit()
+
+    checked = 0
+    drifted = 0
+    corrected_bytes = 0
+    for uid in user_ids:
+        await ensure_usage(db, uid)
+        current = (await db.execute(
+            text("SELECT used_bytes, file_count, by_type FROM user_storage_usage WHERE user_id = :user_id FOR UPDATE"),
+            {"user_id": uid},
+        )).first()
+        actual = (await db.execute(text("""
+            SELECT COALESCE(SUM(bytes), 0) AS used_bytes,
+                   COALESCE(SUM(files), 0) AS file_count,
+                   COALESCE(jsonb_object_agg(file_type, jsonb_build_object('bytes', bytes, 'files', files)), '{}'::jsonb) AS by_type
+            FROM (
+                SELECT COALESCE(file_type, 'other') AS file_type, SUM(size_bytes) AS bytes, COUNT(*) AS files
+                FROM files WHERE user_id = :user_id
+                GROUP BY 1
+            ) t
+        """), {"user_id": uid})).first()
+
+        checked += 1
+        current_types = {k: v for k, v in _as_dict(current.by_type).items() if v.get("files") or v.get("bytes")}
+        actual_types = _as_dict(actual.by_type)
+        if (
+            int(current.used_bytes) != int(actual.used_bytes)
+            or int(current.file_count) != int(actual.file_count)
+            or current_types != actual_types
+        ):
+            drifted += 1
+            corrected_bytes += abs(int(actual.used_bytes) - int(current.used_bytes))
+            logger.warning(
+                f"Storage usage drift for user {uid}: counted {current.used_bytes} bytes/"
+                f"{current.file_count} files, actual {actual.used_bytes}/{actual.file_count}"
+            )
+            await db.execute(text("""
+                UPDATE user_storage_usage
+                SET used_bytes = :used_bytes, file_count = :file_count,
+                    by_type = CAST(:by_type AS jsonb), updated_at = NOW(), reconciled_at = NOW()
+                WHERE user_id = :user_id
+            """), {
+                "user_id": uid,
+                "used_bytes": int(actual.used_bytes),
+                "file_count": int(actual.file_count),
+                "by_type": json.dumps(actual_types),
+            })
+        else:
+            await db.execute(
+                text("UPDATE user_storage_usage SET reconciled_at = NOW() WHERE user_id = :user_id"),
+                {"user_id": uid},
+            )
+        await db.commit()
+
+    return {"users_checked": checked, "drifted": drifted, "corrected_bytes": corrected_bytes}
+
+
+_reconciler_task: Optional[asyncio.Task] = None
+
+
+async def _reconcile_loop(interval_seconds: float) -> None:
+    from app.database import get_db_context
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with get_db_context() as db:
+                report = await reconcile_usage(db)
+            if report["drifted"]:
+                logger.warning(f"Storage usage reconciliation corrected drift: {report}")
+            else:
+                logger.info(f"Storage usage reconciliation: {report}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Storage usage reconciliation failed: {e}")
+
+
+def start_reconciler() -> None:
+    """Start the periodic reconciliation task (idempotent)."""
+    global _reconciler_task
+    interval_hours = get_settings().storage_reconcile_interval_hours
+    if interval_hours <= 0 or (_reconciler_task and not _reconciler_task.done()):
+        return
+    _reconciler_task = asyncio.create_task(_reconcile_loop(interval_hours * 3600))
+
+
+async def stop_reconciler() -> None:
+    global _reconciler_task
+    if _reconciler_task:
+        _reconciler_task.cancel()
+        try:
+            await _reconciler_task
+        except asyncio.CancelledError:
+            pass
+        _reconciler_task = None
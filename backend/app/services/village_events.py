@@ -56,6 +56,7 @@ TOOL_ZONE_MAP = {
     "cortex_recall": "memory_garden",
     "cortex_village": "memory_garden",
     "cortex_stats": "memory_garden",
+    "cortex_episodes": "memory_garden",
     "cortex_export": "memory_garden",
     "cortex_import": "memory_garden",
     # Scratch Memory (Tier 5)
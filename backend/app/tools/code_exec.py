@@ -4,18 +4,14 @@ Tier 6: Code Execution Tools - The Making Hands
 Execute code safely in sandboxed environments.
 "Create and execute to bring ideas to life"
 
-Supports Python execution with restricted builtins.
+Supports Python execution with restricted builtins in a warm pool of
+sandbox worker processes (see app.sandbox).
 Integrates with Cortex Diver's execution backend.
 """
 
 import logging
-import asyncio
-import sys
-import io
-import traceback
-from typing import Optional
-from contextlib import redirect_stdout, redirect_stderr
 
+from app import sandbox
 from . import registry
 from .base import BaseTool, ToolSchema, ToolResult, ToolContext, ToolCategory
 
@@ -26,70 +22,14 @@ logger = logging.getLogger(__name__)
 MAX_EXECUTION_TIME = 10  # seconds
 MAX_OUTPUT_SIZE = 100 * 1024  # 100KB
 
-# Safe builtins for Python execution
-SAFE_BUILTINS = {
-    "abs": abs,
-    "all": all,
-    "any": any,
-    "bin": bin,
-    "bool": bool,
-    "chr": chr,
-    "dict": dict,
-    "divmod": divmod,
-    "enumerate": enumerate,
-    "filter": filter,
-    "float": float,
-    "format": format,
-    "frozenset": frozenset,
-    "hex": hex,
-    "int": int,
-    "isinstance": isinstance,
-    "issubclass": issubclass,
-    "iter": iter,
-    "len": len,
-    "list": list,
-    "map": map,
-    "max": max,
-    "min": min,
-    "next": next,
-    "oct": oct,
-    "ord": ord,
-    "pow": pow,
-    "print": print,
-    "range": range,
-    "repr": repr,
-    "reversed": reversed,
-    "round": round,
-    "set": set,
-    "slice": slice,
-    "sorted": sorted,
-    "str": str,
-    "sum": sum,
-    "tuple": tuple,
-    "type": type,
-    "zip": zip,
-    # Math functions
-    "__import__": lambda name, *args: __safe_import(name),
-}
-
-# Safe modules that can be imported
-SAFE_MODULES = {
-    "math", "random", "datetime", "json", "re",
-    "itertools", "functools", "collections", "string",
-    "decimal", "fractions", "statistics",
-}
-
-
-def __safe_import(name: str, *args):
-    """Safe import that only allows whitelisted modules."""
-    if name in SAFE_MODULES:
-        return __import__(name)
-    raise ImportError(f"Import of '{name}' is not allowed")
+# Restricted builtins/whitelist live with the worker processes in app.sandbox
+SAFE_MODULES = sandbox.SAFE_MODULES
+SAFE_BUILTINS = sandbox.SAFE_BUILTINS
 
 
 async def execute_python_code(code: str, timeout: int = MAX_EXECUTION_TIME) -> dict:
     """
-    Execute Python code in a restricted environment.
+    Execute Python code in a pre-forked sandbox worker process.
 
     Returns dict with:
     - success: bool
@@ -97,72 +37,33 @@ async def execute_python_code(code: str, timeout: int = MAX_EXECUTION_TIME) -> d
     - result: last expression value (if any)
     - error: error message (if failed)
     """
-    stdout_buffer = io.StringIO()
-    stderr_buffer = io.StringIO()
-
-    # Create restricted globals
-    restricted_globals = {
-        "__builtins__": SAFE_BUILTINS,
-        "__name__": "__main__",
-    }
-
-    # Add safe modules
-    for module_name in SAFE_MODULES:
-        try:
-            restricted_globals[module_name] = __import__(module_name)
-        except ImportError:
-            pass
-
-    result_value = None
-    error_msg = None
-
-    def run_code():
-        nonlocal result_value, error_msg
-        try:
-            with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
-                # Try to evaluate as expression first
-                try:
-                    result_value = eval(code, restricted_globals)
-                except SyntaxError:
-                    # Not an expression, execute as statements
-                    exec(code, restricted_globals)
-                    result_value = restricted_globals.get("result")
-        except Exception as e:
-            error_msg = f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"
-
     try:
-        # Run with timeout
-        loop = asyncio.get_event_loop()
-        await asyncio.wait_for(
-            loop.run_in_executor(None, run_code),
-            timeout=timeout
+        reply = await sandbox.get_sandbox_pool().run(
+            code, mode="exec", timeout=timeout, max_output=MAX_OUTPUT_SIZE,
         )
-    except asyncio.TimeoutError:
+    except sandbox.SandboxError as e:
         return {
             "success": False,
             "output": "",
             "result": None,
-            "error": f"Execution timed out after {timeout}s",
+            "error": str(e),
         }
 
-    output = stdout_buffer.getvalue() + stderr_buffer.getvalue()
-
-    # Truncate output if too large
-    if len(output) > MAX_OUTPUT_SIZE:
-        output = output[:MAX_OUTPUT_SIZE] + f"\n\n[Output truncated at {MAX_OUTPUT_SIZE // 1024}KB]"
-
-    if error_msg:
+    if reply["error_type"]:
+        error_msg = f"{reply['error_type']}: {reply['error']}"
+        if reply["traceback"]:
+            error_msg += f"\n{reply['traceback']}"
         return {
             "success": False,
-            "output": output,
+            "output": reply["output"],
             "result": None,
             "error": error_msg[:5000],  # Limit error message
         }
 
     return {
         "success": True,
-        "output": output,
-        "result": repr(result_value) if result_value is not None else None,
+        "output": reply["output"],
+        "result": reply["result_repr"],
     }
 
 
@@ -286,41 +187,33 @@ Examples:
         if len(expression) > 10000:
             return ToolResult(success=False, error="Expression exceeds 10KB limit")
 
-        # Create restricted environment
-        restricted_globals = {
-            "__builtins__": SAFE_BUILTINS,
-        }
-
-        # Add safe modules
-        for module_name in SAFE_MODULES:
-            try:
-                restricted_globals[module_name] = __import__(module_name)
-            except ImportError:
-                pass
-
         try:
-            result = eval(expression, restricted_globals)
-
-            return ToolResult(
-                success=True,
-                result={
-                    "expression": expression,
-                    "result": result,
-                    "type": type(result).__name__,
-                },
+            reply = await sandbox.get_sandbox_pool().run(
+                expression, mode="eval", timeout=MAX_EXECUTION_TIME, max_output=MAX_OUTPUT_SIZE,
             )
+        except sandbox.SandboxError as e:
+            return ToolResult(success=False, error=str(e))
 
-        except SyntaxError as e:
+        if reply["error_type"] == "SyntaxError":
             return ToolResult(
                 success=False,
-                error=f"Syntax error: {str(e)}",
+                error=f"Syntax error: {reply['error']}",
             )
-        except Exception as e:
+        if reply["error_type"]:
             return ToolResult(
                 success=False,
-                error=f"{type(e).__name__}: {str(e)}",
+                error=f"{reply['error_type']}: {reply['error']}",
             )
 
+        return ToolResult(
+            success=True,
+            result={
+                "expression": expression,
+                "result": reply["result"],
+                "type": reply["result_type"],
+            },
+        )
+
 
 # =============================================================================
 # REGISTER TOOLS
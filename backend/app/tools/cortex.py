@@ -10,7 +10,7 @@ semantic enrichment, emotional analysis, and associative linking.
 
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 
@@ -527,6 +527,89 @@ Example: cortex_neighbors(memory_id="mem_abc123")""",
             return ToolResult(success=False, error=f"Neighbors failed: {str(e)}")
 
 
+# =============================================================================
+# CORTEX EPISODES - What happened when
+# =============================================================================
+
+def _parse_when(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class CortexEpisodesTool(BaseTool):
+    """List recorded episodes (conversation turns and tool runs) in a time window."""
+
+    @property
+    def schema(self) -> ToolSchema:
+        return ToolSchema(
+            name="cortex_episodes",
+            description="""Recall what happened when - episodes of past conversations.
+
+Each episode is one stretch of a conversation: user messages, tool runs
+and replies in order. Filter by time window (ISO 8601) and agent.
+
+Example: cortex_episodes(since="2026-03-01", until="2026-03-02")""",
+            category=ToolCategory.MEMORY,
+            input_schema={
+                "type": "object",
+                "properties": {
+                    "since": {
+                        "type": "string",
+                        "description": "Window start, ISO 8601 (default: no lower bound)",
+                    },
+                    "until": {
+                        "type": "string",
+                        "description": "Window end, ISO 8601 (default: now)",
+                    },
+                    "agent_id": {
+                        "type": "string",
+                        "description": "Only episodes of this agent",
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Max episodes to return (default: 10)",
+                        "default": 10,
+                    },
+                },
+                "required": [],
+            },
+            requires_auth=True,
+        )
+
+    async def execute(self, params: dict, context: ToolContext) -> ToolResult:
+        if not context.user_id:
+            return ToolResult(success=False, error="Authentication required")
+
+        try:
+            since, until = _parse_when(params.get("since")), _parse_when(params.get("until"))
+        except ValueError:
+            return ToolResult(success=False, error="since/until must be ISO 8601 dates")
+
+        try:
+            from app.database import async_session
+            from app.services.cerebro.episodes import episodes_between
+
+            user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
+
+            async with async_session() as db:
+                episodes = await episodes_between(
+                    db, user_uuid, since=since, until=until,
+                    agent_id=params.get("agent_id"),
+                    limit=min(params.get("max_results", 10), 50),
+                )
+
+            return ToolResult(
+                success=True,
+                result={"count": len(episodes), "episodes": episodes},
+            )
+
+        except Exception as e:
+            logger.exception("Cortex episodes error")
+            return ToolResult(success=False, error=f"Episodes failed: {str(e)}")
+
+
 # =============================================================================
 # CORTEX EXPORT - Export memory core for transfer
 # =============================================================================
@@ -534,14 +617,17 @@ Example: cortex_neighbors(memory_id="mem_abc123")""",
 class CortexExportTool(BaseTool):
     """Export memory core for transfer between systems."""
 
+    MAX_MEMORIES = 5000  # whole-graph exports stream from GET /cortex/export
+
     @property
     def schema(self) -> ToolSchema:
         return ToolSchema(
             name="cortex_export",
             description="""Export a MemoryCore - portable snapshot of agent memories.
 
-Exports all CerebroCortex memories with metadata and strength state.
-Embeddings are NOT included (regenerated on import).
+Exports CerebroCortex memories (up to 5000) and the links between them,
+with metadata and strength state. Embeddings are NOT included (regenerated
+or reused on import). Larger graphs: stream GET /api/v1/cortex/export.
 
 Example: cortex_export(agent_id="AZOTH")""",
             category=ToolCategory.MEMORY,
@@ -568,39 +654,24 @@ Example: cortex_export(agent_id="AZOTH")""",
             return ToolResult(success=False, error="Authentication required")
 
         try:
-            from app.database import async_session
-            from app.services.cerebro.pg_graph_store import PgGraphStore
+            from app.services.cerebro.transfer import export_ndjson
 
             user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
 
-            async with async_session() as db:
-                store = PgGraphStore(db)
-                nodes = await store.get_memories(
-                    user_uuid,
-                    limit=5000,
-                    agent_id=params.get("agent_id"),
-                    memory_type=params.get("memory_type"),
-                )
-
-                memories = []
-                for node in nodes:
-                    memories.append({
-                        "id": node.id,
-                        "content": node.content,
-                        "memory_type": node.metadata.memory_type.value,
-                        "layer": node.metadata.layer.value,
-                        "visibility": node.metadata.visibility.value,
-                        "agent_id": node.metadata.agent_id,
-                        "tags": node.metadata.tags,
-                        "concepts": node.metadata.concepts,
-                        "valence": node.metadata.valence.value if hasattr(node.metadata.valence, 'value') else node.metadata.valence,
-                        "arousal": node.metadata.arousal,
-                        "salience": node.metadata.salience,
-                        "access_count": node.strength.access_count,
-                        "stability": node.strength.stability,
-                        "difficulty": node.strength.difficulty,
-                        "created_at": node.created_at.isoformat() if node.created_at else None,
-                    })
+            memories, links = [], []
+            truncated = False
+            exported_ids = set()
+            async for line in export_ndjson(user_uuid, params.get("agent_id"), params.get("memory_type")):
+                record = json.loads(line)
+                kind = record.pop("type")
+                if kind == "memory":
+                    if len(memories) >= self.MAX_MEMORIES:
+                        truncated = True
+                        continue
+                    memories.append(record)
+                    exported_ids.add(record["id"])
+                elif kind == "link" and record["source_id"] in exported_ids and record["target_id"] in exported_ids:
+                    links.append(record)
 
             memory_core = {
                 "format_version": "2.0",
@@ -608,17 +679,19 @@ Example: cortex_export(agent_id="AZOTH")""",
                 "agent_id": params.get("agent_id") or "ALL",
                 "exported_at": datetime.utcnow().isoformat(),
                 "memories": memories,
+                "links": links,
                 "total": len(memories),
             }
 
-            return ToolResult(
-                success=True,
-                result={
-                    "memory_core": memory_core,
-                    "total_exported": len(memories),
-                    "message": f"Exported {len(memories)} memories",
-                },
-            )
+            result = {
+                "memory_core": memory_core,
+                "total_exported": len(memories),
+                "message": f"Exported {len(memories)} memories, {len(links)} links",
+            }
+            if truncated:
+                result["truncated"] = True
+                result["message"] += f" (capped at {self.MAX_MEMORIES}; use GET /api/v1/cortex/export for all)"
+            return ToolResult(success=True, result=result)
 
         except Exception as e:
             logger.exception("Cortex export error")
@@ -638,8 +711,9 @@ class CortexImportTool(BaseTool):
             name="cortex_import",
             description="""Import a MemoryCore - restore or transfer agent memories.
 
-Imports memories through the CerebroCortex pipeline.
-Embeddings are regenerated during import.
+Memories and links are bulk-loaded and embedded in the background;
+exact duplicates of existing memories are skipped. Returns an import_id
+whose progress is at GET /api/v1/cortex/import/{import_id}.
 
 Example: cortex_import(memory_core={...})""",
             category=ToolCategory.MEMORY,
@@ -667,54 +741,18 @@ Example: cortex_import(memory_core={...})""",
 
         try:
             from app.database import async_session
+            from app.services.cerebro.transfer import iter_memory_core, stage_import
 
-            service = _get_service()
             user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
 
-            memories = memory_core.get("memories", [])
-            # Support v1 format
-            if not memories:
-                collections = memory_core.get("collections", {})
-                for coll_memories in collections.values():
-                    memories.extend(coll_memories)
-
-            imported_count = 0
-            errors = []
-
             async with async_session() as db:
-                for memory in memories:
-                    try:
-                        content = memory.get("content", "")
-                        if not content:
-                            continue
-
-                        result = await service.remember(
-                            db=db,
-                            user_id=user_uuid,
-                            content=content,
-                            memory_type=memory.get("memory_type"),
-                            tags=memory.get("tags"),
-                            salience=memory.get("salience"),
-                            agent_id=memory.get("agent_id", "AZOTH"),
-                            visibility=memory.get("visibility", "private"),
-                            source="import",
-                        )
-                        if result:
-                            imported_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Error: {str(e)[:50]}")
-
-            result_data = {
-                "imported_count": imported_count,
-                "source_agent": memory_core.get("agent_id", "unknown"),
-                "message": f"Imported {imported_count} memories",
-            }
-            if errors:
-                result_data["errors"] = errors[:5]
-                result_data["error_count"] = len(errors)
+                handle = await stage_import(db, user_uuid, iter_memory_core(memory_core))
 
-            return ToolResult(success=True, result=result_data)
+            return ToolResult(success=True, result={
+                **handle,
+                "source_agent": memory_core.get("agent_id", "unknown"),
+                "message": f"Staged {handle['staged_nodes']} memories and {handle['staged_links']} links for import",
+            })
 
         except Exception as e:
             logger.exception("Cortex import error")
@@ -731,5 +769,6 @@ registry.register(CortexVillageTool())
 registry.register(CortexStatsTool())
 registry.register(CortexAssociateTool())
 registry.register(CortexNeighborsTool())
+registry.register(CortexEpisodesTool())
 registry.register(CortexExportTool())
 registry.register(CortexImportTool())
@@ -9,6 +9,7 @@ NOTE: These tools require database access with user context.
 They use SQLAlchemy models directly rather than HTTP endpoints.
 """
 
+import asyncio
 import logging
 from typing import Optional
 from uuid import UUID
@@ -16,6 +17,11 @@ from uuid import UUID
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.services.vault.blobs import put_bytes, replace_content, replace_staged, schedule_gc
+from app.services.vault.content_index import refresh_file_index
+from app.services.vault.ingest import discard_staged
+from app.services.vault.lines import as_line_bytes, get_line_index, read_range, splice_lines
+from app.services.vault.usage import adjust_usage, get_usage, quota_for
 from . import registry
 from .base import BaseTool, ToolSchema, ToolResult, ToolContext, ToolCategory
 
@@ -170,6 +176,9 @@ Use to:
 - Read markdown or text documents
 - Get configuration files
 
+Pass start_line/end_line to read just a range of lines (cheap even on huge
+files) - useful before vault_edit or vault_insert.
+
 Note: Only text files are supported. Binary files will return metadata only.""",
             category=ToolCategory.FILES,
             input_schema={
@@ -184,6 +193,14 @@ Note: Only text files are supported. Binary files will return metadata only.""",
                         "description": "Max content length to return (default: 50000)",
                         "default": 50000,
                     },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "First line to read (1-indexed, optional)",
+                    },
+                    "end_line": {
+                        "type": "integer",
+                        "description": "Last line to read (1-indexed, inclusive, optional)",
+                    },
                 },
                 "required": ["file_id"],
             },
@@ -196,9 +213,15 @@ Note: Only text files are supported. Binary files will return metadata only.""",
 
         file_id = params.get("file_id")
         max_length = min(params.get("max_length", 50000), 100000)
+        start_line = params.get("start_line")
+        end_line = params.get("end_line")
 
         if not file_id:
             return ToolResult(success=False, error="file_id is required")
+        if start_line is not None and start_line < 1:
+            return ToolResult(success=False, error="start_line must be >= 1")
+        if start_line is not None and end_line is not None and end_line < start_line:
+            return ToolResult(success=False, error="end_line must be >= start_line")
 
         try:
             from app.models.file import File
@@ -246,8 +269,30 @@ Note: Only text files are supported. Binary files will return metadata only.""",
                     file_path = Path(file.storage_path)
 
                     if file_path.exists():
-                        content = file_path.read_text(encoding="utf-8", errors="replace")
-                        if len(content) > max_length:
+                        if start_line is not None or end_line is not None:
+                            # Line range: seek via the line index, read only those bytes
+                            index = await get_line_index(db, file)
+                            await db.commit()
+                            first = start_line or 1
+                            last = min(end_line or index.line_count, index.line_count)
+                            result["total_lines"] = index.line_count
+                            if first > index.line_count:
+                                return ToolResult(
+                                    success=False,
+                                    error=f"start_line {first} exceeds file length ({index.line_count} lines)",
+                                )
+                            byte_start, byte_end = index.span(first, last)
+                            data = await read_range(file_path, byte_start, byte_end)
+                            result["start_line"] = first
+                            result["end_line"] = last
+                            cut_short = False
+                        else:
+                            # max_length chars are at most 4x as many UTF-8 bytes - don't read past that
+                            size = (await asyncio.to_thread(file_path.stat)).st_size
+                            data = await read_range(file_path, 0, min(size, max_length * 4))
+                            cut_short = size > max_length * 4
+                        content = data.decode("utf-8", errors="replace")
+                        if len(content) > max_length or cut_short:
                             content = content[:max_length] + "\n\n[Truncated...]"
                             result["truncated"] = True
                         result["content"] = content
@@ -295,20 +340,17 @@ Use to check available space before creating files.""",
             return ToolResult(success=False, error="Authentication required to access vault")
 
         try:
-            from app.models.file import File, Folder
+            from app.models.file import Folder
+            from app.models.user import User
             from app.database import async_session
+            from app.config import get_settings
 
             async with async_session() as db:
                 user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
 
-                # Count files and total size
-                files_result = await db.execute(
-                    select(
-                        func.count(File.id).label("count"),
-                        func.coalesce(func.sum(File.size_bytes), 0).label("total_size")
-                    ).where(File.user_id == user_uuid)
-                )
-                file_stats = files_result.one()
+                # Totals come from the maintained usage counter
+                usage = await get_usage(db, user_uuid)
+                user = (await db.execute(select(User).where(User.id == user_uuid))).scalar_one_or_none()
 
                 # Count folders
                 folders_result = await db.execute(
@@ -316,8 +358,8 @@ Use to check available space before creating files.""",
                 )
                 folder_count = folders_result.scalar() or 0
 
-                used_bytes = file_stats.total_size or 0
-                quota_bytes = 100 * 1024 * 1024  # 100MB default
+                used_bytes = usage["used_bytes"]
+                quota_bytes = quota_for(user) if user else get_settings().default_quota_bytes
 
                 return ToolResult(
                     success=True,
@@ -327,7 +369,7 @@ Use to check available space before creating files.""",
                         "quota_bytes": quota_bytes,
                         "quota_human": _format_size(quota_bytes),
                         "percent_used": round(used_bytes / quota_bytes * 100, 1),
-                        "file_count": file_stats.count or 0,
+                        "file_count": usage["file_count"],
                         "folder_count": folder_count,
                     },
                 )
@@ -412,13 +454,8 @@ Respects user's storage quota.""",
             from app.models.file import File, Folder, get_file_type
             from app.models.user import User
             from app.database import async_session
-            from app.config import get_settings
-            from pathlib import Path
             from uuid import uuid4
             from datetime import datetime
-            import hashlib
-
-            settings = get_settings()
 
             async with async_session() as db:
                 user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
@@ -433,7 +470,6 @@ Respects user's storage quota.""",
 
                 content_bytes = content.encode("utf-8")
                 content_size = len(content_bytes)
-                checksum = hashlib.sha256(content_bytes).hexdigest()
 
                 if file_id:
                     # Update existing file
@@ -452,31 +488,20 @@ Respects user's storage quota.""",
                     if file.file_type not in ("document", "code", "data"):
                         return ToolResult(success=False, error="Cannot write to binary files")
 
-                    # Check quota for size increase
+                    # Apply size change to usage (quota checked atomically)
                     size_delta = content_size - file.size_bytes
-                    if size_delta > 0:
-                        user_settings = user.settings or {}
-                        used = user_settings.get("storage_used_bytes", 0)
-                        quota = user_settings.get("storage_quota_bytes", settings.default_quota_bytes)
-                        if used + size_delta > quota:
-                            return ToolResult(success=False, error="Storage quota exceeded")
-
-                    # Write content
-                    file_path = Path(file.storage_path)
-                    file_path.write_text(content, encoding="utf-8")
+                    if size_delta != 0 and not await adjust_usage(
+                        db, user_uuid, size_delta, file.file_type, quota=quota_for(user)
+                    ):
+                        return ToolResult(success=False, error="Storage quota exceeded")
 
-                    # Update metadata
-                    file.size_bytes = content_size
-                    file.checksum = checksum
+                    # Write content (repoints the file at a new blob)
+                    released = await replace_content(db, file, content_bytes)
                     file.updated_at = datetime.utcnow()
 
-                    # Update user storage
-                    if size_delta != 0:
-                        user_settings = user.settings or {}
-                        user_settings["storage_used_bytes"] = user_settings.get("storage_used_bytes", 0) + size_delta
-                        user.settings = user_settings
-
                     await db.commit()
+                    schedule_gc(released)
+                    await refresh_file_index(db, file)
 
                     return ToolResult(
                         success=True,
@@ -503,27 +528,20 @@ Respects user's storage quota.""",
                         if not folder_result.scalar_one_or_none():
                             return ToolResult(success=False, error=f"Folder not found: {folder_id}")
 
-                    # Check quota
-                    user_settings = user.settings or {}
-                    used = user_settings.get("storage_used_bytes", 0)
-                    quota = user_settings.get("storage_quota_bytes", settings.default_quota_bytes)
-                    if used + content_size > quota:
-                        return ToolResult(success=False, error="Storage quota exceeded")
-
                     # Sanitize filename
                     safe_filename = filename.replace("/", "_").replace("\\", "_")[:255]
                     extension = safe_filename.rsplit(".", 1)[-1] if "." in safe_filename else "txt"
                     file_type = get_file_type(extension)
 
-                    # Create storage path
-                    new_file_id = uuid4()
-                    vault_path = Path(settings.vault_path) / "users" / str(user_uuid) / "files"
-                    file_dir = vault_path / str(new_file_id)
-                    file_dir.mkdir(parents=True, exist_ok=True)
-                    storage_path = file_dir / safe_filename
+                    # Reserve usage (quota checked atomically)
+                    if not await adjust_usage(
+                        db, user_uuid, content_size, file_type, delta_files=1, quota=quota_for(user)
+                    ):
+                        return ToolResult(success=False, error="Storage quota exceeded")
 
-                    # Write file
-                    storage_path.write_text(content, encoding="utf-8")
+                    # Write file (stored once per checksum)
+                    new_file_id = uuid4()
+                    storage_path, checksum, _ = await put_bytes(db, content_bytes)
 
                     # Create record
                     new_file = File(
@@ -541,11 +559,8 @@ Respects user's storage quota.""",
                     )
                     db.add(new_file)
 
-                    # Update user storage
-                    user_settings["storage_used_bytes"] = used + content_size
-                    user.settings = user_settings
-
                     await db.commit()
+                    await refresh_file_index(db, new_file)
 
                     return ToolResult(
                         success=True,
@@ -627,91 +642,49 @@ Searches text files only (code, documents, data).""",
             return ToolResult(success=False, error="Query must be at least 2 characters")
 
         try:
-            import re
-            from app.models.file import File
             from app.database import async_session
-            from pathlib import Path
+            from app.services.vault.content_index import search_content
 
             async with async_session() as db:
                 user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
 
-                # Build query
-                stmt = (
-                    select(File)
-                    .where(File.user_id == user_uuid)
-                    .where(File.file_type.in_(["document", "code", "data"]))
-                    .where(File.is_archived == False)  # noqa: E712
+                found = await search_content(
+                    db,
+                    user_uuid,
+                    query,
+                    file_type=file_type,
+                    folder_id=UUID(folder_id) if folder_id else None,
+                    max_files=max_results,
+                    max_matches_per_file=5,  # Max 5 matches per file
+                    context_lines=1,
                 )
 
-                if file_type:
-                    stmt = stmt.where(File.file_type == file_type)
-
-                if folder_id:
-                    stmt = stmt.where(File.folder_id == UUID(folder_id))
-
-                stmt = stmt.order_by(File.updated_at.desc())
-
-                result = await db.execute(stmt)
-                files = result.scalars().all()
-
-                # Compile pattern
-                try:
-                    pattern = re.compile(re.escape(query), re.IGNORECASE)
-                except re.error:
-                    return ToolResult(success=False, error="Invalid search pattern")
-
                 results = []
-                files_searched = 0
                 total_matches = 0
-
-                for file in files:
-                    file_path = Path(file.storage_path)
-                    if not file_path.exists():
-                        continue
-
-                    files_searched += 1
-
-                    try:
-                        content = file_path.read_text(encoding="utf-8", errors="replace")
-                        lines = content.splitlines()
-                    except Exception:
-                        continue
-
-                    matches = []
-                    for i, line in enumerate(lines):
-                        if pattern.search(line):
-                            # Get context (1 line before/after)
-                            context_before = lines[i-1] if i > 0 else ""
-                            context_after = lines[i+1] if i < len(lines) - 1 else ""
-
-                            matches.append({
-                                "line": i + 1,
-                                "content": line[:500],  # Truncate long lines
-                                "context_before": context_before[:200],
-                                "context_after": context_after[:200],
-                            })
-
-                            if len(matches) >= 5:  # Max 5 matches per file
-                                break
-
-                    if matches:
-                        total_matches += len(matches)
-                        results.append({
-                            "file_id": str(file.id),
-                            "filename": file.name,
-                            "file_type": file.file_type,
-                            "match_count": len(matches),
-                            "matches": matches,
-                        })
-
-                        if len(results) >= max_results:
-                            break
+                for item in found["results"]:
+                    matches = [
+                        {
+                            "line": m["line"],
+                            "content": m["content"][:500],  # Truncate long lines
+                            "context_before": "".join(m["context_before"])[:200],
+                            "context_after": "".join(m["context_after"])[:200],
+                        }
+                        for m in item["matches"]
+                    ]
+                    total_matches += len(matches)
+                    results.append({
+                        "file_id": str(item["file_id"]),
+                        "filename": item["name"],
+                        "file_type": item["file_type"],
+                        "match_count": len(matches),
+                        "matches": matches,
+                    })
 
                 return ToolResult(
                     success=True,
                     result={
                         "query": query,
-                        "files_searched": files_searched,
+                        "files_searched": found["files_searched"],
                         "files_matched": len(results),
                         "total_matches": total_matches,
                         "results": results,
@@ -742,7 +715,7 @@ Use to:
 - Replace a function or block of code
 - Update a section of a document
 
-Reads file first with vault_read to identify line numbers, then edits surgically.
+Reads file first with vault_read (start_line/end_line for big files) to identify line numbers, then edits surgically.
 Respects user's storage quota. Only works on text files.""",
             category=ToolCategory.FILES,
             input_schema={
@@ -793,12 +766,8 @@ Respects user's storage quota. Only works on text files.""",
             from app.models.file import File
             from app.models.user import User
             from app.database import async_session
-            from app.config import get_settings
             from pathlib import Path
             from datetime import datetime
-            import hashlib
-
-            settings = get_settings()
 
             async with async_session() as db:
                 user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
@@ -817,53 +786,37 @@ Respects user's storage quota. Only works on text files.""",
                 if not file_path.exists():
                     return ToolResult(success=False, error="File not found on disk")
 
-                lines = file_path.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
-                total_lines = len(lines)
+                index = await get_line_index(db, file)
+                total_lines = index.line_count
 
                 if start_line > total_lines:
                     return ToolResult(success=False, error=f"start_line {start_line} exceeds file length ({total_lines} lines)")
                 if end_line > total_lines:
                     end_line = total_lines
 
-                # Replace lines
-                new_lines = new_content.splitlines(keepends=True)
-                if new_lines and not new_lines[-1].endswith('\n'):
-                    new_lines[-1] += '\n'
-
-                edited_lines = lines[:start_line - 1] + new_lines + lines[end_line:]
-                new_full_content = ''.join(edited_lines)
+                # Splice: copy bytes before/after the replaced lines around the new ones
+                replacement, new_line_count = as_line_bytes(new_content)
+                cut_start, cut_end = index.span(start_line, end_line)
+                staged, new_bytes, checksum = await splice_lines(file_path, index, cut_start, cut_end, replacement)
+                edited_line_count = total_lines - (end_line - start_line + 1) + new_line_count
 
                 # Quota check
-                new_bytes = len(new_full_content.encode("utf-8"))
-                old_bytes = file.size_bytes
-                size_delta = new_bytes - old_bytes
-
-                if size_delta > 0:
-                    user_result = await db.execute(select(User).where(User.id == user_uuid))
-                    user = user_result.scalar_one_or_none()
-                    if user:
-                        user_settings = user.settings or {}
-                        used = user_settings.get("storage_used_bytes", 0)
-                        quota = user_settings.get("storage_quota_bytes", settings.default_quota_bytes)
-                        if used + size_delta > quota:
-                            return ToolResult(success=False, error="Storage quota exceeded")
-
-                file_path.write_text(new_full_content, encoding="utf-8")
-
-                checksum = hashlib.sha256(new_full_content.encode("utf-8")).hexdigest()
-                file.size_bytes = new_bytes
-                file.checksum = checksum
-                file.updated_at = datetime.utcnow()
+                size_delta = new_bytes - file.size_bytes
 
                 if size_delta != 0:
                     user_result = await db.execute(select(User).where(User.id == user_uuid))
                     user = user_result.scalar_one_or_none()
-                    if user:
-                        user_settings = user.settings or {}
-                        user_settings["storage_used_bytes"] = user_settings.get("storage_used_bytes", 0) + size_delta
-                        user.settings = user_settings
+                    quota = quota_for(user) if user else None
+                    if not await adjust_usage(db, user_uuid, size_delta, file.file_type, quota=quota):
+                        await discard_staged(staged)
+                        return ToolResult(success=False, error="Storage quota exceeded")
+
+                released = await replace_staged(db, file, staged, checksum, new_bytes)
+                file.updated_at = datetime.utcnow()
 
                 await db.commit()
+                schedule_gc(released)
+                await refresh_file_index(db, file)
 
                 return ToolResult(
                     success=True,
@@ -873,7 +826,7 @@ Respects user's storage quota. Only works on text files.""",
                         "filename": file.name,
                         "lines_replaced": f"{start_line}-{end_line}",
                         "original_line_count": total_lines,
-                        "new_line_count": len(edited_lines),
+                        "new_line_count": edited_line_count,
                         "size": new_bytes,
                         "size_human": _format_size(new_bytes),
                     },
@@ -946,12 +899,8 @@ Respects user's storage quota. Only works on text files.""",
             from app.models.file import File
             from app.models.user import User
             from app.database import async_session
-            from app.config import get_settings
             from pathlib import Path
             from datetime import datetime
-            import hashlib
-
-            settings = get_settings()
 
             async with async_session() as db:
                 user_uuid = UUID(context.user_id) if isinstance(context.user_id, str) else context.user_id
@@ -970,51 +919,36 @@ Respects user's storage quota. Only works on text files.""",
                 if not file_path.exists():
                     return ToolResult(success=False, error="File not found on disk")
 
-                lines = file_path.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
-                total_lines = len(lines)
+                index = await get_line_index(db, file)
+                total_lines = index.line_count
 
                 if after_line > total_lines:
                     return ToolResult(success=False, error=f"after_line {after_line} exceeds file length ({total_lines} lines)")
 
-                # Insert content
-                new_lines = content.splitlines(keepends=True)
-                if new_lines and not new_lines[-1].endswith('\n'):
-                    new_lines[-1] += '\n'
-
-                result_lines = lines[:after_line] + new_lines + lines[after_line:]
-                new_full_content = ''.join(result_lines)
+                # Insert content at the line boundary (an unterminated last line gets its newline first)
+                at = index.boundary(after_line)
+                insertion, inserted_count = as_line_bytes(
+                    content, prefix_newline=(at == index.size and index.size > 0 and not index.terminated),
+                )
+                staged, new_bytes, checksum = await splice_lines(file_path, index, at, at, insertion)
 
                 # Quota check
-                new_bytes = len(new_full_content.encode("utf-8"))
-                old_bytes = file.size_bytes
-                size_delta = new_bytes - old_bytes
-
-                if size_delta > 0:
-                    user_result = await db.execute(select(User).where(User.id == user_uuid))
-                    user = user_result.scalar_one_or_none()
-                    if user:
-                        user_settings = user.settings or {}
-                        used = user_settings.get("storage_used_bytes", 0)
-                        quota = user_settings.get("storage_quota_bytes", settings.default_quota_bytes)
-                        if used + size_delta > quota:
-                            return ToolResult(success=False, error="Storage quota exceeded")
-
-                file_path.write_text(new_full_content, encoding="utf-8")
-
-                checksum = hashlib.sha256(new_full_content.encode("utf-8")).hexdigest()
-                file.size_bytes = new_bytes
-                file.checksum = checksum
-                file.updated_at = datetime.utcnow()
+                size_delta = new_bytes - file.size_bytes
 
                 if size_delta != 0:
                     user_result = await db.execute(select(User).where(User.id == user_uuid))
                     user = user_result.scalar_one_or_none()
-                    if user:
-                        user_settings = user.settings or {}
-                        user_settings["storage_used_bytes"] = user_settings.get("storage_used_bytes", 0) + size_delta
-                        user.settings = user_settings
+                    quota = quota_for(user) if user else None
+                    if not await adjust_usage(db, user_uuid, size_delta, file.file_type, quota=quota):
+                        await discard_staged(staged)
+                        return ToolResult(success=False, error="Storage quota exceeded")
+
+                released = await replace_staged(db, file, staged, checksum, new_bytes)
+                file.updated_at = datetime.utcnow()
 
                 await db.commit()
+                schedule_gc(released)
+                await refresh_file_index(db, file)
 
                 return ToolResult(
                     success=True,
@@ -1023,8 +957,8 @@ Respects user's storage quota. Only works on text files.""",
                         "file_id": str(file.id),
                         "filename": file.name,
                         "inserted_after_line": after_line,
-                        "lines_inserted": len(new_lines),
-                        "new_line_count": len(result_lines),
+                        "lines_inserted": inserted_count,
+                        "new_line_count": total_lines + inserted_count,
                         "size": new_bytes,
                         "size_human": _format_size(new_bytes),
                     },
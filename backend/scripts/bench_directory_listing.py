@@ -0,0 +1,110 @@
+"""
+Benchmark: vault directory listing on wide and deep folder trees.
+
+Inside one transaction (rolled back at the end) a throwaway user gets
+
+- a wide folder: `--width` subfolders, each holding `--files-per-folder` files,
+  plus that many files of its own
+- a deep chain: `--depth` nested folders, listed at the bottom
+
+and `list_directory_contents` is timed for the root, the wide folder and the
+deepest folder. Every listing must be a single SQL statement; the script
+counts statements on the engine and fails if one takes more.
+
+    cd backend && python -m scripts.bench_directory_listing --width 500 --depth 60
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event
+
+from app.api.v1.files import list_directory_contents
+from app.database import get_db_context, get_engine
+from app.models.file import File, Folder
+from app.models.user import User
+from app.services.vault.usage import ensure_usage
+
+
+def _file(user_id, folder_id, i: int) -> File:
+    return File(
+        user_id=user_id, folder_id=folder_id, name=f"note-{i:05d}.md", original_filename=f"note-{i:05d}.md",
+        mime_type="text/markdown", file_type="document", size_bytes=1024,
+        storage_path=f"/nonexistent/bench/{uuid.uuid4().hex}",
+    )
+
+
+async def run(args) -> None:
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    report = []
+    async with get_db_context() as db:
+        try:
+            user = User(email=f"bench-{uuid.uuid4().hex[:12]}@example.invalid", password_hash="!")
+            db.add(user)
+            await db.flush()
+            await ensure_usage(db, user.id)
+
+            wide = Folder(user_id=user.id, name="wide")
+            db.add(wide)
+            await db.flush()
+            children = [Folder(user_id=user.id, parent_id=wide.id, name=f"child-{i:05d}") for i in range(args.width)]
+            db.add_all(children)
+            await db.flush()
+            db.add_all(
+                [_file(user.id, child.id, j) for child in children for j in range(args.files_per_folder)]
+                + [_file(user.id, wide.id, j) for j in range(args.files_per_folder)]
+            )
+            await db.flush()
+
+            deepest = None
+            for i in range(args.depth):
+                deepest = Folder(user_id=user.id, parent_id=deepest.id if deepest else None, name=f"level-{i:03d}")
+                db.add(deepest)
+                await db.flush()
+
+            cases = [("root", None), (f"wide ({args.width} folders)", wide.id), (f"deep ({args.depth} levels)", deepest.id)]
+            sync_engine = get_engine().sync_engine
+            event.listen(sync_engine, "before_cursor_execute", count)
+            try:
+                for label, folder_id in cases:
+                    timings = []
+                    for _ in range(args.repeat):
+                        statements = 0
+                        started = time.perf_counter()
+                        listing = await list_directory_contents(folder_id, user, db)
+                        timings.append((time.perf_counter() - started) * 1000)
+                        assert statements == 1, f"{label}: listing took {statements} statements, expected 1"
+                    timings.sort()
+                    report.append((
+                        label, len(listing.folders), len(listing.files), len(listing.path),
+                        statistics.median(timings), timings[int(0.95 * (len(timings) - 1))],
+                    ))
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", count)
+        finally:
+            await db.rollback()
+
+    print(f"{'listing':<22}{'folders':>9}{'files':>8}{'path':>6}{'p50 ms':>10}{'p95 ms':>10}  (1 statement each)")
+    for label, folders, files, path, p50, p95 in report:
+        print(f"{label:<22}{folders:>9}{files:>8}{path:>6}{p50:>10.1f}{p95:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=40)
+    parser.add_argument("--files-per-folder", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=30)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark: per-user recall latency as the shared cerebro tables grow.
+
+Inside one transaction (rolled back at the end), a target user gets a fixed
+set of memories. Filler memories for other users are then added in steps
+up to each `--sizes` total. After each step the script runs ANALYZE, times
+`hybrid_search` for the target user and prints p50/p95 latency with the
+partitions the planner touches. It also compares `vector_search` against an
+exact scan of the target user's rows and prints recall@k, so a filtered
+index scan that returns too few of the user's rows shows up as a drop.
+
+    cd backend && python -m scripts.bench_partitioned_recall --sizes 20000,100000,400000
+
+Run it once on the plain tables and again after partitioning
+(`cerebro_partitions` > 0, migration finished; see
+GET /api/v1/admin/cerebro/partitioning). With HASH (user_id) partitions the
+target user's latency stays flat as the table grows, since the scans and
+the HNSW index cover only its partition. On the plain table it grows with
+the global row count.
+
+Filler rows carry random vectors and are indexed as they are inserted, so
+large sizes take a while. Needs a database migrated to v137.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import get_db_context
+from app.models.user import User
+from app.services.cerebro.partitioning import partition_count
+from app.services.cerebro.pg_graph_store import PgGraphStore
+
+WORDS = [
+    "deployment", "invoice", "melody", "compost", "itinerary", "vacuum", "recipe", "intervals",
+    "rollout", "refund", "chorus", "seedlings", "passport", "replica", "garlic", "cadence",
+]
+
+INSERT_NODES = """
+    INSERT INTO cerebro_memory_nodes (id, user_id, content, content_hash, memory_type, layer, embedding)
+    SELECT :prefix || g,
+           (CAST(:users AS uuid[]))[1 + g % :n_users],
+           'bench memory ' || g || ' about ' || (CAST(:words AS text[]))[1 + g % :n_words],
+           md5(:prefix || g),
+           'semantic', 'working',
+           CAST(ARRAY(SELECT random() - 0.5 FROM generate_series(1, :dim) WHERE g > 0) AS vector)
+    FROM generate_series(1, :n) AS g
+"""
+
+
+def _vector(rng: random.Random, dim: int) -> list[float]:
+    return [rng.random() - 0.5 for _ in range(dim)]
+
+
+EXACT_NEAREST = """
+    SELECT id FROM cerebro_memory_nodes
+    WHERE user_id = :user_id AND NOT archived AND embedding IS NOT NULL
+    ORDER BY (embedding <=> CAST(:embedding AS vector)) + 0  -- not indexable: exact scan
+    LIMIT :k
+"""
+
+
+def _relations(plan: dict) -> set[str]:
+    found = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= _relations(child)
+    return found
+
+
+async def _insert(db, prefix: str, users: list[str], n: int, dim: int) -> None:
+    await db.execute(text(INSERT_NODES), {
+        "prefix": prefix, "users": users, "n_users": len(users),
+        "words": WORDS, "n_words": len(WORDS), "dim": dim, "n": n,
+    })
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    dim = get_settings().embedding_dimensions
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    queries = [(" ".join(rng.sample(WORDS, 2)), _vector(rng, dim)) for _ in range(args.queries)]
+    run_id = uuid.uuid4().hex[:8]
+
+    rows = []
+    async with get_db_context() as db:
+        try:
+            partitions = await partition_count(db, "cerebro_memory_nodes")
+            users = []
+            for i in range(args.users + 1):
+                user = User(email=f"bench-{run_id}-{i}@example.invalid", password_hash="!")
+                db.add(user)
+                users.append(user)
+            await db.flush()
+            target, others = users[0], [str(u.id) for u in users[1:]]
+
+            await _insert(db, f"bench_{run_id}_t_", [str(target.id)], args.memories, dim)
+            total = (await db.execute(text("SELECT COUNT(*) FROM cerebro_memory_nodes"))).scalar()
+
+            store = PgGraphStore(db)
+            for size in sizes:
+                if size > total:
+                    await _insert(db, f"bench_{run_id}_{size}_", others, size - total, dim)
+                    total = size
+                await db.execute(text("ANALYZE cerebro_memory_nodes"))
+
+                plan = (await db.execute(text("""
+                    EXPLAIN (FORMAT JSON)
+                    SELECT id FROM cerebro_memory_nodes
+                    WHERE user_id = :user_id AND NOT archived
+                    ORDER BY embedding <=> CAST(:embedding AS vector)
+                    LIMIT 10
+                """), {"user_id": str(target.id), "embedding": str(queries[0][1])})).scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                scanned = sorted(_relations(plan[0]["Plan"]))
+
+                timings, recalls = [], []
+                for query, embedding in queries:
+                    started = time.perf_counter()
+                    await store.hybrid_search(target.id, query, embedding, top_k=args.k)
+                    timings.append((time.perf_counter() - started) * 1000)
+
+                    exact = set((await db.execute(text(EXACT_NEAREST), {
+                        "user_id": str(target.id), "embedding": str(embedding), "k": args.k,
+                    })).scalars())
+                    found = {node.id for node, _ in await store.vector_search(target.id, embedding, top_k=args.k)}
+                    recalls.append(len(exact & found) / len(exact) if exact else 1.0)
+                timings.sort()
+                rows.append((
+                    total, statistics.median(timings), timings[int(0.95 * (len(timings) - 1))],
+                    statistics.mean(recalls), scanned,
+                ))
+        finally:
+            await db.rollback()
+
+    layout = f"hash-partitioned ({partitions})" if partitions else "plain"
+    print(f"cerebro_memory_nodes: {layout}; target user {args.memories} memories, "
+          f"{args.users} other users, {args.queries} queries, k={args.k}")
+    print(f"{'total rows':>12}{'p50 ms':>10}{'p95 ms':>10}{'recall@k':>10}  relations scanned")
+    for total, p50, p95, recall, scanned in rows:
+        print(f"{total:>12}{p50:>10.1f}{p95:>10.1f}{recall:>10.3f}  {', '.join(scanned)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20000,100000,400000", help="total table sizes to measure at")
+    parser.add_argument("--memories", type=int, default=2000, help="memories of the measured user")
+    parser.add_argument("--users", type=int, default=200, help="other users owning the filler rows")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
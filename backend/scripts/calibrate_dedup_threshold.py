@@ -0,0 +1,122 @@
+"""
+Calibration: the ingest near-duplicate rule on labeled memory pairs.
+
+Embeds three kinds of pairs with the configured EmbeddingService:
+
+- restatement: the same fact reworded; ingest should merge these
+- update: the same fact with one detail changed or negated; merging would
+  throw the newer content away
+- related: different facts on the same topic
+
+and prints, per kind, the cosine similarity spread and how many pairs each
+threshold would merge on cosine alone and with the `novel_terms` check
+`CerebroService.remember` applies. Exits non-zero if the configured rule
+(DEDUP_COSINE_THRESHOLD plus the check) merges any update pair. The check
+is word-level: an update that only swaps roles ("tea over coffee" ->
+"coffee over tea") passes it, and is kept in the set to show that limit.
+
+    cd backend && python -m scripts.calibrate_dedup_threshold
+
+No database needed; costs one embedding call per sentence with a remote
+provider.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+
+import numpy as np
+
+from app.cerebro.config import DEDUP_COSINE_THRESHOLD
+from app.cerebro.simhash import novel_terms
+from app.services.embedding import get_embedding_service
+
+PAIRS = {
+    "restatement": [
+        ("My favorite color is blue.", "Blue is my favorite color."),
+        ("The deploy failed on Tuesday because of the migration.", "Tuesday's deploy failed because of the migration."),
+        ("I am allergic to peanuts.", "I'm allergic to peanuts."),
+        ("We moved the standup to 10am.", "The standup was moved to 10am."),
+        ("Sarah is the lead on the billing project.", "The lead on the billing project is Sarah."),
+        ("The staging database runs Postgres 16.", "Postgres 16 is what the staging database runs."),
+        ("I prefer tea over coffee in the morning.", "In the morning I prefer tea over coffee."),
+        ("Our API rate limit is 100 requests per minute.", "The rate limit of our API is 100 requests per minute."),
+        ("The garden tomatoes need watering every two days.", "Every two days the garden tomatoes need watering."),
+        ("My flight to Lisbon leaves on March 3rd.", "On March 3rd my flight to Lisbon leaves."),
+    ],
+    "update": [
+        ("My favorite color is blue.", "My favorite color is green."),
+        ("The deploy failed on Tuesday.", "The deploy succeeded on Tuesday."),
+        ("I am allergic to peanuts.", "I am not allergic to peanuts."),
+        ("We moved the standup to 10am.", "We moved the standup to 11am."),
+        ("Sarah is the lead on the billing project.", "Marcus is the lead on the billing project."),
+        ("The staging database runs Postgres 15.", "The staging database runs Postgres 16."),
+        ("I prefer tea over coffee in the morning.", "I prefer coffee over tea in the morning now."),
+        ("Our API rate limit is 100 requests per minute.", "Our API rate limit is 500 requests per minute."),
+        ("I live in Berlin.", "I live in Munich."),
+        ("My flight to Lisbon leaves on March 3rd.", "My flight to Lisbon leaves on March 5th."),
+    ],
+    "related": [
+        ("My favorite color is blue.", "My favorite food is ramen."),
+        ("The deploy failed on Tuesday.", "The deploy pipeline takes twenty minutes."),
+        ("I am allergic to peanuts.", "My brother is allergic to shellfish."),
+        ("We moved the standup to 10am.", "The retro happens every other Friday."),
+        ("Sarah is the lead on the billing project.", "The billing project ships in April."),
+        ("The staging database runs Postgres 16.", "The staging database is backed up nightly."),
+        ("I prefer tea over coffee in the morning.", "I drink a glass of water before breakfast."),
+        ("Our API rate limit is 100 requests per minute.", "Our API uses bearer tokens for auth."),
+        ("I live in Berlin.", "I grew up near Hamburg."),
+        ("My flight to Lisbon leaves on March 3rd.", "The hotel in Lisbon is near the river."),
+    ],
+}
+
+
+def _cosine(a, b) -> float:
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+async def run(args) -> int:
+    service = get_embedding_service()
+    sentences = sorted({s for pairs in PAIRS.values() for pair in pairs for s in pair})
+    vectors = dict(zip(sentences, await service.embed_batch(sentences)))
+
+    scored = {
+        kind: [(_cosine(vectors[new], vectors[old]), not novel_terms(new, old), old, new) for old, new in pairs]
+        for kind, pairs in PAIRS.items()
+    }
+
+    print(f"provider={service.provider} dimensions={service.dimensions}")
+    print(f"{'pairs':<13}{'min':>7}{'p50':>7}{'max':>7}")
+    for kind, rows in scored.items():
+        cosines = [c for c, *_ in rows]
+        print(f"{kind:<13}{min(cosines):>7.3f}{statistics.median(cosines):>7.3f}{max(cosines):>7.3f}")
+
+    thresholds = sorted({round(t, 2) for t in np.arange(args.low, args.high + 1e-9, 0.01)} | {DEDUP_COSINE_THRESHOLD})
+    print("\nmerged per threshold: cosine only / cosine + novel_terms check")
+    print(f"{'threshold':<11}" + "".join(f"{kind:>16}" for kind in scored))
+    for t in thresholds:
+        cells = []
+        for rows in scored.values():
+            by_cosine = sum(c >= t for c, *_ in rows)
+            guarded = sum(c >= t and restates for c, restates, *_ in rows)
+            cells.append(f"{by_cosine:>2}/{len(rows)} {guarded:>2}/{len(rows)}")
+        marker = "  <- configured" if t == DEDUP_COSINE_THRESHOLD else ""
+        print(f"{t:<11.2f}" + "".join(f"{c:>16}" for c in cells) + marker)
+
+    lost = [(c, old, new) for c, restates, old, new in scored["update"] if c >= DEDUP_COSINE_THRESHOLD and restates]
+    for c, old, new in lost:
+        print(f"LOST UPDATE at {c:.3f}: {old!r} -> {new!r}")
+    return 1 if lost else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--low", type=float, default=0.80)
+    parser.add_argument("--high", type=float, default=0.98)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Offline evaluation: hybrid (full-text + vector, RRF) recall vs vector-only.
+
+Builds a synthetic memory corpus for a throwaway user inside one
+transaction, runs both search paths for a query set with known relevant
+memories, prints recall@k and latency, and rolls everything back.
+
+    cd backend && python -m scripts.eval_hybrid_recall --memories 5000 --k 10
+
+Queries come in two kinds:
+
+- topical: paraphrase a memory's topic words; the relevant memories are the
+  ones sharing the topic
+- identifier: ask about an error code / symbol / ticket that appears in
+  exactly one memory
+
+By default embeddings are a deterministic hashed bag of the dictionary
+words (identifiers and numbers carry no signal), a stand-in for how
+sentence embedding models blur rare tokens. `--real-embeddings` uses the
+configured EmbeddingService instead (slow, costs API calls).
+
+Needs a database migrated to v134.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import re
+import statistics
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import get_db_context
+from app.models.user import User
+from app.services.cerebro.pg_graph_store import PgGraphStore
+
+TOPICS = {
+    "deploy": ["deployment", "rollout", "release", "pipeline", "staging", "production"],
+    "billing": ["invoice", "subscription", "payment", "refund", "credits", "pricing"],
+    "music": ["melody", "chorus", "tempo", "lyrics", "arrangement", "mixdown"],
+    "garden": ["tomatoes", "compost", "watering", "seedlings", "soil", "harvest"],
+    "travel": ["flight", "itinerary", "hotel", "passport", "luggage", "layover"],
+    "database": ["index", "query", "migration", "vacuum", "replica", "schema"],
+    "cooking": ["recipe", "simmer", "garlic", "oven", "seasoning", "dough"],
+    "fitness": ["running", "stretching", "intervals", "recovery", "squats", "cadence"],
+}
+FILLER = ["we", "noted", "that", "the", "was", "again", "after", "discussing", "with", "team", "today", "about"]
+WORD = re.compile(r"[a-z]+")
+
+
+def _identifier(rng: random.Random) -> str:
+    kind = rng.randrange(3)
+    if kind == 0:
+        return f"ERR_{rng.randrange(1000, 99999)}"
+    if kind == 1:
+        return f"{rng.choice(['parse', 'load', 'sync', 'flush', 'render'])}_{rng.choice(['config', 'cache', 'queue', 'state'])}_v{rng.randrange(2, 40)}"
+    return f"TICKET-{rng.randrange(100, 9999)}"
+
+
+def build_corpus(n: int, rng: random.Random) -> tuple[list[dict], list[dict]]:
+    """Synthetic memories plus queries with their relevant memory ids."""
+    memories, queries = [], []
+    topics = list(TOPICS)
+    for i in range(n):
+        topic = rng.choice(topics)
+        words = rng.sample(TOPICS[topic], 3) + rng.sample(FILLER, 4)
+        ident = _identifier(rng)
+        words.insert(rng.randrange(len(words)), ident)
+        memories.append({"id": f"eval_{i:06d}", "topic": topic, "ident": ident, "content": " ".join(words)})
+
+    by_topic: dict[str, list[str]] = {}
+    for m in memories:
+        by_topic.setdefault(m["topic"], []).append(m["id"])
+    for m in rng.sample(memories, min(100, n)):
+        queries.append({"kind": "identifier", "query": f"what happened with {m['ident']}", "relevant": {m["id"]}})
+    for topic, words in TOPICS.items():
+        for _ in range(5):
+            queries.append({"kind": "topical", "query": " ".join(rng.sample(words, 2)), "relevant": set(by_topic.get(topic, []))})
+    return memories, queries
+
+
+def hashed_embedding(content: str, dim: int) -> list[float]:
+    vec = np.zeros(dim, dtype=np.float64)
+    for word in WORD.findall(content.lower()):
+        if word in FILLER:
+            continue
+        h = int(hashlib.md5(word.encode()).hexdigest(), 16)
+        vec[h % dim] += 1.0 if (h >> 64) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    return (vec / norm if norm else vec).tolist()
+
+
+async def embed_all(contents: list[str], dim: int, real: bool) -> list[list[float]]:
+    if not real:
+        return [hashed_embedding(c, dim) for c in contents]
+    from app.services.embedding import get_embedding_service
+
+    service = get_embedding_service()
+    vectors = []
+    for i in range(0, len(contents), 100):
+        vectors.extend(await service.embed_batch(contents[i:i + 100]))
+    return vectors
+
+
+def recall_at_k(found: list[str], relevant: set[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(found[:k]) & relevant) / min(len(relevant), k)
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    dim = get_settings().embedding_dimensions
+    memories, queries = build_corpus(args.memories, rng)
+    vectors = await embed_all([m["content"] for m in memories], dim, args.real_embeddings)
+    query_vectors = await embed_all([q["query"] for q in queries], dim, args.real_embeddings)
+
+    async with get_db_context() as db:
+        try:
+            user = User(email=f"eval-{uuid.uuid4().hex[:12]}@example.invalid", password_hash="!")
+            db.add(user)
+            await db.flush()
+            await db.execute(text("""
+                INSERT INTO cerebro_memory_nodes (id, user_id, content, content_hash, memory_type, layer, embedding)
+                SELECT t.id, :user_id, t.content, md5(t.content), 'semantic', 'working', CAST(t.embedding AS vector)
+                FROM unnest(CAST(:ids AS text[]), CAST(:contents AS text[]), CAST(:embeddings AS text[]))
+                    AS t(id, content, embedding)
+            """), {
+                "user_id": str(user.id),
+                "ids": [m["id"] for m in memories],
+                "contents": [m["content"] for m in memories],
+                "embeddings": [f"[{','.join(str(x) for x in v)}]" for v in vectors],
+            })
+            await db.execute(text("ANALYZE cerebro_memory_nodes"))
+
+            store = PgGraphStore(db)
+            report: dict[str, dict[str, list[float]]] = {}
+            for q, qvec in zip(queries, query_vectors):
+                started = time.perf_counter()
+                # The pre-hybrid path: over-fetch 2x, keep the best k
+                vector_hits = await store.vector_search(user.id, qvec, top_k=args.k * 2)
+                vector_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                hybrid_hits = await store.hybrid_search(user.id, q["query"], qvec, top_k=args.k)
+                hybrid_ms = (time.perf_counter() - started) * 1000
+
+                stats = report.setdefault(q["kind"], {"vector": [], "hybrid": [], "vector_ms": [], "hybrid_ms": []})
+                stats["vector"].append(recall_at_k([n.id for n, _ in vector_hits], q["relevant"], args.k))
+                stats["hybrid"].append(recall_at_k([n.id for n, _, _, _ in hybrid_hits], q["relevant"], args.k))
+                stats["vector_ms"].append(vector_ms)
+                stats["hybrid_ms"].append(hybrid_ms)
+        finally:
+            await db.rollback()
+
+    print(f"{args.memories} memories, {len(queries)} queries, k={args.k}, "
+          f"{'real' if args.real_embeddings else 'hashed'} embeddings")
+    print(f"{'queries':<12}{'n':>5}{'vector R@k':>13}{'hybrid R@k':>13}{'vector p50/p95 ms':>22}{'hybrid p50/p95 ms':>22}")
+    for kind, stats in report.items():
+        def latency(values: list[float]) -> str:
+            ordered = sorted(values)
+            return f"{statistics.median(ordered):.1f}/{ordered[int(0.95 * (len(ordered) - 1))]:.1f}"
+        print(
+            f"{kind:<12}{len(stats['vector']):>5}"
+            f"{statistics.mean(stats['vector']):>13.3f}{statistics.mean(stats['hybrid']):>13.3f}"
+            f"{latency(stats['vector_ms']):>22}{latency(stats['hybrid_ms']):>22}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memories", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--real-embeddings", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()